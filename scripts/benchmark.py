@@ -0,0 +1,305 @@
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import bib_merge
+import bib_reader
+import check_toc
+import file_utils
+import generate_item_tables
+import project_index
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Tracked, so that `make clean` keeps it and every checkout compares against the same numbers
+BASELINE_FILE = os.path.join(PROJECT_ROOT, 'benchmarks', 'baseline.json')
+
+BIB_SIZES = (1000, 10000, 50000)
+SECTION_COUNT = 300
+CITATIONS_PER_SECTION = 200
+ITEM_COUNT = 5000
+TOC_ENTRIES = 2000
+
+# Share of generated bib entries that duplicate an earlier one (same DOI or retyped key)
+DUPLICATE_RATE = 0.05
+DEFAULT_MARGIN = 0.25
+DEFAULT_REPEAT = 3
+
+WORDS = ('Akzeptanz', 'Vertrauen', 'Modell', 'künstliche', 'Intelligenz', 'Nutzung', 'Studie', 'Technologie',
+         'Unsicherheit', 'Antwort', 'Wahrnehmung', 'Einfluss', 'Systeme', 'Entscheidung', 'Analyse')
+SYLLABLES = ('ba', 'ch', 'da', 'ke', 'li', 'mü', 'ner', 'os', 'ri', 'sch', 'ta', 'ven', 'wi', 'zo', 'ger', 'man')
+CONSTRUCTS = ('PUF', 'PEOU', 'TRU', 'BI', 'ATT', 'SE', 'PR', 'UNC')
+
+
+def _word(rng, syllables=3):
+    return ''.join(rng.choice(SYLLABLES) for _ in range(syllables))
+
+
+def _surname(rng):
+    return _word(rng, rng.randint(2, 4)).capitalize()
+
+
+def _sentence(rng, words=12):
+    return ' '.join(rng.choice(WORDS) if rng.random() < 0.5 else _word(rng) for _ in range(words))
+
+
+def generate_bibliography(path, size, seed=0):
+    """Writes a Zotero-style .bib file with `size` entries, DUPLICATE_RATE of them duplicates."""
+    rng = random.Random(seed)
+    entries = []
+    for i in range(size):
+        if entries and rng.random() < DUPLICATE_RATE:
+            original = rng.choice(entries)
+            fields = dict(original.fields, note=f"duplicate {i}")
+            entries.append(bib_reader.BibEntry(original.entry_type, f"dup_{i}", fields))
+            continue
+        author = _surname(rng)
+        year = str(rng.randint(1980, 2025))
+        fields = {
+            'title': f"{_sentence(rng, 8)} {i}",
+            'author': f"{author}, {rng.choice('ABCDEFGH')}. and {_surname(rng)}, {rng.choice('ABCDEFGH')}.",
+            'year': year,
+            'journal': f"Journal of {rng.choice(WORDS)}",
+            'doi': f"10.{1000 + i % 9000}/bench.{i}",
+            'url': f"https://example.org/papers/{i}",
+            'abstract': _sentence(rng, 60),
+        }
+        entries.append(bib_reader.BibEntry('article', f"{author.lower()}_{year}_{i}", fields))
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n\n'.join(bib_merge.format_entry(entry) for entry in entries))
+        f.write('\n')
+    return [entry.key for entry in entries]
+
+
+def generate_sections(root, keys, count=SECTION_COUNT, citations=CITATIONS_PER_SECTION, seed=0):
+    """Writes `count` section files with dense \\parencite usage below root/content/prestudy."""
+    rng = random.Random(seed)
+    sections_dir = os.path.join(root, 'content', 'prestudy', 'sections')
+    os.makedirs(sections_dir, exist_ok=True)
+    main_lines = ['\\documentclass{article}', '\\begin{document}', '\\tableofcontents', '\\listoffigures',
+                  '\\listoftables']
+    for i in range(count):
+        lines = [f'\\section{{Abschnitt {i}}}\\label{{sec:s{i}}}']
+        for j in range(citations):
+            cited = ','.join(rng.sample(keys, rng.randint(1, 3)))
+            lines.append(f"{_sentence(rng)} \\parencite[S.~{j}]{{{cited}}}. % Kommentar {j}")
+            if j % 20 == 0:
+                lines.append(f'Siehe Abschnitt~\\ref{{sec:s{rng.randrange(count)}}}.')
+        with open(os.path.join(sections_dir, f'section_{i:04d}.tex'), 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        main_lines.append(f'\\subfile{{sections/section_{i:04d}}}')
+    main_lines += ['\\printbibliography', '\\end{document}']
+    with open(os.path.join(root, 'content', 'prestudy', 'main.tex'), 'w', encoding='utf-8') as f:
+        f.write('\n'.join(main_lines) + '\n')
+
+
+def generate_items(path, count=ITEM_COUNT, seed=0):
+    """Writes an items.csv with the columns of content/resources/data/items.csv."""
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Construct', 'Item_Original', 'Item_Adapted', 'Scaling', 'Source'])
+        for i in range(count):
+            writer.writerow([rng.choice(CONSTRUCTS), f"{_sentence(rng)} & 50% {i}", f"{_sentence(rng)} #{i}",
+                             '1-5 Likert-Skala', f"{_surname(rng)} et al. ({rng.randint(1990, 2025)})"])
+
+
+def generate_artifacts(build_dir, entries=TOC_ENTRIES, seed=0):
+    """Writes main.aux/.toc/.lof/.lot/.bbl files of a large document; its sections match generate_sections."""
+    rng = random.Random(seed)
+    os.makedirs(build_dir, exist_ok=True)
+    lists = {'toc': 'section', 'lof': 'figure', 'lot': 'table'}
+    for extension, kind in lists.items():
+        with open(os.path.join(build_dir, f'main.{extension}'), 'w', encoding='utf-8') as f:
+            for i in range(entries):
+                title = f"Abschnitt {i}" if kind == 'section' else _sentence(rng, 6)
+                f.write(f"\\contentsline {{{kind}}}{{\\numberline {{{i}}}{title}}}{{{i}}}"
+                        f"{{{kind}.{i}}}%\n")
+    with open(os.path.join(build_dir, 'main.aux'), 'w', encoding='utf-8') as f:
+        for i in range(entries):
+            f.write(f"\\newlabel{{sec:s{i}}}{{{{{i}}}{{{i}}}{{Abschnitt {i}}}{{section.{i}}}{{}}}}\n")
+    with open(os.path.join(build_dir, 'main.bbl'), 'w', encoding='utf-8') as f:
+        f.write("\\refsection{0}\n")
+        for i in range(entries):
+            f.write(f"  \\entry{{key{i}}}{{article}}{{}}\n    \\field{{title}}{{{_sentence(rng)}}}\n  \\endentry\n")
+        f.write("\\endrefsection\n")
+
+
+class Corpus:
+    """A synthetic project tree in a temporary directory."""
+
+    def __init__(self, sizes=BIB_SIZES, sections=SECTION_COUNT, items=ITEM_COUNT):
+        self.tmp = tempfile.TemporaryDirectory(prefix='thesis-bench-')
+        self.root = self.tmp.name
+        self.bib_files = {}
+        keys = []
+        for size in sizes:
+            path = os.path.join(self.root, f'bibliography_{size}.bib')
+            keys = generate_bibliography(path, size)
+            self.bib_files[size] = path
+        generate_sections(self.root, keys[:1000] or ['key'], count=sections)
+        self.items_csv = os.path.join(self.root, 'items.csv')
+        generate_items(self.items_csv, items)
+        self.build_dir = os.path.join(self.root, 'content', 'prestudy', 'build', 'main')
+        generate_artifacts(self.build_dir)
+
+    def path(self, *parts):
+        return os.path.join(self.root, *parts)
+
+    def cleanup(self):
+        self.tmp.cleanup()
+
+
+def benchmarks(corpus):
+    """Returns {name: (setup, run)}; setup runs untimed before every repetition."""
+    cases = {}
+
+    def noop():
+        pass
+
+    index_cache = corpus.path('.cache', 'project_index.json')
+
+    def drop_index_cache():
+        if os.path.exists(index_cache):
+            os.remove(index_cache)
+
+    cases['citations/cold'] = (drop_index_cache,
+                               lambda: project_index.build_index(corpus.root, index_cache, ('prestudy',)))
+    cases['citations/warm'] = (noop, lambda: project_index.build_index(corpus.root, index_cache, ('prestudy',)))
+
+    for size, bib_file in sorted(corpus.bib_files.items()):
+        cache_dir = corpus.path('.cache', f'bib_{size}')
+        cases[f'bib_keys/{size}/cold'] = (noop, lambda f=bib_file: bib_reader.get_bibliography_keys(f, None))
+        cases[f'bib_keys/{size}/warm'] = (lambda f=bib_file, d=cache_dir: bib_reader.load_bibliography(f, d),
+                                          lambda f=bib_file, d=cache_dir: bib_reader.get_bibliography_keys(f, d))
+        entries = list(bib_reader.iter_entries(bib_file))
+        cases[f'dedup/{size}'] = (noop, lambda e=entries: bib_merge.merge_entries(e))
+
+    tables_dir = corpus.path('tables')
+
+    def drop_tables():
+        for name in os.listdir(tables_dir) if os.path.isdir(tables_dir) else ():
+            os.remove(os.path.join(tables_dir, name))
+
+    cases['tables/cold'] = (drop_tables, lambda: generate_item_tables.generate_latex_tables(corpus.items_csv, tables_dir))
+    cases['tables/unchanged'] = (lambda: generate_item_tables.generate_latex_tables(corpus.items_csv, tables_dir),
+                                 lambda: generate_item_tables.generate_latex_tables(corpus.items_csv, tables_dir))
+
+    main_tex = corpus.path('content', 'prestudy', 'main.tex')
+    cases['toc_check'] = (noop, lambda: check_toc.check_document(main_tex, corpus.build_dir))
+    return cases
+
+
+def run_benchmarks(corpus, repeat=DEFAULT_REPEAT, name_filter=None):
+    """Times every benchmark `repeat` times; returns {name: {'min', 'median', 'repeat'}}."""
+    results = {}
+    for name, (setup, run) in benchmarks(corpus).items():
+        if name_filter and name_filter not in name:
+            continue
+        timings = []
+        for _ in range(repeat):
+            with contextlib.redirect_stdout(io.StringIO()):
+                setup()
+                start = time.perf_counter()
+                run()
+                timings.append(time.perf_counter() - start)
+        results[name] = {'min': min(timings), 'median': statistics.median(timings), 'repeat': repeat}
+        print(f"  {name:<28} min {results[name]['min'] * 1000:>9.1f} ms  "
+              f"median {results[name]['median'] * 1000:>9.1f} ms")
+    return results
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baseline(path, results):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    baseline = {
+        'version': 1,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+    }
+    with file_utils.atomic_write(path) as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def compare(results, baseline, margin=DEFAULT_MARGIN):
+    """
+    Compares the fastest run of each benchmark with the baseline.
+
+    Returns a list of (name, baseline_seconds, current_seconds) for every
+    benchmark that got slower than the baseline by more than `margin`.
+    """
+    regressions = []
+    for name, result in sorted(results.items()):
+        previous = baseline['results'].get(name)
+        if previous is None:
+            continue
+        if result['min'] > previous['min'] * (1 + margin):
+            regressions.append((name, previous['min'], result['min']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Python tooling on synthetic large corpora.")
+    parser.add_argument('--sizes', default=','.join(str(size) for size in BIB_SIZES),
+                        help="comma-separated bibliography sizes (default: %(default)s)")
+    parser.add_argument('--sections', type=int, default=SECTION_COUNT, help="number of section files")
+    parser.add_argument('--items', type=int, default=ITEM_COUNT, help="number of rows in items.csv")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="repetitions per benchmark")
+    parser.add_argument('--filter', help="only run benchmarks whose name contains this string")
+    parser.add_argument('--baseline', default=BASELINE_FILE, help="baseline file (default: %(default)s)")
+    parser.add_argument('--save', action='store_true', help="write the results as the new baseline")
+    parser.add_argument('--check', action='store_true', help="fail if a benchmark regressed against the baseline")
+    parser.add_argument('--margin', type=float, default=DEFAULT_MARGIN,
+                        help="allowed slowdown before --check fails, e.g. 0.25 = 25%% (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    print(f"Generating corpus: bibliographies {sizes}, {args.sections} sections, {args.items} items...")
+    corpus = Corpus(sizes, args.sections, args.items)
+    try:
+        print(f"Running benchmarks ({args.repeat} repetitions):")
+        results = run_benchmarks(corpus, args.repeat, args.filter)
+    finally:
+        corpus.cleanup()
+
+    exit_code = 0
+    if args.check:
+        baseline = load_baseline(args.baseline)
+        if baseline is None:
+            print(f"Error: no baseline at {args.baseline}. Run with --save first.")
+            return 1
+        regressions = compare(results, baseline, args.margin)
+        for name, previous, current in regressions:
+            print(f"Regression: {name} took {current * 1000:.1f} ms, baseline {previous * 1000:.1f} ms "
+                  f"(+{(current / previous - 1) * 100:.0f}%, allowed {args.margin * 100:.0f}%)")
+        if regressions:
+            exit_code = 1
+        else:
+            print(f"No regressions against {args.baseline} (margin {args.margin * 100:.0f}%).")
+
+    if args.save:
+        save_baseline(args.baseline, results)
+        print(f"Baseline written to {args.baseline}")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,354 @@
+import argparse
+import json
+import os
+import re
+import sys
+import unicodedata
+from collections import defaultdict
+from difflib import SequenceMatcher
+
+import bib_reader
+import file_utils
+
+# Near-duplicate titles are only compared inside an (author, year) block, and
+# only when the block is small, so the work stays linear in the library size.
+TITLE_SIMILARITY = 0.9
+MAX_BLOCK_SIZE = 50
+
+# Fields compared when reporting conflicts between merged entries
+CONFLICT_FIELDS = ('title', 'year', 'doi', 'journal', 'booktitle')
+
+# For these types the ISBN identifies the containing book, not the entry itself
+CONTAINED_TYPES = ('incollection', 'inbook', 'inproceedings', 'article')
+# A part of a book is never the same work as a book
+PART_TYPES = ('incollection', 'inbook', 'inproceedings')
+BOOK_TYPES = ('book', 'mvbook', 'collection', 'mvcollection', 'proceedings', 'mvproceedings')
+
+MONTH_MACROS = ('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec')
+
+LATEX_COMMAND = re.compile(r'\\[a-zA-Z]+\s*')
+NON_ALNUM = re.compile(r'[^0-9a-z]+')
+DOI_PREFIX = re.compile(r'^(?:https?://)?(?:dx\.)?(?:doi\.org/)?(?:doi:\s*)?', re.IGNORECASE)
+
+
+def normalize_text(text):
+    """Lowercases, strips LaTeX markup/accents and collapses everything else to single spaces."""
+    text = LATEX_COMMAND.sub('', text or '').replace('{', '').replace('}', '')
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = ''.join(c for c in text if not unicodedata.combining(c)).replace('ß', 'ss')
+    return NON_ALNUM.sub(' ', text).strip()
+
+
+def normalize_doi(value):
+    value = DOI_PREFIX.sub('', (value or '').strip())
+    return value.lower() or None
+
+
+def normalize_isbns(value):
+    """Returns all ISBNs of a field as ISBN-13 digit strings."""
+    isbns = []
+    for token in re.split(r'[\s,;]+', value or ''):
+        digits = re.sub(r'[^0-9Xx]', '', token).upper()
+        if len(digits) == 10:
+            core = '978' + digits[:9]
+            check = (10 - sum(int(d) * (1 if i % 2 == 0 else 3) for i, d in enumerate(core)) % 10) % 10
+            digits = core + str(check)
+        if len(digits) == 13:
+            isbns.append(digits)
+    return isbns
+
+
+def normalize_url(value):
+    value = (value or '').strip().lower()
+    value = re.sub(r'^https?://', '', value)
+    value = re.sub(r'^www\.', '', value)
+    value = value.split('#')[0].rstrip('/')
+    return value or None
+
+
+def first_author(fields):
+    authors = fields.get('author') or fields.get('editor') or ''
+    first = re.split(r'\s+and\s+', authors.strip(), maxsplit=1)[0]
+    # "Last, First" or "First Last" or "{Corporate Author}"
+    surname = first.split(',')[0] if ',' in first else (first.split() or [''])[-1]
+    if first.startswith('{'):
+        surname = first
+    return normalize_text(surname)
+
+
+def fingerprint(entry):
+    title = normalize_text(entry.fields.get('title'))
+    if not title:
+        return None
+    return f"{title}|{entry.fields.get('year', '').strip()}|{first_author(entry.fields)}"
+
+
+def index_keys(entry):
+    """Yields the (index, value) pairs an entry is registered under."""
+    doi = normalize_doi(entry.fields.get('doi'))
+    if doi:
+        yield 'doi', doi
+    if entry.entry_type not in CONTAINED_TYPES:
+        for isbn in normalize_isbns(entry.fields.get('isbn')):
+            yield 'isbn', isbn
+    url = normalize_url(entry.fields.get('url'))
+    if url and not (doi and 'doi.org/' in url):
+        yield 'url', url
+    print_key = fingerprint(entry)
+    if print_key:
+        yield 'fingerprint', print_key
+
+
+def compatible(a, b):
+    """Entries with different DOIs or years, or a book and one of its parts, are never the same work."""
+    doi_a, doi_b = normalize_doi(a.fields.get('doi')), normalize_doi(b.fields.get('doi'))
+    if doi_a and doi_b and doi_a != doi_b:
+        return False
+    year_a, year_b = a.fields.get('year', '').strip(), b.fields.get('year', '').strip()
+    if year_a and year_b and year_a != year_b:
+        return False
+    types = (a.entry_type, b.entry_type)
+    return not any(t in PART_TYPES for t in types) or not any(t in BOOK_TYPES for t in types)
+
+
+class _UnionFind:
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, i):
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i, j):
+        root_i, root_j = self.find(i), self.find(j)
+        if root_i != root_j:
+            # The earlier entry stays the root so the first occurrence wins
+            if root_j < root_i:
+                root_i, root_j = root_j, root_i
+            self.parent[root_j] = root_i
+
+
+def find_duplicate_groups(entries):
+    """
+    Groups entries that describe the same work.
+
+    Entries are registered in hashed indexes on citation key, DOI, ISBN, URL
+    and a title+year+first-author fingerprint; entries sharing an index value
+    are merged if compatible(). A shared citation key alone is not enough:
+    the titles must match as well, otherwise one work could pull another
+    into its group through the key. Near-duplicate titles are found by comparing titles only within
+    small (first author, year) blocks. Returns (groups, reasons) where each
+    group is a sorted list of entry positions.
+    """
+    union = _UnionFind(len(entries))
+    reasons = defaultdict(set)
+    indexes = defaultdict(dict)
+    blocks = defaultdict(list)
+
+    def link(i, j, reason):
+        union.union(i, j)
+        reasons[union.find(i)].add(reason)
+
+    for i, entry in enumerate(entries):
+        first_with_key = indexes['key'].setdefault(entry.key, i)
+        if (first_with_key != i and compatible(entries[first_with_key], entry)
+                and _similar_titles(entries[first_with_key], entry)):
+            link(first_with_key, i, 'key')
+        for index, value in index_keys(entry):
+            j = indexes[index].setdefault(value, i)
+            if j != i and compatible(entries[j], entry):
+                link(j, i, index)
+        year = entry.fields.get('year', '').strip()
+        author = first_author(entry.fields)
+        if author and year:
+            blocks[(author, year)].append(i)
+
+    for members in blocks.values():
+        if len(members) < 2 or len(members) > MAX_BLOCK_SIZE:
+            continue
+        titles = [normalize_text(entries[i].fields.get('title')) for i in members]
+        for a in range(len(members)):
+            for b in range(a + 1, len(members)):
+                i, j = members[a], members[b]
+                if union.find(i) == union.find(j) or not titles[a] or not titles[b]:
+                    continue
+                ratio = SequenceMatcher(None, titles[a], titles[b]).ratio()
+                if ratio >= TITLE_SIMILARITY and compatible(entries[i], entries[j]):
+                    link(i, j, 'title')
+
+    groups = defaultdict(list)
+    for i in range(len(entries)):
+        groups[union.find(i)].append(i)
+    merged_reasons = defaultdict(set)
+    for root, reason in reasons.items():
+        merged_reasons[union.find(root)].update(reason)
+    return [groups[root] for root in sorted(groups)], merged_reasons
+
+
+def merge_entries(entries):
+    """
+    Merges duplicate entries and returns (merged_entries, report).
+
+    The first occurrence is kept; fields it lacks are filled in from its
+    duplicates, whose keys are recorded in a biblatex `ids` field so existing
+    citations keep resolving. Differing values of CONFLICT_FIELDS are listed
+    as conflicts in the report. A citation key reused for a different work is
+    reported as well and never becomes an alias of another work; a later work
+    whose own entry has the key is kept under it with a `-1`, `-2`, ... suffix
+    (as Zotero disambiguates keys).
+    """
+    groups, reasons = find_duplicate_groups(entries)
+    merged = []
+    report = {'merged': [], 'conflicts': []}
+    used_keys = {entry.key for entry in entries}
+    # Each key belongs to the first group whose primary entry has it
+    owners = {}
+    for group in groups:
+        owners.setdefault(entries[group[0]].key, group[0])
+
+    def key_clash(key, kept, title, renamed):
+        report['conflicts'].append({'type': 'key', 'key': key, 'renamed': renamed,
+                                    'kept': kept.fields.get('title', ''), 'title': title})
+
+    for group in groups:
+        primary = entries[group[0]]
+        key = primary.key
+        if owners[key] != group[0]:
+            key = _disambiguate(key, used_keys)
+            key_clash(primary.key, entries[owners[primary.key]], primary.fields.get('title', ''), key)
+        fields = dict(primary.fields)
+        aliases = []
+        duplicates = []
+        for position in group[1:]:
+            other = entries[position]
+            duplicates.append(other.key)
+            for name, value in other.fields.items():
+                if name not in fields:
+                    fields[name] = value
+                elif name in CONFLICT_FIELDS and _normalized(name, value) != _normalized(name, fields[name]):
+                    report['conflicts'].append({
+                        'type': 'field',
+                        'key': primary.key,
+                        'duplicate': other.key,
+                        'field': name,
+                        'kept': fields[name],
+                        'dropped': value,
+                    })
+            if other.key in owners and owners[other.key] != group[0]:
+                # The key cites another work; this one stays reachable under `key`
+                key_clash(other.key, entries[owners[other.key]], other.fields.get('title', ''), key)
+            elif other.key != key and other.key not in aliases:
+                aliases.append(other.key)
+
+        if aliases:
+            existing = [a.strip() for a in fields.get('ids', '').split(',') if a.strip()]
+            fields['ids'] = ', '.join(existing + [a for a in aliases if a not in existing])
+        if duplicates:
+            report['merged'].append({
+                'key': primary.key,
+                'duplicates': duplicates,
+                'reasons': sorted(reasons.get(group[0], ())),
+            })
+        merged.append(bib_reader.BibEntry(primary.entry_type, key, fields))
+
+    return merged, report
+
+
+def _similar_titles(a, b):
+    title_a, title_b = normalize_text(a.fields.get('title')), normalize_text(b.fields.get('title'))
+    return not title_a or not title_b or SequenceMatcher(None, title_a, title_b).ratio() >= TITLE_SIMILARITY
+
+
+def _disambiguate(key, used_keys):
+    suffix = 1
+    while f"{key}-{suffix}" in used_keys:
+        suffix += 1
+    used_keys.add(f"{key}-{suffix}")
+    return f"{key}-{suffix}"
+
+
+def _normalized(name, value):
+    if name == 'doi':
+        return normalize_doi(value)
+    return normalize_text(value)
+
+
+def format_entry(entry):
+    """Serializes a BibEntry in the tab-indented style of Zotero exports."""
+    lines = [f"@{entry.entry_type}{{{entry.key},"]
+    for name, value in entry.fields.items():
+        if name == 'month' and value.lower() in MONTH_MACROS:
+            lines.append(f"\t{name} = {value.lower()},")
+        else:
+            lines.append(f"\t{name} = {{{value}}},")
+    lines.append("}")
+    return '\n'.join(lines)
+
+
+def write_bibliography(entries, bib_path, local_keys=()):
+    """
+    Writes merged entries deterministically; entries from local.bib go in their own section.
+
+    The file is replaced atomically, so an interrupted sync never leaves a
+    truncated bibliography behind.
+    """
+    remote = [e for e in entries if e.key not in local_keys]
+    local = [e for e in entries if e.key in local_keys]
+    with file_utils.atomic_write(bib_path) as f:
+        f.write('\n\n'.join(format_entry(e) for e in remote))
+        f.write("\n")
+        if local:
+            f.write("\n% Local Citations\n")
+            f.write('\n\n'.join(format_entry(e) for e in local))
+            f.write("\n")
+
+
+def write_report(report, report_path):
+    os.makedirs(os.path.dirname(os.path.abspath(report_path)), exist_ok=True)
+    with file_utils.atomic_write(report_path) as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+
+def merge_sources(remote_entries, local_entries):
+    """Merges Zotero entries with local.bib; returns (entries, report, local_keys)."""
+    merged, report = merge_entries(list(remote_entries) + list(local_entries))
+    remote_keys = set(e.key for e in remote_entries)
+    local_keys = set(e.key for e in merged if e.key not in remote_keys)
+    return merged, report, local_keys
+
+
+def print_report(report):
+    for item in report['merged']:
+        print(f"  Merged {', '.join(item['duplicates'])} into {item['key']} ({', '.join(item['reasons'])})")
+    for conflict in report['conflicts']:
+        if conflict['type'] == 'key':
+            print(f"  Conflict: key {conflict['key']} is used for different works, "
+                  f"kept '{conflict['title']}' as {conflict['renamed']}")
+        else:
+            print(f"  Conflict: {conflict['key']}.{conflict['field']} differs in {conflict['duplicate']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Merge .bib files and report duplicate entries.")
+    parser.add_argument('sources', nargs='+', help=".bib files in priority order")
+    parser.add_argument('-o', '--output', required=True, help="merged .bib file to write")
+    parser.add_argument('--report', help="write a JSON report of merged and conflicting entries")
+    args = parser.parse_args(argv)
+
+    entries = []
+    for source in args.sources:
+        entries.extend(bib_reader.iter_entries(source))
+    merged, report = merge_entries(entries)
+    write_bibliography(merged, args.output)
+    if args.report:
+        write_report(report, args.report)
+    print_report(report)
+    print(f"Wrote {len(merged)} entries ({len(entries) - len(merged)} duplicates merged) to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
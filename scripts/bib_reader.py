@@ -0,0 +1,221 @@
+import hashlib
+import os
+import pickle
+import re
+import sys
+from collections import namedtuple
+
+import file_utils
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BIB_FILE = os.path.join(PROJECT_ROOT, 'content', 'resources', 'bibliography.bib')
+CACHE_DIR = os.path.join(PROJECT_ROOT, '.cache')
+
+# Bump when the parser or record layout changes so stale caches are discarded
+CACHE_VERSION = 1
+
+# Entry types that carry no citation key
+SKIPPED_TYPES = ('comment', 'preamble', 'string')
+
+ENTRY_START = re.compile(r'\s*@\s*([A-Za-z]+)\s*[{(]')
+FIELD_NAME = re.compile(r'\s*([A-Za-z][\w\-:.+]*)\s*=\s*')
+BRACES = re.compile(r'[{}]')
+QUOTE_OR_BRACE = re.compile(r'[{}"]')
+
+BibEntry = namedtuple('BibEntry', ['entry_type', 'key', 'fields'])
+BibEntry.__doc__ = "Lightweight BibTeX entry: lowercase type, citation key and a dict of lowercase fields."
+
+
+def _read_braced(body, pos):
+    """Returns (value, end) for a `{...}` value starting at body[pos] == '{'."""
+    depth = 0
+    for match in BRACES.finditer(body, pos):
+        depth += 1 if match.group() == '{' else -1
+        if depth == 0:
+            return body[pos + 1:match.start()], match.end()
+    return body[pos + 1:], len(body)
+
+
+def _read_quoted(body, pos):
+    """Returns (value, end) for a `"..."` value starting at body[pos] == '"'."""
+    depth = 0
+    for match in QUOTE_OR_BRACE.finditer(body, pos + 1):
+        char = match.group()
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+        elif depth == 0:
+            return body[pos + 1:match.start()], match.end()
+    return body[pos + 1:], len(body)
+
+
+def parse_fields(body):
+    """Parses the `name = value, ...` part of an entry into a dict."""
+    fields = {}
+    pos = 0
+    length = len(body)
+    while pos < length:
+        match = FIELD_NAME.match(body, pos)
+        if not match:
+            comma = body.find(',', pos)
+            if comma == -1:
+                break
+            pos = comma + 1
+            continue
+        name = match.group(1).lower()
+        pos = match.end()
+        parts = []
+        # Values may be concatenated with '#'
+        while pos < length:
+            char = body[pos]
+            if char == '{':
+                value, pos = _read_braced(body, pos)
+            elif char == '"':
+                value, pos = _read_quoted(body, pos)
+            else:
+                end = pos
+                while end < length and body[end] not in ',#':
+                    end += 1
+                value, pos = body[pos:end].strip(), end
+            parts.append(value)
+            while pos < length and body[pos].isspace():
+                pos += 1
+            if pos < length and body[pos] == '#':
+                pos += 1
+                while pos < length and body[pos].isspace():
+                    pos += 1
+                continue
+            break
+        fields[name] = ''.join(parts).strip()
+        comma = body.find(',', pos)
+        if comma == -1:
+            break
+        pos = comma + 1
+    return fields
+
+
+def _make_entry(entry_type, lines):
+    text = ''.join(lines)
+    # Drop the closing brace/parenthesis of the entry
+    text = text.rstrip()
+    if text.endswith(('}', ')')):
+        text = text[:-1]
+    key, _, body = text.partition(',')
+    key = key.strip()
+    if not key:
+        return None
+    return BibEntry(entry_type, key, parse_fields(body))
+
+
+def parse_lines(lines):
+    """
+    Yields one BibEntry per entry from an iterable of lines.
+
+    Only the current entry is held in memory. `@comment`, `@preamble` and
+    `@string` blocks are skipped.
+    """
+    entry_type = None
+    parenthesized = False
+    entry_lines = []
+    depth = 0
+    for line in lines:
+        if entry_type is None:
+            match = ENTRY_START.match(line)
+            if not match:
+                continue
+            entry_type = match.group(1).lower()
+            parenthesized = match.group().endswith('(')
+            line = line[match.end():]
+            depth = 0 if parenthesized else 1
+            entry_lines = []
+        depth += line.count('{') - line.count('}')
+        entry_lines.append(line)
+        if parenthesized:
+            done = depth <= 0 and line.rstrip().endswith(')')
+        else:
+            done = depth <= 0
+        if done:
+            if entry_type not in SKIPPED_TYPES:
+                entry = _make_entry(entry_type, entry_lines)
+                if entry is not None:
+                    yield entry
+            entry_type = None
+
+
+def iter_entries(file_path):
+    """Streams a .bib file and yields one BibEntry per entry."""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        yield from parse_lines(f)
+
+
+def parse_string(content):
+    """Parses BibTeX held in a string, e.g. an API response."""
+    return list(parse_lines(content.splitlines(keepends=True)))
+
+
+def cache_path_for(file_path, cache_dir=CACHE_DIR):
+    name = hashlib.sha1(os.path.abspath(file_path).encode('utf-8')).hexdigest()[:12]
+    return os.path.join(cache_dir, f"bib-{os.path.basename(file_path)}-{name}.pickle")
+
+
+def load_bibliography(file_path=BIB_FILE, cache_dir=CACHE_DIR):
+    """
+    Returns the list of BibEntry records of a .bib file.
+
+    The parsed database is stored as a pickle in `cache_dir` and reused as long as
+    the file's content hash is unchanged. Pass `cache_dir=None` to disable caching.
+    """
+    if not os.path.exists(file_path):
+        return []
+
+    digest = file_utils.file_hash(file_path)
+    cache_file = cache_path_for(file_path, cache_dir) if cache_dir else None
+
+    if cache_file and os.path.exists(cache_file):
+        try:
+            with open(cache_file, 'rb') as f:
+                cached = pickle.load(f)
+            if cached.get('version') == CACHE_VERSION and cached.get('hash') == digest:
+                return [BibEntry(*record) for record in cached['entries']]
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, KeyError, TypeError):
+            pass
+
+    entries = list(iter_entries(file_path))
+
+    if cache_file:
+        os.makedirs(cache_dir, exist_ok=True)
+        with file_utils.atomic_write(cache_file, 'wb') as f:
+            pickle.dump({
+                'version': CACHE_VERSION,
+                'hash': digest,
+                'entries': [tuple(entry) for entry in entries],
+            }, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    return entries
+
+
+def get_bibliography_keys(file_path=BIB_FILE, cache_dir=CACHE_DIR):
+    """
+    Returns the set of citation keys defined in a .bib file.
+
+    Alias keys declared in a biblatex `ids` field are included, since they
+    resolve like the entry's own key.
+    """
+    keys = set()
+    for entry in load_bibliography(file_path, cache_dir):
+        keys.add(entry.key)
+        if 'ids' in entry.fields:
+            keys.update(alias.strip() for alias in entry.fields['ids'].split(',') if alias.strip())
+    return keys
+
+
+def main():
+    file_path = sys.argv[1] if len(sys.argv) > 1 else BIB_FILE
+    entries = load_bibliography(file_path)
+    print(f"Parsed {len(entries)} entries from {file_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,6 +7,14 @@ usage() {
     echo "  --all       Build both Prestudy and Thesis"
     echo "  --prestudy  Build Prestudy (default)"
     echo "  --thesis    Build Thesis"
+    echo "  --clean     Remove all artifacts and the Biber cache before building;"
+    echo "              also bypasses the build store"
+    echo "  --jobs=N    Build at most N documents in parallel (default: CPU count)"
+    echo "  --chrome-trace  Also write the build trace in Chrome trace-event format"
+    echo "  --no-format Run pdflatex without the precompiled preamble formats"
+    echo "  --no-store  Neither reuse nor save products in the shared build store"
+    echo "  --preview=FILE  Compile one section with its parent's preamble, references"
+    echo "              and bibliography into build/preview/ (see scripts/preview.py)"
     echo "  --help      Show this help message"
     exit 1
 }
@@ -14,61 +22,120 @@ usage() {
 # Parse arguments
 BUILD_PRESTUDY=false
 BUILD_THESIS=false
-
-if [ $# -eq 0 ]; then
+CLEAN_BUILD=false
+CHROME_TRACE=false
+PREVIEW_FILE=
+BUILD_JOBS=${BUILD_JOBS:-}
+
+for arg in "$@"; do
+    case $arg in
+        --all)
+            BUILD_PRESTUDY=true
+            BUILD_THESIS=true
+            ;;
+        --prestudy)
+            BUILD_PRESTUDY=true
+            ;;
+        --thesis)
+            BUILD_THESIS=true
+            ;;
+        --clean)
+            CLEAN_BUILD=true
+            # A clean build really compiles everything
+            export BUILD_STORE=0
+            ;;
+        --jobs=*)
+            BUILD_JOBS="${arg#*=}"
+            ;;
+        --chrome-trace)
+            CHROME_TRACE=true
+            ;;
+        --no-format)
+            export PREAMBLE_FORMAT=0
+            ;;
+        --no-store)
+            export BUILD_STORE=0
+            ;;
+        --preview=*)
+            PREVIEW_FILE="${arg#*=}"
+            ;;
+        --help)
+            usage
+            ;;
+        *)
+            echo "Unknown option: $arg"
+            usage
+            ;;
+    esac
+done
+
+# Default target
+if [ "$BUILD_PRESTUDY" = false ] && [ "$BUILD_THESIS" = false ]; then
     BUILD_PRESTUDY=true
-else
-    for arg in "$@"; do
-        case $arg in
-            --all)
-                BUILD_PRESTUDY=true
-                BUILD_THESIS=true
-                ;;
-            --prestudy)
-                BUILD_PRESTUDY=true
-                ;;
-            --thesis)
-                BUILD_THESIS=true
-                ;;
-            --help)
-                usage
-                ;;
-            *)
-                echo "Unknown option: $arg"
-                usage
-                ;;
-        esac
-    done
 fi
 
 # Save current directory
 START_DIR=$(pwd)
 
 # Set TEXINPUTS to include the shared lib directory and resources
-# Use absolute paths to be safe regardless of where latexmk is run
+# Use absolute paths so pdflatex and biber find them from any working directory
 # We include content/resources/images recursively (//) so \includegraphics finds images
 export TEXINPUTS="$START_DIR/content/lib//:$START_DIR/content/resources//:$START_DIR/content/resources/images//:"
 export BIBINPUTS="$START_DIR/content/resources//:"
 
+# A preview only compiles one section against the last full build: tables,
+# images and sources are taken as they are
+if [ -n "$PREVIEW_FILE" ]; then
+    if [ -d "$START_DIR/.cache/assets/print" ]; then
+        export TEXINPUTS="$START_DIR/.cache/assets/print//:$TEXINPUTS"
+    fi
+    exec python3 scripts/preview.py "$PREVIEW_FILE"
+fi
+
+# Every stage appends its timings here; written to <target>/build/build-trace.json
+# at the end (see scripts/build_trace.py, summarized by `make profile`)
+export BUILD_TRACE="$START_DIR/.cache/build/trace.jsonl"
+mkdir -p "$(dirname "$BUILD_TRACE")"
+rm -f "$BUILD_TRACE"
+
 # Generate survey item tables (Global step)
 if [ "$SKIP_GEN_TABLES" != "true" ]; then
-    echo "Generating survey item tables..."
-    python3 scripts/generate_item_tables.py
+    echo "Generating survey item and results tables..."
+    python3 scripts/build_trace.py run generate_item_tables -- python3 scripts/generate_item_tables.py
+    # Results tables from the analysis output in content/resources/data/results/;
+    # only tables whose input data changed are rendered again
+    python3 scripts/build_trace.py run generate_results_tables -- python3 scripts/generate_results_tables.py
 else
     echo "Skipping survey item table generation (SKIP_GEN_TABLES=true)"
 fi
 
-# Sanitize bibliography (remove hidden Unicode characters)
-echo "Sanitizing bibliography..."
-python3 scripts/sanitize_bib.py
+# Print-optimized images (downscaled to 300 dpi at text width, recompressed) and
+# the responsive webapp variants; only images that changed are processed again.
+# Their directory goes in front of TEXINPUTS so \includegraphics uses them.
+if [ "$SKIP_IMAGE_ASSETS" = "true" ]; then
+    echo "Using existing image assets (SKIP_IMAGE_ASSETS=true)"
+    export TEXINPUTS="$START_DIR/.cache/assets/print//:$TEXINPUTS"
+elif python3 -c "import PIL" 2>/dev/null; then
+    echo "Processing image assets..."
+    if python3 scripts/build_trace.py run image_assets -- python3 scripts/image_assets.py; then
+        export TEXINPUTS="$START_DIR/.cache/assets/print//:$TEXINPUTS"
+    fi
+else
+    echo "Pillow not installed, using the original images"
+fi
+
+# Sanitize sources (remove hidden Unicode characters, normalize to NFC);
+# files unchanged since the last clean run are skipped
+echo "Sanitizing bibliography and LaTeX sources..."
+python3 scripts/build_trace.py run sanitize_sources -- python3 scripts/sanitize_sources.py
 
-# Function to build a target
-build_target() {
+# Function to prepare a target and queue its documents
+prepare_target() {
     local target_dir=$1
     local target_name=$2
 
     echo "------------------------------------------------"
-    echo "Building $target_name in $target_dir"
+    echo "Preparing $target_name in $target_dir"
     echo "------------------------------------------------"
 
     if [ ! -d "$target_dir" ]; then
@@ -78,19 +145,6 @@ build_target() {
 
     cd "$target_dir" || exit 1
 
-    # Clean up previous build artifacts
-    latexmk -c
-    
-    # Clean up section artifacts to ensure fresh builds
-    if [ -d "sections" ]; then
-        echo "Cleaning section artifacts..."
-        rm -f sections/*.aux sections/*.bcf sections/*.bbl sections/*.blg sections/*.log sections/*.run.xml sections/*.toc sections/*.out sections/*.fdb_latexmk sections/*.fls
-    fi
-    
-    # Clear Biber cache to avoid corruption issues
-    echo "Clearing Biber cache..."
-    rm -rf $(biber --cache)
-
     # Define files to build
     FILES_TO_BUILD=("main.tex")
 
@@ -99,38 +153,87 @@ build_target() {
         FILES_TO_BUILD+=("main_required.tex")
     fi
 
-    for file in "${FILES_TO_BUILD[@]}"; do
-        echo "Building $file..."
-        latexmk -pdf -interaction=nonstopmode -file-line-error -outdir=. "$file"
-        
-        if [ $? -ne 0 ]; then
-            echo "Error building $file in $target_name"
-            cd "$START_DIR"
-            return 1
+    if [ "$CLEAN_BUILD" = true ]; then
+        # Clean up previous build artifacts
+        rm -rf build
+
+        # Clean up section artifacts to ensure fresh builds
+        if [ -d "sections" ]; then
+            echo "Cleaning section artifacts..."
+            rm -f sections/*.aux sections/*.bcf sections/*.bbl sections/*.blg sections/*.log sections/*.run.xml sections/*.toc sections/*.out sections/*.fdb_latexmk sections/*.fls
         fi
+
+        for file in "${FILES_TO_BUILD[@]}"; do
+            python3 "$START_DIR/scripts/build_deps.py" forget "$file"
+        done
+    fi
+
+    for file in "${FILES_TO_BUILD[@]}"; do
+        DOCUMENTS+=("$target_dir/$file")
     done
+    TARGET_DIRS+=("$target_dir")
 
     # Note: Individual section PDFs are NOT built separately.
     # Sections are included in main.pdf via subfiles package.
     # Building sections standalone causes citation issues because
-    # biber can't find bibliography.bib from the sections/ subdirectory.
+    # biber can't find bibliography.bib from the sections/ subdirectory;
+    # use --preview=<section.tex>, which compiles them with the parent's setup.
 
-    echo "Build of $target_name successful! PDFs are located in $target_dir"
     cd "$START_DIR"
     return 0
 }
 
-# Execute builds
+# Collect documents
 EXIT_CODE=0
+DOCUMENTS=()
+TARGET_DIRS=()
 
 if [ "$BUILD_PRESTUDY" = true ]; then
-    build_target "content/prestudy" "Prestudy"
+    prepare_target "content/prestudy" "Prestudy"
     if [ $? -ne 0 ]; then EXIT_CODE=1; fi
 fi
 
 if [ "$BUILD_THESIS" = true ]; then
-    build_target "content/thesis" "Thesis"
+    prepare_target "content/thesis" "Thesis"
+    if [ $? -ne 0 ]; then EXIT_CODE=1; fi
+fi
+
+if [ "$CLEAN_BUILD" = true ]; then
+    # Clear Biber cache to avoid corruption issues. The documents' biber runs
+    # use their own caches in build/<jobname>/biber-cache/ (removed with build/
+    # above), so parallel builds never share one
+    echo "Clearing Biber cache..."
+    rm -rf $(biber --cache)
+fi
+
+# Execute builds: independent documents run in parallel, each in its own
+# output directory (<target>/build/<jobname>/), see scripts/build_driver.py.
+# The static preamble of each document is dumped once into a format
+# (build/<jobname>/<jobname>-preamble.fmt) that every pdflatex pass starts from;
+# the summary reports the time this saved per pass (scripts/preamble_format.py).
+# PDFs, .bbl files and image variants whose inputs another build already saw are
+# copied from the build store (~/.cache/bachelor-thesis/build-store, shared by all
+# checkouts; scripts/build_store.py, `make store-stats`)
+if [ ${#DOCUMENTS[@]} -gt 0 ]; then
+    JOBS_OPTS=()
+    if [ -n "$BUILD_JOBS" ]; then
+        JOBS_OPTS+=("--jobs=$BUILD_JOBS")
+    fi
+    python3 scripts/build_driver.py "${JOBS_OPTS[@]}" "${DOCUMENTS[@]}"
     if [ $? -ne 0 ]; then EXIT_CODE=1; fi
 fi
 
+# Write the build trace next to the PDFs
+if [ ${#TARGET_DIRS[@]} -gt 0 ]; then
+    TRACE_OPTS=()
+    if [ "$CHROME_TRACE" = true ]; then
+        TRACE_OPTS+=("--chrome")
+    fi
+    TRACE_DIRS=()
+    for target_dir in "${TARGET_DIRS[@]}"; do
+        TRACE_DIRS+=("$target_dir/build")
+    done
+    python3 scripts/build_trace.py finish "${TRACE_OPTS[@]}" "${TRACE_DIRS[@]}"
+fi
+
 exit $EXIT_CODE
@@ -0,0 +1,237 @@
+import hashlib
+import json
+import os
+import re
+import sys
+
+import file_utils
+import image_assets
+from project_index import CITE_PATTERN, COMMENT_PATTERN
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATE_DIR = os.path.join(PROJECT_ROOT, '.cache', 'build')
+
+# Mirrors TEXINPUTS/BIBINPUTS in build.sh: searched recursively when a
+# relative path cannot be resolved from the document itself.
+TEX_SEARCH_DIRS = [
+    os.path.join(PROJECT_ROOT, 'content', 'lib'),
+    os.path.join(PROJECT_ROOT, 'content', 'resources'),
+]
+BIB_SEARCH_DIRS = [os.path.join(PROJECT_ROOT, 'content', 'resources')]
+
+GRAPHICS_EXTENSIONS = ('', '.pdf', '.png', '.jpg', '.jpeg', '.eps')
+
+INCLUDE_PATTERN = re.compile(r'\\(subfile|input|include)\{([^}]+)\}')
+GRAPHICS_PATTERN = re.compile(r'\\includegraphics(?:\[[^\]]*\])?\{([^}]+)\}')
+BIBRESOURCE_PATTERN = re.compile(r'\\addbibresource(?:\[[^\]]*\])?\{([^}]+)\}')
+GRAPHICSPATH_PATTERN = re.compile(r'\\graphicspath\{((?:\{[^}]*\})+)\}')
+CLASS_PATTERN = re.compile(r'\\(documentclass|usepackage)(?:\[[^\]]*\])?\{([^}]+)\}')
+
+# Build plans, from cheapest to most expensive
+UP_TO_DATE = 'up-to-date'
+LATEX_ONLY = 'latex-only'
+FULL = 'full'
+
+_search_cache = {}
+
+
+def _find_in_tree(search_dirs, rel_path):
+    """Looks up a file by basename below the given directories (like `dir//` in kpathsea)."""
+    name = os.path.basename(rel_path)
+    cache_key = (tuple(search_dirs), name)
+    if cache_key not in _search_cache:
+        found = None
+        for search_dir in search_dirs:
+            for dirpath, dirnames, filenames in os.walk(search_dir):
+                dirnames.sort()
+                if name in filenames:
+                    found = os.path.join(dirpath, name)
+                    break
+            if found:
+                break
+        _search_cache[cache_key] = found
+    return _search_cache[cache_key]
+
+
+def resolve(rel_path, base_dirs, search_dirs, extensions=('',)):
+    """Resolves a LaTeX path against the document directories, then the search trees."""
+    rel_path = rel_path.strip()
+    for extension in extensions:
+        candidate = rel_path + extension
+        for base_dir in base_dirs:
+            full_path = os.path.normpath(os.path.join(base_dir, candidate))
+            if os.path.isfile(full_path):
+                return full_path
+        found = _find_in_tree(search_dirs, candidate)
+        if found:
+            return found
+    return None
+
+
+def collect_dependencies(main_tex):
+    """
+    Walks the \\subfile/\\input/\\includegraphics/\\addbibresource graph of a document.
+
+    Returns a dict with the resolved `tex`, `graphics` and `bib` inputs, the
+    citation keys used anywhere in the graph and the paths that could not be resolved.
+    """
+    main_tex = os.path.abspath(main_tex)
+    main_dir = os.path.dirname(main_tex)
+    deps = {'tex': [], 'graphics': [], 'bib': [], 'citations': set(), 'missing': [], 'preamble': ''}
+    graphics_dirs = [main_dir]
+    seen = set()
+    pending = [main_tex]
+
+    while pending:
+        tex_file = pending.pop(0)
+        if tex_file in seen:
+            continue
+        seen.add(tex_file)
+        deps['tex'].append(tex_file)
+        with open(tex_file, 'r', encoding='utf-8') as f:
+            content = COMMENT_PATTERN.sub('', f.read())
+        base_dirs = [os.path.dirname(tex_file), main_dir]
+        if tex_file == main_tex:
+            # biblatex options live in the preamble and change what biber produces
+            deps['preamble'] = content.split('\\begin{document}', 1)[0]
+
+        for match in GRAPHICSPATH_PATTERN.finditer(content):
+            for path in re.findall(r'\{([^}]*)\}', match.group(1)):
+                graphics_dirs.append(os.path.normpath(os.path.join(main_dir, path)))
+
+        for command, name in CLASS_PATTERN.findall(content):
+            extension = '.cls' if command == 'documentclass' else '.sty'
+            for package in name.split(','):
+                # Only track classes/packages vendored in content/lib, not TeX Live ones
+                found = resolve(package.strip(), [], TEX_SEARCH_DIRS[:1], (extension,))
+                if found and found not in deps['tex']:
+                    deps['tex'].append(found)
+
+        for _cmd, name in INCLUDE_PATTERN.findall(content):
+            found = resolve(name, base_dirs, TEX_SEARCH_DIRS, ('.tex', ''))
+            if found:
+                pending.append(found)
+            else:
+                deps['missing'].append(name)
+
+        for name in GRAPHICS_PATTERN.findall(content):
+            found = resolve(name, base_dirs + graphics_dirs, TEX_SEARCH_DIRS, GRAPHICS_EXTENSIONS)
+            if found:
+                if found not in deps['graphics']:
+                    deps['graphics'].append(found)
+            else:
+                deps['missing'].append(name)
+
+        for name in BIBRESOURCE_PATTERN.findall(content):
+            found = resolve(name, [main_dir], BIB_SEARCH_DIRS)
+            if found:
+                if found not in deps['bib']:
+                    deps['bib'].append(found)
+            else:
+                deps['missing'].append(name)
+
+        for _cmd, keys in CITE_PATTERN.findall(content):
+            deps['citations'].update(key.strip() for key in keys.split(','))
+
+    return deps
+
+
+def fingerprint(deps):
+    """
+    Content-hashes every input. `bib` covers everything biber depends on.
+
+    pdflatex embeds the print variants of image_assets.py instead of the
+    original graphics when build.sh puts their directory in front of
+    TEXINPUTS, so the search path and the print settings count as inputs.
+    """
+    inputs = {}
+    for kind in ('tex', 'graphics', 'bib'):
+        for path in deps[kind]:
+            inputs[os.path.relpath(path, PROJECT_ROOT).replace(os.sep, '/')] = file_utils.file_hash(path)
+    for name in deps['missing']:
+        inputs[f"missing:{name}"] = None
+    inputs['search-path:TEXINPUTS'] = os.environ.get('TEXINPUTS', '').replace(PROJECT_ROOT, '.')
+    inputs['images:print'] = json.dumps(image_assets.print_settings(), sort_keys=True)
+
+    bib_digest = hashlib.sha256()
+    for path in sorted(deps['bib']):
+        bib_digest.update(inputs[os.path.relpath(path, PROJECT_ROOT).replace(os.sep, '/')].encode())
+    bib_digest.update('\n'.join(sorted(deps['citations'])).encode('utf-8'))
+    bib_digest.update(deps['preamble'].encode('utf-8'))
+
+    return {'inputs': inputs, 'bib': bib_digest.hexdigest()}
+
+
+def state_path(main_tex):
+    rel_path = os.path.relpath(os.path.abspath(main_tex), PROJECT_ROOT)
+    return os.path.join(STATE_DIR, rel_path.replace(os.sep, '-') + '.json')
+
+
+def load_state(main_tex):
+    return file_utils.load_cache(state_path(main_tex)) or None
+
+
+def plan_build(main_tex, outdir=None):
+    """Decides which passes a document needs: up-to-date, latex-only or full."""
+    main_tex = os.path.abspath(main_tex)
+    outdir = os.path.abspath(outdir) if outdir else os.path.dirname(main_tex)
+    jobname = os.path.splitext(os.path.basename(main_tex))[0]
+    state = load_state(main_tex)
+    if state is None:
+        return FULL
+
+    current = fingerprint(collect_dependencies(main_tex))
+    has_bbl = os.path.exists(os.path.join(outdir, jobname + '.bbl'))
+    if current['bib'] != state.get('bib') or not has_bbl:
+        return FULL
+    if current['inputs'] != state.get('inputs') or not os.path.exists(os.path.join(outdir, jobname + '.pdf')):
+        return LATEX_ONLY
+    return UP_TO_DATE
+
+
+def record_build(main_tex):
+    """Stores the fingerprint of a successfully built document."""
+    state = fingerprint(collect_dependencies(main_tex))
+    path = state_path(main_tex)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with file_utils.atomic_write(path) as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+
+
+def forget_build(main_tex):
+    path = state_path(main_tex)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def usage():
+    print("Usage: build_deps.py {plan|record|forget|deps} <file.tex> [outdir]")
+    return 2
+
+
+def main(argv):
+    if len(argv) < 2:
+        return usage()
+    command, main_tex = argv[0], argv[1]
+    outdir = argv[2] if len(argv) > 2 else None
+
+    if command == 'plan':
+        print(plan_build(main_tex, outdir))
+    elif command == 'record':
+        record_build(main_tex)
+    elif command == 'forget':
+        forget_build(main_tex)
+    elif command == 'deps':
+        deps = collect_dependencies(main_tex)
+        for kind in ('tex', 'graphics', 'bib'):
+            for path in deps[kind]:
+                print(f"{kind}\t{os.path.relpath(path, PROJECT_ROOT)}")
+        for name in deps['missing']:
+            print(f"missing\t{name}")
+    else:
+        return usage()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
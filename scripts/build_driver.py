@@ -0,0 +1,327 @@
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import build_deps
+import build_store
+import build_trace
+import file_utils
+import image_assets
+import latex_log
+import preamble_format
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Per-document output lives below <target>/build/<jobname>/ so that concurrent
+# builds never share .aux/.bcf/.bbl files.
+BUILD_DIR_NAME = 'build'
+
+PDFLATEX_COMMAND = ['pdflatex', '-interaction=nonstopmode', '-file-line-error']
+BIBER_COMMAND = ['biber']
+# biber (a PAR-packed binary in TeX Live) unpacks itself into a cache that
+# parallel runs would share and could corrupt; every document gets its own
+BIBER_CACHE_DIR = 'biber-cache'
+# Like latexmk's max_repeat: stop even if LaTeX still asks for another pass
+MAX_LATEX_PASSES = 5
+MAX_BIBER_PASSES = 2
+# Written by one pass and read by the next; a change means the output may be stale
+AUX_EXTENSIONS = ('.aux', '.toc', '.lof', '.lot', '.out')
+DIAGNOSTICS_SUFFIX = '.diagnostics.json'
+# What a build leaves in its output directory that the next build, check_toc.py
+# or a preview reads; stored together in the build store
+PRODUCT_EXTENSIONS = ('.pdf', '.aux', '.bbl', '.blg', '.toc', '.lof', '.lot', '.out', '.log', DIAGNOSTICS_SUFFIX)
+DATASOURCE_PATTERN = re.compile(r'<bcf:datasource[^>]*>([^<]+)</bcf:datasource>')
+# Errors printed for a failed document; the rest are in the build log and the JSON
+MAX_REPORTED_ERRORS = 10
+
+# Status of a document whose products were restored from the build store
+STORED = 'stored'
+
+# `saved_per_pass` is the startup time the preamble format saves per pdflatex
+# pass (None if the document was built without one), `passes` the pdflatex passes run
+# and `diagnostics` the latex_log.py diagnostics of the last pass
+BuildResult = namedtuple('BuildResult', ['document', 'status', 'exit_code', 'duration', 'log_path',
+                                         'saved_per_pass', 'passes', 'diagnostics'], defaults=(None, 0, ()))
+
+
+def set_search_paths():
+    """
+    Sets TEXINPUTS/BIBINPUTS like build.sh for runs outside of it (watch mode,
+    previews); values already in the environment are kept.
+    """
+    search_path = f"{PROJECT_ROOT}/content/lib//:{PROJECT_ROOT}/content/resources//:" \
+                  f"{PROJECT_ROOT}/content/resources/images//:"
+    print_assets = os.path.join(PROJECT_ROOT, '.cache', 'assets', 'print')
+    if os.path.isdir(print_assets):
+        search_path = f"{print_assets}//:" + search_path
+    os.environ.setdefault('TEXINPUTS', search_path)
+    os.environ.setdefault('BIBINPUTS', f"{PROJECT_ROOT}/content/resources//:")
+
+
+def output_dir_for(main_tex):
+    """Returns the isolated output directory of a document, e.g. content/prestudy/build/main."""
+    main_tex = os.path.abspath(main_tex)
+    jobname = os.path.splitext(os.path.basename(main_tex))[0]
+    return os.path.join(os.path.dirname(main_tex), BUILD_DIR_NAME, jobname)
+
+
+def _digests(outdir, jobname, extensions):
+    digests = {}
+    for extension in extensions:
+        path = os.path.join(outdir, jobname + extension)
+        digests[extension] = file_utils.file_hash(path) if os.path.exists(path) else None
+    return digests
+
+
+def bbl_key(bcf_path, source_dir):
+    """
+    Store key of biber's output: the .bcf biblatex wrote (cited keys, options)
+    and the content of the .bib files it names. None if a .bib is not found.
+    """
+    with open(bcf_path, 'rb') as f:
+        bcf = f.read()
+    parts = [bcf, build_store.tool_identity('biber')]
+    for name in DATASOURCE_PATTERN.findall(bcf.decode('utf-8', errors='replace')):
+        path = build_deps.resolve(name, [source_dir], build_deps.BIB_SEARCH_DIRS)
+        if not path:
+            return None
+        parts.append(file_utils.file_hash(path))
+    return build_store.make_key(*parts)
+
+
+def document_key(main_tex):
+    """
+    Store key of a finished document: the content of every input (.tex,
+    tables, images, .bib, vendored classes), the search paths, the settings
+    of the print variants that replace the images and the installed
+    pdflatex and biber. Paths are relative to the checkout, so other
+    worktrees and clones find the same products.
+    """
+    inputs = build_deps.fingerprint(build_deps.collect_dependencies(main_tex))['inputs']
+    search_path = os.environ.get('TEXINPUTS', '').replace(PROJECT_ROOT, '.')
+    return build_store.make_key(os.path.relpath(main_tex, PROJECT_ROOT).replace(os.sep, '/'),
+                                json.dumps(inputs, sort_keys=True), search_path,
+                                json.dumps(image_assets.print_settings(), sort_keys=True),
+                                build_store.tool_identity('pdflatex'), build_store.tool_identity('biber'))
+
+
+def _products(outdir, jobname):
+    return {extension.lstrip('.'): os.path.join(outdir, jobname + extension) for extension in PRODUCT_EXTENSIONS}
+
+
+def biber_env(outdir):
+    """Environment for biber with its unpack cache in `<outdir>/biber-cache`."""
+    cache_dir = os.path.join(outdir, BIBER_CACHE_DIR)
+    os.makedirs(cache_dir, exist_ok=True)
+    return dict(os.environ, PAR_GLOBAL_TEMP=cache_dir)
+
+
+def run_passes(main_tex, outdir, plan, log, fmt=None, parent=None):
+    """
+    Runs pdflatex and biber until latex_log.py finds nothing left to resolve.
+
+    After every pdflatex pass the .log is analyzed: biber runs when biblatex
+    asks for it (or once up front for a full plan), and pdflatex runs again
+    only if LaTeX asks for a rerun, the pass rewrote the auxiliary files it
+    read, or biber produced a different .bbl. A .bbl biber produced before
+    for the same .bcf and .bib files is taken from the build store instead of
+    running biber again. Returns (exit_code, passes per
+    tool, CPU seconds of all passes, diagnostics of the last pass).
+    """
+    source_dir = os.path.dirname(main_tex)
+    jobname = os.path.splitext(os.path.basename(main_tex))[0]
+    pdflatex = (PDFLATEX_COMMAND + (preamble_format.pdflatex_options(fmt) if fmt else [])
+                + [f'-output-directory={outdir}', os.path.basename(main_tex)])
+    biber = BIBER_COMMAND + [f'--input-directory={outdir}', f'--output-directory={outdir}', jobname]
+    passes = {'pdflatex': 0, 'biber': 0}
+    cpu = [0.0, 0.0]
+    diagnostics = []
+    biber_pending = plan == build_deps.FULL
+
+    def run(command, name, env=None):
+        log.write(f"$ {' '.join(command)}\n")
+        log.flush()
+        passes[name] += 1
+        exit_code, event = build_trace.run_traced(command, name, cwd=source_dir, log=log, document=main_tex,
+                                                  category='pass', parent=parent, env=env)
+        if event and event['cpu_user'] is not None:
+            cpu[0] += event['cpu_user']
+            cpu[1] += event['cpu_system']
+        return exit_code
+
+    while True:
+        before = _digests(outdir, jobname, AUX_EXTENSIONS)
+        exit_code = run(pdflatex, 'pdflatex')
+        diagnostics = latex_log.read(os.path.join(outdir, jobname + '.log'), latex_log.parse_log)
+        if exit_code != 0:
+            return exit_code, passes, cpu, diagnostics
+        decision = latex_log.decide(diagnostics, _digests(outdir, jobname, AUX_EXTENSIONS) != before)
+        rerun = decision.latex
+        if (biber_pending or decision.biber) and passes['biber'] < MAX_BIBER_PASSES:
+            biber_pending = False
+            bbl = _digests(outdir, jobname, ('.bbl',))
+            bcf_path = os.path.join(outdir, jobname + '.bcf')
+            key = bbl_key(bcf_path, source_dir) if build_store.enabled() and os.path.exists(bcf_path) else None
+            biber_outputs = {'bbl': os.path.join(outdir, jobname + '.bbl'), 'blg': os.path.join(outdir, jobname + '.blg')}
+            if key and build_store.fetch('bbl', key, biber_outputs):
+                log.write("biber: .bbl restored from the build store\n")
+            else:
+                exit_code = run(biber, 'biber', biber_env(outdir))
+                if exit_code == 0 and key:
+                    build_store.save('bbl', key, biber_outputs)
+            diagnostics += latex_log.read(biber_outputs['blg'], latex_log.parse_blg)
+            if exit_code != 0:
+                return exit_code, passes, cpu, diagnostics
+            rerun = rerun or _digests(outdir, jobname, ('.bbl',)) != bbl
+        if not rerun:
+            return 0, passes, cpu, diagnostics
+        if passes['pdflatex'] >= MAX_LATEX_PASSES:
+            log.write(f"Stopped after {MAX_LATEX_PASSES} pdflatex passes: {'; '.join(decision.reasons)}\n")
+            return 0, passes, cpu, diagnostics
+        log.write(f"Rerun: {'; '.join(decision.reasons) or 'bibliography changed'}\n")
+
+
+def write_diagnostics(path, diagnostics):
+    with file_utils.atomic_write(path) as f:
+        json.dump(latex_log.to_json(diagnostics), f, indent=2)
+
+
+def build_document(main_tex):
+    """
+    Builds one document in its own output directory and returns a BuildResult.
+
+    pdflatex and biber output is written to `<outdir>/<jobname>.build.log`,
+    the diagnostics of the last pass to `<outdir>/<jobname>.diagnostics.json`;
+    the finished PDF is copied next to the source so existing paths keep
+    working. Timings and pass counts go to the build trace (see build_trace.py).
+    Every pdflatex pass runs on the precompiled format of the document's
+    static preamble (see preamble_format.py) when one can be dumped.
+    """
+    main_tex = os.path.abspath(main_tex)
+    source_dir = os.path.dirname(main_tex)
+    jobname = os.path.splitext(os.path.basename(main_tex))[0]
+    outdir = output_dir_for(main_tex)
+    log_path = os.path.join(outdir, jobname + '.build.log')
+    os.makedirs(outdir, exist_ok=True)
+
+    started = time.time()
+    start = time.monotonic()
+    plan = build_deps.plan_build(main_tex, outdir)
+    build_trace.record({'name': 'plan', 'category': 'stage', 'document': main_tex, 'start': started,
+                        'wall': time.monotonic() - start, 'plan': plan})
+    if plan == build_deps.UP_TO_DATE:
+        build_trace.record({'name': 'build', 'category': 'document', 'document': main_tex,
+                            'start': time.time(), 'wall': 0.0, 'exit_code': 0, 'passes': {}, 'plan': plan})
+        return BuildResult(main_tex, plan, 0, time.monotonic() - start, log_path)
+
+    key = document_key(main_tex) if build_store.enabled() else None
+    products = _products(outdir, jobname)
+    if key and build_store.fetch('pdf', key, products, required=['pdf']):
+        # Built before, in this or another checkout, from the same inputs
+        shutil.copy2(products['pdf'], os.path.join(source_dir, jobname + '.pdf'))
+        build_deps.record_build(main_tex)
+        build_trace.record({'name': 'build', 'category': 'document', 'document': main_tex, 'start': started,
+                            'wall': time.monotonic() - start, 'exit_code': 0, 'passes': {}, 'plan': STORED})
+        return BuildResult(main_tex, STORED, 0, time.monotonic() - start, log_path)
+
+    fmt = preamble_format.ensure_format(main_tex, outdir)
+    event = {'name': 'build', 'category': 'document', 'document': main_tex, 'start': time.time(),
+             'id': build_trace.event_id(), 'plan': plan}
+    build_start = time.monotonic()
+    with open(log_path, 'w', encoding='utf-8') as log:
+        exit_code, passes, cpu, diagnostics = run_passes(main_tex, outdir, plan, log, fmt, parent=event['id'])
+    event.update(wall=time.monotonic() - build_start, cpu_user=cpu[0], cpu_system=cpu[1], exit_code=exit_code,
+                 passes=passes, diagnostics=latex_log.summary(diagnostics))
+    build_trace.record(event)
+    write_diagnostics(os.path.join(outdir, jobname + DIAGNOSTICS_SUFFIX), diagnostics)
+    saved_per_pass = fmt['saved'] if fmt else None
+
+    if exit_code == 0:
+        shutil.copy2(products['pdf'], os.path.join(source_dir, jobname + '.pdf'))
+        build_deps.record_build(main_tex)
+        if key:
+            build_store.save('pdf', key, {name: path for name, path in products.items() if os.path.exists(path)})
+        status = plan
+    else:
+        build_deps.forget_build(main_tex)
+        status = 'failed'
+    return BuildResult(main_tex, status, exit_code, time.monotonic() - start, log_path, saved_per_pass,
+                       passes['pdflatex'], diagnostics)
+
+
+def format_savings(result):
+    """Describes the time the preamble format saved, e.g. '0.8s/pass x3 = 2.4s'."""
+    if result.saved_per_pass is None:
+        return '-'
+    return f"{result.saved_per_pass:.1f}s/pass x{result.passes} = {result.saved_per_pass * result.passes:.1f}s"
+
+
+def tail(path, lines=20):
+    if not os.path.exists(path):
+        return ''
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return ''.join(f.readlines()[-lines:])
+
+
+def run_builds(documents, jobs=None):
+    """Builds documents concurrently, running at most `jobs` documents at a time."""
+    jobs = max(1, jobs or os.cpu_count() or 1)
+    results = []
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(build_document, document): document for document in documents}
+        for future in as_completed(futures):
+            document = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"Error building {document}: {e}")
+                result = BuildResult(os.path.abspath(document), 'failed', 1, 0.0, None)
+            rel_path = os.path.relpath(result.document, PROJECT_ROOT)
+            savings = f", preamble format saved {format_savings(result)}" if result.saved_per_pass is not None else ''
+            print(f"[{result.status}] {rel_path} ({result.duration:.1f}s{savings})")
+            errors = [d for d in result.diagnostics if d.severity == latex_log.ERROR]
+            if result.exit_code != 0 and errors:
+                for diagnostic in errors[:MAX_REPORTED_ERRORS]:
+                    print(f"  {latex_log.format_diagnostic(diagnostic)}")
+                print(f"  (all output in {os.path.relpath(result.log_path, PROJECT_ROOT)})")
+            elif result.exit_code != 0 and result.log_path:
+                print(f"--- last lines of {os.path.relpath(result.log_path, PROJECT_ROOT)} ---")
+                print(tail(result.log_path))
+            results.append(result)
+    return results
+
+
+def print_summary(results):
+    print("------------------------------------------------")
+    print(f"{'Document':<40} {'Status':<12} {'Exit':>4} {'Time':>8}  Preamble format saved")
+    for result in sorted(results, key=lambda r: r.document):
+        rel_path = os.path.relpath(result.document, PROJECT_ROOT)
+        print(f"{rel_path:<40} {result.status:<12} {result.exit_code:>4} {result.duration:>7.1f}s  "
+              f"{format_savings(result)}")
+    print("------------------------------------------------")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build LaTeX documents in parallel with isolated output directories.")
+    parser.add_argument('documents', nargs='+', help="main .tex files to build")
+    parser.add_argument('-j', '--jobs', type=int, default=int(os.environ.get('BUILD_JOBS', 0)) or None,
+                        help="maximum number of documents built at once (default: BUILD_JOBS or CPU count)")
+    parser.add_argument('--no-format', action='store_true',
+                        help="run pdflatex without the precompiled preamble formats")
+    args = parser.parse_args(argv)
+    if args.no_format:
+        os.environ[preamble_format.FORMAT_ENV] = '0'
+
+    results = run_builds(args.documents, args.jobs)
+    print_summary(results)
+    return 0 if all(result.exit_code == 0 for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,301 @@
+import argparse
+import functools
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+
+import file_utils
+
+# Bump when the layout of entries changes, so old entries are not used
+STORE_VERSION = 1
+
+# Set to 0 to neither read nor write the store (build.sh --no-store, --clean)
+STORE_ENV = 'BUILD_STORE'
+# Where the store lives; outside the checkout by default, so that worktrees
+# and other clones of the repository share it
+STORE_DIR_ENV = 'BUILD_STORE_DIR'
+MAX_SIZE_ENV = 'BUILD_STORE_MAX_SIZE'
+DEFAULT_MAX_SIZE = 2048  # MiB
+
+STATS_FILE = 'stats.jsonl'
+# Above this size the oldest half of the statistics is dropped on eviction
+MAX_STATS_SIZE = 1024 * 1024
+META_FILE = 'meta.json'
+
+_lock = threading.Lock()
+
+
+def enabled():
+    return os.environ.get(STORE_ENV, '1') != '0'
+
+
+def store_dir():
+    if os.environ.get(STORE_DIR_ENV):
+        return os.environ[STORE_DIR_ENV]
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'bachelor-thesis', 'build-store')
+
+
+def max_size():
+    """Size limit of the store in bytes."""
+    return int(os.environ.get(MAX_SIZE_ENV) or DEFAULT_MAX_SIZE) * 1024 * 1024
+
+
+def make_key(*parts):
+    """Hashes the parts (str or bytes) that identify a build product into a store key."""
+    digest = hashlib.sha256(f"v{STORE_VERSION}".encode())
+    for part in parts:
+        data = part if isinstance(part, bytes) else str(part).encode('utf-8')
+        digest.update(f"\n{len(data)}:".encode())
+        digest.update(data)
+    return digest.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def tool_identity(name):
+    """
+    Identifies an installed tool by path, size and mtime, so products of a
+    different TeX Live or biber version are not reused. Cheaper than running
+    `<tool> --version` for every lookup.
+    """
+    path = shutil.which(name)
+    if not path:
+        return f"{name}:missing"
+    path = os.path.realpath(path)
+    stat = os.stat(path)
+    return f"{name}:{path}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def entry_dir(namespace, key, root=None):
+    return os.path.join(root or store_dir(), 'entries', namespace, key[:2], key)
+
+
+def record(namespace, event, size=0, root=None):
+    """Appends a hit, miss or save to the statistics of the store."""
+    root = root or store_dir()
+    line = json.dumps({'namespace': namespace, 'event': event, 'bytes': size, 'time': time.time()}) + '\n'
+    with _lock:
+        os.makedirs(root, exist_ok=True)
+        with open(os.path.join(root, STATS_FILE), 'a', encoding='utf-8') as f:
+            f.write(line)
+
+
+def load(namespace, key):
+    """
+    Looks up a store entry and returns {name: path} of its files, or None on
+    a miss (or if the store is disabled). A hit marks the entry as recently
+    used. The files belong to the store: copy them, never modify them.
+    """
+    if not enabled():
+        return None
+    directory = entry_dir(namespace, key)
+    meta_path = os.path.join(directory, META_FILE)
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        os.utime(meta_path)
+    except (OSError, ValueError):
+        record(namespace, 'miss')
+        return None
+    files = {name: os.path.join(directory, 'files', name) for name in meta['files']}
+    record(namespace, 'hit', sum(meta['files'].values()))
+    return files
+
+
+def fetch(namespace, key, targets, required=None):
+    """
+    Copies the files of a store entry to `targets` ({name: destination path}),
+    as far as the entry has them. Returns True if the entry exists and has
+    all `required` files (default: all targets).
+    """
+    files = load(namespace, key)
+    if files is None or not set(targets if required is None else required) <= set(files):
+        return False
+    try:
+        for name, destination in targets.items():
+            if name not in files:
+                continue
+            os.makedirs(os.path.dirname(destination) or '.', exist_ok=True)
+            with file_utils.atomic_path(destination) as tmp_path:
+                shutil.copyfile(files[name], tmp_path)
+    except OSError:
+        # Evicted by another build in the meantime
+        return False
+    return True
+
+
+def save(namespace, key, files):
+    """
+    Stores build products under `key`. `files` maps names to paths or to the
+    content as bytes. An existing entry is kept: the key already determines
+    the content. The store is trimmed to its size limit afterwards.
+    """
+    if not enabled():
+        return
+    directory = entry_dir(namespace, key)
+    if os.path.exists(os.path.join(directory, META_FILE)):
+        return
+    tmp_dir = f"{directory}.tmp{os.getpid()}-{threading.get_ident()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(os.path.join(tmp_dir, 'files'))
+    sizes = {}
+    for name, source in files.items():
+        path = os.path.join(tmp_dir, 'files', name)
+        if isinstance(source, bytes):
+            with open(path, 'wb') as f:
+                f.write(source)
+        else:
+            shutil.copyfile(source, path)
+        sizes[name] = os.path.getsize(path)
+    with open(os.path.join(tmp_dir, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump({'namespace': namespace, 'key': key, 'files': sizes, 'created': time.time()}, f)
+    try:
+        os.rename(tmp_dir, directory)
+    except OSError:
+        # Saved by a concurrent build
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return
+    record(namespace, 'save', sum(sizes.values()))
+    evict(max_size())
+
+
+def entries(root=None):
+    """All entries as dicts with namespace, key, path, size and last use, least recently used first."""
+    found = []
+    base = os.path.join(root or store_dir(), 'entries')
+    if not os.path.isdir(base):
+        return found
+    for namespace in sorted(os.listdir(base)):
+        for prefix in os.listdir(os.path.join(base, namespace)):
+            prefix_dir = os.path.join(base, namespace, prefix)
+            for key in os.listdir(prefix_dir):
+                if '.tmp' in key:
+                    continue
+                meta_path = os.path.join(prefix_dir, key, META_FILE)
+                try:
+                    with open(meta_path, 'r', encoding='utf-8') as f:
+                        meta = json.load(f)
+                    used = os.stat(meta_path).st_mtime
+                except (OSError, ValueError):
+                    continue
+                found.append({'namespace': namespace, 'key': key, 'path': os.path.join(prefix_dir, key),
+                              'size': sum(meta['files'].values()), 'used': used})
+    return sorted(found, key=lambda entry: entry['used'])
+
+
+def trim_stats(root=None, limit=None):
+    """
+    Keeps the newest events of the statistics, at most half of `limit` bytes
+    (default MAX_STATS_SIZE), once they exceed `limit`.
+    """
+    limit = limit or MAX_STATS_SIZE
+    path = os.path.join(root or store_dir(), STATS_FILE)
+    with _lock:
+        try:
+            if os.path.getsize(path) <= limit:
+                return
+            with open(path, 'rb') as f:
+                f.seek(-(limit // 2), os.SEEK_END)
+                f.readline()  # the first line is cut off
+                data = f.read()
+        except OSError:
+            return
+        with file_utils.atomic_write(path, 'wb') as f:
+            f.write(data)
+
+
+def evict(limit, root=None):
+    """
+    Removes the least recently used entries until the store is at most
+    `limit` bytes and returns them. Also keeps the statistics from growing
+    forever.
+    """
+    trim_stats(root)
+    items = entries(root)
+    total = sum(entry['size'] for entry in items)
+    removed = []
+    for entry in items:
+        if total <= limit:
+            break
+        shutil.rmtree(entry['path'], ignore_errors=True)
+        total -= entry['size']
+        removed.append(entry)
+    return removed
+
+
+def stats(root=None):
+    """Per namespace: hits, misses, saves, bytes restored, hit rate and the current entries and size."""
+    root = root or store_dir()
+    summary = {}
+
+    def namespace_stats(namespace):
+        return summary.setdefault(namespace, {'hit': 0, 'miss': 0, 'save': 0, 'restored': 0, 'entries': 0, 'size': 0})
+
+    path = os.path.join(root, STATS_FILE)
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                item = namespace_stats(event['namespace'])
+                item[event['event']] += 1
+                if event['event'] == 'hit':
+                    item['restored'] += event['bytes']
+    for entry in entries(root):
+        item = namespace_stats(entry['namespace'])
+        item['entries'] += 1
+        item['size'] += entry['size']
+    for item in summary.values():
+        lookups = item['hit'] + item['miss']
+        item['hit_rate'] = item['hit'] / lookups if lookups else None
+    return summary
+
+
+def _mib(size):
+    return f"{size / 1024 / 1024:.1f} MiB"
+
+
+def print_stats(summary):
+    print(f"Build store: {store_dir()} (limit {_mib(max_size())})")
+    print(f"  {'Namespace':<10} {'Hits':>6} {'Misses':>7} {'Hit rate':>9} {'Saves':>6} {'Entries':>8} {'Size':>11}")
+    for namespace, item in sorted(summary.items()):
+        rate = f"{item['hit_rate']:.0%}" if item['hit_rate'] is not None else '-'
+        print(f"  {namespace:<10} {item['hit']:>6} {item['miss']:>7} {rate:>9} {item['save']:>6} "
+              f"{item['entries']:>8} {_mib(item['size']):>11}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect and trim the content-addressed build store.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    stats_parser = subparsers.add_parser('stats', help="show hit rates and size per kind of build product")
+    stats_parser.add_argument('--json', action='store_true')
+    evict_parser = subparsers.add_parser('evict', help="remove least recently used entries")
+    evict_parser.add_argument('--max-size', type=int, default=None,
+                              help=f"size limit in MiB (default: {MAX_SIZE_ENV} or {DEFAULT_MAX_SIZE})")
+    subparsers.add_parser('clear', help="remove the store and its statistics")
+    args = parser.parse_args(argv)
+
+    if args.command == 'stats':
+        summary = stats()
+        if args.json:
+            print(json.dumps(summary, indent=2, sort_keys=True))
+        else:
+            print_stats(summary)
+    elif args.command == 'evict':
+        limit = args.max_size * 1024 * 1024 if args.max_size is not None else max_size()
+        removed = evict(limit)
+        print(f"Removed {len(removed)} entries ({_mib(sum(entry['size'] for entry in removed))}).")
+    else:
+        shutil.rmtree(store_dir(), ignore_errors=True)
+        print(f"Removed {store_dir()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,217 @@
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TRACE_FILE_NAME = 'build-trace.json'
+CHROME_TRACE_FILE_NAME = 'build-trace.chrome.json'
+
+# Set by build.sh; events of all build processes are appended here as JSON lines
+TRACE_ENV = 'BUILD_TRACE'
+
+_lock = threading.Lock()
+_counter = itertools.count()
+
+
+def event_id():
+    """A new id, unique across the processes of one build; set it to refer to an event before it is recorded."""
+    return f"{os.getpid()}-{next(_counter)}"
+
+
+def record(event, trace_file=None):
+    """Appends one event to the trace file named by $BUILD_TRACE (no-op if unset)."""
+    trace_file = trace_file or os.environ.get(TRACE_ENV)
+    if not trace_file:
+        return
+    event.setdefault('id', event_id())
+    line = json.dumps(event, sort_keys=True) + '\n'
+    with _lock:
+        os.makedirs(os.path.dirname(os.path.abspath(trace_file)), exist_ok=True)
+        with open(trace_file, 'a', encoding='utf-8') as f:
+            f.write(line)
+
+
+def run_traced(command, name, cwd=None, log=None, document=None, category=None, parent=None, env=None):
+    """
+    Runs a command, streaming its output to `log` (or stdout), and records its timing.
+
+    Returns (exit_code, event). The event holds wall and CPU time of the process
+    and its children. `category` and `parent` override the event's category and
+    link it to an enclosing event: build_driver.py runs every pdflatex and biber
+    pass as a 'pass' of its document build and counts the passes itself.
+    `env` replaces the environment of the process.
+    """
+    started = time.time()
+    t0 = time.monotonic()
+    out = log or sys.stdout
+    try:
+        proc = subprocess.Popen(command, cwd=cwd, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                text=True, errors='replace')
+    except OSError as e:
+        out.write(f"Error: could not run {command[0]}: {e}\n")
+        return 127, None
+
+    for line in proc.stdout:
+        out.write(line)
+    proc.stdout.close()
+
+    cpu_user = cpu_system = None
+    if hasattr(os, 'wait4'):
+        # wait4 reports the resource usage of exactly this child (and the
+        # children it waited for), which stays correct for parallel builds
+        _pid, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        cpu_user, cpu_system = usage.ru_utime, usage.ru_stime
+    else:
+        proc.wait()
+
+    wall = time.monotonic() - t0
+    event = {
+        'name': name,
+        'category': category or ('document' if document else 'stage'),
+        'document': document,
+        'start': started,
+        'wall': wall,
+        'cpu_user': cpu_user,
+        'cpu_system': cpu_system,
+        'exit_code': proc.returncode,
+    }
+    if parent:
+        event['parent'] = parent
+    record(event)
+    return proc.returncode, event
+
+
+def load_events(paths):
+    """Reads events from JSON-lines or finished trace files, dropping duplicates."""
+    events = {}
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            if path.endswith('.jsonl'):
+                items = [json.loads(line) for line in f if line.strip()]
+            else:
+                items = json.load(f).get('events', [])
+        for event in items:
+            events[event['id']] = event
+    return sorted(events.values(), key=lambda e: e['start'])
+
+
+def summarize(events):
+    """Per-document totals: build wall/CPU time and number of passes per tool."""
+    documents = {}
+    for event in events:
+        if event['category'] != 'document':
+            continue
+        entry = documents.setdefault(event['document'], {'wall': 0.0, 'cpu': 0.0, 'passes': {}})
+        entry['wall'] += event['wall']
+        entry['cpu'] += (event.get('cpu_user') or 0.0) + (event.get('cpu_system') or 0.0)
+        for tool, count in event.get('passes', {}).items():
+            entry['passes'][tool] = entry['passes'].get(tool, 0) + count
+    return documents
+
+
+def to_chrome_trace(events):
+    """Converts events to the Chrome trace-event format (chrome://tracing, Perfetto)."""
+    lanes = {}
+    trace_events = []
+    origin = min((e['start'] for e in events), default=0.0)
+    for event in events:
+        lane = lanes.setdefault(event.get('document') or 'build', len(lanes) + 1)
+        args = {k: v for k, v in event.items() if k not in ('name', 'start', 'wall', 'category')}
+        trace_events.append({
+            'name': event['name'],
+            'cat': event['category'],
+            'ph': 'X',
+            'ts': int((event['start'] - origin) * 1e6),
+            'dur': int(event['wall'] * 1e6),
+            'pid': 1,
+            'tid': lane,
+            'args': args,
+        })
+    for name, lane in lanes.items():
+        trace_events.append({'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': lane,
+                             'args': {'name': os.path.relpath(name, PROJECT_ROOT) if name != 'build' else name}})
+    return {'traceEvents': trace_events, 'displayTimeUnit': 'ms'}
+
+
+def finish(trace_file, output_dirs, chrome=False):
+    """Writes the collected events as build-trace.json (and optionally a Chrome trace) into each output dir."""
+    events = load_events([trace_file])
+    trace = {'version': 1, 'events': events, 'documents': summarize(events)}
+    for output_dir in output_dirs:
+        os.makedirs(output_dir, exist_ok=True)
+        with open(os.path.join(output_dir, TRACE_FILE_NAME), 'w', encoding='utf-8') as f:
+            json.dump(trace, f, indent=2, sort_keys=True)
+        if chrome:
+            with open(os.path.join(output_dir, CHROME_TRACE_FILE_NAME), 'w', encoding='utf-8') as f:
+                json.dump(to_chrome_trace(events), f)
+        print(f"Build trace written to {os.path.join(output_dir, TRACE_FILE_NAME)}")
+
+
+def print_summary(events, limit=10):
+    def label(event):
+        document = event.get('document')
+        return f"{event['name']} ({os.path.relpath(document, PROJECT_ROOT)})" if document else event['name']
+
+    def cpu(event):
+        if event.get('cpu_user') is None:
+            return '-'
+        return f"{event['cpu_user'] + event['cpu_system']:.1f}s"
+
+    print(f"Slowest stages (top {limit}):")
+    print(f"  {'Stage':<55} {'Wall':>8} {'CPU':>8}")
+    for event in sorted(events, key=lambda e: e['wall'], reverse=True)[:limit]:
+        print(f"  {label(event):<55} {event['wall']:>7.1f}s {cpu(event):>8}")
+
+    print("LaTeX/biber passes per document:")
+    for document, entry in sorted(summarize(events).items()):
+        passes = ', '.join(f"{tool} x{count}" for tool, count in sorted(entry['passes'].items())) or 'skipped'
+        print(f"  {os.path.relpath(document, PROJECT_ROOT):<40} {entry['wall']:>7.1f}s  {passes}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record and summarize build stage timings.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help="run a command as a traced build stage")
+    run_parser.add_argument('name')
+    run_parser.add_argument('stage_command', nargs=argparse.REMAINDER)
+
+    finish_parser = subparsers.add_parser('finish', help="write build-trace.json into the given directories")
+    finish_parser.add_argument('output_dirs', nargs='+')
+    finish_parser.add_argument('--chrome', action='store_true', help="also write Chrome trace-event JSON")
+
+    summary_parser = subparsers.add_parser('summary', help="print the slowest stages of finished traces")
+    summary_parser.add_argument('traces', nargs='+')
+    summary_parser.add_argument('--limit', type=int, default=10)
+
+    args = parser.parse_args(argv)
+    if args.command == 'run':
+        command = args.stage_command[1:] if args.stage_command[:1] == ['--'] else args.stage_command
+        exit_code, _event = run_traced(command, args.name)
+        return exit_code
+    if args.command == 'finish':
+        trace_file = os.environ.get(TRACE_ENV)
+        if not trace_file:
+            print(f"Error: ${TRACE_ENV} is not set.")
+            return 1
+        finish(trace_file, args.output_dirs, chrome=args.chrome)
+        return 0
+
+    events = load_events(args.traces)
+    if not events:
+        print("No build trace found. Run ./scripts/build.sh first.")
+        return 1
+    print_summary(events, args.limit)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,811 @@
+import argparse
+import glob
+import hashlib
+import html
+import json
+import os
+import re
+import sys
+import unicodedata
+
+import export_references
+import project_index
+from file_utils import load_cache, save_cache, write_if_changed
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONTENT_DIR = os.path.join(PROJECT_ROOT, 'content')
+OUTPUT_DIR = os.path.join(PROJECT_ROOT, 'webapp', 'static', 'content')
+CACHE_DIR = os.path.join(PROJECT_ROOT, '.cache', 'content')
+IMAGE_URL = '/images/'
+# Responsive variants written by image_assets.py; figures whose image is listed get a srcset
+IMAGE_MANIFEST = os.path.join(PROJECT_ROOT, 'webapp', 'static', 'assets', 'images.json')
+IMAGE_SIZES = '(min-width: 800px) 800px, 100vw'
+# Glossary table shown on the webapp's /glossar page, one entry per row
+GLOSSARY_FILE = os.path.join(CONTENT_DIR, 'resources', 'tables', '07_glossar.tex')
+GRAPHICS_PATTERN = re.compile(r'\\includegraphics(?:\[[^\]]*\])?\{([^}]+)\}')
+
+# Bump when the HTML output changes so all cached sections are compiled again
+COMPILER_VERSION = 1
+
+SUBFILE_PATTERN = re.compile(r'\\(subfile|input)\{([^}]+)\}')
+DOCUMENT_BODY = re.compile(r'\\begin\{document\}(.*?)\\end\{document\}', re.DOTALL)
+HEADING_PATTERN = re.compile(r'\\(section|subsection)(\*?)\s*(?=[\[{])')
+BIBLIOGRAPHY_PATTERN = re.compile(r'\\printbibliography(?:\[([^\]]*)\])?')
+LABEL_PATTERN = re.compile(r'\\label\{([^}]+)\}')
+FLOAT_PATTERN = re.compile(r'\\begin\{(figure|table)\}|\\label\{([^}]+)\}')
+BLANK_LINES = re.compile(r'\n\s*\n')
+NAME_PATTERN = re.compile(r'[A-Za-z@]+\*?')
+# Page layout environments that may span headings; removed before the body is split
+PAGE_ENVIRONMENTS = re.compile(r'\\(?:begin|end)\{landscape\}')
+
+# Inline commands rendered as HTML elements around their argument
+FORMATTING = {'textbf': 'strong', 'textit': 'em', 'emph': 'em', 'textsl': 'em', 'underline': 'u',
+              'texttt': 'code', 'enquote': 'q'}
+# Commands whose arguments are dropped entirely
+DROPPED = {'label': 1, 'vspace': 1, 'hspace': 1, 'phantom': 1, 'vphantom': 1, 'caption': 1, 'includegraphics': 1,
+           'setcounter': 2, 'addtocounter': 2, 'renewcommand': 2, 'newcommand': 2, 'pagenumbering': 1,
+           'thispagestyle': 1, 'pagestyle': 1, 'nocite': 1, 'cmidrule': 1, 'graphicspath': 1}
+SYMBOLS = {'ldots': '\u2026', 'dots': '\u2026', 'LaTeX': 'LaTeX', 'TeX': 'TeX', 'to': '\u2192',
+           'rightarrow': '\u2192', 'leftarrow': '\u2190', 'ge': '\u2265', 'geq': '\u2265', 'le': '\u2264',
+           'leq': '\u2264', 'neq': '\u2260', 'times': '\u00d7', 'pm': '\u00b1', 'approx': '\u2248',
+           'alpha': '\u03b1', 'beta': '\u03b2', 'gamma': '\u03b3', 'delta': '\u03b4', 'lambda': '\u03bb',
+           'mu': '\u03bc', 'sigma': '\u03c3', 'chi': '\u03c7', 'rho': '\u03c1', 'eta': '\u03b7',
+           'checkmark': '\u2713', 'quad': ' ', 'qquad': ' ', 'textendash': '\u2013', 'textemdash': '\u2014',
+           'S': '\u00a7', 'euro': '\u20ac', 'textasciitilde': '~', 'textbackslash': '\\', 'newline': '<br>',
+           'linebreak': '<br>'}
+ESCAPED = {'%': '%', '&': '&amp;', '_': '_', '#': '#', '$': '$', '{': '{', '}': '}', ',': '\u2009',
+           ' ': ' ', ';': ' ', '!': '', '-': '', '/': '', '\\': '<br>'}
+# Environments that are unwrapped, and environments that are not shown on the web at all
+UNWRAPPED = ('center', 'landscape', 'threeparttable', 'minipage', 'flushleft', 'flushright', 'small')
+SKIPPED = ('ganttchart', 'tikzpicture', 'comment')
+LISTS = {'itemize': 'ul', 'enumerate': 'ol'}
+QUOTES = ('quote', 'quotation', 'displayquote')
+TABULARS = ('tabular', 'tabularx', 'tabular*', 'longtable')
+ITEM_PATTERN = re.compile(r'\\item(\[[^\]]*\])?')
+RULES = re.compile(r'\\(toprule|midrule|bottomrule|hline|cmidrule(\([^)]*\))?\{[^}]*\})')
+
+TRANSLITERATION = {'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'ß': 'ss'}
+
+
+def read_group(text, pos, open_char='{', close_char='}'):
+    """Returns (content, end) of the balanced group starting at text[pos] == open_char."""
+    depth = 0
+    for i in range(pos, len(text)):
+        char = text[i]
+        if char == '\\':
+            continue
+        if char == open_char and (i == 0 or text[i - 1] != '\\'):
+            depth += 1
+        elif char == close_char and text[i - 1] != '\\':
+            depth -= 1
+            if depth == 0:
+                return text[pos + 1:i], i + 1
+    return text[pos + 1:], len(text)
+
+
+def read_arguments(text, pos, required=1, optional=2):
+    """Reads up to `optional` [...] and then `required` {...} arguments; returns (optionals, args, end)."""
+    optionals, args = [], []
+    while len(optionals) < optional:
+        skipped = pos
+        while skipped < len(text) and text[skipped] in ' \t':
+            skipped += 1
+        if skipped < len(text) and text[skipped] == '[':
+            value, pos = read_group(text, skipped, '[', ']')
+            optionals.append(value)
+        else:
+            break
+    while len(args) < required:
+        skipped = pos
+        while skipped < len(text) and text[skipped] in ' \t\n':
+            skipped += 1
+        if skipped < len(text) and text[skipped] == '{':
+            value, pos = read_group(text, skipped)
+            args.append(value)
+        else:
+            break
+    return optionals, args, pos
+
+
+def strip_comments(text):
+    return '\n'.join(project_index.COMMENT_PATTERN.sub('', line) for line in text.split('\n'))
+
+
+def resolve_tex(path, base_dir, main_dir):
+    """Resolves a \\subfile/\\input path relative to the including file, then to the main file."""
+    candidates = [path if path.endswith('.tex') else path + '.tex', path]
+    for directory in (base_dir, main_dir):
+        for candidate in candidates:
+            full = os.path.normpath(os.path.join(directory, candidate))
+            if os.path.isfile(full):
+                return full
+    return None
+
+
+def expand_document(main_tex):
+    """
+    Returns the document body with all \\subfile and \\input files inlined,
+    comments removed, and the list of files it was read from.
+    """
+    main_dir = os.path.dirname(os.path.abspath(main_tex))
+    files = []
+
+    def expand(path, stack):
+        files.append(path)
+        with open(path, 'r', encoding='utf-8') as f:
+            text = strip_comments(f.read())
+        body = DOCUMENT_BODY.search(text)
+        if body:
+            text = body.group(1)
+        base_dir = os.path.dirname(path)
+
+        def include(match):
+            target = resolve_tex(match.group(2), base_dir, main_dir)
+            if target is None or target in stack:
+                return ''
+            return '\n\n' + expand(target, stack + (target,)) + '\n\n'
+
+        return SUBFILE_PATTERN.sub(include, text)
+
+    main = os.path.abspath(main_tex)
+    return PAGE_ENVIRONMENTS.sub('', expand(main, (main,))), files
+
+
+def slugify(title):
+    text = ''.join(TRANSLITERATION.get(c, c) for c in title.lower())
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9]+', '-', text).strip('-') or 'section'
+
+
+def split_sections(body):
+    """
+    Splits a document body at \\section and \\subsection commands (and a
+    numbered \\printbibliography). Returns a list of section dicts with their
+    LaTeX `source`, `intro` and `subsections` [{title, body}].
+    """
+    headings = []
+    for match in HEADING_PATTERN.finditer(body):
+        optionals, args, end = read_arguments(body, match.end(), required=1, optional=1)
+        title = optionals[0] if optionals else (args[0] if args else '')
+        headings.append((match.start(), end, match.group(1), not match.group(2), title))
+    for match in BIBLIOGRAPHY_PATTERN.finditer(body):
+        options = match.group(1) or ''
+        title = re.search(r'title\s*=\s*\{([^}]*)\}', options)
+        headings.append((match.start(), match.start(), 'bibliography', 'bibnumbered' in options,
+                         title.group(1) if title else 'Literatur'))
+    headings.sort()
+
+    sections = []
+    for i, (start, end, kind, numbered, title) in enumerate(headings):
+        stop = headings[i + 1][0] if i + 1 < len(headings) else len(body)
+        text = body[end:stop]
+        if kind == 'subsection':
+            if sections:
+                sections[-1]['subsections'].append({'title': title, 'numbered': numbered, 'body': text})
+                sections[-1]['source'] += body[start:stop]
+            continue
+        sections.append({'title': title, 'numbered': numbered, 'bibliography': kind == 'bibliography',
+                         'intro': text, 'subsections': [], 'source': body[start:stop]})
+    return sections
+
+
+def number_floats(body):
+    """Numbers figures and tables in document order; returns {label: number} for \\ref."""
+    counters = {'figure': 0, 'table': 0}
+    labels, current = {}, None
+    for match in FLOAT_PATTERN.finditer(body):
+        if match.group(1):
+            counters[match.group(1)] += 1
+            current = str(counters[match.group(1)])
+        elif current is not None:
+            labels[match.group(2)] = current
+            current = None
+    return labels
+
+
+def last_name(author):
+    return author.split(',')[0].strip() if ',' in author else author.strip()
+
+
+class Citations:
+    """Resolves citation keys against the exported references (webapp schema)."""
+
+    def __init__(self, references):
+        self.references = references
+        self.used = []
+        self.unresolved = []
+
+    def lookup(self, key):
+        reference = self.references.get(key)
+        if key not in self.used:
+            self.used.append(key)
+        if reference is None and key not in self.unresolved:
+            self.unresolved.append(key)
+        return reference
+
+    def names(self, reference, conjunction):
+        names = [last_name(a) for a in reference['authors']]
+        if len(names) == 1:
+            return names[0]
+        if len(names) == 2:
+            return f"{names[0]} {conjunction} {names[1]}"
+        return f"{names[0]} et al."
+
+    def year(self, reference):
+        return str(reference['year']) if reference['year'] else 'o. J.'
+
+    def cite(self, command, keys, prenote='', postnote=''):
+        """Renders \\parencite, \\textcite, \\cite and \\fullcite as APA-style HTML."""
+        parts = []
+        for key in (k.strip() for k in keys.split(',') if k.strip()):
+            reference = self.lookup(key)
+            if reference is None:
+                text = html.escape(key)
+            elif command == 'fullcite':
+                text = self.full(reference)
+            elif command == 'textcite':
+                text = f"{html.escape(self.names(reference, 'und'))} ({self.year(reference)})"
+            else:
+                text = f"{html.escape(self.names(reference, '&'))}, {self.year(reference)}"
+            css = '' if reference is not None else ' class="unresolved"'
+            parts.append(f'<cite data-ref="{html.escape(key)}"{css}>{text}</cite>')
+        text = ('; ' if command != 'textcite' else ', ').join(parts)
+        if command in ('fullcite', 'textcite'):
+            return text
+        if prenote:
+            text = f"{prenote} {text}"
+        if postnote:
+            text = f"{text}, {postnote}"
+        return f"({text})" if command == 'parencite' else text
+
+    def full(self, reference):
+        authors = [html.escape(a) for a in reference['authors']]
+        names = authors[0] if len(authors) == 1 else ', '.join(authors[:-1]) + ', &amp; ' + authors[-1]
+        source = reference.get('journal') or reference.get('booktitle') or reference.get('publisher') or ''
+        text = f"{names} ({self.year(reference)}). {html.escape(reference['title'])}."
+        if source:
+            text += f" <em>{html.escape(source)}</em>"
+            if reference.get('volume'):
+                text += f", {html.escape(reference['volume'])}"
+            text += '.'
+        if reference.get('doi'):
+            doi = reference['doi'] if reference['doi'].startswith('http') else 'https://doi.org/' + reference['doi']
+            text += f' <a href="{html.escape(doi)}">{html.escape(doi)}</a>'
+        return text
+
+
+class Converter:
+    """Converts the LaTeX of one section to HTML."""
+
+    def __init__(self, citations, labels, images=None):
+        self.citations = citations
+        self.labels = labels
+        self.images = images or {}
+
+    # Inline ------------------------------------------------------------
+
+    def inline(self, text):
+        out = []
+        pos, length = 0, len(text)
+        while pos < length:
+            char = text[pos]
+            if char == '\\':
+                pos = self._command(text, pos, out)
+            elif char == '$':
+                end = text.find('$', pos + 1)
+                end = length if end == -1 else end
+                out.append(self._math(text[pos + 1:end]))
+                pos = end + 1
+            elif char in '{}':
+                pos += 1
+            elif char == '~':
+                out.append('\u00a0')
+                pos += 1
+            elif text.startswith('---', pos):
+                out.append('\u2014')
+                pos += 3
+            elif text.startswith('--', pos):
+                out.append('\u2013')
+                pos += 2
+            elif text.startswith('``', pos):
+                out.append('\u201c')
+                pos += 2
+            elif text.startswith("''", pos):
+                out.append('\u201d')
+                pos += 2
+            elif char.isspace():
+                out.append(' ')
+                while pos < length and text[pos].isspace():
+                    pos += 1
+            else:
+                out.append(html.escape(char, quote=False))
+                pos += 1
+        return ''.join(out).strip()
+
+    def _command(self, text, pos, out):
+        name = NAME_PATTERN.match(text, pos + 1)
+        if not name:
+            out.append(ESCAPED.get(text[pos + 1:pos + 2], html.escape(text[pos + 1:pos + 2])))
+            return pos + 2
+        command = name.group().rstrip('*')
+        end = name.end()
+        if 'cite' in command:
+            optionals, args, end = read_arguments(text, end)
+            prenote, postnote = ('', optionals[0]) if len(optionals) == 1 else (optionals + ['', ''])[:2]
+            out.append(self.citations.cite(command, args[0] if args else '', self.inline(prenote),
+                                           self.inline(postnote)))
+        elif command in FORMATTING:
+            _optionals, args, end = read_arguments(text, end, optional=0)
+            tag = FORMATTING[command]
+            out.append(f"<{tag}>{self.inline(args[0] if args else '')}</{tag}>")
+        elif command == 'url':
+            _optionals, args, end = read_arguments(text, end, optional=0)
+            url = html.escape(args[0] if args else '')
+            out.append(f'<a href="{url}">{url}</a>')
+        elif command == 'href':
+            _optionals, args, end = read_arguments(text, end, required=2, optional=0)
+            url, label = (args + ['', ''])[:2]
+            out.append(f'<a href="{html.escape(url)}">{self.inline(label)}</a>')
+        elif command in ('ref', 'autoref', 'cref', 'Cref', 'pageref'):
+            _optionals, args, end = read_arguments(text, end, optional=0)
+            out.append(html.escape(self.labels.get(args[0], '??') if args else '??'))
+        elif command in DROPPED:
+            _optionals, _args, end = read_arguments(text, end, required=DROPPED[command], optional=1)
+        elif command == 'resizebox':
+            _optionals, args, end = read_arguments(text, end, required=3, optional=0)
+            out.append(self.inline(args[2]) if len(args) == 3 else '')
+        elif command in SYMBOLS:
+            out.append(SYMBOLS[command])
+            # A space after a command word only terminates it
+            if end < len(text) and text[end] == ' ' and command not in ('quad', 'qquad'):
+                end += 1
+        # Any other command (\centering, \newpage, \small, ...) is dropped; its arguments stay as text
+        return end
+
+    def _math(self, text):
+        converted = re.sub(r'\\([A-Za-z]+)\s*', lambda m: SYMBOLS.get(m.group(1), ''), text)
+        converted = converted.replace('{', '').replace('}', '').replace('^', '').replace('_', '')
+        return html.escape(converted, quote=False)
+
+    # Blocks ------------------------------------------------------------
+
+    def blocks(self, text):
+        """Converts paragraphs, lists, quotes, figures and tables; returns HTML."""
+        out = []
+        pos = 0
+        pattern = re.compile(r'\\begin\{([^}]+)\}|\\(subsubsection|paragraph)\*?\s*(?=[\[{])')
+        while True:
+            match = pattern.search(text, pos)
+            chunk = text[pos:match.start() if match else len(text)]
+            out.extend(self.paragraphs(chunk))
+            if not match:
+                break
+            if match.group(2):
+                optionals, args, pos = read_arguments(text, match.end(), optional=1)
+                title = optionals[0] if optionals else (args[0] if args else '')
+                tag = 'h4' if match.group(2) == 'subsubsection' else 'h5'
+                out.append(f"<{tag}>{self.inline(title)}</{tag}>")
+                continue
+            name = match.group(1)
+            inner, pos = self._environment(text, match.end(), name)
+            out.append(self.environment(name, inner))
+        return '\n'.join(part for part in out if part)
+
+    def _environment(self, text, start, name):
+        """Returns (content, end) of the environment `name` whose \\begin ends at `start`."""
+        begin, end = f"\\begin{{{name}}}", f"\\end{{{name}}}"
+        depth, pos = 1, start
+        while depth:
+            next_begin = text.find(begin, pos)
+            next_end = text.find(end, pos)
+            if next_end == -1:
+                return text[start:], len(text)
+            if next_begin != -1 and next_begin < next_end:
+                depth += 1
+                pos = next_begin + len(begin)
+            else:
+                depth -= 1
+                pos = next_end + len(end)
+        return text[start:pos - len(end)], pos
+
+    def paragraphs(self, text):
+        return [f"<p>{html_text}</p>" for html_text in (self.inline(p) for p in BLANK_LINES.split(text))
+                if html_text]
+
+    def environment(self, name, inner):
+        if name in SKIPPED:
+            return ''
+        if name in UNWRAPPED:
+            return self.blocks(inner)
+        if name in LISTS:
+            items = ''.join(f"<li>{self._item(item)}</li>" for _term, item in self._items(inner))
+            return f"<{LISTS[name]}>{items}</{LISTS[name]}>"
+        if name == 'description':
+            items = ''.join(f"<dt>{self.inline(term)}</dt><dd>{self._item(item)}</dd>"
+                            for term, item in self._items(inner))
+            return f"<dl>{items}</dl>"
+        if name in QUOTES:
+            return f"<blockquote>{self.blocks(inner)}</blockquote>"
+        if name in ('figure', 'figure*', 'table', 'table*'):
+            # Drop the placement option ([h!], [H], ...)
+            stripped = inner.lstrip()
+            if stripped.startswith('['):
+                inner = stripped[read_group(stripped, 0, '[', ']')[1]:]
+            if name.startswith('figure'):
+                return self._figure(inner)
+            return self._table_float(inner)
+        if name in TABULARS:
+            return self._tabular(name, inner)
+        if name == 'tablenotes':
+            return '<p class="note">' + self.inline(ITEM_PATTERN.sub(' ', inner)) + '</p>'
+        return self.blocks(inner)
+
+    def _items(self, inner):
+        """Splits list content at its top-level \\item commands; yields (term, text)."""
+        parts, depth, last = [], 0, None
+        token = re.compile(r'\\begin\{|\\end\{|\\item\b')
+        for match in token.finditer(inner):
+            if match.group() == '\\begin{':
+                depth += 1
+            elif match.group() == '\\end{':
+                depth -= 1
+            elif depth == 0:
+                if last is not None:
+                    parts.append(inner[last:match.start()])
+                last = match.end()
+        if last is not None:
+            parts.append(inner[last:])
+        for part in parts:
+            term = ''
+            stripped = part.lstrip()
+            if stripped.startswith('['):
+                term, end = read_group(stripped, 0, '[', ']')
+                part = stripped[end:]
+            yield term, part
+
+    def _item(self, text):
+        converted = self.blocks(text)
+        # A single paragraph is shown without <p> inside the list item
+        if converted.startswith('<p>') and converted.count('<p>') == 1 and converted.endswith('</p>'):
+            return converted[3:-4]
+        return converted
+
+    def _caption(self, inner):
+        match = re.search(r'\\caption\s*(?=[\[{])', inner)
+        if not match:
+            return ''
+        optionals, args, _end = read_arguments(inner, match.end(), optional=1)
+        return self.inline(args[0] if args else '')
+
+    def _figure(self, inner):
+        caption = self._caption(inner)
+        images = []
+        for match in re.finditer(r'\\includegraphics', inner):
+            _optionals, args, _end = read_arguments(inner, match.end(), optional=1)
+            if args:
+                name = os.path.basename(args[0].strip())
+                alt = html.escape(re.sub(r'<[^>]+>', '', caption))
+                images.append(self._image(name, alt))
+        label = LABEL_PATTERN.search(inner)
+        number = self.labels.get(label.group(1)) if label else None
+        prefix = f"<strong>Abbildung {number}</strong> " if number else ''
+        return f"<figure>{''.join(images)}<figcaption>{prefix}{caption}</figcaption></figure>"
+
+    def _image(self, name, alt):
+        variants = self.images.get(name)
+        if not variants or not variants.get('src'):
+            return f'<img src="{html.escape(IMAGE_URL + name)}" alt="{alt}" loading="lazy">'
+        sources = ''.join(f'<source type="{mime}" srcset="{html.escape(srcset)}" sizes="{IMAGE_SIZES}">'
+                          for mime, srcset in sorted(variants['srcset'].items(), reverse=True)
+                          if mime != 'image/jpeg')
+        size = f' width="{variants["width"]}" height="{variants["height"]}"' if 'width' in variants else ''
+        fallback = html.escape(variants['srcset'].get('image/jpeg', ''))
+        return (f'<picture>{sources}<img src="{html.escape(variants["src"])}" srcset="{fallback}" '
+                f'sizes="{IMAGE_SIZES}"{size} alt="{alt}" loading="lazy"></picture>')
+
+    def _table_float(self, inner):
+        caption = self._caption(inner)
+        label = LABEL_PATTERN.search(inner)
+        number = self.labels.get(label.group(1)) if label else None
+        prefix = f"<strong>Tabelle {number}</strong> " if number else ''
+        body = self.blocks(inner)
+        return f'<figure class="table"><figcaption>{prefix}{caption}</figcaption>{body}</figure>'
+
+    def _tabular(self, name, inner):
+        # Skip the width and column specification
+        _optionals, _args, pos = read_arguments(inner, 0, required=2 if name in ('tabularx', 'tabular*') else 1,
+                                                optional=1)
+        inner = inner[pos:]
+        head, _, rest = inner.partition('\\midrule')
+        if not rest:
+            head, rest = '', inner
+        rows = []
+        for part, cell in ((head, 'th'), (rest, 'td')):
+            for row in re.split(r'\\\\(?:\[[^\]]*\])?', RULES.sub('', part)):
+                if not row.strip():
+                    continue
+                cells = re.split(r'(?<!\\)&', row)
+                cells_html = ''.join(self._cell(c, cell) for c in cells)
+                rows.append((cell, f"<tr>{cells_html}</tr>"))
+        thead = ''.join(row for cell, row in rows if cell == 'th')
+        tbody = ''.join(row for cell, row in rows if cell == 'td')
+        return f"<table>{'<thead>' + thead + '</thead>' if thead else ''}<tbody>{tbody}</tbody></table>"
+
+    def _cell(self, text, tag):
+        match = re.match(r'\s*\\multicolumn\{(\d+)\}\{[^}]*\}', text)
+        span = ''
+        if match:
+            _optionals, args, _end = read_arguments(text, match.end(), optional=0)
+            text = args[0] if args else ''
+            span = f' colspan="{match.group(1)}"'
+        return f"<{tag}{span}>{self.inline(text)}</{tag}>"
+
+
+def bibliography_html(citations, keys):
+    items = ''.join(f'<li id="ref-{html.escape(key)}">{citations.full(citations.references[key])}</li>'
+                    for key in keys if key in citations.references)
+    return f'<ol class="references">{items}</ol>'
+
+
+def load_references(cache_dir=None, entries=None):
+    """{key or alias: Reference} from the bibliography (or `entries`), as exported for the webapp."""
+    if entries is None:
+        entries = export_references.load_entries(cache_dir=cache_dir)
+    references = {}
+    for entry in entries:
+        reference = export_references.convert_entry(entry)
+        references[entry.key] = reference
+        for alias in entry.fields.get('ids', '').split(','):
+            if alias.strip():
+                references.setdefault(alias.strip(), reference)
+    return references
+
+
+def load_images(manifest_file=IMAGE_MANIFEST):
+    """The image variants from image_assets.py by file name and stem, {} if there are none."""
+    manifest = load_cache(manifest_file)
+    images = {}
+    for rel_path, variants in manifest.items():
+        name = rel_path.rsplit('/', 1)[-1]
+        images[name] = variants
+        images.setdefault(os.path.splitext(name)[0], variants)
+    return images
+
+
+def table_rows(text):
+    """Rows of the first tabular in `text` as lists of LaTeX cells: the header row, then the body rows."""
+    text = strip_comments(text)
+    head, _, body = text.partition('\\midrule')
+    head = re.split(r'\\\\', head.split('\\toprule')[-1])[0]
+    body = body.split('\\bottomrule')[0]
+    rows = [re.split(r'(?<!\\)&', row) for row in [head] + re.split(r'\\\\', body)]
+    return [[cell.strip() for cell in row] for row in rows if row[0].strip()]
+
+
+def compile_glossary(glossary_file=GLOSSARY_FILE):
+    """
+    {columns, terms} of the glossary table; every term has the anchor `id` it
+    gets on the glossary page and its other cells as HTML.
+    """
+    with open(glossary_file, 'r', encoding='utf-8') as f:
+        header, *rows = table_rows(f.read())
+    converter = Converter(Citations({}), {})
+    terms, used_ids = [], set()
+    for cells in rows:
+        term = html.unescape(converter.inline(cells[0]))
+        slug, n = slugify(term), 2
+        term_id = slug
+        while term_id in used_ids:
+            term_id, n = f"{slug}-{n}", n + 1
+        used_ids.add(term_id)
+        terms.append({'id': term_id, 'term': term, 'cells': [converter.inline(cell) for cell in cells[1:]]})
+    columns = [html.unescape(re.sub(r'<[^>]+>', '', converter.inline(cell))) for cell in header]
+    return {'columns': columns, 'terms': terms}
+
+
+def section_key(section, labels, references, cited_all, images=None):
+    """Hash of a section's LaTeX plus the reference data, float numbers and image variants it uses."""
+    source = section['source']
+    keys = sorted(set(k.strip() for _cmd, ks in project_index.CITE_PATTERN.findall(source)
+                      for k in ks.split(',')))
+    if section['bibliography']:
+        keys = cited_all
+    used_labels = sorted(set(re.findall(r'\\(?:[a-zA-Z]*ref|label)\{([^}]+)\}', source)))
+    used_images = sorted(set(os.path.basename(name.strip()) for name in GRAPHICS_PATTERN.findall(source)))
+    text = json.dumps({
+        'version': COMPILER_VERSION,
+        'source': source,
+        'number': section.get('number'),
+        'references': [references.get(k) for k in keys],
+        'labels': [labels.get(label) for label in used_labels],
+        'images': [(images or {}).get(name) for name in used_images],
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def compile_section(section, converter, cited_all):
+    """Returns the JSON chunk of one section."""
+    used_ids = set()
+
+    def unique(slug):
+        candidate, n = slug, 2
+        while candidate in used_ids:
+            candidate, n = f"{slug}-{n}", n + 1
+        used_ids.add(candidate)
+        return candidate
+
+    # The intro first, so citations are listed in document order
+    content = converter.blocks(section['intro'])
+    subsections = []
+    counter = 0
+    for subsection in section['subsections']:
+        number = None
+        if subsection['numbered'] and section['number']:
+            counter += 1
+            number = f"{section['number']}.{counter}"
+        title = re.sub(r'<[^>]+>', '', converter.inline(subsection['title']))
+        subsections.append({
+            'id': unique(slugify(title)),
+            'number': number,
+            'title': title,
+            'content': converter.blocks(subsection['body']),
+        })
+
+    if section['bibliography']:
+        content = bibliography_html(converter.citations, cited_all)
+    chunk = {
+        'id': section['id'],
+        'number': section['number'],
+        'title': section['title_text'],
+        'wordCount': project_index.count_words(section['source']),
+        'content': content,
+    }
+    if subsections:
+        chunk['subsections'] = subsections
+    chunk['citations'] = list(converter.citations.used)
+    return chunk
+
+
+def prepare_document(main_tex, references):
+    """
+    Expands and splits `main_tex`. Returns (sections, labels, cited keys, files)
+    with the `id`, `number` and `title_text` of every section set.
+    """
+    body, files = expand_document(main_tex)
+    sections = split_sections(body)
+    labels = number_floats(body)
+    cited_all = []
+    for _cmd, keys in project_index.CITE_PATTERN.findall(body):
+        for key in keys.split(','):
+            if key.strip() and key.strip() != '*' and key.strip() not in cited_all:
+                cited_all.append(key.strip())
+
+    used_ids = set()
+    counter = 0
+    for section in sections:
+        plain = Converter(Citations(references), labels)
+        section['title_text'] = re.sub(r'<[^>]+>', '', plain.inline(section['title']))
+        slug, n = slugify(section['title_text']), 2
+        section['id'] = slug
+        while section['id'] in used_ids:
+            section['id'], n = f"{slug}-{n}", n + 1
+        used_ids.add(section['id'])
+        if section['numbered']:
+            counter += 1
+        section['number'] = str(counter) if section['numbered'] else ''
+    return sections, labels, cited_all, files
+
+
+def compile_document(main_tex, output_dir, cache_file=None, references=None, force=False, images=None):
+    """
+    Compiles the \\subfile tree of `main_tex` into one JSON file per section
+    plus an index.json in `output_dir`.
+
+    A section is only compiled again when the hash of its LaTeX, the references
+    it cites, the float numbers it refers to or the variants of its images
+    changed. Returns a report dict.
+    """
+    if references is None:
+        references = load_references()
+    if images is None:
+        images = load_images()
+    sections, labels, cited_all, files = prepare_document(main_tex, references)
+
+    cache = {} if force else load_cache(cache_file, COMPILER_VERSION)
+
+    os.makedirs(output_dir, exist_ok=True)
+    report = {'compiled': [], 'cached': [], 'written': [], 'removed': [], 'unresolved': []}
+    index = []
+    keys = {}
+    for section in sections:
+        filename = os.path.join(output_dir, f"{section['id']}.json")
+        key = section_key(section, labels, references, cited_all, images)
+        keys[section['id']] = key
+        cached = cache.get(section['id'])
+        if cached and cached['key'] == key and os.path.exists(filename):
+            chunk = cached['summary']
+            report['cached'].append(section['id'])
+        else:
+            converter = Converter(Citations(references), labels, images)
+            full = compile_section(section, converter, cited_all)
+            if write_if_changed(filename, json.dumps(full, ensure_ascii=False, indent=2) + "\n"):
+                report['written'].append(filename)
+            report['compiled'].append(section['id'])
+            report['unresolved'].extend(k for k in converter.citations.unresolved if k not in report['unresolved'])
+            chunk = {
+                'id': full['id'],
+                'number': full['number'],
+                'title': full['title'],
+                'wordCount': full['wordCount'],
+                'subsections': [{'id': s['id'], 'number': s['number'], 'title': s['title']}
+                                for s in full.get('subsections', [])],
+                'unresolved': converter.citations.unresolved,
+            }
+            cache[section['id']] = {'key': key, 'summary': chunk}
+        index.append({
+            'id': chunk['id'],
+            'number': chunk['number'],
+            'title': chunk['title'],
+            'wordCount': chunk['wordCount'],
+            'subsections': chunk['subsections'],
+            'file': f"{chunk['id']}.json",
+            # Changes with the section content, so the webapp can cache chunks per hash
+            'hash': key[:12],
+        })
+        if section['id'] in report['cached']:
+            report['unresolved'].extend(k for k in chunk['unresolved'] if k not in report['unresolved'])
+
+    document = os.path.basename(os.path.dirname(os.path.abspath(main_tex)))
+    index_file = os.path.join(output_dir, 'index.json')
+    if write_if_changed(index_file, json.dumps({'document': document, 'sections': index},
+                                               ensure_ascii=False, indent=2) + "\n"):
+        report['written'].append(index_file)
+
+    # Chunks of sections that no longer exist
+    for path in sorted(glob.glob(os.path.join(output_dir, '*.json'))):
+        name = os.path.basename(path)[:-len('.json')]
+        if name != 'index' and name not in keys:
+            os.remove(path)
+            report['removed'].append(path)
+    cache = {name: entry for name, entry in cache.items() if name in keys}
+    if cache_file:
+        save_cache(cache_file, cache, COMPILER_VERSION)
+    report['sections'] = len(sections)
+    report['files'] = files
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile a LaTeX document into per-section JSON for the webapp.")
+    parser.add_argument('documents', nargs='*', default=['prestudy'],
+                        help="documents below content/ (default: prestudy)")
+    parser.add_argument('--output-dir', default=OUTPUT_DIR,
+                        help="a subdirectory per document is written here (default: webapp/static/content)")
+    parser.add_argument('--force', action='store_true', help="ignore the cache and compile all sections")
+    args = parser.parse_args(argv)
+
+    references = load_references()
+    status = 0
+    if os.path.exists(GLOSSARY_FILE):
+        glossary = compile_glossary(GLOSSARY_FILE)
+        os.makedirs(args.output_dir, exist_ok=True)
+        write_if_changed(os.path.join(args.output_dir, 'glossary.json'),
+                         json.dumps(glossary, ensure_ascii=False, indent=2) + "\n")
+        print(f"glossary: {len(glossary['terms'])} terms")
+    for document in args.documents:
+        main_tex = os.path.join(CONTENT_DIR, document, 'main.tex')
+        if not os.path.exists(main_tex):
+            print(f"Error: {main_tex} not found")
+            status = 1
+            continue
+        report = compile_document(main_tex, os.path.join(args.output_dir, document),
+                                  os.path.join(CACHE_DIR, f"{document}.json"), references, args.force)
+        print(f"{document}: {report['sections']} sections, {len(report['compiled'])} compiled, "
+              f"{len(report['cached'])} cached, {len(report['written'])} files written")
+        for key in report['unresolved']:
+            print(f"  Warning: citation '{key}' not found in the bibliography")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
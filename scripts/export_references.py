@@ -0,0 +1,230 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import sys
+import unicodedata
+
+import bib_merge
+import bib_reader
+from file_utils import load_cache, save_cache, write_if_changed
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BIB_FILE = bib_reader.BIB_FILE
+LOCAL_BIB_FILE = os.path.join(PROJECT_ROOT, 'content', 'resources', 'local.bib')
+OUTPUT_FILE = os.path.join(PROJECT_ROOT, 'webapp', 'src', 'lib', 'data', 'references.json')
+COMPACT_DIR = os.path.join(PROJECT_ROOT, 'webapp', 'static', 'references')
+CACHE_FILE = os.path.join(PROJECT_ROOT, '.cache', 'references.json')
+
+# Bump when the conversion changes so all cached entries are serialized again
+EXPORT_VERSION = 1
+
+# BibTeX entry type -> Reference['type'] in webapp/src/lib/data/references.ts
+TYPES = {
+    'article': 'article',
+    'book': 'book', 'mvbook': 'book', 'collection': 'book', 'incollection': 'book', 'inbook': 'book',
+    'booklet': 'book',
+    'inproceedings': 'conference', 'proceedings': 'conference', 'conference': 'conference',
+    'thesis': 'thesis', 'phdthesis': 'thesis', 'mastersthesis': 'thesis',
+    # Reports have no type of their own in the webapp; they are cited like articles
+    'techreport': 'article', 'report': 'article',
+}
+DEFAULT_TYPE = 'web'
+
+# Reference field -> BibTeX fields, first one present wins. Key order is the output order.
+FIELDS = (
+    ('journal', ('journal', 'journaltitle', 'institution', 'howpublished', 'organization')),
+    ('volume', ('volume',)),
+    ('issue', ('number', 'issue')),
+    ('pages', ('pages',)),
+    ('doi', ('doi',)),
+    ('url', ('url',)),
+    ('publisher', ('publisher',)),
+    ('booktitle', ('booktitle',)),
+)
+
+ACCENTS = {'"': '\u0308', "'": '\u0301', '`': '\u0300', '^': '\u0302', '~': '\u0303', 'c': '\u0327', 'v': '\u030c'}
+ACCENT = re.compile(r'\\([\'"`^~cv])\s*\{?([A-Za-z])\}?')
+ESCAPED = re.compile(r'\\([&%$#_{}])')
+COMMAND = re.compile(r'\\[A-Za-z]+\*?\s*')
+SPACES = re.compile(r'\s+')
+
+
+def latex_to_text(value):
+    """Plain text of a BibTeX value: accents resolved, commands and protecting braces removed."""
+    value = ACCENT.sub(lambda m: m.group(2) + ACCENTS[m.group(1)], value or '')
+    value = ESCAPED.sub(lambda m: {'{': '\x00', '}': '\x01'}.get(m.group(1), m.group(1)), value)
+    value = COMMAND.sub('', value).replace('{', '').replace('}', '').replace('\x00', '{').replace('\x01', '}')
+    return SPACES.sub(' ', unicodedata.normalize('NFC', value)).strip()
+
+
+def split_authors(value):
+    """Splits an author list on top-level ' and ' (braced corporate names stay whole)."""
+    authors, depth, start = [], 0, 0
+    for match in re.finditer(r'[{}]|\s+and\s+', value):
+        token = match.group()
+        if token == '{':
+            depth += 1
+        elif token == '}':
+            depth -= 1
+        elif depth == 0:
+            authors.append(value[start:match.start()])
+            start = match.end()
+    authors.append(value[start:])
+    return [name for name in (latex_to_text(a) for a in authors) if name]
+
+
+def convert_entry(entry):
+    """Converts a BibEntry to the webapp's Reference schema (keys in a fixed order)."""
+    fields = entry.fields
+    year = re.match(r'\d{4}', fields.get('year') or fields.get('date') or '')
+    reference = {
+        'id': entry.key,
+        'authors': split_authors(fields.get('author') or fields.get('editor') or '') or ['Unknown'],
+        'year': int(year.group()) if year else 0,
+        'title': latex_to_text(fields.get('title', '')),
+        'type': TYPES.get(entry.entry_type, DEFAULT_TYPE),
+    }
+    for name, sources in FIELDS:
+        for source in sources:
+            if fields.get(source):
+                # Keep '--' in page ranges as the webapp formats them itself
+                reference[name] = fields[source].strip() if name == 'pages' else latex_to_text(fields[source])
+                break
+    return reference
+
+
+def entry_hash(entry):
+    text = json.dumps([EXPORT_VERSION, entry.entry_type, entry.key, sorted(entry.fields.items())],
+                      ensure_ascii=False)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def load_entries(bib_file=BIB_FILE, local_bib_file=LOCAL_BIB_FILE, cache_dir=bib_reader.CACHE_DIR):
+    """Entries of the bibliography with local.bib merged in, as sync_zotero.py merges them."""
+    remote = bib_reader.load_bibliography(bib_file, cache_dir)
+    local = bib_reader.load_bibliography(local_bib_file, cache_dir) if local_bib_file else []
+    entries, _report, _local_keys = bib_merge.merge_sources(remote, local)
+    return entries
+
+
+def serialize(entries, cache):
+    """
+    Returns ({key: (hash, pretty, compact)}, number of converted entries).
+
+    Entries whose source hash is in `cache` reuse their serialized text;
+    only new or changed entries are converted and serialized again.
+    """
+    serialized, converted = {}, 0
+    for entry in entries:
+        digest = entry_hash(entry)
+        cached = cache.get(entry.key)
+        if cached and cached[0] == digest:
+            serialized[entry.key] = tuple(cached)
+            continue
+        reference = convert_entry(entry)
+        pretty = json.dumps(reference, ensure_ascii=False, indent=2)
+        compact = json.dumps(reference, ensure_ascii=False, separators=(',', ':'))
+        serialized[entry.key] = (digest, pretty, compact)
+        converted += 1
+    return serialized, converted
+
+
+def render_pretty(serialized):
+    """The indented JSON array, assembled from the per-entry texts."""
+    if not serialized:
+        return "[]\n"
+    items = ['  ' + text.replace('\n', '\n  ') for _hash, text, _compact in serialized]
+    return "[\n" + ",\n".join(items) + "\n]\n"
+
+
+def render_compact(serialized):
+    return "[" + ",".join(compact for _hash, _pretty, compact in serialized) + "]\n"
+
+
+def shard_name(key):
+    """Shard of a reference: the lowercase first letter of its id, '_' for anything else."""
+    first = key[:1].lower()
+    return first if 'a' <= first <= 'z' else '_'
+
+
+def write_compact(keys, serialized, compact_dir):
+    """
+    Writes references.min.json, one minified shard per first letter of the id
+    and an index.json of the shards. Returns the written paths.
+    """
+    os.makedirs(compact_dir, exist_ok=True)
+    shards = {}
+    for key in keys:
+        shards.setdefault(shard_name(key), []).append(serialized[key])
+    files = {'references.min.json': render_compact([serialized[key] for key in keys])}
+    for name, items in shards.items():
+        files[f"shard-{name}.json"] = render_compact(items)
+    index = {'version': EXPORT_VERSION, 'count': len(keys),
+             'shards': {name: len(items) for name, items in sorted(shards.items())}}
+    files['index.json'] = json.dumps(index, separators=(',', ':'), sort_keys=True) + "\n"
+
+    written = []
+    for name, content in files.items():
+        path = os.path.join(compact_dir, name)
+        if write_if_changed(path, content):
+            written.append(path)
+    for path in sorted(glob.glob(os.path.join(compact_dir, 'shard-*.json'))):
+        if os.path.basename(path) not in files:
+            os.remove(path)
+            written.append(path)
+    return written
+
+
+def export_references(bib_file=BIB_FILE, local_bib_file=LOCAL_BIB_FILE, output_file=OUTPUT_FILE,
+                      compact_dir=None, cache_file=CACHE_FILE):
+    """
+    Exports the bibliography to the webapp's references.json.
+
+    Entries are serialized in bibliography order with a fixed key order, and
+    the file is only written when its bytes change, so unchanged bibliographies
+    do not invalidate the webapp build. Returns a report dict.
+    """
+    # Parsed .bib files are cached next to the export cache (.cache/ by default)
+    entries = load_entries(bib_file, local_bib_file, os.path.dirname(cache_file) if cache_file else None)
+    cache = load_cache(cache_file, EXPORT_VERSION)
+    serialized, converted = serialize(entries, cache)
+    keys = [entry.key for entry in entries]
+
+    written = []
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    if write_if_changed(output_file, render_pretty([serialized[key] for key in keys])):
+        written.append(output_file)
+    if compact_dir:
+        written.extend(write_compact(keys, serialized, compact_dir))
+
+    if cache_file and (converted or len(cache) != len(serialized)):
+        save_cache(cache_file, serialized, EXPORT_VERSION)
+    return {'entries': len(keys), 'converted': converted, 'written': written}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the bibliography to the webapp's references.json.")
+    parser.add_argument('--bib', default=BIB_FILE)
+    parser.add_argument('--local-bib', default=LOCAL_BIB_FILE)
+    parser.add_argument('-o', '--output', default=OUTPUT_FILE)
+    parser.add_argument('--compact', nargs='?', const=COMPACT_DIR, metavar='DIR',
+                        help="also write minified, per-letter sharded references for lazy loading "
+                             "(default: webapp/static/references)")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.bib):
+        print(f"Error: bibliography not found at {args.bib}")
+        return 1
+    report = export_references(args.bib, args.local_bib, args.output, args.compact)
+    for path in report['written']:
+        print(f"Wrote {os.path.relpath(path, PROJECT_ROOT)}")
+    print(f"References: {report['entries']} entries, {report['converted']} converted, "
+          f"{len(report['written'])} files written")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+
+# mkstemp creates files readable only by the owner; published files get the usual permissions
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+@contextlib.contextmanager
+def atomic_path(path):
+    """
+    Yields a unique temporary path next to `path` and moves it over `path`
+    when the block ends without an exception; otherwise it is removed.
+
+    Every writer gets its own temporary file, so parallel test workers,
+    threaded builds and the watcher never share one, and readers never see
+    a partially written `path`.
+    """
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+    os.close(fd)
+    try:
+        os.chmod(tmp_path, 0o666 & ~_UMASK)
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+@contextlib.contextmanager
+def atomic_write(path, mode='w', encoding='utf-8'):
+    """Opens a unique temporary file for writing that atomically replaces `path` when closed."""
+    with atomic_path(path) as tmp_path:
+        with open(tmp_path, mode, encoding=None if 'b' in mode else encoding) as f:
+            yield f
+
+
+def file_hash(path):
+    """Returns the SHA-256 hex digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_if_changed(filename, content):
+    """
+    Writes content to filename unless the file already has identical content.
+
+    Returns True if the file was (re)written.
+    """
+    data = content.encode('utf-8')
+    if os.path.exists(filename):
+        with open(filename, 'rb') as f:
+            if f.read() == data:
+                return False
+    with atomic_write(filename, 'wb') as f:
+        f.write(data)
+    return True
+
+
+def load_cache(cache_file, version=None):
+    """
+    Returns the entries of a JSON cache written by save_cache().
+
+    A missing or unreadable cache, or one written with another `version`,
+    yields {}, so callers simply rebuild what it would have held.
+    """
+    if not cache_file or not os.path.exists(cache_file):
+        return {}
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    if version is None:
+        return data
+    if data.get('version') != version:
+        return {}
+    return data.get('entries', {})
+
+
+def save_cache(cache_file, entries, version=None):
+    """Atomically writes `entries` as a JSON cache, tagged with `version` if given."""
+    os.makedirs(os.path.dirname(cache_file) or '.', exist_ok=True)
+    data = entries if version is None else {'version': version, 'entries': entries}
+    with atomic_write(cache_file) as f:
+        json.dump(data, f, ensure_ascii=False, sort_keys=True)
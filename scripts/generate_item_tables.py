@@ -1,10 +1,18 @@
 import csv
+import glob
 import os
 import sys
 
+from file_utils import write_if_changed
+
 def generate_latex_tables(csv_path, output_dir):
     """
     Reads items.csv and generates LaTeX tables for each construct and a master table.
+
+    Tables are rendered in memory and only written when their content changed,
+    so unchanged tables keep their mtime and do not trigger LaTeX rebuilds.
+    Generated `table_*.tex` files of constructs that no longer exist are removed.
+    Returns a dict with the `written`, `unchanged` and `removed` file paths.
     """
     if not os.path.exists(csv_path):
         print(f"Error: CSV file not found at {csv_path}")
@@ -29,18 +37,35 @@ def generate_latex_tables(csv_path, output_dir):
             items_by_construct[safe_construct].append(row)
             all_items.append(row)
 
-    # Generate individual tables
+    rendered = {}
+
+    # Render individual tables
     for construct, items in items_by_construct.items():
         filename = os.path.join(output_dir, f"table_{construct}.tex")
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(create_latex_table(items, caption=f"Items for Construct: {construct}", label=f"tab:{construct}"))
-        print(f"Generated {filename}")
+        rendered[filename] = create_latex_table(items, caption=f"Items for Construct: {construct}", label=f"tab:{construct}")
 
-    # Generate master table
+    # Render master table
     master_filename = os.path.join(output_dir, "table_master.tex")
-    with open(master_filename, 'w', encoding='utf-8') as f:
-        f.write(create_latex_table(all_items, caption="All Survey Items", label="tab:master_items"))
-    print(f"Generated {master_filename}")
+    rendered[master_filename] = create_latex_table(all_items, caption="All Survey Items", label="tab:master_items")
+
+    report = {'written': [], 'unchanged': [], 'removed': []}
+    for filename, content in rendered.items():
+        if write_if_changed(filename, content):
+            report['written'].append(filename)
+            print(f"Generated {filename}")
+        else:
+            report['unchanged'].append(filename)
+
+    # Remove tables of constructs that no longer exist in the CSV
+    for filename in sorted(glob.glob(os.path.join(output_dir, "table_*.tex"))):
+        if filename not in rendered:
+            os.remove(filename)
+            report['removed'].append(filename)
+            print(f"Removed stale {filename}")
+
+    print(f"Tables: {len(report['written'])} written, {len(report['unchanged'])} unchanged, "
+          f"{len(report['removed'])} removed")
+    return report
 
 def create_latex_table(items, caption, label):
     """
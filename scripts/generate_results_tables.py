@@ -0,0 +1,270 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+
+from file_utils import file_hash, load_cache, save_cache, write_if_changed
+from generate_item_tables import escape_latex
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(PROJECT_ROOT, 'content', 'resources', 'data', 'results')
+OUTPUT_DIR = os.path.join(PROJECT_ROOT, 'content', 'resources', 'tables')
+CACHE_FILE = os.path.join(PROJECT_ROOT, '.cache', 'results_tables.json')
+
+# Bump when the rendering changes so all cached tables are rendered again
+RENDER_VERSION = 2
+
+DASH = "--"
+
+
+def format_number(value, decimals=2, leading_zero=True):
+    """
+    APA number format: a real minus sign, and no leading zero for values that
+    cannot exceed 1 (correlations, reliabilities, proportions).
+    """
+    if value is None:
+        return DASH
+    text = f"{abs(value):.{decimals}f}"
+    if not leading_zero and text.startswith('0.'):
+        text = text[1:]
+    if value < 0 and float(text) != 0:
+        text = "$-$" + text
+    return text
+
+
+def format_p(value, decimals=3):
+    if value is None:
+        return DASH
+    if value < 10 ** -decimals:
+        return "< " + format_number(10 ** -decimals, decimals, leading_zero=False)
+    return format_number(value, decimals, leading_zero=False)
+
+
+def render_table(caption, label, columns, header, rows, note=None):
+    """Wraps header and body rows in the APA7 threeparttable layout of generate_item_tables.py."""
+    latex = []
+    latex.append("\\begin{table}[ht]")
+    latex.append("\\centering")
+    latex.append("\\begin{threeparttable}")
+    latex.append(f"\\caption{{{caption}}}")
+    latex.append(f"\\label{{{label}}}")
+    latex.append(f"\\begin{{tabular}}{{{columns}}}")
+    latex.append("\\toprule")
+    latex.append(" & ".join(header) + " \\\\")
+    latex.append("\\midrule")
+    for row in rows:
+        latex.append(" & ".join(row) + " \\\\")
+    latex.append("\\bottomrule")
+    latex.append("\\end{tabular}")
+    if note:
+        latex.append("\\begin{tablenotes}")
+        latex.append("\\small")
+        latex.append(f"\\item \\textit{{Note.}} {note}")
+        latex.append("\\end{tablenotes}")
+    latex.append("\\end{threeparttable}")
+    latex.append("\\end{table}")
+    return "\n".join(latex) + "\n"
+
+
+def descriptives_table(survey, decimals):
+    """Construct scores from survey_scoring.py: number of items, n, M, SD, skewness and Cronbach's alpha."""
+    rows = []
+    for name, stats in survey['constructs'].items():
+        score = stats['score']
+        rows.append([
+            escape_latex(name),
+            str(len(stats['items'])),
+            str(score['n']),
+            format_number(score['mean'], decimals),
+            format_number(score['sd'], decimals),
+            format_number(score['skewness'], decimals),
+            format_number(stats['alpha'], decimals, leading_zero=False),
+        ])
+    return render_table(
+        "Descriptive Statistics of the Constructs", "tab:results_descriptives", "l r r r r r r",
+        ["\\textbf{Construct}", "\\textit{k}", "\\textit{n}", "\\textit{M}", "\\textit{SD}",
+         "\\textit{Skew}", "$\\alpha$"],
+        rows,
+        f"\\textit{{N}} = {survey['respondents']}. \\textit{{k}} = number of items; "
+        f"\\textit{{n}} = respondents who answered at least the required items; $\\alpha$ = Cronbach's alpha.")
+
+
+def correlations_table(survey, decimals):
+    """Lower-triangle correlation matrix of the construct scores with their means and SDs."""
+    correlations = survey['correlations']
+    names = correlations['constructs']
+    matrix = correlations['matrix']
+    rows = []
+    for i, name in enumerate(names):
+        score = survey['constructs'][name]['score']
+        cells = [f"{i + 1}. {escape_latex(name)}", format_number(score['mean'], decimals),
+                 format_number(score['sd'], decimals)]
+        for j in range(len(names) - 1):
+            if j < i:
+                cells.append(format_number(matrix[i][j], decimals, leading_zero=False))
+            elif j == i:
+                cells.append(DASH)
+            else:
+                cells.append("")
+        rows.append(cells)
+    return render_table(
+        "Means, Standard Deviations and Correlations of the Constructs", "tab:results_correlations",
+        "l r r " + " ".join("r" for _ in names[1:]),
+        ["\\textbf{Construct}", "\\textit{M}", "\\textit{SD}"] + [str(i + 1) for i in range(len(names) - 1)],
+        rows,
+        f"\\textit{{n}} = {correlations['n_complete']} respondents with all construct scores.")
+
+
+def reliability_table(survey, decimals):
+    """Item statistics per construct: M, SD, corrected item-total correlation and alpha if deleted."""
+    rows = []
+    for name, stats in survey['constructs'].items():
+        for i, item in enumerate(stats['items']):
+            rows.append([
+                escape_latex(name) if i == 0 else "",
+                escape_latex(item),
+                format_number(stats['item_mean'][i], decimals),
+                format_number(stats['item_sd'][i], decimals),
+                format_number(stats['item_total'][i] if stats['item_total'] else None, decimals,
+                              leading_zero=False),
+                format_number(stats['alpha_if_deleted'][i] if stats['alpha_if_deleted'] else None, decimals,
+                              leading_zero=False),
+            ])
+    return render_table(
+        "Item Statistics and Reliability", "tab:results_reliability", "l l r r r r",
+        ["\\textbf{Construct}", "\\textbf{Item}", "\\textit{M}", "\\textit{SD}", "$r_{it}$",
+         "$\\alpha$ if deleted"],
+        rows,
+        "$r_{it}$ = corrected item-total correlation.")
+
+
+def fit_table(fit, decimals):
+    """Fit indices per model from fit.json ({model: {chi2, df, p, cfi, tli, rmsea, srmr}})."""
+    rows = []
+    for name, indices in fit.items():
+        rows.append([
+            escape_latex(name),
+            format_number(indices.get('chi2'), decimals),
+            str(indices['df']) if indices.get('df') is not None else DASH,
+            format_p(indices.get('p')),
+            format_number(indices.get('cfi'), decimals + 1, leading_zero=False),
+            format_number(indices.get('tli'), decimals + 1, leading_zero=False),
+            format_number(indices.get('rmsea'), decimals + 1, leading_zero=False),
+            format_number(indices.get('srmr'), decimals + 1, leading_zero=False),
+        ])
+    return render_table(
+        "Model Fit Indices", "tab:results_fit", "l r r r r r r r",
+        ["\\textbf{Model}", "$\\chi^2$", "\\textit{df}", "\\textit{p}", "CFI", "TLI", "RMSEA", "SRMR"],
+        rows,
+        "Cutoffs following Hu and Bentler (1999): CFI and TLI $\\geq$ .95, RMSEA $\\leq$ .06, SRMR $\\leq$ .08.")
+
+
+def power_table(power, decimals):
+    """Power curves of power_simulation.py --json: one row per sample size, one column per hypothesis."""
+    names = power['hypotheses']
+    rows = [[str(n)] + [format_number(value, decimals, leading_zero=False) for value in values]
+            for n, values in sorted(power['power'].items(), key=lambda item: int(item[0]))]
+    target = power.get('target', 0.8)
+    required = power.get('required', {})
+    note = (f"Share of simulated samples in which the hypothesis is supported "
+            f"($\\alpha$ = {format_number(power.get('alpha', 0.05), 2, leading_zero=False)}). "
+            f"Required \\textit{{n}} for {target:.0%} power: "
+            + ", ".join(f"{escape_latex(name)} {required[name] if required.get(name) else DASH}"
+                        for name in names) + ".")
+    return render_table(
+        "Simulated Statistical Power per Hypothesis", "tab:results_power", "r " + " ".join("r" for _ in names),
+        ["\\textit{n}"] + [escape_latex(name) for name in names],
+        rows,
+        note.replace('%', '\\%'))
+
+
+# Output file -> (input file in RESULTS_DIR, renderer)
+TABLES = {
+    'results_descriptives.tex': ('survey.json', descriptives_table),
+    'results_correlations.tex': ('survey.json', correlations_table),
+    'results_reliability.tex': ('survey.json', reliability_table),
+    'results_fit.tex': ('fit.json', fit_table),
+    'results_power.tex': ('power.json', power_table),
+}
+
+
+def table_key(table, data, params):
+    """Hash of everything a table depends on: its input data, the parameters and the renderer version."""
+    text = json.dumps({'table': table, 'data': data, 'params': params, 'version': RENDER_VERSION},
+                      sort_keys=True)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def generate_results_tables(results_dir=RESULTS_DIR, output_dir=OUTPUT_DIR, decimals=2, cache_file=CACHE_FILE,
+                            force=False):
+    """
+    Renders the results tables whose analysis output exists in `results_dir`.
+
+    A table is only rendered again if the hash of its input data and parameters
+    differs from the last run, or its .tex file was removed or edited. Tables
+    whose analysis output no longer exists are removed. Returns a dict with the
+    `written`, `unchanged`, `cached`, `missing` and `removed` table paths.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    cache = {} if force else load_cache(cache_file)
+    params = {'decimals': decimals}
+    inputs = {}
+    report = {'written': [], 'unchanged': [], 'cached': [], 'missing': [], 'removed': []}
+
+    for table, (input_name, renderer) in TABLES.items():
+        filename = os.path.join(output_dir, table)
+        input_path = os.path.join(results_dir, input_name)
+        if not os.path.exists(input_path):
+            report['missing'].append(filename)
+            cache.pop(table, None)
+            if os.path.exists(filename):
+                os.remove(filename)
+                report['removed'].append(filename)
+                print(f"Removed stale {filename}")
+            continue
+        if input_name not in inputs:
+            with open(input_path, 'r', encoding='utf-8') as f:
+                inputs[input_name] = json.load(f)
+        data = inputs[input_name]
+        key = table_key(table, data, params)
+        entry = cache.get(table)
+        if entry and entry['key'] == key and os.path.exists(filename) and file_hash(filename) == entry['output']:
+            report['cached'].append(filename)
+            continue
+
+        content = renderer(data, decimals)
+        if write_if_changed(filename, content):
+            report['written'].append(filename)
+            print(f"Generated {filename}")
+        else:
+            report['unchanged'].append(filename)
+        cache[table] = {'key': key, 'output': hashlib.sha256(content.encode('utf-8')).hexdigest()}
+
+    if cache_file:
+        save_cache(cache_file, cache)
+    print(f"Results tables: {len(report['written'])} written, {len(report['unchanged'])} unchanged, "
+          f"{len(report['cached'])} cached, {len(report['missing'])} without analysis output, "
+          f"{len(report['removed'])} removed")
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render analysis results as APA7 LaTeX tables.")
+    parser.add_argument('--results-dir', default=RESULTS_DIR,
+                        help="directory with survey.json, fit.json and power.json")
+    parser.add_argument('--output-dir', default=OUTPUT_DIR)
+    parser.add_argument('--decimals', type=int, default=2)
+    parser.add_argument('--force', action='store_true', help="ignore the cache and render all tables")
+    args = parser.parse_args(argv)
+
+    try:
+        generate_results_tables(args.results_dir, args.output_dir, args.decimals, force=args.force)
+    except (ValueError, KeyError) as e:
+        print(f"Error: invalid analysis output ({e})")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
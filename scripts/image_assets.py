@@ -0,0 +1,363 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # optional; without Pillow the webapp and pdflatex use the original images
+    Image = ImageOps = None
+
+import build_store
+import file_utils
+from file_utils import file_hash, load_cache, save_cache, write_if_changed
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMAGES_DIR = os.path.join(PROJECT_ROOT, 'content', 'resources', 'images')
+CACHE_DIR = os.path.join(PROJECT_ROOT, '.cache', 'assets')
+# Print variants keep the file names of the originals; build.sh puts this
+# directory in front of TEXINPUTS so \includegraphics picks them up
+PRINT_DIR = os.path.join(CACHE_DIR, 'print')
+WEB_DIR = os.path.join(PROJECT_ROOT, 'webapp', 'static', 'assets')
+WEB_URL = '/assets/'
+MANIFEST_NAME = 'images.json'
+
+# Bump when a transform changes its output so all variants are made again
+PIPELINE_VERSION = 1
+
+RASTER_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+PDF_EXTENSIONS = ('.pdf',)
+# EXIF orientation tag; orientations 5-8 rotate the image by 90 degrees
+ORIENTATION = 0x0112
+ROTATED = (5, 6, 7, 8)
+
+# 300 dpi across the 16 cm text width of an A4 page with apa7 margins
+PRINT_MAX_WIDTH = 1890
+PRINT_QUALITY = 88
+# ghostscript -dPDFSETTINGS for PDFs; vector PDFs are already print-ready and
+# only their embedded images are recompressed
+PRINT_PDF_SETTINGS = '/printer'
+# srcset widths for the webapp; WebP first, JPEG as fallback for every browser
+WEB_WIDTHS = (480, 960, 1600)
+WEB_FORMATS = (('webp', 78), ('jpeg', 80))
+MIME_TYPES = {'webp': 'image/webp', 'jpeg': 'image/jpeg', 'png': 'image/png', 'pdf': 'application/pdf'}
+EXTENSIONS = {'webp': '.webp', 'jpeg': '.jpg', 'png': '.png', 'pdf': '.pdf'}
+
+
+def find_sources(images_dir):
+    """Raster images and PDFs below `images_dir`, as sorted paths."""
+    paths = []
+    for dirpath, dirnames, filenames in os.walk(images_dir):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.lower().endswith(RASTER_EXTENSIONS + PDF_EXTENSIONS):
+                paths.append(os.path.join(dirpath, name))
+    return paths
+
+
+def source_format(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension in PDF_EXTENSIONS:
+        return 'pdf'
+    return 'png' if extension == '.png' else 'jpeg'
+
+
+def image_size(path):
+    """(width, height) of a raster image after EXIF rotation, None for PDFs."""
+    if source_format(path) == 'pdf':
+        return None
+    with Image.open(path) as image:
+        width, height = image.size
+        orientation = image.getexif().get(ORIENTATION, 1)
+    return [height, width] if orientation in ROTATED else [width, height]
+
+
+def print_settings():
+    """
+    Everything besides the source that determines the print variants
+    pdflatex embeds, so build products made from them can be keyed by it.
+    """
+    return {'version': PIPELINE_VERSION, 'max_width': PRINT_MAX_WIDTH, 'quality': PRINT_QUALITY,
+            'pdf_settings': PRINT_PDF_SETTINGS}
+
+
+def transforms(fmt, size):
+    """
+    The variants of one source as transform specs: one print variant and
+    one web variant per width and format.
+
+    Web widths larger than the image are dropped; the largest width is then
+    the image's own, so small images still get one variant per format.
+    """
+    specs = []
+    if fmt == 'pdf':
+        specs.append({'target': 'print', 'format': 'pdf', 'settings': PRINT_PDF_SETTINGS})
+    else:
+        specs.append({'target': 'print', 'format': fmt, 'max_width': PRINT_MAX_WIDTH, 'quality': PRINT_QUALITY})
+    widths = [w for w in WEB_WIDTHS if size is None or w < size[0]]
+    if size is not None and size[0] <= WEB_WIDTHS[-1]:
+        widths.append(size[0])
+    for width in widths:
+        for web_format, quality in WEB_FORMATS:
+            specs.append({'target': 'web', 'format': web_format, 'width': width, 'quality': quality})
+    return specs
+
+
+def variant_key(source_hash, spec):
+    """Cache key of a variant: the source content plus the transform parameters."""
+    text = json.dumps({'version': PIPELINE_VERSION, 'source': source_hash, 'transform': spec}, sort_keys=True)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:24]
+
+
+def store_path(store_dir, key, spec):
+    return os.path.join(store_dir, key + EXTENSIONS[spec['format']])
+
+
+def _open_source(source, width):
+    """Opens a source as a Pillow image; PDFs are rasterized at `width` with pdftoppm."""
+    if source_format(source) != 'pdf':
+        with Image.open(source) as image:
+            if image.format == 'JPEG':
+                # Let libjpeg decode at 1/2, 1/4 or 1/8 scale when that is still `width` wide
+                w, h = image.size
+                scale = width / (h if image.getexif().get(ORIENTATION, 1) in ROTATED else w)
+                if scale < 1:
+                    image.draft('RGB', (math.ceil(w * scale), math.ceil(h * scale)))
+            return ImageOps.exif_transpose(image)
+    with tempfile.TemporaryDirectory() as tmp:
+        prefix = os.path.join(tmp, 'page')
+        subprocess.run(['pdftoppm', '-png', '-singlefile', '-f', '1', '-scale-to-x', str(width), '-scale-to-y', '-1',
+                        source, prefix], check=True, capture_output=True)
+        with Image.open(prefix + '.png') as image:
+            image.load()
+            return image.copy()
+
+
+def _save(image, path, spec):
+    options = {'quality': spec['quality']} if 'quality' in spec else {}
+    if spec['format'] == 'jpeg':
+        if image.mode in ('RGBA', 'LA', 'P'):
+            # JPEG has no alpha channel: flatten transparent areas onto white
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, 'white')
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        image = image.convert('RGB')
+        options.update(optimize=True, progressive=True)
+    elif spec['format'] == 'webp':
+        image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+    elif spec['format'] == 'png':
+        options = {'optimize': True}
+    # Metadata (EXIF, thumbnails) is not copied
+    image.save(path, format=spec['format'].upper(), **options)
+
+
+def make_variant(source, spec, path):
+    """Renders one variant of `source` to `path` (written atomically)."""
+    with file_utils.atomic_path(path) as tmp_path:
+        if spec['format'] == 'pdf':
+            subprocess.run(['gs', '-sDEVICE=pdfwrite', f"-dPDFSETTINGS={spec['settings']}", '-dNOPAUSE', '-dBATCH',
+                            '-dQUIET', f'-sOutputFile={tmp_path}', source], check=True, capture_output=True)
+        else:
+            width = spec.get('width') or spec['max_width']
+            with _open_source(source, width) as image:
+                if image.width > width:
+                    height = round(image.height * width / image.width)
+                    image = image.resize((width, height), Image.LANCZOS)
+                _save(image, tmp_path, spec)
+
+
+def missing_tool(spec, fmt):
+    """The external tool a variant needs but which is not installed (ghostscript, pdftoppm), else None."""
+    tool = 'gs' if spec['format'] == 'pdf' else 'pdftoppm' if fmt == 'pdf' else None
+    return tool if tool and shutil.which(tool) is None else None
+
+
+def web_name(rel_path, key, spec):
+    """Content-hashed file name of a web variant, e.g. ba_faryf_ai_tam-3f2a9c1e-960.webp."""
+    stem = os.path.splitext(rel_path.replace('/', '-'))[0]
+    return f"{stem}-{key[:8]}-{spec['width']}{EXTENSIONS[spec['format']]}"
+
+
+def publish(src, dst):
+    """
+    Hard-links a store file to its published path, so checking an unchanged
+    variant is one stat call. Falls back to copying across file systems.
+    Returns whether the published content changed.
+    """
+    changed = True
+    if os.path.exists(dst):
+        if os.path.samefile(src, dst):
+            return False
+        # Same content from an earlier store: linked anyway, so the next check is a stat again
+        changed = os.path.getsize(dst) != os.path.getsize(src) or file_hash(dst) != file_hash(src)
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    with file_utils.atomic_path(dst) as tmp_path:
+        os.remove(tmp_path)
+        try:
+            os.link(src, tmp_path)
+        except OSError:
+            shutil.copyfile(src, tmp_path)
+    return changed
+
+
+def remove_stale(directory, keep):
+    """Deletes files below `directory` that are not in `keep`; returns their paths."""
+    removed = []
+    for dirpath, _dirnames, filenames in os.walk(directory):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            if path not in keep:
+                os.remove(path)
+                removed.append(path)
+    return sorted(removed)
+
+
+def manifest_entry(entry, web_variants):
+    """srcset data of one image for the webapp."""
+    srcset = {}
+    for spec, name in web_variants:
+        srcset.setdefault(MIME_TYPES[spec['format']], []).append(f"{WEB_URL}{name} {spec['width']}w")
+    fallback = [name for spec, name in web_variants if spec['format'] == WEB_FORMATS[-1][0]]
+    item = {'src': WEB_URL + fallback[-1] if fallback else None,
+            'srcset': {mime: ', '.join(items) for mime, items in srcset.items()}}
+    if entry.get('size'):
+        item['width'], item['height'] = entry['size']
+    return item
+
+
+def build_assets(images_dir=IMAGES_DIR, cache_dir=CACHE_DIR, print_dir=PRINT_DIR, web_dir=WEB_DIR, jobs=None,
+                 use_store=True):
+    """
+    Renders the print and web variants of every image below `images_dir`.
+
+    Variants live in `<cache_dir>/store/`, named by a hash of the source
+    content and the transform parameters. Sources whose mtime and size
+    match the last run are not read at all. Variants missing from the store
+    are copied from the shared build store (see build_store.py) if another
+    checkout rendered them; the rest are rendered, in parallel with `jobs`
+    threads (Pillow releases the GIL while resizing and encoding). The print variants are then
+    published under their original names in `print_dir`, the web variants
+    under content-hashed names in `web_dir` together with images.json.
+    Returns a dict with the `rendered`, `restored` (from the build store),
+    `published`, `removed`, `failed` and `skipped` (tool not installed) variants.
+    """
+    cache_file = os.path.join(cache_dir, 'assets.json')
+    store_dir = os.path.join(cache_dir, 'store')
+    os.makedirs(store_dir, exist_ok=True)
+    cached = load_cache(cache_file)
+    sources = {}
+    for path in find_sources(images_dir):
+        rel_path = os.path.relpath(path, images_dir).replace(os.sep, '/')
+        stat = os.stat(path)
+        entry = cached.get(rel_path)
+        if not (entry and entry['mtime'] == stat.st_mtime_ns and entry['bytes'] == stat.st_size):
+            digest = file_hash(path)
+            if entry and entry['hash'] == digest:
+                entry = dict(entry, mtime=stat.st_mtime_ns, bytes=stat.st_size)
+            else:
+                entry = {'hash': digest, 'mtime': stat.st_mtime_ns, 'bytes': stat.st_size,
+                         'size': image_size(path)}
+        sources[rel_path] = (path, entry)
+
+    report = {'rendered': [], 'restored': [], 'published': [], 'removed': [], 'failed': [], 'skipped': []}
+    variants = {}
+    pending = []
+    for rel_path, (path, entry) in sources.items():
+        fmt = source_format(path)
+        for spec in transforms(fmt, entry['size']):
+            tool = missing_tool(spec, fmt)
+            if tool:
+                if f"{rel_path} ({tool} not installed)" not in report['skipped']:
+                    report['skipped'].append(f"{rel_path} ({tool} not installed)")
+                continue
+            key = variant_key(entry['hash'], spec)
+            stored = store_path(store_dir, key, spec)
+            variants.setdefault(rel_path, []).append((spec, key, stored))
+            if os.path.exists(stored):
+                continue
+            if use_store and build_store.fetch('images', key, {'variant': stored}):
+                report['restored'].append(stored)
+            else:
+                pending.append((path, spec, stored, key))
+
+    jobs = max(1, jobs or os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(make_variant, path, spec, stored): (path, spec, stored, key)
+                   for path, spec, stored, key in pending}
+        for future, (path, spec, stored, key) in futures.items():
+            try:
+                future.result()
+                report['rendered'].append(stored)
+                if use_store:
+                    build_store.save('images', key, {'variant': stored})
+            except (OSError, ValueError, subprocess.CalledProcessError) as e:
+                report['failed'].append(f"{os.path.relpath(path, images_dir)} ({spec['target']} {spec['format']}): {e}")
+    report['rendered'].sort()
+
+    published = set()
+    manifest = {}
+    for rel_path, items in sorted(variants.items()):
+        web_variants = []
+        for spec, key, stored in items:
+            if not os.path.exists(stored):
+                continue
+            if spec['target'] == 'print':
+                dst = os.path.join(print_dir, *rel_path.split('/'))
+            else:
+                name = web_name(rel_path, key, spec)
+                dst = os.path.join(web_dir, name)
+                web_variants.append((spec, name))
+            published.add(dst)
+            if publish(stored, dst):
+                report['published'].append(dst)
+        if web_variants:
+            manifest[rel_path] = manifest_entry(sources[rel_path][1], web_variants)
+
+    manifest_file = os.path.join(web_dir, MANIFEST_NAME)
+    write_if_changed(manifest_file, json.dumps(manifest, indent=2, sort_keys=True) + "\n")
+    published.add(manifest_file)
+    stored = {stored for items in variants.values() for _spec, _key, stored in items}
+    for directory, keep in ((print_dir, published), (web_dir, published), (store_dir, stored)):
+        report['removed'].extend(remove_stale(directory, keep))
+
+    entries = {rel_path: entry for rel_path, (_path, entry) in sources.items()}
+    if entries != cached:
+        save_cache(cache_file, entries)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Render print variants (for pdflatex) and responsive web variants of the images.")
+    parser.add_argument('--images-dir', default=IMAGES_DIR, help="source images (default: content/resources/images)")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="parallel workers (default: CPU count)")
+    parser.add_argument('--force', action='store_true',
+                        help="discard the variant store and render everything again, bypassing the build store")
+    args = parser.parse_args(argv)
+
+    if Image is None:
+        # npm run build calls this in environments without Python packages (Netlify, CI)
+        print("Warning: Pillow not installed, using the original images")
+        return 0
+    if args.force:
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+    report = build_assets(args.images_dir, jobs=args.jobs, use_store=not args.force)
+    for skipped in report['skipped']:
+        print(f"Skipped {skipped}")
+    for failed in report['failed']:
+        print(f"Error: {failed}")
+    print(f"Image assets: {len(report['rendered'])} rendered, {len(report['restored'])} from the build store, "
+          f"{len(report['published'])} published, "
+          f"{len(report['removed'])} removed")
+    return 1 if report['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,305 @@
+import argparse
+import json
+import os
+import re
+import sys
+from collections import namedtuple
+
+# TeX breaks log lines after max_print_line bytes (79 in TeX Live)
+MAX_PRINT_LINE = 79
+# Lines of context after '! ...' that are searched for the 'l.<n>' line
+ERROR_CONTEXT_LINES = 12
+
+ERROR = 'error'
+WARNING = 'warning'
+BADBOX = 'badbox'
+
+# severity: error/warning/badbox, kind: what happened (undefined-reference, overfull, ...),
+# file/line: source location if the log tells it, otherwise None
+Diagnostic = namedtuple('Diagnostic', ['severity', 'kind', 'message', 'file', 'line'])
+
+FILE_LINE_ERROR = re.compile(r'^(\.{0,2}/?[^:\s][^:]*\.\w+):(\d+): (.*)$')
+TEX_ERROR = re.compile(r'^! (.*)$')
+ERROR_LINE = re.compile(r'^l\.(\d+) ')
+WARNING_START = re.compile(r'^(LaTeX|Package|Class) (?:(\S+) )?Warning: (.*)$')
+LATEX_FONT_WARNING = re.compile(r'^LaTeX Font Warning: (.*)$')
+CONTINUATION = re.compile(r'^\(([\w@.-]+)\)\s+(.*)$')
+BADBOX_START = re.compile(r'^(Overfull|Underfull) \\[hv]box \((.*?)\) (?:in paragraph|in alignment|detected|has occurred)'
+                          r'.*?(?:lines? (\d+)(?:--\d+)?)?$')
+INPUT_LINE = re.compile(r'on input line (\d+)')
+UNDEFINED = re.compile(r"^(Reference|Citation) [`'](.+?)' on page \S+ undefined")
+FILE_OPEN = re.compile(r'\(([^\s()\[\]{}"]+)')
+
+# Messages that ask for another pass; biblatex also asks for biber this way
+RERUN_LATEX = re.compile(r'Rerun to get|Please rerun LaTeX|Label\(s\) may have changed|rerun LaTeX afterwards'
+                         r'|Temporary extra page added|Rerun LaTeX', re.IGNORECASE)
+RERUN_BIBER = re.compile(r'Please \(re\)run Biber|run Biber on the file', re.IGNORECASE)
+
+BLG_MESSAGE = re.compile(r'^\[\d+\] [\w:.]+> (INFO|WARN|ERROR) - (.*)$')
+BLG_LOCATION = re.compile(r'([^\s,(]+?\.bib)(?:_\d+\.utf8)?, line (\d+)')
+BLG_MISSING_ENTRY = re.compile(r"I didn't find a database entry for '([^']+)'")
+
+Decision = namedtuple('Decision', ['latex', 'biber', 'reasons'])
+
+
+def _text(line):
+    return line.decode('utf-8', errors='replace') if isinstance(line, bytes) else line
+
+
+def unwrap(lines, width=MAX_PRINT_LINE):
+    """
+    Joins lines that TeX broke at `width` bytes back together.
+
+    TeX counts bytes, not characters, so a line of exactly `width` bytes
+    continues on the next one, and a multi-byte character may be split
+    between the two. Lines are therefore measured as UTF-8 and decoded only
+    after joining; bytes (a log opened in binary mode, as read() does) are
+    used as they are. Works on any iterable of lines, so a log is processed
+    as it is read.
+    """
+    pending = b''
+    for line in lines:
+        if isinstance(line, str):
+            line = line.encode('utf-8')
+        line = line.rstrip(b'\r\n')
+        if len(line) == width:
+            pending += line
+            continue
+        yield _text(pending + line)
+        pending = b''
+    if pending:
+        yield _text(pending)
+
+
+def _is_file(name):
+    return name.startswith(('/', './', '../')) or re.search(r'\.[A-Za-z][A-Za-z0-9]{0,7}$', name) is not None
+
+
+class _FileStack:
+    """Follows the '(file ... )' nesting of the log to know which file TeX is reading."""
+
+    def __init__(self):
+        self.stack = []
+
+    @property
+    def current(self):
+        for name in reversed(self.stack):
+            if name:
+                return name
+        return None
+
+    def feed(self, line):
+        pos = 0
+        while pos < len(line):
+            char = line[pos]
+            if char == '(':
+                match = FILE_OPEN.match(line, pos)
+                name = match.group(1) if match and _is_file(match.group(1)) else None
+                self.stack.append(name)
+                pos = match.end() if name else pos + 1
+            elif char == ')':
+                if self.stack:
+                    self.stack.pop()
+                pos += 1
+            else:
+                pos += 1
+
+
+def _location(name):
+    return name[2:] if name and name.startswith('./') else name
+
+
+def parse_log(lines, width=MAX_PRINT_LINE):
+    """
+    Yields the Diagnostics of a pdflatex .log while reading it line by line.
+
+    Errors come from '! ...' lines (with the 'l.<n>' line that follows) or
+    from -file-line-error lines; warnings are collected with their
+    '(package)' continuation lines. Locations use the file TeX was reading.
+    """
+    files = _FileStack()
+    error = None
+    warning = None
+    in_box = False
+
+    def finish_warning():
+        origin, package, text = warning
+        text = ' '.join(' '.join(text).split())
+        line = INPUT_LINE.search(text)
+        undefined = UNDEFINED.match(text)
+        if undefined:
+            kind = 'undefined-' + undefined.group(1).lower()
+        elif RERUN_BIBER.search(text):
+            kind = 'rerun-biber'
+        elif RERUN_LATEX.search(text):
+            kind = 'rerun-latex'
+        else:
+            kind = (package or origin).lower()
+        return Diagnostic(WARNING, kind, text, _location(files.current), int(line.group(1)) if line else None)
+
+    for line in unwrap(lines, width):
+        if warning:
+            continuation = CONTINUATION.match(line)
+            if continuation and continuation.group(1) == (warning[1] or warning[0]):
+                warning[2].append(continuation.group(2))
+                continue
+            yield finish_warning()
+            warning = None
+
+        if error:
+            # The context of an error ends with 'l.<n> ...'; give up after a few lines (e.g. '<*>')
+            match = ERROR_LINE.match(line)
+            if match or error[3] >= ERROR_CONTEXT_LINES:
+                yield Diagnostic(ERROR, 'error', error[0], error[1], error[2] or (int(match.group(1)) if match else None))
+                error = None
+            else:
+                error = error[:3] + (error[3] + 1,)
+            continue
+
+        if in_box:
+            # The box content that follows a bad box message is typeset text, not file nesting
+            in_box = bool(line.strip())
+            continue
+
+        match = FILE_LINE_ERROR.match(line)
+        if match:
+            error = (match.group(3), _location(match.group(1)), int(match.group(2)), 0)
+            continue
+        match = TEX_ERROR.match(line)
+        if match:
+            error = (match.group(1), _location(files.current), None, 0)
+            continue
+        match = WARNING_START.match(line) or LATEX_FONT_WARNING.match(line)
+        if match:
+            if match.re is LATEX_FONT_WARNING:
+                warning = ('LaTeX Font', 'Font', [match.group(1)])
+            else:
+                warning = (match.group(1), match.group(2), [match.group(3)])
+            continue
+        match = BADBOX_START.match(line)
+        if match:
+            kind = match.group(1).lower()
+            yield Diagnostic(BADBOX, kind, line, _location(files.current),
+                             int(match.group(3)) if match.group(3) else None)
+            in_box = True
+            continue
+        files.feed(line)
+
+    if warning:
+        yield finish_warning()
+    if error:
+        yield Diagnostic(ERROR, 'error', error[0], error[1], error[2])
+
+
+def parse_blg(lines):
+    """Yields the warnings and errors of a biber .blg file as Diagnostics."""
+    for line in lines:
+        match = BLG_MESSAGE.match(_text(line).rstrip('\r\n'))
+        if not match or match.group(1) == 'INFO':
+            continue
+        level, text = match.groups()
+        location = BLG_LOCATION.search(text)
+        missing = BLG_MISSING_ENTRY.search(text)
+        kind = 'missing-entry' if missing else 'biber'
+        yield Diagnostic(ERROR if level == 'ERROR' else WARNING, kind, text,
+                         os.path.basename(location.group(1)) if location else None,
+                         int(location.group(2)) if location else None)
+
+
+def read(path, parser):
+    """
+    Diagnostics of a .log or .blg file; an empty list if the file does not exist.
+
+    The file is read as bytes, so unwrap() can join TeX's lines at their
+    byte length before decoding them.
+    """
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, 'rb') as f:
+        return list(parser(f))
+
+
+def decide(diagnostics, aux_changed=False):
+    """
+    Decides from the diagnostics of the last pass whether another pdflatex
+    or biber pass is needed.
+
+    Rerun requests of LaTeX, hyperref and biblatex ask for pdflatex, 'Please
+    (re)run Biber' for biber; pdflatex has to run after biber only if the
+    .bbl it writes differs, which the caller checks. `aux_changed` says that
+    the pass rewrote auxiliary files (.aux, .toc, ...) it had read, which
+    LaTeX does not always warn about. Undefined references alone do not
+    cause a rerun: they are not resolved by running again.
+    """
+    reasons = []
+    biber = latex = False
+    for diagnostic in diagnostics:
+        if diagnostic.kind == 'rerun-biber':
+            biber = True
+            reasons.append(diagnostic.message)
+        elif diagnostic.kind == 'rerun-latex':
+            latex = True
+            reasons.append(diagnostic.message)
+    if aux_changed:
+        latex = True
+        reasons.append('auxiliary files changed')
+    return Decision(latex, biber, reasons)
+
+
+def to_json(diagnostics, decision=None):
+    data = {'diagnostics': [d._asdict() for d in diagnostics]}
+    if decision is not None:
+        data['rerun'] = decision._asdict()
+    return data
+
+
+def summary(diagnostics):
+    """Counts per kind, e.g. {'overfull': 3, 'undefined-citation': 1}."""
+    counts = {}
+    for diagnostic in diagnostics:
+        counts[diagnostic.kind] = counts.get(diagnostic.kind, 0) + 1
+    return counts
+
+
+def format_diagnostic(diagnostic):
+    location = diagnostic.file or '?'
+    if diagnostic.line is not None:
+        location += f":{diagnostic.line}"
+    return f"{location}: {diagnostic.severity}: {diagnostic.message}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Report the errors, warnings and bad boxes of a LaTeX .log and its biber .blg.")
+    parser.add_argument('log', help="pdflatex .log file, e.g. content/prestudy/build/main/main.log")
+    parser.add_argument('--blg', help="biber .blg file (default: next to the .log)")
+    parser.add_argument('--json', action='store_true', help="print the diagnostics as JSON")
+    parser.add_argument('--no-badboxes', action='store_true', help="leave out overfull/underfull boxes")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.log):
+        print(f"Error: {args.log} not found.")
+        return 1
+    blg = args.blg or os.path.splitext(args.log)[0] + '.blg'
+    diagnostics = read(args.log, parse_log) + read(blg, parse_blg)
+    decision = decide(diagnostics)
+    if args.no_badboxes:
+        diagnostics = [d for d in diagnostics if d.severity != BADBOX]
+
+    if args.json:
+        print(json.dumps(to_json(diagnostics, decision), indent=2))
+    else:
+        for diagnostic in diagnostics:
+            print(format_diagnostic(diagnostic))
+        counts = ', '.join(f"{count} {kind}" for kind, count in sorted(summary(diagnostics).items()))
+        print(f"{len(diagnostics)} diagnostics" + (f" ({counts})" if counts else ''))
+        if decision.latex or decision.biber:
+            tools = ' and '.join(tool for tool, needed in (('biber', decision.biber), ('pdflatex', decision.latex))
+                                 if needed)
+            print(f"Another {tools} pass is needed: "
+                  f"{'; '.join(decision.reasons)}")
+    return 1 if any(d.severity == ERROR for d in diagnostics) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
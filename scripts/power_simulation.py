@@ -0,0 +1,398 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+
+import numpy as np
+
+import file_utils
+import survey_scoring
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(PROJECT_ROOT, '.cache', 'power')
+
+# Bump when the data generation or estimation changes so cached replications are discarded
+SIMULATION_VERSION = 1
+
+# Replications per work unit; one chunk is simulated, estimated and cached at once
+CHUNK_SIZE = 200
+DEFAULT_SIZES = tuple(range(60, 331, 30))
+
+# Likert categories 1-5 from a standard normal item response
+LIKERT_THRESHOLDS = np.array([-1.5, -0.5, 0.5, 1.5])
+
+GROUPS = ('control', 'positive', 'negative')
+DUMMIES = ('Dummy_Pos', 'Dummy_Neg')
+
+# AI-TAM structural model (tables/05_hypothesen_liste.tex). Coefficients are in
+# standard deviations of the outcome; for the framing dummies they are the group
+# mean difference to the control group.
+DEFAULT_MODEL = {
+    'paths': {
+        'XAIT': {'Dummy_Pos': 0.4, 'Dummy_Neg': -0.4},
+        'EOU': {'XAIT': 0.3},
+        'PUF': {'XAIT': 0.3, 'EOU': 0.3, 'FAM-TEC': 0.2},
+        'BI': {'PUF': 0.4, 'EOU': 0.2},
+        'CI': {'BI': 0.5},
+    },
+    'hypotheses': {
+        'H1a': ['Dummy_Pos', 'XAIT', '+'],
+        'H1b': ['Dummy_Neg', 'XAIT', '-'],
+        'H2': ['XAIT', 'PUF', '+'],
+        'H3': ['XAIT', 'EOU', '+'],
+        'H4': ['PUF', 'BI', '+'],
+        'H5': ['EOU', 'BI', '+'],
+        'H6': ['EOU', 'PUF', '+'],
+        'H7': ['BI', 'CI', '+'],
+        'H8': ['FAM-TEC', 'PUF', '+'],
+    },
+    # Specific indirect effects, tested by the joint significance of their links
+    'mediation': {
+        'H9': ['Dummy_Pos', 'XAIT', 'PUF', 'BI'],
+    },
+    'loading': 0.75,
+    'alpha': 0.05,
+}
+
+
+def load_model(path=None, constructs=None):
+    """
+    Returns DEFAULT_MODEL, updated with the keys of a JSON model file and
+    checked with validate_model() against `constructs` (default: items.csv).
+    """
+    model = json.loads(json.dumps(DEFAULT_MODEL))
+    if path:
+        with open(path, 'r', encoding='utf-8') as f:
+            overrides = json.load(f)
+        if not isinstance(overrides, dict):
+            raise ValueError(f"{path}: expected a JSON object with keys of the model")
+        model.update(overrides)
+        validate_model(model, item_counts() if constructs is None else constructs)
+    return model
+
+
+def validate_model(model, constructs):
+    """
+    Raises ValueError unless every key of `model` is known, every path
+    connects constructs of `constructs` (or the framing dummies) with a
+    number, and every hypothesis and mediation chain names existing paths.
+    """
+    unknown = sorted(set(model) - set(DEFAULT_MODEL))
+    if unknown:
+        raise ValueError(f"Unknown model keys: {', '.join(unknown)} (expected {', '.join(DEFAULT_MODEL)})")
+    paths = model['paths']
+    if not isinstance(paths, dict) or not paths:
+        raise ValueError("'paths' must map every outcome to {predictor: coefficient}")
+    known = set(constructs) | set(DUMMIES)
+    for outcome, predictors in paths.items():
+        if not isinstance(predictors, dict) or not predictors:
+            raise ValueError(f"paths.{outcome} must map predictors to coefficients")
+        for name in [outcome] + list(predictors):
+            if name not in known:
+                raise ValueError(f"paths.{outcome}: unknown construct '{name}' (not in items.csv)")
+        for predictor, coefficient in predictors.items():
+            if isinstance(coefficient, bool) or not isinstance(coefficient, (int, float)):
+                raise ValueError(f"paths.{outcome}.{predictor} must be a number, not {coefficient!r}")
+
+    def has_path(predictor, outcome):
+        return predictor in paths.get(outcome, {})
+
+    for name, hypothesis in model['hypotheses'].items():
+        if not (isinstance(hypothesis, list) and len(hypothesis) == 3 and hypothesis[2] in ('+', '-')):
+            raise ValueError(f"hypotheses.{name} must be [predictor, outcome, '+' or '-']")
+        if not has_path(hypothesis[0], hypothesis[1]):
+            raise ValueError(f"hypotheses.{name}: the model has no path {hypothesis[0]} -> {hypothesis[1]}")
+    for name, chain in model.get('mediation', {}).items():
+        if not isinstance(chain, list) or len(chain) < 3:
+            raise ValueError(f"mediation.{name} must list at least a predictor, a mediator and an outcome")
+        for predictor, outcome in zip(chain, chain[1:]):
+            if not has_path(predictor, outcome):
+                raise ValueError(f"mediation.{name}: the model has no path {predictor} -> {outcome}")
+    for key in ('loading', 'alpha'):
+        value = model[key]
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 < value < 1:
+            raise ValueError(f"'{key}' must be a number between 0 and 1, not {value!r}")
+
+
+def item_counts(items=None):
+    """Number of items per construct in items.csv (the Treatment Check is not part of the model)."""
+    items = items or survey_scoring.load_catalogue()
+    return {name: len(positions) for name, positions in survey_scoring.constructs_of(items).items()
+            if not items[positions[0]].boolean}
+
+
+def structural_order(paths):
+    """Endogenous constructs in an order where every predictor comes first."""
+    order, pending = [], dict(paths)
+    while pending:
+        ready = [name for name, predictors in pending.items() if all(p not in pending for p in predictors)]
+        if not ready:
+            raise ValueError(f"The path model has a cycle between {', '.join(sorted(pending))}")
+        for name in ready:
+            order.append(name)
+            del pending[name]
+    return order
+
+
+def residual_variances(paths):
+    """
+    Residual variance of every endogenous construct so that all latent
+    constructs have unit variance, derived from the implied covariance matrix.
+    """
+    exogenous = sorted(set(p for predictors in paths.values() for p in predictors) - set(paths) - set(DUMMIES))
+    names = list(DUMMIES) + exogenous
+    # Equal allocation: each dummy is Bernoulli(1/3), both are never 1 together
+    size = len(names) + len(paths)
+    sigma = np.zeros((size, size))
+    sigma[:2, :2] = [[2 / 9, -1 / 9], [-1 / 9, 2 / 9]]
+    for i in range(2, len(names)):
+        sigma[i, i] = 1.0
+    variances = {}
+    for outcome in structural_order(paths):
+        weights = np.zeros(size)
+        for predictor, coefficient in paths[outcome].items():
+            weights[names.index(predictor)] = coefficient
+        explained = weights @ sigma @ weights
+        if explained >= 1:
+            raise ValueError(f"Paths into {outcome} explain more than its variance ({explained:.2f})")
+        k = len(names)
+        names.append(outcome)
+        sigma[k, :k] = sigma[:k, :k] @ weights[:k]
+        sigma[:k, k] = sigma[k, :k]
+        sigma[k, k] = 1.0
+        variances[outcome] = 1 - explained
+    return variances
+
+
+def simulate_scores(rng, replications, n, model, counts):
+    """
+    Draws `replications` data sets of n respondents.
+
+    Latent constructs follow the path model; every item is loading * latent
+    plus noise, cut into 1-5 Likert categories, and construct scores are item
+    means, as in the analysis. Returns {name: (replications x n) array}.
+    """
+    paths = model['paths']
+    loading = model['loading']
+    group = np.arange(n) % len(GROUPS)
+    latent = {
+        'Dummy_Pos': np.broadcast_to((group == 1) * 1.0, (replications, n)),
+        'Dummy_Neg': np.broadcast_to((group == 2) * 1.0, (replications, n)),
+    }
+    variances = residual_variances(paths)
+    for name in sorted(set(p for predictors in paths.values() for p in predictors) - set(paths) - set(DUMMIES)):
+        latent[name] = rng.standard_normal((replications, n))
+    for outcome in structural_order(paths):
+        value = np.sqrt(variances[outcome]) * rng.standard_normal((replications, n))
+        for predictor, coefficient in paths[outcome].items():
+            value = value + coefficient * latent[predictor]
+        latent[outcome] = value
+
+    scores = {name: latent[name] for name in DUMMIES}
+    for name, value in latent.items():
+        if name in DUMMIES:
+            continue
+        k = counts.get(name, 1)
+        noise = rng.standard_normal((replications, n, k))
+        responses = loading * value[:, :, None] + np.sqrt(1 - loading ** 2) * noise
+        scores[name] = (np.searchsorted(LIKERT_THRESHOLDS, responses) + 1).mean(axis=2)
+    return scores
+
+
+def t_critical(alpha, df):
+    """Two-sided critical t value (Cornish-Fisher expansion of the normal quantile)."""
+    z = NormalDist().inv_cdf(1 - alpha / 2)
+    return z + (z ** 3 + z) / (4 * df) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * df ** 2)
+
+
+def fit_paths(scores, paths):
+    """Batched OLS of every structural equation; returns {(predictor, outcome): (coef, t)} arrays per replication."""
+    estimates = {}
+    for outcome, predictors in paths.items():
+        predictors = list(predictors)
+        target = scores[outcome]
+        replications, n = target.shape
+        design = np.concatenate([np.ones((replications, n, 1))] +
+                                [scores[name][:, :, None] for name in predictors], axis=2)
+        transposed = design.transpose(0, 2, 1)
+        inverse = np.linalg.pinv(transposed @ design)
+        coefficients = (inverse @ (transposed @ target[..., None]))[..., 0]
+        residuals = target - (design @ coefficients[..., None])[..., 0]
+        df = n - design.shape[2]
+        sigma2 = (residuals ** 2).sum(axis=1) / df
+        standard_errors = np.sqrt(np.diagonal(inverse, axis1=1, axis2=2) * sigma2[:, None])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t_values = coefficients / standard_errors
+        for j, predictor in enumerate(predictors, start=1):
+            estimates[(predictor, outcome)] = (coefficients[:, j], t_values[:, j], df)
+    return estimates
+
+
+def hypothesis_names(model):
+    return list(model['hypotheses']) + list(model.get('mediation', {}))
+
+
+def evaluate_hypotheses(estimates, model):
+    """Returns a (replications x hypotheses) bool matrix: significant in the expected direction."""
+    alpha = model['alpha']
+
+    def supported(predictor, outcome, sign):
+        coefficient, t_value, df = estimates[(predictor, outcome)]
+        return (np.abs(t_value) > t_critical(alpha, df)) & (np.sign(coefficient) == sign)
+
+    columns = []
+    for predictor, outcome, direction in model['hypotheses'].values():
+        columns.append(supported(predictor, outcome, 1 if direction == '+' else -1))
+    for chain in model.get('mediation', {}).values():
+        # Joint significance: every link significant with the sign of the simulated path
+        joint = np.ones(columns[0].shape, dtype=bool)
+        for predictor, outcome in zip(chain, chain[1:]):
+            joint &= supported(predictor, outcome, np.sign(model['paths'][outcome][predictor]))
+        columns.append(joint)
+    return np.column_stack(columns)
+
+
+def model_key(model, counts):
+    text = json.dumps({'model': model, 'counts': counts, 'version': SIMULATION_VERSION,
+                       'chunk_size': CHUNK_SIZE}, sort_keys=True)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+
+def _chunk_path(cache_dir, n, chunk, size):
+    return os.path.join(cache_dir, f"n{n:05d}_chunk{chunk:05d}_{size}.npy")
+
+
+def _simulate_chunk(model, counts, seed, n, chunk, size):
+    """One unit of work: `size` replications at sample size n with their own random stream."""
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(n, chunk)))
+    scores = simulate_scores(rng, size, n, model, counts)
+    return n, chunk, evaluate_hypotheses(fit_paths(scores, model['paths']), model)
+
+
+def simulate_power(sizes, replications, model=None, counts=None, seed=0, workers=None, cache_dir=CACHE_DIR,
+                   progress=False):
+    """
+    Estimates the power of every hypothesis for each total sample size in `sizes`.
+
+    Replications are simulated in chunks of CHUNK_SIZE across a process pool,
+    each chunk with its own seed. With `cache_dir`, the hypothesis decisions of
+    every chunk are stored per model, so extending the grid or the number of
+    replications only simulates the new chunks. Returns {'hypotheses', 'power'
+    ({n: [power per hypothesis]}), 'simulated', 'seconds'}.
+    """
+    model = model or load_model()
+    counts = counts or item_counts()
+    names = hypothesis_names(model)
+    workers = max(1, workers or os.cpu_count() or 1)
+    model_dir = os.path.join(cache_dir, f"{model_key(model, counts)}-seed{seed}") if cache_dir else None
+    if model_dir:
+        os.makedirs(model_dir, exist_ok=True)
+
+    chunks = [(n, chunk, min(CHUNK_SIZE, replications - chunk * CHUNK_SIZE))
+              for n in sizes for chunk in range(-(-replications // CHUNK_SIZE))]
+    decisions = {}
+    pending = []
+    for n, chunk, size in chunks:
+        path = _chunk_path(model_dir, n, chunk, size) if model_dir else None
+        if path and os.path.exists(path):
+            decisions[(n, chunk)] = np.load(path)
+        else:
+            pending.append((n, chunk, size))
+
+    start = time.monotonic()
+
+    def collect(n, chunk, result):
+        decisions[(n, chunk)] = result
+        if model_dir:
+            path = _chunk_path(model_dir, n, chunk, result.shape[0])
+            with file_utils.atomic_write(path, 'wb') as f:
+                np.save(f, result)
+        if progress:
+            print(f"  n = {n}: {min((chunk + 1) * CHUNK_SIZE, replications)}/{replications} replications", flush=True)
+
+    if workers == 1 or len(pending) <= 1:
+        for n, chunk, size in pending:
+            collect(*_simulate_chunk(model, counts, seed, n, chunk, size))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_simulate_chunk, model, counts, seed, n, chunk, size)
+                       for n, chunk, size in pending]
+            for future in futures:
+                collect(*future.result())
+
+    power = {}
+    for n in sizes:
+        stacked = np.concatenate([decisions[(n, chunk)] for m, chunk, _size in chunks if m == n])
+        power[n] = [float(v) for v in stacked.mean(axis=0)]
+    return {
+        'hypotheses': names,
+        'power': power,
+        'simulated': sum(size for _n, _chunk, size in pending),
+        'seconds': time.monotonic() - start,
+    }
+
+
+def required_sizes(result, target=0.8):
+    """Smallest simulated sample size that reaches `target` power per hypothesis (None if none does)."""
+    required = {}
+    for i, name in enumerate(result['hypotheses']):
+        reached = [n for n in sorted(result['power']) if result['power'][n][i] >= target]
+        required[name] = reached[0] if reached else None
+    return required
+
+
+def print_curves(result, target=0.8):
+    names = result['hypotheses']
+    print(f"{'n':>5} " + ' '.join(f"{name:>6}" for name in names))
+    for n in sorted(result['power']):
+        print(f"{n:>5} " + ' '.join(f"{value:>6.2f}" for value in result['power'][n]))
+    required = required_sizes(result, target)
+    print(f"n for {target:.0%} power: " + ', '.join(
+        f"{name} {required[name] if required[name] else '>' + str(max(result['power']))}" for name in names))
+
+
+def parse_sizes(text):
+    """'60:300:30' (start:stop:step, inclusive) or '60,90,120'."""
+    if ':' in text:
+        start, stop, step = (int(part) for part in text.split(':'))
+        return list(range(start, stop + 1, step))
+    return [int(part) for part in text.split(',') if part]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo power analysis for the AI-TAM path model.")
+    parser.add_argument('--sizes', default=','.join(str(n) for n in DEFAULT_SIZES),
+                        help="total sample sizes, '60:300:30' or '60,90,120' (default: %(default)s)")
+    parser.add_argument('-r', '--replications', type=int, default=1000, help="replications per sample size")
+    parser.add_argument('--model', help="JSON file overriding keys of the default model (paths, hypotheses, ...)")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('-j', '--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--target', type=float, default=0.8, help="power to report the required n for")
+    parser.add_argument('--json', help="write the power curves to this JSON file")
+    parser.add_argument('--no-cache', action='store_true', help="do not read or write cached replications")
+    args = parser.parse_args(argv)
+
+    try:
+        model = load_model(args.model)
+        result = simulate_power(parse_sizes(args.sizes), args.replications, model, seed=args.seed,
+                                workers=args.workers, cache_dir=None if args.no_cache else CACHE_DIR)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+    print(f"Simulated {result['simulated']} replications in {result['seconds']:.1f}s "
+          f"(cached ones reused), alpha = {model['alpha']}")
+    print_curves(result, args.target)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(dict(result, required=required_sizes(result, args.target), target=args.target,
+                           alpha=model['alpha'], replications=args.replications), f, indent=2)
+            f.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
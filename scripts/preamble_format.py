@@ -0,0 +1,178 @@
+import hashlib
+import json
+import os
+import subprocess
+import time
+
+import build_trace
+import file_utils
+from project_index import COMMENT_PATTERN
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LIB_DIR = os.path.join(PROJECT_ROOT, 'content', 'lib')
+
+# Bump when the way formats are dumped changes, so old formats are not reused
+FORMAT_VERSION = 1
+
+# Set to 0 to build without precompiled formats (build.sh --no-format)
+FORMAT_ENV = 'PREAMBLE_FORMAT'
+
+# mylatexformat stops dumping here; everything after it (title, bibliography
+# resources, ...) is read on every pass. Without a format the line is a no-op.
+END_OF_DUMP = '\\csname endofdump\\endcsname'
+
+LATEX = 'pdflatex'
+BASE_FORMAT = 'pdflatex.fmt'
+
+
+def enabled():
+    return os.environ.get(FORMAT_ENV, '1') != '0'
+
+
+def static_preamble(main_tex):
+    """
+    Returns the part of a document's preamble that goes into its format.
+
+    That is everything before `\\csname endofdump\\endcsname`, or before
+    `\\begin{document}` if the marker is missing. Comments are dropped so
+    editing them does not invalidate the format.
+    """
+    with open(main_tex, 'r', encoding='utf-8') as f:
+        content = f.read()
+    preamble = content.split('\\begin{document}', 1)[0]
+    for marker in (END_OF_DUMP, '\\endofdump'):
+        if marker in preamble:
+            preamble = preamble.split(marker, 1)[0]
+            break
+    return COMMENT_PATTERN.sub('', preamble)
+
+
+def lib_files(lib_dir=None):
+    """All files below content/lib, the classes and packages the preamble loads."""
+    paths = []
+    for dirpath, dirnames, filenames in os.walk(lib_dir or LIB_DIR):
+        dirnames.sort()
+        paths.extend(os.path.join(dirpath, name) for name in sorted(filenames))
+    return paths
+
+
+def kpsewhich(name):
+    """Resolves a file in the TeX installation, None if it is not installed."""
+    try:
+        result = subprocess.run(['kpsewhich', name], capture_output=True, text=True)
+    except OSError:
+        return None
+    path = result.stdout.strip()
+    return path if result.returncode == 0 and path else None
+
+
+def format_key(main_tex, base_format, lib_dir=None):
+    """
+    Hashes everything a format depends on: the static preamble, the files in
+    content/lib and the base LaTeX format (which changes with TeX Live updates).
+    """
+    lib_dir = lib_dir or LIB_DIR
+    digest = hashlib.sha256(f"v{FORMAT_VERSION}\n".encode())
+    digest.update(static_preamble(main_tex).encode('utf-8'))
+    for path in lib_files(lib_dir):
+        digest.update(f"\n{os.path.relpath(path, lib_dir)}:{file_utils.file_hash(path)}".encode())
+    digest.update(f"\n{BASE_FORMAT}:{file_utils.file_hash(base_format)}".encode())
+    return digest.hexdigest()
+
+
+def format_paths(main_tex, outdir):
+    """Paths of the format, its metadata and the timing probe, e.g. build/main/main-preamble.fmt."""
+    jobname = os.path.splitext(os.path.basename(main_tex))[0] + '-preamble'
+    base = os.path.join(outdir, jobname)
+    return {'jobname': jobname, 'fmt': base + '.fmt', 'meta': base + '.json', 'probe': base + '-probe.tex'}
+
+
+def load_meta(path):
+    return file_utils.load_cache(path) or None
+
+
+def _run(command, cwd):
+    """Runs a LaTeX command quietly and returns (exit_code, seconds)."""
+    start = time.monotonic()
+    try:
+        result = subprocess.run(command, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                stdin=subprocess.DEVNULL)
+    except OSError:
+        return 127, 0.0
+    return result.returncode, time.monotonic() - start
+
+
+def measure(main_tex, paths, outdir):
+    """
+    Times one pass over the static preamble with and without the format.
+
+    The probe document is the static preamble with an empty body, so the
+    difference is the startup time every pdflatex pass saves.
+    """
+    with open(paths['probe'], 'w', encoding='utf-8') as f:
+        f.write(static_preamble(main_tex) + '\n\\begin{document}\n\\end{document}\n')
+    options = ['-draftmode', '-interaction=batchmode', f'-output-directory={outdir}']
+    source_dir = os.path.dirname(main_tex)
+    # The probe lives in the output directory, but relative paths in the
+    # preamble (\graphicspath, ...) resolve against the document directory
+    _code, without = _run([LATEX] + options + [paths['probe']], source_dir)
+    _code, with_format = _run([LATEX, f"-fmt={paths['fmt']}"] + options + [paths['probe']], source_dir)
+    return without, with_format
+
+
+def ensure_format(main_tex, outdir):
+    """
+    Returns the format of a document's static preamble, dumping it first if it
+    is missing or out of date.
+
+    The result is a dict with the format `path`, whether it was `dumped` now
+    and the measured `saved` seconds per pdflatex pass, or None if formats are
+    disabled or cannot be built here (no mylatexformat, dump failed); the
+    document is then built without one.
+    """
+    main_tex = os.path.abspath(main_tex)
+    if not enabled():
+        return None
+    base_format = kpsewhich(BASE_FORMAT)
+    if not base_format or not kpsewhich('mylatexformat.ltx'):
+        return None
+
+    os.makedirs(outdir, exist_ok=True)
+    paths = format_paths(main_tex, outdir)
+    key = format_key(main_tex, base_format)
+    meta = load_meta(paths['meta'])
+    if meta and meta.get('key') == key and os.path.exists(paths['fmt']):
+        return {'path': paths['fmt'], 'dumped': False, 'saved': meta['saved']}
+
+    started = time.time()
+    command = [LATEX, '-ini', '-interaction=nonstopmode', f"-jobname={paths['jobname']}",
+               f'-output-directory={outdir}', '&pdflatex', 'mylatexformat.ltx', os.path.basename(main_tex)]
+    exit_code, seconds = _run(command, os.path.dirname(main_tex))
+    if exit_code != 0 or not os.path.exists(paths['fmt']):
+        for path in (paths['fmt'], paths['meta']):
+            if os.path.exists(path):
+                os.remove(path)
+        print(f"Warning: could not dump the preamble format of {os.path.relpath(main_tex, PROJECT_ROOT)}, "
+              f"see {os.path.relpath(os.path.join(outdir, paths['jobname'] + '.log'), PROJECT_ROOT)}")
+        return None
+
+    without, with_format = measure(main_tex, paths, outdir)
+    meta = {'key': key, 'dump': seconds, 'without': without, 'with': with_format,
+            'saved': max(0.0, without - with_format)}
+    with file_utils.atomic_write(paths['meta']) as f:
+        json.dump(meta, f, indent=2, sort_keys=True)
+    build_trace.record({'name': 'preamble_format', 'category': 'stage', 'document': main_tex, 'start': started,
+                        'wall': time.time() - started, 'saved': meta['saved']})
+    return {'path': paths['fmt'], 'dumped': True, 'saved': meta['saved']}
+
+
+def pdflatex_options(fmt):
+    """pdflatex options that start a pass from the given format."""
+    return [f"-fmt={fmt['path']}"]
+
+
+def forget_format(main_tex, outdir):
+    paths = format_paths(os.path.abspath(main_tex), outdir)
+    for path in (paths['fmt'], paths['meta']):
+        if os.path.exists(path):
+            os.remove(path)
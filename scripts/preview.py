@@ -0,0 +1,177 @@
+import argparse
+import os
+import re
+import shutil
+import sys
+import time
+
+import build_driver
+import build_trace
+import check_toc
+import latex_log
+import preamble_format
+from project_index import CITE_PATTERN
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Previews are written below <target>/build/preview/<section>/, next to the full builds
+PREVIEW_DIR_NAME = 'preview'
+
+SUBFILES_PARENT_PATTERN = re.compile(r'\\documentclass\[([^\]]+)\]\{subfiles\}')
+
+
+def parent_document(section_tex):
+    """The main .tex a subfile names in \\documentclass[../main.tex]{subfiles}, None if it names none."""
+    with open(section_tex, 'r', encoding='utf-8') as f:
+        match = SUBFILES_PARENT_PATTERN.search(f.read())
+    if not match:
+        return None
+    parent = os.path.join(os.path.dirname(section_tex), match.group(1).strip())
+    if not parent.endswith('.tex'):
+        parent += '.tex'
+    return os.path.normpath(parent)
+
+
+def preview_dir_for(section_tex, main_tex):
+    """Scratch directory of a preview, e.g. content/prestudy/build/preview/03_methodology."""
+    stem = os.path.splitext(os.path.basename(section_tex))[0]
+    return os.path.join(os.path.dirname(main_tex), build_driver.BUILD_DIR_NAME, PREVIEW_DIR_NAME, stem)
+
+
+def wrapper_source(section_tex, main_tex):
+    """
+    A document with the parent's preamble, copied verbatim so that the
+    parent's preamble format applies, and the section as its only content.
+    """
+    with open(main_tex, 'r', encoding='utf-8') as f:
+        preamble = f.read().split('\\begin{document}', 1)[0]
+    include = os.path.splitext(os.path.relpath(section_tex, os.path.dirname(main_tex)))[0].replace(os.sep, '/')
+    return f"{preamble}\\begin{{document}}\n\\subfile{{{include}}}\n\\end{{document}}\n"
+
+
+def cited_keys(section_tex, main_dir):
+    keys = set()
+    for _cmd, names in CITE_PATTERN.findall(check_toc.document_body(section_tex, main_dir)):
+        keys.update(key.strip() for key in names.split(',') if key.strip() and key.strip() != '*')
+    return keys
+
+
+def bbl_keys(bbl_path):
+    if not os.path.exists(bbl_path):
+        return None
+    with open(bbl_path, 'r', encoding='utf-8', errors='replace') as f:
+        return {match.group(1) for match in map(check_toc.BBL_ENTRY_PATTERN.match, f) if match}
+
+
+def seed(parent_outdir, parent_jobname, outdir, jobname, extensions):
+    """Copies the parent's artifacts so the preview starts with its labels and bibliography."""
+    for extension in extensions:
+        source = os.path.join(parent_outdir, parent_jobname + extension)
+        if os.path.exists(source):
+            shutil.copyfile(source, os.path.join(outdir, jobname + extension))
+
+
+def build_preview(section_tex, main_tex=None, log=None):
+    """
+    Compiles one subfile with the preamble of its parent document into a
+    scratch directory and returns a dict with the `pdf`, `exit_code`, the
+    number of pdflatex `passes`, whether `biber` ran, the `diagnostics` and
+    the `duration`.
+
+    The parent's .aux is copied in before every pass, so references to other
+    sections resolve to the numbers and pages of the full document. If the
+    parent's .bbl has an entry for every key the section cites, it is reused
+    and one pass is enough; otherwise biber runs on the preview and a second
+    pass picks up the new .bbl.
+    """
+    start = time.monotonic()
+    section_tex = os.path.abspath(section_tex)
+    main_tex = os.path.abspath(main_tex or parent_document(section_tex))
+    main_dir = os.path.dirname(main_tex)
+    parent_jobname = os.path.splitext(os.path.basename(main_tex))[0]
+    parent_outdir = build_driver.output_dir_for(main_tex)
+    jobname = os.path.splitext(os.path.basename(section_tex))[0]
+    outdir = preview_dir_for(section_tex, main_tex)
+    os.makedirs(outdir, exist_ok=True)
+
+    wrapper = os.path.join(outdir, jobname + '.tex')
+    with open(wrapper, 'w', encoding='utf-8') as f:
+        f.write(wrapper_source(section_tex, main_tex))
+    # A .bbl left by an earlier preview may lack keys cited since; without one biblatex asks for biber
+    if os.path.exists(os.path.join(outdir, jobname + '.bbl')):
+        os.remove(os.path.join(outdir, jobname + '.bbl'))
+    parent_keys = bbl_keys(os.path.join(parent_outdir, parent_jobname + '.bbl'))
+    reuse_bbl = parent_keys is not None and cited_keys(section_tex, main_dir) <= parent_keys
+    if reuse_bbl:
+        seed(parent_outdir, parent_jobname, outdir, jobname, ('.bbl',))
+
+    # The parent's format was dumped from the same preamble
+    fmt = preamble_format.ensure_format(main_tex, parent_outdir)
+    pdflatex = (build_driver.PDFLATEX_COMMAND + (preamble_format.pdflatex_options(fmt) if fmt else [])
+                + [f'-output-directory={outdir}', os.path.relpath(wrapper, main_dir)])
+    biber = build_driver.BIBER_COMMAND + [f'--input-directory={outdir}', f'--output-directory={outdir}', jobname]
+    log = log or sys.stdout
+    result = {'pdf': os.path.join(outdir, jobname + '.pdf'), 'passes': 0, 'biber': False}
+
+    def run_pdflatex():
+        # The pass rewrites the .aux with the section's labels only
+        seed(parent_outdir, parent_jobname, outdir, jobname, ('.aux',))
+        result['passes'] += 1
+        exit_code, _event = build_trace.run_traced(pdflatex, 'pdflatex', cwd=main_dir, log=log, document=wrapper,
+                                                   category='pass')
+        return exit_code, latex_log.read(os.path.join(outdir, jobname + '.log'), latex_log.parse_log)
+
+    exit_code, diagnostics = run_pdflatex()
+    # "Label(s) may have changed" is expected: the seeded .aux holds the labels of
+    # the whole document. Only a missing bibliography is worth another pass.
+    if exit_code == 0 and latex_log.decide(diagnostics).biber:
+        result['biber'] = True
+        exit_code, _event = build_trace.run_traced(biber, 'biber', cwd=main_dir, log=log, document=wrapper,
+                                                   category='pass', env=build_driver.biber_env(outdir))
+        if exit_code == 0:
+            exit_code, diagnostics = run_pdflatex()
+    result.update(exit_code=exit_code, diagnostics=diagnostics, duration=time.monotonic() - start)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compile one section with its parent's preamble, references and bibliography.")
+    parser.add_argument('section', help="subfile to preview, e.g. content/prestudy/sections/03_methodology.tex")
+    parser.add_argument('--main', help="parent document (default: the one named in \\documentclass[...]{subfiles})")
+    args = parser.parse_args(argv)
+
+    section_tex = os.path.abspath(args.section)
+    if not os.path.isfile(section_tex):
+        print(f"Error: {args.section} not found.")
+        return 1
+    main_tex = os.path.abspath(args.main) if args.main else parent_document(section_tex)
+    if not main_tex or not os.path.isfile(main_tex):
+        print(f"Error: no parent document found for {args.section}, pass it with --main.")
+        return 1
+    if not os.path.exists(os.path.join(build_driver.output_dir_for(main_tex),
+                                       os.path.splitext(os.path.basename(main_tex))[0] + '.aux')):
+        print(f"Note: {os.path.relpath(main_tex, PROJECT_ROOT)} has not been built yet; references to other "
+              f"sections stay undefined until it is.")
+
+    build_driver.set_search_paths()
+    outdir = preview_dir_for(section_tex, main_tex)
+    os.makedirs(outdir, exist_ok=True)
+    log_path = os.path.join(outdir, os.path.splitext(os.path.basename(section_tex))[0] + '.build.log')
+    with open(log_path, 'w', encoding='utf-8') as log:
+        result = build_preview(section_tex, main_tex, log)
+
+    errors = [d for d in result['diagnostics'] if d.severity == latex_log.ERROR]
+    for diagnostic in errors:
+        print(latex_log.format_diagnostic(diagnostic))
+    if result['exit_code'] != 0:
+        print(f"Preview failed, see {os.path.relpath(log_path, PROJECT_ROOT)}")
+        return 1
+    passes = f"{result['passes']} pdflatex pass{'es' if result['passes'] > 1 else ''}" + \
+             (" and biber" if result['biber'] else '')
+    print(f"Preview written to {os.path.relpath(result['pdf'], PROJECT_ROOT)} ({passes}, {result['duration']:.1f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
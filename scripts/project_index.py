@@ -0,0 +1,187 @@
+import os
+import re
+import sys
+
+from file_utils import file_hash, load_cache, save_cache
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONTENT_DIR = os.path.join(PROJECT_ROOT, 'content')
+CACHE_DIR = os.path.join(PROJECT_ROOT, '.cache')
+CACHE_FILE = os.path.join(CACHE_DIR, 'project_index.json')
+
+# Documents scanned by the index, relative to content/
+DOCUMENT_DIRS = ('prestudy', 'thesis', 'text-ideas')
+
+# Bump when the parser changes so stale cache entries are discarded
+INDEX_VERSION = 1
+
+# Pattern to find \cite{key}, \parencite{key}, \textcite{key}, \nocite{*} etc.
+CITE_PATTERN = re.compile(r'\\([a-zA-Z]*cite[a-zA-Z]*)(?:\[[^\]]*\]){0,2}\{([^}]+)\}')
+SUBFILE_PATTERN = re.compile(r'\\subfile\{([^}]+)\}')
+LABEL_PATTERN = re.compile(r'\\label\{([^}]+)\}')
+REF_PATTERN = re.compile(r'\\(?:[a-zA-Z]*ref)\{([^}]+)\}')
+COMMENT_PATTERN = re.compile(r'(?<!\\)%.*')
+COMMAND_PATTERN = re.compile(r'\\[a-zA-Z@]+\*?')
+WORD_PATTERN = re.compile(r'[^\W\d_]+(?:[-\'][^\W\d_]+)*')
+
+
+def count_words(content):
+    """Roughly counts prose words, ignoring comments and LaTeX command names."""
+    text = COMMENT_PATTERN.sub('', content)
+    text = COMMAND_PATTERN.sub(' ', text)
+    return len(WORD_PATTERN.findall(text))
+
+
+def parse_tex(content):
+    """
+    Extracts citations, subfile includes, labels, refs and word count from LaTeX source.
+
+    `\\nocite{*}` is not recorded as a key; it sets the `nocite_all` flag instead.
+    """
+    citations = []
+    nocite_all = False
+    for _cmd, keys in CITE_PATTERN.findall(content):
+        for key in keys.split(','):
+            key = key.strip()
+            if key == '*':
+                nocite_all = True
+            elif key and key not in citations:
+                citations.append(key)
+
+    refs = []
+    for keys in REF_PATTERN.findall(content):
+        for key in keys.split(','):
+            key = key.strip()
+            if key and key not in refs:
+                refs.append(key)
+
+    return {
+        'citations': citations,
+        'nocite_all': nocite_all,
+        'subfiles': [s.strip() for s in SUBFILE_PATTERN.findall(content)],
+        'labels': [s.strip() for s in LABEL_PATTERN.findall(content)],
+        'refs': refs,
+        'word_count': count_words(content),
+    }
+
+
+def find_tex_files(root=PROJECT_ROOT, documents=DOCUMENT_DIRS):
+    """Returns project-relative paths of all .tex files of the given documents."""
+    tex_files = []
+    for document in documents:
+        document_dir = os.path.join(root, 'content', document)
+        for dirpath, dirnames, filenames in os.walk(document_dir):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                if filename.endswith('.tex'):
+                    full_path = os.path.join(dirpath, filename)
+                    tex_files.append(os.path.relpath(full_path, root).replace(os.sep, '/'))
+    return tex_files
+
+
+class ProjectIndex:
+    """Per-file record of citations, includes, labels, refs and word counts."""
+
+    def __init__(self, files, root=PROJECT_ROOT, parsed=0):
+        self.files = files
+        self.root = root
+        # Number of files that had to be re-parsed while building this index
+        self.parsed = parsed
+
+    def paths(self, prefix='', exclude=()):
+        """Project-relative paths under `prefix`, skipping names containing any of `exclude`."""
+        return [
+            path for path in sorted(self.files)
+            if path.startswith(prefix)
+            and not any(part in os.path.basename(path) for part in exclude)
+        ]
+
+    def citations(self, paths):
+        """Union of all citation keys used in the given files."""
+        keys = set()
+        for path in paths:
+            keys.update(self.files[path]['citations'])
+        return keys
+
+    def labels(self, paths):
+        labels = set()
+        for path in paths:
+            labels.update(self.files[path]['labels'])
+        return labels
+
+    def refs(self, paths):
+        refs = set()
+        for path in paths:
+            refs.update(self.files[path]['refs'])
+        return refs
+
+    def word_count(self, paths):
+        return sum(self.files[path]['word_count'] for path in paths)
+
+    def entry(self, path):
+        return self.files[path]
+
+
+def build_index(root=PROJECT_ROOT, cache_file=CACHE_FILE, documents=DOCUMENT_DIRS):
+    """
+    Scans all documents once and returns a ProjectIndex.
+
+    A cached entry is reused when the file's mtime and size are unchanged, or when
+    its content hash still matches; only changed files are re-parsed.
+    """
+    cached = load_cache(cache_file, INDEX_VERSION)
+    files = {}
+    parsed = 0
+    dirty = False
+
+    for rel_path in find_tex_files(root, documents):
+        full_path = os.path.join(root, rel_path)
+        stat = os.stat(full_path)
+        entry = cached.get(rel_path)
+
+        if entry and entry['mtime'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+            files[rel_path] = entry
+            continue
+
+        digest = file_hash(full_path)
+        if entry and entry['hash'] == digest:
+            entry = dict(entry, mtime=stat.st_mtime_ns, size=stat.st_size)
+        else:
+            with open(full_path, 'r', encoding='utf-8') as f:
+                entry = parse_tex(f.read())
+            entry.update(hash=digest, mtime=stat.st_mtime_ns, size=stat.st_size)
+            parsed += 1
+        files[rel_path] = entry
+        dirty = True
+
+    if set(files) != set(cached):
+        dirty = True
+    if cache_file and dirty:
+        save_cache(cache_file, files, INDEX_VERSION)
+
+    return ProjectIndex(files, root=root, parsed=parsed)
+
+
+_INDEX = None
+
+
+def get_project_index():
+    """Returns the project index, building it at most once per process."""
+    global _INDEX
+    if _INDEX is None:
+        _INDEX = build_index()
+    return _INDEX
+
+
+def main():
+    index = build_index()
+    print(f"Indexed {len(index.files)} .tex files ({index.parsed} re-parsed).")
+    for document in DOCUMENT_DIRS:
+        paths = index.paths(f'content/{document}/')
+        print(f"  {document}: {len(paths)} files, {len(index.citations(paths))} unique citations, "
+              f"{index.word_count(paths)} words")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
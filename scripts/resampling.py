@@ -0,0 +1,356 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from statistics import NormalDist
+
+import numpy as np
+
+import file_utils
+
+BOOTSTRAP = 'bootstrap'
+PERMUTATION = 'permutation'
+
+# Resamples per batch; one batch is one index matrix and one unit of work/checkpointing
+BATCH_SIZE = 500
+CHECKPOINT_VERSION = 1
+
+
+def load_table(csv_path, columns=None):
+    """Reads a numeric CSV (e.g. the scores of survey_scoring.py); returns (data, column names), complete rows only."""
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        header = [name.strip() for name in f.readline().strip().split(',')]
+    columns = columns or header
+    missing = [name for name in columns if name not in header]
+    if missing:
+        raise ValueError(f"{csv_path} has no column(s): {', '.join(missing)}")
+    data = np.genfromtxt(csv_path, delimiter=',', skip_header=1, usecols=[header.index(c) for c in columns],
+                         ndmin=2)
+    return data[~np.isnan(data).any(axis=1)], list(columns)
+
+
+def _ols(design, target):
+    """Batched least squares: design (B x n x p), target (B x n) -> coefficients (B x p)."""
+    transposed = design.transpose(0, 2, 1)
+    xtx = transposed @ design
+    xty = (transposed @ target[..., None])[..., 0]
+    try:
+        return np.linalg.solve(xtx, xty[..., None])[..., 0]
+    except np.linalg.LinAlgError:
+        # A resample without variance in a predictor (e.g. no member of a group)
+        return np.einsum('bij,bj->bi', np.linalg.pinv(xtx), xty)
+
+
+class IndirectEffect:
+    """
+    Serial indirect effect of chain[0] on chain[-1] through the mediators in between.
+
+    Every mediator and the outcome are regressed on all earlier variables of the
+    chain plus the covariates (Hayes' model 6); the effect is the product of
+    the coefficients of consecutive links, e.g. Dummy_Pos > XAIT > PUF > BI.
+    """
+
+    def __init__(self, columns, chain, covariates=()):
+        if len(chain) < 3:
+            raise ValueError("An indirect effect needs at least one mediator")
+        self.columns = list(columns)
+        self.chain = list(chain)
+        self.covariates = [name for name in covariates if name not in chain]
+        self.name = ' > '.join(self.chain)
+
+    def __repr__(self):
+        return f"IndirectEffect({self.chain!r}, covariates={self.covariates!r})"
+
+    def __call__(self, data, indices):
+        sample = data[indices]
+        position = {name: self.columns.index(name) for name in self.chain + self.covariates}
+        effect = np.ones(indices.shape[0])
+        for k in range(1, len(self.chain)):
+            predictors = self.chain[:k] + self.covariates
+            design = np.concatenate([np.ones(indices.shape + (1,)),
+                                     sample[:, :, [position[name] for name in predictors]]], axis=2)
+            coefficients = _ols(design, sample[:, :, position[self.chain[k]]])
+            # Coefficient of the directly preceding chain variable (after the intercept)
+            effect *= coefficients[:, k]
+        return effect
+
+
+class MeanDifference:
+    """Difference of the mean of `outcome` between the groups coded `a` and `b` in column `group`."""
+
+    def __init__(self, columns, outcome, group, a, b):
+        self.columns = list(columns)
+        self.outcome, self.group, self.a, self.b = outcome, group, a, b
+        self.name = f"{outcome}: {group}={a} - {group}={b}"
+
+    def __repr__(self):
+        return f"MeanDifference({self.outcome!r}, {self.group!r}, {self.a!r}, {self.b!r})"
+
+    def __call__(self, data, indices):
+        values = data[indices, self.columns.index(self.outcome)]
+        groups = data[indices, self.columns.index(self.group)]
+        in_a, in_b = groups == self.a, groups == self.b
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (values * in_a).sum(axis=1) / in_a.sum(axis=1) - (values * in_b).sum(axis=1) / in_b.sum(axis=1)
+
+
+class Permuted:
+    """Applies the resample indices only to `permuted` columns (e.g. the group labels), keeping the rest in place."""
+
+    def __init__(self, statistic, permuted):
+        self.statistic = statistic
+        self.permuted = [statistic.columns.index(name) for name in permuted]
+        self.name = statistic.name
+
+    def __repr__(self):
+        return f"Permuted({self.statistic!r}, {self.permuted!r})"
+
+    def __call__(self, data, indices):
+        batch, n = indices.shape
+        # Build the permuted data set per resample, then evaluate it in original order
+        sample = np.broadcast_to(data, (batch,) + data.shape).copy()
+        sample[:, :, self.permuted] = data[indices][:, :, self.permuted]
+        identity = np.broadcast_to(np.arange(n), (batch, n))
+        flat = sample.reshape(batch * n, -1)
+        return self.statistic(flat, identity + (np.arange(batch) * n)[:, None])
+
+
+def index_matrix(rng, n, size, method, strata=None):
+    """
+    Draws `size` resamples of n row indices as one (size x n) matrix.
+
+    Bootstrap resamples with replacement, within each stratum if `strata`
+    (one label per row) is given, so cell sizes of the design stay fixed.
+    Permutations shuffle all rows.
+    """
+    if method == PERMUTATION:
+        return rng.permuted(np.broadcast_to(np.arange(n), (size, n)), axis=1)
+    if strata is None:
+        return rng.integers(0, n, size=(size, n))
+    indices = np.empty((size, n), dtype=np.int64)
+    for label in np.unique(strata):
+        members = np.flatnonzero(strata == label)
+        indices[:, members] = members[rng.integers(0, len(members), size=(size, len(members)))]
+    return indices
+
+
+def batch_rng(seed, batch):
+    """Independent, reproducible random stream per batch, regardless of which worker runs it."""
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(batch,)))
+
+
+_worker_state = {}
+
+
+def _init_worker(data, statistics, method, strata, seed):
+    _worker_state.update(data=data, statistics=statistics, method=method, strata=strata, seed=seed)
+
+
+def _run_batch(batch, size):
+    state = _worker_state
+    indices = index_matrix(batch_rng(state['seed'], batch), state['data'].shape[0], size,
+                           state['method'], state['strata'])
+    return batch, np.column_stack([statistic(state['data'], indices) for statistic in state['statistics']])
+
+
+def _fingerprint(data, statistics, method, strata, seed, batch_size):
+    digest = hashlib.sha256(np.ascontiguousarray(data).tobytes())
+    if strata is not None:
+        digest.update(np.ascontiguousarray(strata).tobytes())
+    digest.update(repr((statistics, method, seed, batch_size, CHECKPOINT_VERSION)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _batch_path(checkpoint_dir, batch, size):
+    return os.path.join(checkpoint_dir, f"batch_{batch:06d}_{size}.npy")
+
+
+def _open_checkpoint(checkpoint_dir, fingerprint):
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    meta_path = os.path.join(checkpoint_dir, 'meta.json')
+    if os.path.exists(meta_path):
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('fingerprint') != fingerprint:
+            raise ValueError(f"Checkpoint {checkpoint_dir} belongs to a different run "
+                             "(data, statistics, seed or batch size changed)")
+        return
+    # Atomic like the batches, so an interrupted run leaves a checkpoint that can be resumed
+    with file_utils.atomic_write(meta_path) as f:
+        json.dump({'fingerprint': fingerprint}, f)
+
+
+def _save_batch(checkpoint_dir, batch, values):
+    path = _batch_path(checkpoint_dir, batch, values.shape[0])
+    with file_utils.atomic_write(path, 'wb') as f:
+        np.save(f, values)
+
+
+class ResampleResult:
+    """Resampled statistics (resamples x statistics) with the estimate on the original data and timing."""
+
+    def __init__(self, names, estimate, values, seconds, computed):
+        self.names = names
+        self.estimate = estimate
+        self.values = values
+        self.seconds = seconds
+        self.computed = computed
+
+    @property
+    def throughput(self):
+        """Resamples computed per second in this run (excludes batches restored from a checkpoint)."""
+        return self.computed / self.seconds if self.seconds > 0 else float('inf')
+
+
+def resample(data, statistics, n_resamples, method=BOOTSTRAP, batch_size=BATCH_SIZE, workers=None, seed=0,
+             strata=None, checkpoint_dir=None, progress=False):
+    """
+    Evaluates `statistics` on `n_resamples` bootstrap resamples or permutations.
+
+    Resamples are drawn as batched index matrices and every statistic is
+    evaluated on a whole batch at once. Batches are spread over a process pool;
+    each batch has its own seed, so results are identical for any number of
+    workers. With `checkpoint_dir` every finished batch is saved and a rerun
+    (or a run with more resamples) only computes the missing batches.
+    """
+    data = np.asarray(data, dtype=float)
+    strata = None if strata is None else np.asarray(strata)
+    workers = max(1, workers or os.cpu_count() or 1)
+    batches = [(batch, min(batch_size, n_resamples - batch * batch_size))
+               for batch in range(-(-n_resamples // batch_size))]
+    identity = np.arange(data.shape[0])[None, :]
+    estimate = np.array([statistic(data, identity)[0] for statistic in statistics])
+
+    results = {}
+    if checkpoint_dir:
+        _open_checkpoint(checkpoint_dir, _fingerprint(data, statistics, method, strata, seed, batch_size))
+        for batch, size in batches:
+            path = _batch_path(checkpoint_dir, batch, size)
+            if os.path.exists(path):
+                results[batch] = np.load(path)
+    pending = [(batch, size) for batch, size in batches if batch not in results]
+
+    start = time.monotonic()
+    done = 0
+
+    def collect(batch, values):
+        nonlocal done
+        results[batch] = values
+        done += values.shape[0]
+        if checkpoint_dir:
+            _save_batch(checkpoint_dir, batch, values)
+        if progress:
+            rate = done / max(time.monotonic() - start, 1e-9)
+            print(f"  {done + n_resamples - sum(size for _b, size in pending)}/{n_resamples} resamples "
+                  f"({rate:,.0f}/s)", flush=True)
+
+    if workers == 1 or len(pending) <= 1:
+        _init_worker(data, statistics, method, strata, seed)
+        for batch, size in pending:
+            collect(*_run_batch(batch, size))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(data, statistics, method, strata, seed)) as pool:
+            futures = [pool.submit(_run_batch, batch, size) for batch, size in pending]
+            for future in as_completed(futures):
+                collect(*future.result())
+
+    seconds = time.monotonic() - start
+    values = np.concatenate([results[batch] for batch, _size in batches]) if batches else np.empty((0, len(statistics)))
+    return ResampleResult([statistic.name for statistic in statistics], estimate, values, seconds, done)
+
+
+def percentile_interval(values, level=0.95):
+    alpha = (1 - level) / 2
+    return tuple(np.nanquantile(values, [alpha, 1 - alpha], axis=0))
+
+
+def bias_corrected_interval(values, estimate, level=0.95):
+    """Bias-corrected (BC) bootstrap interval (Efron, 1987), as used for the indirect effects in the analysis plan."""
+    normal = NormalDist()
+    z_alpha = normal.inv_cdf((1 + level) / 2)
+    lower, upper = [], []
+    for column, value in zip(values.T, np.atleast_1d(estimate)):
+        column = column[~np.isnan(column)]
+        share = np.clip(np.mean(column < value), 1 / (len(column) + 1), len(column) / (len(column) + 1))
+        z0 = normal.inv_cdf(share)
+        bounds = np.quantile(column, [normal.cdf(2 * z0 - z_alpha), normal.cdf(2 * z0 + z_alpha)])
+        lower.append(bounds[0])
+        upper.append(bounds[1])
+    return np.array(lower), np.array(upper)
+
+
+def permutation_p_value(null, observed):
+    """Two-sided p-value of `observed` against permutation `null` values, (1 + #extreme) / (1 + R)."""
+    null = np.asarray(null)
+    extreme = (np.abs(null) >= np.abs(np.atleast_1d(observed)) - 1e-12).sum(axis=0)
+    return (1 + extreme) / (1 + null.shape[0])
+
+
+def print_result(result, method, level=0.95):
+    print(f"{result.values.shape[0]} {method} resamples, {result.computed} computed in {result.seconds:.1f}s "
+          f"({result.throughput:,.0f} resamples/s)")
+    if method == BOOTSTRAP:
+        lower, upper = bias_corrected_interval(result.values, result.estimate, level)
+        p_lower, p_upper = percentile_interval(result.values, level)
+        print(f"  {'Statistic':<40} {'Estimate':>9} {'BC ' + format(level, '.0%') + ' CI':>22} {'Percentile CI':>22}")
+        for i, name in enumerate(result.names):
+            print(f"  {name:<40} {result.estimate[i]:>9.4f} [{lower[i]:>9.4f}, {upper[i]:>9.4f}] "
+                  f"[{p_lower[i]:>9.4f}, {p_upper[i]:>9.4f}]")
+    else:
+        p_values = permutation_p_value(result.values, result.estimate)
+        print(f"  {'Statistic':<40} {'Observed':>9} {'p':>8}")
+        for i, name in enumerate(result.names):
+            print(f"  {name:<40} {result.estimate[i]:>9.4f} {p_values[i]:>8.4f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bootstrap confidence intervals and permutation tests.")
+    parser.add_argument('method', choices=(BOOTSTRAP, PERMUTATION))
+    parser.add_argument('data', help="numeric CSV, e.g. construct scores with dummy-coded framing groups")
+    parser.add_argument('--indirect', action='append', default=[], metavar='X>M1>...>Y',
+                        help="serial indirect effect, e.g. Dummy_Pos>XAIT>PUF>BI (repeatable)")
+    parser.add_argument('--covariates', default='', help="comma-separated covariates of every regression")
+    parser.add_argument('--difference', action='append', default=[], metavar='OUTCOME:GROUP:A:B',
+                        help="mean difference of OUTCOME between GROUP=A and GROUP=B (repeatable)")
+    parser.add_argument('--permute', default='',
+                        help="comma-separated columns shuffled by the permutation test (default: the group columns)")
+    parser.add_argument('--strata', help="bootstrap within the levels of this column (e.g. the design cell)")
+    parser.add_argument('-n', '--resamples', type=int, default=5000)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('-j', '--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--level', type=float, default=0.95, help="confidence level")
+    parser.add_argument('--checkpoint', help="directory to save finished batches in and resume from")
+    args = parser.parse_args(argv)
+
+    try:
+        data, columns = load_table(args.data)
+        covariates = [name for name in args.covariates.split(',') if name]
+        statistics = [IndirectEffect(columns, chain.split('>'), covariates) for chain in args.indirect]
+        for spec in args.difference:
+            outcome, group, a, b = spec.split(':')
+            statistics.append(MeanDifference(columns, outcome, group, float(a), float(b)))
+        if not statistics:
+            parser.error("specify at least one --indirect or --difference statistic")
+        if args.method == PERMUTATION:
+            permuted = [name for name in args.permute.split(',') if name]
+            if not permuted:
+                permuted = sorted(set(s.group if isinstance(s, MeanDifference) else s.chain[0] for s in statistics))
+            statistics = [Permuted(statistic, permuted) for statistic in statistics]
+        strata = data[:, columns.index(args.strata)] if args.strata else None
+        result = resample(data, statistics, args.resamples, args.method, args.batch_size, args.workers,
+                          args.seed, strata, args.checkpoint, progress=True)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+
+    print_result(result, args.method, args.level)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,241 @@
+import argparse
+import codecs
+import hashlib
+import os
+import re
+import sys
+import unicodedata
+
+import file_utils
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONTENT_DIR = os.path.join(PROJECT_ROOT, 'content')
+CACHE_FILE = os.path.join(PROJECT_ROOT, '.cache', 'sanitize.json')
+CACHE_VERSION = 1
+
+EXTENSIONS = ('.bib', '.tex')
+# Build output (latexmk -outdir) is never sanitized
+SKIP_DIRS = ('build',)
+CHUNK_SIZE = 1 << 16
+
+# Characters that are invisible in editors but break pdflatex/biber or searches.
+# Each maps to its replacement; NBSP-like spaces are handled per file type below.
+REMOVED = {
+    'zero-width': '\u200b\u200c\u200d\u2060',
+    'bom': '\ufeff',
+    'bidi': '\u200e\u200f\u061c\u202a\u202b\u202c\u202d\u202e\u2066\u2067\u2068\u2069',
+}
+NBSP = '\u00a0\u202f\u2007'
+# A non-breaking space is a tie in LaTeX, a narrow one (the space in "z. B." or
+# between thousands) and a figure space a thin space; in .bib values a plain
+# space is safer (URLs, keys)
+NBSP_REPLACEMENT = {
+    '.tex': {'\u00a0': '~', '\u202f': '\\,', '\u2007': '\\,'},
+    '.bib': {'\u00a0': ' ', '\u202f': ' ', '\u2007': ' '},
+}
+# In these arguments and environments `~` and `\,` would be printed literally,
+# so NBSPs become plain spaces there
+VERBATIM_ENVIRONMENTS = r'verbatim\*?|Verbatim|lstlisting|minted'
+VERBATIM_BEGIN = re.compile(r'\\begin\{(' + VERBATIM_ENVIRONMENTS + r')\}')
+LITERAL_PATTERN = re.compile(r'\\(?:url|href)\s*\{[^{}]*\}|\\verb\*?([^a-zA-Z\s*]).*?\1|'
+                             + VERBATIM_BEGIN.pattern)
+
+TROUBLESOME = re.compile('[' + ''.join(REMOVED.values()) + NBSP + ']')
+NBSP_PATTERN = re.compile('[' + NBSP + ']')
+TEX_SPACES = str.maketrans(NBSP_REPLACEMENT['.tex'])
+PLAIN_SPACES = str.maketrans(NBSP_REPLACEMENT['.bib'])
+
+
+def iter_chunks(f, size=CHUNK_SIZE):
+    """
+    Yields (raw_bytes, text) chunks of a binary file, split after newlines.
+
+    Splitting at line ends keeps combining sequences in one chunk, so NFC
+    normalization gives the same result as on the whole file.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    pending_raw, pending_text = b'', ''
+    while True:
+        raw = f.read(size)
+        text = decoder.decode(raw, final=not raw)
+        pending_raw += raw
+        pending_text += text
+        cut = pending_text.rfind('\n') + 1
+        if not raw:
+            if pending_text:
+                yield pending_raw, pending_text
+            return
+        if cut:
+            head = pending_text[:cut]
+            head_len = len(head.encode('utf-8'))
+            yield pending_raw[:head_len], head
+            pending_raw, pending_text = pending_raw[head_len:], pending_text[cut:]
+
+
+def replace_tex_spaces(text, state):
+    """
+    Replaces NBSPs in LaTeX source: by `~` or `\\,` in text, by plain spaces in
+    \\url/\\href targets, \\verb and verbatim environments. `state` carries an
+    open verbatim environment from one chunk to the next.
+    """
+    if not state.get('verbatim') and not NBSP_PATTERN.search(text) and not VERBATIM_BEGIN.search(text):
+        return text
+    parts = []
+    pos = 0
+    while pos < len(text):
+        if state.get('verbatim'):
+            end_marker = f"\\end{{{state['verbatim']}}}"
+            end = text.find(end_marker, pos)
+            stop = len(text) if end < 0 else end + len(end_marker)
+            parts.append(text[pos:stop].translate(PLAIN_SPACES))
+            if end >= 0:
+                state['verbatim'] = None
+            pos = stop
+            continue
+        match = LITERAL_PATTERN.search(text, pos)
+        stop = match.start() if match else len(text)
+        parts.append(text[pos:stop].translate(TEX_SPACES))
+        if not match:
+            break
+        parts.append(match.group().translate(PLAIN_SPACES))
+        state['verbatim'] = match.group(2)
+        pos = match.end()
+    return ''.join(parts)
+
+
+def sanitize_text(text, extension, state=None):
+    """
+    Returns (sanitized_text, {category: count}) for one chunk. Pass the same
+    `state` dict for all chunks of a file.
+    """
+    counts = {}
+    state = {} if state is None else state
+    if TROUBLESOME.search(text):
+        for category, chars in REMOVED.items():
+            found = sum(text.count(c) for c in chars)
+            if found:
+                counts[category] = found
+                text = text.translate({ord(c): None for c in chars})
+        found = sum(text.count(c) for c in NBSP)
+        if found:
+            counts['nbsp'] = found
+    if extension == '.tex':
+        # Also tracks verbatim environments in chunks without NBSPs
+        text = replace_tex_spaces(text, state)
+    elif 'nbsp' in counts:
+        text = text.translate(PLAIN_SPACES)
+    if not unicodedata.is_normalized('NFC', text):
+        normalized = unicodedata.normalize('NFC', text)
+        counts['nfc'] = sum(1 for a, b in zip(text.splitlines(), normalized.splitlines()) if a != b)
+        text = normalized
+    return text, counts
+
+
+def scan_file(path):
+    """Streams a file once; returns (sha256, {category: count}) without modifying it."""
+    extension = os.path.splitext(path)[1]
+    digest = hashlib.sha256()
+    totals = {}
+    state = {}
+    with open(path, 'rb') as f:
+        for raw, text in iter_chunks(f):
+            digest.update(raw)
+            _text, counts = sanitize_text(text, extension, state)
+            for category, count in counts.items():
+                totals[category] = totals.get(category, 0) + count
+    return digest.hexdigest(), totals
+
+
+def rewrite_file(path):
+    """Writes the sanitized content to a temporary file and atomically replaces `path`."""
+    extension = os.path.splitext(path)[1]
+    digest = hashlib.sha256()
+    state = {}
+    # The source is closed before the temporary file replaces it
+    with file_utils.atomic_write(path, 'wb') as dst:
+        with open(path, 'rb') as src:
+            for _raw, text in iter_chunks(src):
+                sanitized, _counts = sanitize_text(text, extension, state)
+                data = sanitized.encode('utf-8')
+                digest.update(data)
+                dst.write(data)
+    return digest.hexdigest()
+
+
+def find_sources(paths):
+    """Expands files and directories to the .bib/.tex files below them."""
+    for path in paths:
+        if os.path.isfile(path):
+            yield os.path.abspath(path)
+            continue
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS and not d.startswith('.'))
+            for filename in sorted(filenames):
+                if filename.endswith(EXTENSIONS):
+                    yield os.path.abspath(os.path.join(dirpath, filename))
+
+
+def sanitize(paths, check=False, cache_file=CACHE_FILE):
+    """
+    Sanitizes all .bib/.tex files below `paths`.
+
+    Files whose mtime and size, or else content hash, match the last clean run
+    are skipped. Dirty files are rewritten atomically, or only reported with
+    `check`. Returns ({path: {category: count}} of the dirty files, errors).
+    """
+    cached = file_utils.load_cache(cache_file, CACHE_VERSION)
+    files = {}
+    dirty = {}
+    errors = []
+    for path in find_sources(paths):
+        key = os.path.relpath(path, PROJECT_ROOT).replace(os.sep, '/')
+        stat = os.stat(path)
+        entry = cached.get(key)
+        if entry and entry['mtime'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+            files[key] = entry
+            continue
+        try:
+            if entry and file_utils.file_hash(path) == entry['hash']:
+                files[key] = dict(entry, mtime=stat.st_mtime_ns, size=stat.st_size)
+                continue
+            digest, counts = scan_file(path)
+        except UnicodeDecodeError as e:
+            errors.append(f"{key}: not valid UTF-8 ({e.reason} at byte {e.start})")
+            continue
+        if counts:
+            dirty[key] = counts
+            if check:
+                continue
+            digest = rewrite_file(path)
+            stat = os.stat(path)
+        files[key] = {'hash': digest, 'mtime': stat.st_mtime_ns, 'size': stat.st_size}
+
+    for error in errors:
+        print(f"Error: {error}")
+    if cache_file and any(cached.get(key) != entry for key, entry in files.items()):
+        file_utils.save_cache(cache_file, {**cached, **files}, CACHE_VERSION)
+    return dirty, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Remove invisible Unicode characters and normalize .bib/.tex sources to NFC.")
+    parser.add_argument('paths', nargs='*', default=[CONTENT_DIR],
+                        help="files or directories to sanitize (default: content/)")
+    parser.add_argument('--check', action='store_true',
+                        help="only report dirty files and exit non-zero if there are any (for CI)")
+    args = parser.parse_args(argv)
+
+    dirty, errors = sanitize(args.paths, check=args.check)
+    for key, counts in sorted(dirty.items()):
+        summary = ', '.join(f"{count} {category}" for category, count in sorted(counts.items()))
+        print(f"{'Found' if args.check else 'Sanitized'} {key}: {summary}")
+    if not dirty:
+        print("All sources are clean.")
+    if errors or (args.check and dirty):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,328 @@
+import argparse
+import glob
+import hashlib
+import html
+import json
+import math
+import os
+import re
+import sys
+import unicodedata
+
+import compile_content
+import export_references
+from file_utils import load_cache, save_cache, write_if_changed
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONTENT_DIR = compile_content.CONTENT_DIR
+GLOSSARY_FILE = compile_content.GLOSSARY_FILE
+OUTPUT_DIR = os.path.join(PROJECT_ROOT, 'webapp', 'static', 'search')
+CACHE_FILE = os.path.join(PROJECT_ROOT, '.cache', 'search.json')
+
+# Bump when tokenization or the index format changes; the webapp checks it too
+INDEX_VERSION = 1
+
+# Document -> webapp route that renders its compiled sections; the URLs of the
+# index point to the section ids compile_content.py gives them there
+ROUTES = {'prestudy': '/vorstudie'}
+# Renders compile_content.compile_glossary() with the term ids as anchors
+GLOSSARY_ROUTE = '/glossar'
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+TAG_PATTERN = re.compile(r'<[^>]+>')
+# Light German stemming: at most two suffixes are removed, longest first,
+# keeping a stem of at least MIN_STEM letters (Nutzungen, Nutzung, nutzen -> nutz).
+# webapp/src/lib/search.ts implements the same rules for queries.
+SUFFIXES = ('ungen', 'ung', 'ern', 'em', 'en', 'er', 'es', 'e', 's', 'n')
+MIN_STEM = 3
+
+
+def normalize(text):
+    """Lowercase, 'ß' as 'ss' and diacritics removed (ä -> a, é -> e)."""
+    text = unicodedata.normalize('NFKD', text.lower().replace('ß', 'ss'))
+    return ''.join(c for c in text if not unicodedata.combining(c))
+
+
+def stem(term):
+    if not term.isalpha():
+        return term
+    for _ in range(2):
+        for suffix in SUFFIXES:
+            if term.endswith(suffix) and len(term) - len(suffix) >= MIN_STEM:
+                term = term[:-len(suffix)]
+                break
+        else:
+            break
+    return term
+
+
+def tokenize(text):
+    """Terms of `text` in order; the list index is the term position."""
+    return [stem(token) for token in TOKEN_PATTERN.findall(normalize(text))]
+
+
+def html_to_text(value):
+    return html.unescape(TAG_PATTERN.sub(' ', value))
+
+
+def _hash(value):
+    text = json.dumps([INDEX_VERSION, value], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+# Sources ---------------------------------------------------------------
+#
+# Every source yields (cache key, hash, build) per cached part: `build()` returns
+# the search units of the part and is only called when the hash changed.
+# A unit is {id, kind, title, url, terms}.
+
+
+def section_parts(document, main_tex, references):
+    """One part per section of a document; its units are the section intro and every subsection."""
+    sections, labels, cited_all, _files = compile_content.prepare_document(main_tex, references)
+    route = ROUTES.get(document, f"/{document}")
+    for section in sections:
+        if section['bibliography']:
+            continue
+
+        def build(section=section):
+            converter = compile_content.Converter(compile_content.Citations(references), labels)
+            chunk = compile_content.compile_section(section, converter, cited_all)
+            title = ' '.join(filter(None, [chunk['number'], chunk['title']]))
+            units = [{'id': f"{document}/{chunk['id']}", 'kind': 'section', 'title': title,
+                      'url': f"{route}#{chunk['id']}",
+                      'terms': tokenize(chunk['title'] + ' ' + html_to_text(chunk['content']))}]
+            for subsection in chunk.get('subsections', []):
+                units.append({
+                    'id': f"{document}/{chunk['id']}/{subsection['id']}",
+                    'kind': 'section',
+                    'title': ' '.join(filter(None, [subsection['number'], subsection['title']])),
+                    'url': f"{route}#{subsection['id']}",
+                    'terms': tokenize(subsection['title'] + ' ' + html_to_text(subsection['content'])),
+                })
+            return units
+
+        key = compile_content.section_key(section, labels, references, cited_all)
+        yield f"{document}/{section['id']}", key, build
+
+
+def glossary_parts(glossary_file):
+    """One part per glossary term, linked to its anchor on the glossary page."""
+    for entry in compile_content.compile_glossary(glossary_file)['terms']:
+
+        def build(entry=entry):
+            text = ' '.join([entry['term']] + [html_to_text(cell) for cell in entry['cells']])
+            return [{'id': f"glossar/{entry['id']}", 'kind': 'glossary', 'title': entry['term'],
+                     'url': f"{GLOSSARY_ROUTE}#{entry['id']}", 'terms': tokenize(text)}]
+
+        yield f"glossar/{entry['id']}", _hash(entry), build
+
+
+def reference_parts(entries):
+    for entry in entries:
+
+        def build(entry=entry):
+            reference = export_references.convert_entry(entry)
+            fields = [reference['title'], ' '.join(reference['authors']), str(reference['year'] or '')]
+            fields += [reference.get(name, '') for name in ('journal', 'booktitle', 'publisher')]
+            return [{'id': f"references/{entry.key}", 'kind': 'reference', 'title': reference['title'],
+                     'url': None, 'terms': tokenize(' '.join(fields))}]
+
+        yield f"references/{entry.key}", export_references.entry_hash(entry), build
+
+
+# Index -----------------------------------------------------------------
+
+
+def shard_name(term):
+    """Shard of a term: its first character; digits share the shard '0'."""
+    first = term[:1]
+    return '0' if first.isdigit() else first
+
+
+def build_postings(units):
+    """{term: {doc: [positions]}} with doc = index of the unit."""
+    postings = {}
+    for doc, unit in enumerate(units):
+        for position, term in enumerate(unit['terms']):
+            postings.setdefault(term, {}).setdefault(doc, []).append(position)
+    return postings
+
+
+def encode_postings(docs):
+    """
+    Flat, delta-encoded postings of one term: per document the doc id delta,
+    the number of positions and the position deltas.
+    """
+    encoded, last_doc = [], 0
+    for doc in sorted(docs):
+        positions = docs[doc]
+        encoded += [doc - last_doc, len(positions)]
+        last = 0
+        for position in positions:
+            encoded.append(position - last)
+            last = position
+        last_doc = doc
+    return encoded
+
+
+def decode_postings(encoded):
+    """Inverse of encode_postings: {doc: [positions]}."""
+    docs, i, doc = {}, 0, 0
+    while i < len(encoded):
+        doc += encoded[i]
+        count = encoded[i + 1]
+        positions, position = [], 0
+        for delta in encoded[i + 2:i + 2 + count]:
+            position += delta
+            positions.append(position)
+        docs[doc] = positions
+        i += 2 + count
+    return docs
+
+
+def dump(value):
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'), sort_keys=True) + "\n"
+
+
+def write_index(units, output_dir):
+    """Writes docs.json, one terms-<x>.json shard per first character and index.json."""
+    os.makedirs(output_dir, exist_ok=True)
+    shards = {}
+    for term, docs in build_postings(units).items():
+        shards.setdefault(shard_name(term), {})[term] = encode_postings(docs)
+
+    files = {f"terms-{name}.json": dump(terms) for name, terms in shards.items()}
+    files['docs.json'] = dump([{'id': u['id'], 'kind': u['kind'], 'title': u['title'], 'url': u['url'],
+                                'length': len(u['terms'])} for u in units])
+    manifest = {
+        'version': INDEX_VERSION,
+        'documents': len(units),
+        'docs': hashlib.sha256(files['docs.json'].encode('utf-8')).hexdigest()[:12],
+        # The hash lets the webapp cache shards until their content changes
+        'shards': {name: {'terms': len(shards[name]),
+                          'hash': hashlib.sha256(files[f"terms-{name}.json"].encode('utf-8')).hexdigest()[:12]}
+                   for name in sorted(shards)},
+    }
+    files['index.json'] = json.dumps(manifest, indent=1, sort_keys=True) + "\n"
+
+    written, removed = [], []
+    for name, content in files.items():
+        path = os.path.join(output_dir, name)
+        if write_if_changed(path, content):
+            written.append(path)
+    for path in sorted(glob.glob(os.path.join(output_dir, 'terms-*.json'))):
+        if os.path.basename(path) not in files:
+            os.remove(path)
+            removed.append(path)
+    return written, removed
+
+
+def build_search_index(documents=tuple(ROUTES), output_dir=OUTPUT_DIR, cache_file=CACHE_FILE,
+                       glossary_file=GLOSSARY_FILE, entries=None, force=False, content_dir=CONTENT_DIR):
+    """
+    Tokenizes the sections of `documents`, the glossary and the references and
+    writes the sharded positional index to `output_dir`.
+
+    Terms are cached per section, glossary row and reference under a hash of
+    their source, so only changed parts are tokenized again. Returns a report dict.
+    """
+    if entries is None:
+        entries = export_references.load_entries()
+    references = compile_content.load_references(entries=entries)
+
+    parts = []
+    for document in documents:
+        main_tex = os.path.join(content_dir, document, 'main.tex')
+        if os.path.exists(main_tex):
+            parts.extend(section_parts(document, main_tex, references))
+    if glossary_file and os.path.exists(glossary_file):
+        parts.extend(glossary_parts(glossary_file))
+    parts.extend(reference_parts(entries))
+
+    cache = {} if force else load_cache(cache_file, INDEX_VERSION)
+    units, tokenized, seen = [], [], {}
+    for name, key, build in parts:
+        cached = cache.get(name)
+        if cached and cached['key'] == key:
+            part_units = cached['units']
+        else:
+            part_units = build()
+            tokenized.append(name)
+        seen[name] = {'key': key, 'units': part_units}
+        units.extend(part_units)
+
+    written, removed = write_index(units, output_dir)
+    if cache_file and (tokenized or len(seen) != len(cache)):
+        save_cache(cache_file, seen, INDEX_VERSION)
+    return {'units': len(units), 'parts': len(parts), 'tokenized': tokenized, 'written': written,
+            'removed': removed}
+
+
+def search(query, index_dir=OUTPUT_DIR, limit=10):
+    """
+    Answers a query from the static index as the webapp does: all terms must
+    occur, a "quoted phrase" only with consecutive positions. Reads only the
+    shards of the query terms. Returns [(score, doc)] with the best first.
+    """
+    with open(os.path.join(index_dir, 'docs.json'), 'r', encoding='utf-8') as f:
+        docs = json.load(f)
+    phrases = [tokenize(p) for p in re.findall(r'"([^"]+)"', query)]
+    phrases += [[term] for term in tokenize(re.sub(r'"[^"]*"', ' ', query))]
+    phrases = [p for p in phrases if p]
+    if not phrases:
+        return []
+
+    shards, postings = {}, {}
+    for term in {term for phrase in phrases for term in phrase}:
+        name = shard_name(term)
+        if name not in shards:
+            path = os.path.join(index_dir, f"terms-{name}.json")
+            shards[name] = {}
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    shards[name] = json.load(f)
+        postings[term] = decode_postings(shards[name].get(term, []))
+
+    scores = None
+    for phrase in phrases:
+        matches = {}
+        for doc, positions in postings[phrase[0]].items():
+            count = sum(1 for p in positions
+                        if all(p + i in postings[term].get(doc, ()) for i, term in enumerate(phrase[1:], 1)))
+            if count:
+                matches[doc] = count
+        idf = math.log(1 + len(docs) / len(matches)) if matches else 0
+        phrase_scores = {doc: count * idf / math.sqrt(docs[doc]['length']) for doc, count in matches.items()}
+        scores = phrase_scores if scores is None else {doc: scores[doc] + phrase_scores[doc]
+                                                       for doc in scores if doc in phrase_scores}
+    ranked = sorted(((score, docs[doc]) for doc, score in scores.items()), key=lambda item: -item[0])
+    return ranked[:limit]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the static full-text search index of the webapp.")
+    parser.add_argument('documents', nargs='*', default=list(ROUTES),
+                        help="documents below content/ (default: prestudy, the only one the webapp renders)")
+    parser.add_argument('--output-dir', default=OUTPUT_DIR)
+    parser.add_argument('--force', action='store_true', help="ignore the cache and tokenize everything")
+    parser.add_argument('--query', metavar='TEXT', help="search the built index instead of building it")
+    args = parser.parse_args(argv)
+
+    if args.query is not None:
+        if not os.path.exists(os.path.join(args.output_dir, 'index.json')):
+            print(f"Error: no search index in {args.output_dir}")
+            return 1
+        for score, doc in search(args.query, args.output_dir):
+            print(f"{score:6.3f}  {doc['title']}  ({doc['url'] or doc['id']})")
+        return 0
+
+    report = build_search_index(args.documents, args.output_dir, force=args.force)
+    print(f"Search index: {report['units']} entries from {report['parts']} parts, "
+          f"{len(report['tokenized'])} tokenized, {len(report['written'])} files written, "
+          f"{len(report['removed'])} removed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,345 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+import re
+import sys
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ITEMS_CSV = os.path.join(PROJECT_ROOT, 'content', 'resources', 'data', 'items.csv')
+
+# Rows per chunk; memory use depends on this, not on the size of the export
+CHUNK_SIZE = 50000
+
+LIKERT_PATTERN = re.compile(r'(\d+)\s*-\s*(\d+)')
+BOOLEAN_VALUES = {'1': 1.0, 'j': 1.0, 'ja': 1.0, 'y': 1.0, 'yes': 1.0, 'true': 1.0,
+                  '0': 0.0, 'n': 0.0, 'nein': 0.0, 'no': 0.0, 'false': 0.0}
+
+Item = namedtuple('Item', ['id', 'construct', 'text', 'scale_min', 'scale_max', 'boolean'])
+Item.__doc__ = "One questionnaire item of items.csv; `id` is e.g. PUF_1, the column name in response exports."
+
+
+def safe_construct(construct):
+    """Same file-safe construct name as generate_item_tables.py, e.g. 'Treatment Check' -> 'Treatment_Check'."""
+    return "".join([c for c in construct if c.isalnum() or c in (' ', '-', '_')]).strip().replace(' ', '_')
+
+
+def load_catalogue(csv_path=ITEMS_CSV):
+    """
+    Reads items.csv and returns the items in file order, numbered per construct.
+
+    Some item texts contain unquoted commas, so Scaling and Source are taken
+    from the end of the row; the adapted text is only used when unambiguous.
+    """
+    items = []
+    counters = {}
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        for row in reader:
+            if not row:
+                continue
+            construct = row[0].strip()
+            counters[construct] = counters.get(construct, 0) + 1
+            scaling = row[-2].strip()
+            text = row[header.index('Item_Adapted')].strip() if len(row) == len(header) else ''
+            match = LIKERT_PATTERN.search(scaling)
+            boolean = match is None and ('bool' in scaling.lower() or 'j/n' in scaling.lower())
+            scale_min, scale_max = (int(match.group(1)), int(match.group(2))) if match else (0, 1)
+            items.append(Item(f"{safe_construct(construct)}_{counters[construct]}", construct,
+                              text, scale_min, scale_max, boolean))
+    return items
+
+
+def constructs_of(items):
+    """Returns an OrderedDict construct -> list of item positions."""
+    constructs = OrderedDict()
+    for position, item in enumerate(items):
+        constructs.setdefault(item.construct, []).append(position)
+    return constructs
+
+
+def resolve_columns(header, items):
+    """
+    Maps each item to its column in a response export.
+
+    Columns may be named by item id (PUF_1) or by the adapted item text, as
+    survey tools usually export the question text. Missing items raise ValueError.
+    """
+    lookup = {name.strip().lower(): i for i, name in enumerate(header)}
+    columns = []
+    missing = []
+    for item in items:
+        column = lookup.get(item.id.lower(), lookup.get(item.text.lower()) if item.text else None)
+        if column is None:
+            missing.append(item.id)
+        columns.append(column)
+    if missing:
+        raise ValueError(f"Response export has no column for: {', '.join(missing)}")
+    return columns
+
+
+def iter_response_chunks(responses_csv, items, chunk_size=CHUNK_SIZE, id_column=None):
+    """
+    Streams a response export as (ids, values) chunks.
+
+    `values` is a float matrix (rows x items) with NaN for missing or
+    out-of-range answers; boolean items are coded 1/0. `ids` holds the
+    respondent ids of `id_column`, or None.
+    """
+    likert_min = np.array([item.scale_min for item in items], dtype=float)
+    likert_max = np.array([item.scale_max for item in items], dtype=float)
+    boolean = np.array([item.boolean for item in items])
+
+    with open(responses_csv, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        columns = resolve_columns(header, items)
+        if id_column and id_column not in header:
+            raise ValueError(f"Response export has no id column '{id_column}'")
+        id_index = header.index(id_column) if id_column else None
+        while True:
+            rows = list(itertools.islice(reader, chunk_size))
+            if not rows:
+                return
+            raw = np.array([[row[c] if c < len(row) else '' for c in columns] for row in rows])
+            ids = np.array([row[id_index] for row in rows]) if id_index is not None else None
+            yield ids, _to_values(raw, boolean, likert_min, likert_max)
+
+
+def _to_values(raw, boolean, scale_min, scale_max):
+    """Decodes a chunk of answer strings; each distinct string is parsed only once."""
+    unique, inverse = np.unique(raw, return_inverse=True)
+    numeric = np.full(len(unique), np.nan)
+    coded = np.full(len(unique), np.nan)
+    for i, text in enumerate(unique):
+        text = text.strip().lower()
+        coded[i] = BOOLEAN_VALUES.get(text, np.nan)
+        try:
+            numeric[i] = float(text.replace(',', '.'))
+        except ValueError:
+            pass
+    inverse = inverse.reshape(raw.shape)
+    values = np.where(boolean, coded[inverse], numeric[inverse])
+    values[~boolean & ((values < scale_min) | (values > scale_max))] = np.nan
+    return values
+
+
+class RunningMoments:
+    """
+    Mergeable column means, co-moment matrix and third moments.
+
+    Chunks are reduced with matrix operations and combined with the pairwise
+    update of Chan et al., so the result equals a single pass over all rows
+    while memory stays bounded by the chunk size.
+    """
+
+    def __init__(self, width):
+        self.n = 0
+        self.mean = np.zeros(width)
+        self.m2 = np.zeros((width, width))
+        self.m3 = np.zeros(width)
+
+    def update(self, values):
+        """Adds the complete rows of a (rows x width) matrix."""
+        values = values[~np.isnan(values).any(axis=1)]
+        n_b = values.shape[0]
+        if n_b == 0:
+            return
+        mean_b = values.mean(axis=0)
+        centered = values - mean_b
+        m2_b = centered.T @ centered
+        m3_b = (centered ** 3).sum(axis=0)
+
+        n_a, n = self.n, self.n + n_b
+        delta = mean_b - self.mean
+        m2_a_diag, m2_b_diag = np.diag(self.m2).copy(), np.diag(m2_b)
+        self.m3 = (self.m3 + m3_b + delta ** 3 * n_a * n_b * (n_a - n_b) / n ** 2
+                   + 3 * delta * (n_a * m2_b_diag - n_b * m2_a_diag) / n)
+        self.m2 = self.m2 + m2_b + np.outer(delta, delta) * n_a * n_b / n
+        self.mean = self.mean + delta * n_b / n
+        self.n = n
+
+    def covariance(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else np.full(self.m2.shape, np.nan)
+
+    def std(self):
+        return np.sqrt(np.diag(self.covariance()))
+
+    def skewness(self):
+        """Sample skewness (adjusted Fisher-Pearson, as reported by SPSS)."""
+        n = self.n
+        if n < 3:
+            return np.full(self.m3.shape, np.nan)
+        m2 = np.diag(self.m2) / n
+        with np.errstate(divide='ignore', invalid='ignore'):
+            g1 = (self.m3 / n) / m2 ** 1.5
+        return g1 * np.sqrt(n * (n - 1)) / (n - 2)
+
+    def correlation(self):
+        std = self.std()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.covariance() / np.outer(std, std)
+
+
+def reliability(covariance):
+    """
+    Cronbach's alpha, alpha-if-item-deleted and corrected item-total correlations.
+
+    Everything is derived from the item covariance matrix: the variance of the
+    sum score is 1'C1 and the covariance of an item with the rest score is
+    (C1)_i - C_ii, so no per-respondent pass is needed.
+    """
+    k = covariance.shape[0]
+    item_var = np.diag(covariance)
+    row_sums = covariance.sum(axis=1)
+    total_var = row_sums.sum()
+    result = {'alpha': None, 'alpha_if_deleted': [None] * k, 'item_total': [None] * k}
+    if k < 2 or not total_var > 0:
+        return result
+
+    result['alpha'] = float(k / (k - 1) * (1 - item_var.sum() / total_var))
+    rest_var = total_var - 2 * row_sums + item_var
+    with np.errstate(divide='ignore', invalid='ignore'):
+        item_total = (row_sums - item_var) / np.sqrt(item_var * rest_var)
+        if k > 2:
+            # Sum of variances/covariances without item i
+            rest_item_var = item_var.sum() - item_var
+            alpha_deleted = (k - 1) / (k - 2) * (1 - rest_item_var / rest_var)
+            result['alpha_if_deleted'] = [_number(v) for v in alpha_deleted]
+    result['item_total'] = [_number(v) for v in item_total]
+    return result
+
+
+def _number(value):
+    return None if np.isnan(value) else float(value)
+
+
+def score_responses(responses_csv, items=None, chunk_size=CHUNK_SIZE, scores_csv=None, id_column=None,
+                    min_answered=1.0):
+    """
+    Computes construct scores and reliability statistics in one streaming pass.
+
+    Construct scores are the mean of the construct's items for respondents who
+    answered at least `min_answered` (share) of them; they are written to
+    `scores_csv` chunk by chunk if given. Reliability uses listwise complete
+    answers per construct. Returns a dict with per-construct results and the
+    correlation matrix of the construct scores.
+    """
+    items = items or load_catalogue()
+    constructs = constructs_of(items)
+    item_moments = OrderedDict((name, RunningMoments(len(positions))) for name, positions in constructs.items())
+    score_moments = RunningMoments(len(constructs))
+    score_stats = [RunningMoments(1) for _ in constructs]
+    rows = 0
+
+    scores_file = open(scores_csv, 'w', encoding='utf-8', newline='') if scores_csv else None
+    try:
+        writer = csv.writer(scores_file) if scores_file else None
+        if writer:
+            writer.writerow(([id_column] if id_column else []) + [safe_construct(c) for c in constructs])
+
+        for ids, values in iter_response_chunks(responses_csv, items, chunk_size, id_column):
+            rows += values.shape[0]
+            scores = np.full((values.shape[0], len(constructs)), np.nan)
+            for c, (name, positions) in enumerate(constructs.items()):
+                block = values[:, positions]
+                item_moments[name].update(block)
+                answered = (~np.isnan(block)).sum(axis=1)
+                enough = answered >= np.ceil(min_answered * len(positions))
+                with np.errstate(invalid='ignore'):
+                    means = np.nansum(block, axis=1) / np.where(answered > 0, answered, 1)
+                scores[enough, c] = means[enough]
+                score_stats[c].update(scores[:, c:c + 1])
+            score_moments.update(scores)
+
+            if writer:
+                formatted = np.where(np.isnan(scores), '', np.char.mod('%.4f', scores))
+                if ids is not None:
+                    formatted = np.column_stack([ids, formatted])
+                writer.writerows(formatted.tolist())
+    finally:
+        if scores_file:
+            scores_file.close()
+
+    results = OrderedDict()
+    for c, (name, positions) in enumerate(constructs.items()):
+        moments = item_moments[name]
+        stats = reliability(moments.covariance())
+        score = score_stats[c]
+        results[name] = {
+            'items': [items[p].id for p in positions],
+            'n_complete': moments.n,
+            'item_mean': [_number(v) for v in moments.mean] if moments.n else [None] * len(positions),
+            'item_sd': [_number(v) for v in moments.std()] if moments.n > 1 else [None] * len(positions),
+            'alpha': stats['alpha'],
+            'alpha_if_deleted': stats['alpha_if_deleted'],
+            'item_total': stats['item_total'],
+            'score': {
+                'n': score.n,
+                'mean': _number(score.mean[0]) if score.n else None,
+                'sd': _number(score.std()[0]) if score.n > 1 else None,
+                'skewness': _number(score.skewness()[0]) if score.n > 2 else None,
+            },
+        }
+
+    correlation = score_moments.correlation() if score_moments.n > 1 else np.full((len(constructs),) * 2, np.nan)
+    return {
+        'respondents': rows,
+        'constructs': results,
+        'correlations': {
+            'constructs': list(constructs),
+            'n_complete': score_moments.n,
+            'matrix': [[_number(v) for v in row] for row in correlation],
+        },
+    }
+
+
+def _fmt(value, digits=2):
+    return '-' if value is None else f"{value:.{digits}f}"
+
+
+def print_report(result):
+    print(f"Respondents: {result['respondents']}")
+    for name, stats in result['constructs'].items():
+        score = stats['score']
+        print(f"\n{name}: alpha = {_fmt(stats['alpha'])} (n = {stats['n_complete']}), "
+              f"score M = {_fmt(score['mean'])}, SD = {_fmt(score['sd'])}, skew = {_fmt(score['skewness'])}")
+        print(f"  {'Item':<20} {'M':>6} {'SD':>6} {'r_it':>6} {'alpha-del':>9}")
+        for i, item_id in enumerate(stats['items']):
+            print(f"  {item_id:<20} {_fmt(stats['item_mean'][i]):>6} {_fmt(stats['item_sd'][i]):>6} "
+                  f"{_fmt(stats['item_total'][i]):>6} {_fmt(stats['alpha_if_deleted'][i]):>9}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score survey responses against items.csv.")
+    parser.add_argument('responses', help="CSV export with one column per item (item id or item text)")
+    parser.add_argument('--items', default=ITEMS_CSV, help="item catalogue (default: items.csv)")
+    parser.add_argument('--scores', help="write per-respondent construct scores to this CSV")
+    parser.add_argument('--id-column', help="respondent id column copied to the scores CSV")
+    parser.add_argument('--json', help="write all statistics to this JSON file")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="rows per chunk")
+    parser.add_argument('--min-answered', type=float, default=1.0,
+                        help="share of a construct's items needed for a score (default: all)")
+    args = parser.parse_args(argv)
+
+    try:
+        result = score_responses(args.responses, load_catalogue(args.items), args.chunk_size,
+                                 args.scores, args.id_column, args.min_answered)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    print_report(result)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+            f.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,30 +1,245 @@
+import argparse
+import json
 import os
 import sys
 import subprocess
 import getpass
 import re
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
 
-def deduplicate_bibtex(bibtex_content):
-    """Remove duplicate entries from bibtex content, keeping the first occurrence."""
-    # Pattern to match bibtex entries
-    entry_pattern = re.compile(r'(@\w+\{([^,]+),.*?\n\})', re.DOTALL)
-    
-    seen_keys = set()
-    deduplicated_entries = []
-    
-    for match in entry_pattern.finditer(bibtex_content):
-        full_entry = match.group(1)
-        entry_key = match.group(2).strip()
-        
-        if entry_key not in seen_keys:
-            seen_keys.add(entry_key)
-            deduplicated_entries.append(full_entry)
-        else:
-            print(f"  Skipping duplicate entry: {entry_key}")
-    
-    return '\n\n'.join(deduplicated_entries)
-
-def sync_zotero():
+import bib_merge
+import bib_reader
+import file_utils
+
+DEFAULT_API_URL = 'https://api.zotero.org'
+CACHE_DIR = os.path.join('.cache', 'zotero')
+
+# List of collection IDs to sync
+# 5CCCD4LW: Bachelor Thesis (Parent)
+# 6ABWTZEP: Bachelor Thesis / 02_Prestudy
+# X6YTQVV3: Bachelor Thesis / 01_ research
+COLLECTION_IDS = ['5CCCD4LW', '6ABWTZEP', 'X6YTQVV3']
+
+# Zotero accepts at most 50 item keys per request
+ITEM_BATCH_SIZE = 50
+PAGE_LIMIT = 100
+MAX_WORKERS = 4
+
+LINK_NEXT = re.compile(r'<([^>]+)>;\s*rel="next"')
+
+
+def http_get(url, api_key, headers=None):
+    """
+    Performs a GET request and returns (status, headers, body).
+
+    Uses curl instead of urllib/requests to avoid python SSL issues.
+    """
+    command = ['curl', '-sS', '-D', '-', '-H', f'Zotero-API-Key: {api_key}', '-H', 'Zotero-API-Version: 3']
+    for name, value in (headers or {}).items():
+        command += ['-H', f'{name}: {value}']
+    command.append(url)
+    result = subprocess.run(command, capture_output=True, text=True, check=True)
+
+    raw = result.stdout.replace('\r\n', '\n')
+    head, _, body = raw.partition('\n\n')
+    lines = head.split('\n')
+    status = int(lines[0].split()[1])
+    response_headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(':')
+        response_headers[name.strip().lower()] = value.strip()
+    return status, response_headers, body
+
+
+def _check_response(url, status, body):
+    if status >= 400:
+        raise RuntimeError(f"HTTP {status} for {url}: {body.strip()[:200]}")
+
+
+def fetch_pages(url, api_key, headers=None, page_size=PAGE_LIMIT, workers=MAX_WORKERS):
+    """
+    Fetches a paginated Zotero resource.
+
+    The first page tells the number of results (`Total-Results`), so the
+    remaining `start=` offsets are requested concurrently. Without that
+    header the `Link: rel="next"` headers are followed one by one.
+
+    Returns (status, library_version, bodies). A 304 response yields no bodies.
+    """
+    status, response_headers, body = http_get(url, api_key, headers)
+    if status == 304:
+        return status, None, []
+    _check_response(url, status, body)
+    library_version = response_headers.get('last-modified-version')
+    library_version = int(library_version) if library_version is not None else None
+    bodies = [body]
+
+    total = response_headers.get('total-results')
+    if total is not None:
+        separator = '&' if '?' in url else '?'
+        urls = [f"{url}{separator}start={start}" for start in range(page_size, int(total), page_size)]
+
+        def fetch(page_url):
+            page_status, page_headers, page_body = http_get(page_url, api_key, headers)
+            _check_response(page_url, page_status, page_body)
+            # Pages of different library versions would mix two states of the library
+            page_version = page_headers.get('last-modified-version')
+            if library_version is not None and page_version is not None and int(page_version) != library_version:
+                raise RuntimeError(f"library changed to version {page_version} while fetching {url}")
+            return page_body
+
+        if urls:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                bodies.extend(pool.map(fetch, urls))
+        return status, library_version, bodies
+
+    match = LINK_NEXT.search(response_headers.get('link', ''))
+    while match:
+        url = match.group(1)
+        status, response_headers, body = http_get(url, api_key, headers)
+        _check_response(url, status, body)
+        bodies.append(body)
+        match = LINK_NEXT.search(response_headers.get('link', ''))
+    return status, library_version, bodies
+
+
+def load_cache(cache_dir):
+    cache = file_utils.load_cache(os.path.join(cache_dir, 'items.json'))
+    return cache or {'library_version': None, 'collections': {}, 'items': {}}
+
+
+def save_cache(cache_dir, cache):
+    file_utils.save_cache(os.path.join(cache_dir, 'items.json'), cache)
+
+
+def fetch_collection_versions(base_url, user_id, api_key, col_id, since, workers=MAX_WORKERS):
+    """Returns ({item_key: version}, library_version), or (None, None) if unchanged since `since`."""
+    query = urlencode({'format': 'versions', 'limit': PAGE_LIMIT})
+    url = f"{base_url}/users/{user_id}/collections/{col_id}/items?{query}"
+    headers = {'If-Modified-Since-Version': str(since)} if since is not None else None
+    status, library_version, bodies = fetch_pages(url, api_key, headers, workers=workers)
+    if status == 304:
+        return None, None
+    versions = {}
+    for body in bodies:
+        versions.update(json.loads(body))
+    return versions, library_version
+
+
+def fetch_items(base_url, user_id, api_key, item_keys):
+    """Fetches items with their BibTeX export; returns {item_key: {'version', 'bibtex'}}."""
+    query = urlencode({
+        'itemKey': ','.join(item_keys),
+        'format': 'json',
+        'include': 'bibtex',
+        'limit': PAGE_LIMIT,
+    })
+    url = f"{base_url}/users/{user_id}/items?{query}"
+    _status, _version, bodies = fetch_pages(url, api_key)
+    items = {}
+    for body in bodies:
+        for item in json.loads(body):
+            items[item['key']] = {'version': item['version'], 'bibtex': item.get('bibtex', '')}
+    return items
+
+
+def sync_cache(cache, api_key, user_id, collection_ids, base_url=DEFAULT_API_URL, workers=MAX_WORKERS):
+    """
+    Brings the local per-item cache up to date.
+
+    Collections are checked concurrently with `If-Modified-Since-Version`; only
+    items whose version differs from the cached one are downloaded. Returns
+    (cache, complete); `complete` is False if a collection or item could not
+    be fetched.
+    """
+    since = cache.get('library_version')
+
+    def check(col_id):
+        print(f"Syncing Zotero collection {col_id}...")
+        try:
+            return col_id, True, fetch_collection_versions(base_url, user_id, api_key, col_id, since, workers)
+        except (subprocess.CalledProcessError, RuntimeError, ValueError) as e:
+            print(f"Error fetching items from collection {col_id}: {e}")
+            return col_id, False, (None, None)
+
+    library_versions = []
+    wanted = {}
+    failed = False
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for col_id, ok, (versions, library_version) in pool.map(check, collection_ids):
+            if not ok:
+                failed = True
+                continue
+            if versions is None:
+                print(f"  Collection {col_id} unchanged.")
+                continue
+            cache['collections'][col_id] = sorted(versions)
+            library_versions.append(library_version)
+            for key, version in versions.items():
+                cached = cache['items'].get(key)
+                if cached is None or cached['version'] != version:
+                    wanted[key] = version
+
+        keys = sorted(wanted)
+        batches = [keys[i:i + ITEM_BATCH_SIZE] for i in range(0, len(keys), ITEM_BATCH_SIZE)]
+        if batches:
+            print(f"Downloading {len(keys)} changed items in {len(batches)} requests...")
+
+        def download(batch):
+            try:
+                return fetch_items(base_url, user_id, api_key, batch)
+            except (subprocess.CalledProcessError, RuntimeError, ValueError) as e:
+                print(f"Error fetching items {batch[0]}..{batch[-1]}: {e}")
+                return {}
+
+        for batch, items in zip(batches, pool.map(download, batches)):
+            if set(batch) - set(items):
+                failed = True
+            cache['items'].update(items)
+
+    # Drop items that are no longer part of any synced collection
+    referenced = set(key for keys in cache['collections'].values() for key in keys)
+    cache['items'] = {key: item for key, item in cache['items'].items() if key in referenced}
+
+    # Only advance the library version when everything was fetched, so a
+    # failed run is retried in full next time
+    if library_versions and not failed and all(v is not None for v in library_versions):
+        cache['library_version'] = max(library_versions)
+    return cache, not failed
+
+
+def assemble_bibtex(cache, collection_ids):
+    """Concatenates the cached BibTeX of all collections in a deterministic order."""
+    parts = []
+    for col_id in collection_ids:
+        for key in cache['collections'].get(col_id, []):
+            bibtex = cache['items'].get(key, {}).get('bibtex', '').strip()
+            if bibtex:
+                parts.append(bibtex)
+    return '\n'.join(parts)
+
+
+def write_bibliography(bibtex_content, bib_path, local_bib_path, report_path=None):
+    """Merges the Zotero export with local.bib (see bib_merge.py) and writes bib_path."""
+    print("Merging and deduplicating bibliography entries...")
+    remote_entries = bib_reader.parse_string(bibtex_content)
+    local_entries = []
+    if os.path.exists(local_bib_path):
+        print(f"Merging local citations from {local_bib_path}...")
+        local_entries = list(bib_reader.iter_entries(local_bib_path))
+
+    entries, report, local_keys = bib_merge.merge_sources(remote_entries, local_entries)
+    bib_merge.print_report(report)
+    bib_merge.write_bibliography(entries, bib_path, local_keys)
+    if report_path:
+        bib_merge.write_report(report, report_path)
+        print(f"Merge report written to {report_path}")
+
+    print(f"Successfully wrote bibliography to {bib_path}")
+
+
+def load_credentials():
     # Load .env if present
     if os.path.exists('.env'):
         with open('.env', 'r') as f:
@@ -36,77 +251,60 @@ def sync_zotero():
 
     api_key = os.environ.get('ZOTERO_API_KEY', '').strip()
     user_id = os.environ.get('ZOTERO_USER_ID', '').strip()
-    
+
     # Prompt if missing
     if not api_key:
         api_key = getpass.getpass("Enter your Zotero API Key: ").strip()
     if not user_id:
         user_id = input("Enter your Zotero User ID: ").strip()
-        
+
     if not api_key or not user_id:
         print("Error: ZOTERO_API_KEY or ZOTERO_USER_ID not set.")
         sys.exit(1)
+    return api_key, user_id
 
-    # List of collection IDs to sync
-    # 5CCCD4LW: Bachelor Thesis (Parent)
-    # 6ABWTZEP: Bachelor Thesis / 02_Prestudy
-    # X6YTQVV3: Bachelor Thesis / 01_ research
-    collection_ids = ['5CCCD4LW', '6ABWTZEP', 'X6YTQVV3']
-    
-    all_items = []
 
-    for col_id in collection_ids:
-        print(f"Syncing Zotero collection {col_id}...")
-        url = f"https://api.zotero.org/users/{user_id}/collections/{col_id}/items?format=bibtex&limit=100"
-        
-        try:
-            # Use curl instead of urllib/requests to avoid python SSL issues
-            result = subprocess.run(
-                ['curl', '-s', '-H', f'Zotero-API-Key: {api_key}', url],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            data = result.stdout
-            if data:
-                all_items.append(data)
-            else:
-                print(f"Warning: No data received for collection {col_id}")
-                
-        except subprocess.CalledProcessError as e:
-            print(f"Error fetching items from collection {col_id}: {e}")
-            print(f"Stderr: {e.stderr}")
-        except Exception as e:
-            print(f"Unexpected error: {e}")
+def sync_zotero(offline=False, cache_dir=CACHE_DIR, base_url=None, workers=MAX_WORKERS,
+                collection_ids=COLLECTION_IDS,
+                bib_path=os.path.join('content', 'resources', 'bibliography.bib'),
+                local_bib_path=os.path.join('content', 'resources', 'local.bib')):
+    """
+    Syncs the item cache (unless `offline`) and writes bib_path from it.
+
+    Returns 1 without touching bib_path if the sync was incomplete, so a
+    failed request never drops entries from the bibliography.
+    """
+    cache = load_cache(cache_dir)
 
-    if not all_items:
+    if not offline:
+        api_key, user_id = load_credentials()
+        base_url = base_url or os.environ.get('ZOTERO_API_URL', DEFAULT_API_URL)
+        cache, complete = sync_cache(cache, api_key, user_id, collection_ids, base_url.rstrip('/'), workers)
+        # Items that were fetched are kept; the next run only asks for the rest
+        save_cache(cache_dir, cache)
+        if not complete:
+            print(f"Error: the Zotero sync is incomplete, {bib_path} was not changed. Run it again.")
+            return 1
+
+    combined_bibtex = assemble_bibtex(cache, collection_ids)
+    if not combined_bibtex:
         print("No items found in any collection.")
-        return
-
-    # Combine all items and deduplicate
-    combined_bibtex = '\n'.join(all_items)
-    print("Deduplicating bibliography entries...")
-    deduplicated_bibtex = deduplicate_bibtex(combined_bibtex)
-
-    # Write to bibliography.bib
-    # Define the output file path
-    bib_path = os.path.join('content', 'resources', 'bibliography.bib')
-    local_bib_path = os.path.join('content', 'resources', 'local.bib')
-    
-    with open(bib_path, 'w', encoding='utf-8') as f:
-        f.write(deduplicated_bibtex)
-        f.write("\n")
-            
-        # Append local bibliography if it exists
-        if os.path.exists(local_bib_path):
-            print(f"Appending local citations from {local_bib_path}...")
-            with open(local_bib_path, 'r', encoding='utf-8') as local_f:
-                f.write("\n% Local Citations\n")
-                f.write(local_f.read())
-                f.write("\n")
-            
-    print(f"Successfully wrote bibliography to {bib_path}")
+        return 0
+
+    write_bibliography(combined_bibtex, bib_path, local_bib_path,
+                       report_path=os.path.join(cache_dir, 'merge_report.json'))
+    return 0
 
-if __name__ == "__main__":
-    sync_zotero()
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sync bibliography.bib from Zotero collections.")
+    parser.add_argument('--offline', action='store_true',
+                        help="rebuild bibliography.bib from the local item cache without network access")
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS,
+                        help="maximum number of concurrent requests")
+    args = parser.parse_args(argv)
+    return sync_zotero(offline=args.offline, workers=args.workers)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
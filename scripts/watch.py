@@ -0,0 +1,435 @@
+import argparse
+import contextlib
+import ctypes
+import ctypes.util
+import io
+import os
+import re
+import select
+import shutil
+import struct
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import bib_reader
+import build_deps
+import build_driver
+import project_index
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WATCHED_DIRS = ('content', 'scripts', 'tests')
+DOCUMENTS = ('content/prestudy/main.tex', 'content/prestudy/main_required.tex', 'content/thesis/main.tex')
+
+# Quiet period that ends a burst of saves
+DEBOUNCE = 0.15
+POLL_INTERVAL = 0.5
+
+IGNORED_DIRS = {'build', '__pycache__', '.cache', '.git', 'node_modules', '.pytest_cache', '.ruff_cache'}
+# Files written by the builds and by editors
+IGNORED_SUFFIXES = ('.aux', '.log', '.out', '.toc', '.lof', '.lot', '.bbl', '.bcf', '.blg', '.fls',
+                    '.fdb_latexmk', '.synctex.gz', '.run.xml', '.tmp', '.swp', '.swx', '~')
+
+# Tests that read the LaTeX sources or the bibliography -> paths that affect them.
+# They run in this process, where their session fixtures (tests/conftest.py)
+# return the in-memory project index.
+CONTENT_CHECKS = {
+    'test_structure': ('content/prestudy/main.tex',),
+    'test_formatting_rules': ('content/prestudy/main.tex',),
+    'test_formal_guidelines': ('content/prestudy/main.tex', 'content/prestudy/sections/'),
+    'test_citations': ('content/prestudy/', 'content/resources/bibliography.bib'),
+    'test_bibliography_counts': ('content/prestudy/', 'content/resources/bibliography.bib'),
+}
+# Modules the watcher keeps state of in memory: a change restarts it
+STATE_MODULES = ('watch', 'project_index', 'bib_reader', 'build_deps', 'build_driver', 'build_trace', 'preamble_format')
+
+IMPORT_PATTERN = re.compile(r'^\s*(?:from|import)\s+(\w+)', re.MULTILINE)
+
+# inotify(7)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct('iIII')
+
+
+def relevant(path, root=PROJECT_ROOT):
+    """False for build artifacts, caches and editor files."""
+    rel_path = os.path.relpath(path, root)
+    parts = rel_path.split(os.sep)
+    if any(part in IGNORED_DIRS for part in parts[:-1]):
+        return False
+    name = parts[-1]
+    if name.startswith('.') or name.endswith(IGNORED_SUFFIXES):
+        return False
+    # build_driver.py copies every PDF next to the .tex it was built from
+    return not (name.endswith('.pdf') and os.path.exists(path[:-len('.pdf')] + '.tex'))
+
+
+def walk_dirs(roots):
+    for top in roots:
+        for dirpath, dirnames, _filenames in os.walk(top):
+            dirnames[:] = sorted(d for d in dirnames if d not in IGNORED_DIRS and not d.startswith('.'))
+            yield dirpath
+
+
+class PollingWatcher:
+    """Detects changes by comparing the mtime and size of all files every `interval` seconds."""
+
+    name = 'polling'
+
+    def __init__(self, roots, interval=POLL_INTERVAL):
+        self.roots = roots
+        self.interval = interval
+        self.snapshot = self.scan()
+
+    def scan(self):
+        snapshot = {}
+        for dirpath in walk_dirs(self.roots):
+            for entry in os.scandir(dirpath):
+                if entry.is_file():
+                    stat = entry.stat()
+                    snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def changes(self, timeout=None):
+        """Blocks up to `timeout` seconds (forever if None) and returns the changed paths."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = self.interval if deadline is None else min(self.interval, deadline - time.monotonic())
+            if remaining > 0:
+                time.sleep(remaining)
+            snapshot = self.scan()
+            changed = {path for path in snapshot.keys() | self.snapshot.keys()
+                       if snapshot.get(path) != self.snapshot.get(path)}
+            self.snapshot = snapshot
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """Linux inotify through libc; raises OSError where it is not available."""
+
+    name = 'inotify'
+
+    def __init__(self, roots):
+        library = ctypes.util.find_library('c')
+        try:
+            self.libc = ctypes.CDLL(library, use_errno=True)
+            self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except (OSError, AttributeError, TypeError) as e:
+            raise OSError(f"inotify is not available: {e}") from e
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches = {}
+        for dirpath in walk_dirs(roots):
+            self.add(dirpath)
+
+    def add(self, directory):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"cannot watch {directory} (raise fs.inotify.max_user_watches "
+                                              "or use --poll)")
+        self.watches[wd] = directory
+
+    def changes(self, timeout=None):
+        """Blocks up to `timeout` seconds (forever if None) and returns the changed paths."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        changed, offset = set(), 0
+        while offset < len(data):
+            wd, mask, _cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b'\0')
+            offset += EVENT_HEADER.size + length
+            directory = self.watches.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                del self.watches[wd]
+                continue
+            path = os.path.join(directory, os.fsdecode(name)) if name else directory
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and relevant(path) and os.path.basename(path) not in IGNORED_DIRS:
+                    # Files may have been written before the new directory was watched
+                    for dirpath in walk_dirs([path]):
+                        self.add(dirpath)
+                        changed.update(entry.path for entry in os.scandir(dirpath) if entry.is_file())
+                continue
+            changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+def make_watcher(roots, polling=False):
+    if not polling:
+        try:
+            return InotifyWatcher(roots)
+        except OSError as e:
+            print(f"{e}; falling back to polling")
+    return PollingWatcher(roots)
+
+
+def collect_test_imports(tests_dir, scripts_dir):
+    """{test module: scripts it imports, directly or through other scripts}."""
+    def imports(path, modules):
+        with open(path, 'r', encoding='utf-8') as f:
+            return {name for name in IMPORT_PATTERN.findall(f.read()) if name in modules}
+
+    scripts = {name[:-3]: os.path.join(scripts_dir, name) for name in os.listdir(scripts_dir) if name.endswith('.py')}
+    direct = {name: imports(path, scripts) for name, path in scripts.items()}
+    closure = {}
+
+    def expand(name, seen):
+        for imported in direct.get(name, ()):
+            if imported not in seen:
+                seen.add(imported)
+                expand(imported, seen)
+        return seen
+
+    for name in sorted(os.listdir(tests_dir)):
+        if name.startswith('test_') and name.endswith('.py'):
+            found = set()
+            for imported in imports(os.path.join(tests_dir, name), scripts):
+                found.add(imported)
+                expand(imported, found)
+            closure[name[:-3]] = found
+    return closure
+
+
+class ProjectState:
+    """
+    The parsed project kept in memory between changes: the project index
+    (citations, labels, word counts), the bibliography keys, the dependency
+    graph of every document and the scripts every test imports.
+    """
+
+    def __init__(self, root=PROJECT_ROOT, documents=DOCUMENTS, cache=True):
+        self.root = root
+        self.cache_file = project_index.CACHE_FILE if cache else None
+        self.bib_file = os.path.join(root, 'content', 'resources', 'bibliography.bib')
+        self.documents = [os.path.join(root, d) for d in documents if os.path.exists(os.path.join(root, d))]
+        self.index = None
+        self.bib_keys = set()
+        self.deps = {}
+        self.tests = {}
+        self.refresh_index()
+        self.refresh_bibliography()
+        for document in self.documents:
+            self.refresh_document(document)
+        self.refresh_tests()
+
+    def refresh_index(self):
+        # Only files whose mtime changed are parsed again; tests that call
+        # get_project_index() in this process see the new index
+        self.index = project_index.build_index(self.root, self.cache_file)
+        project_index._INDEX = self.index
+
+    def refresh_bibliography(self):
+        if os.path.exists(self.bib_file):
+            self.bib_keys = bib_reader.get_bibliography_keys(self.bib_file)
+
+    def refresh_document(self, document):
+        build_deps._search_cache.clear()
+        self.deps[document] = build_deps.collect_dependencies(document)
+
+    def refresh_tests(self):
+        self.tests = collect_test_imports(os.path.join(self.root, 'tests'), os.path.join(self.root, 'scripts'))
+
+    def dependents(self, path):
+        return [document for document, deps in self.deps.items()
+                if path == document or any(path in deps[kind] for kind in ('tex', 'graphics', 'bib'))]
+
+    def missing_citations(self, document):
+        return sorted(self.deps[document]['citations'] - self.bib_keys - {'*'})
+
+    def plan(self, changed):
+        """
+        Decides what a set of changed paths affects. Returns a dict with
+        `restart`, in-process `checks`, `tests` to run in a subprocess and
+        the `documents` to rebuild.
+        """
+        plan = {'restart': False, 'checks': set(), 'tests': set(), 'documents': set()}
+        for path in changed:
+            rel_path = os.path.relpath(path, self.root).replace(os.sep, '/')
+            name = os.path.splitext(os.path.basename(rel_path))[0]
+            if rel_path.startswith('scripts/') and rel_path.endswith('.py'):
+                plan['restart'] |= name in STATE_MODULES
+                plan['tests'].update(test for test, modules in self.tests.items() if name in modules)
+            elif rel_path.startswith('tests/') and name.startswith('test_') and rel_path.endswith('.py'):
+                plan['tests'].add(name)
+            elif rel_path.startswith('content/'):
+                plan['checks'].update(check for check, prefixes in CONTENT_CHECKS.items()
+                                      if any(rel_path.startswith(prefix) for prefix in prefixes))
+                plan['documents'].update(self.dependents(path))
+        # An edited check runs with its new code
+        plan['checks'] -= plan['tests']
+        return {key: sorted(value) if isinstance(value, set) else value for key, value in plan.items()}
+
+    def update(self, changed):
+        """Brings the in-memory state up to date with the changed paths."""
+        content = [p for p in changed if os.path.relpath(p, self.root).startswith('content' + os.sep)]
+        if any(p.endswith('.tex') for p in content):
+            self.refresh_index()
+        if self.bib_file in changed:
+            self.refresh_bibliography()
+        for document in self.documents:
+            if document in changed or any(p in self.deps[document]['tex'] or not os.path.exists(p) for p in content):
+                self.refresh_document(document)
+        if any(os.path.relpath(p, self.root).split(os.sep)[0] in ('scripts', 'tests') for p in changed):
+            self.refresh_tests()
+
+
+class _Outcomes:
+    """pytest plugin that collects the outcome, duration and failures of every test module."""
+
+    def __init__(self):
+        self.modules = {}
+
+    def pytest_runtest_logreport(self, report):
+        name = os.path.splitext(os.path.basename(report.nodeid.split('::')[0]))[0]
+        ok, seconds, output = self.modules.get(name, (True, 0.0, ''))
+        if report.failed:
+            ok, output = False, output + report.longreprtext + '\n'
+        self.modules[name] = (ok, seconds + report.duration, output)
+
+
+PYTEST_OPTIONS = ['-q', '-p', 'no:cacheprovider']
+
+
+def run_checks(names, tests_dir=os.path.join(PROJECT_ROOT, 'tests')):
+    """
+    Runs test modules in one pytest session in this process, so their session
+    fixtures use the in-memory project index. Returns {name: (ok, seconds, output)}.
+    """
+    outcomes = _Outcomes()
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        pytest.main(PYTEST_OPTIONS + [os.path.join(tests_dir, name + '.py') for name in names], plugins=[outcomes])
+    return {name: outcomes.modules.get(name, (False, 0.0, output.getvalue())) for name in names}
+
+
+def run_test(name, tests_dir=os.path.join(PROJECT_ROOT, 'tests')):
+    """Runs a test module in a fresh interpreter, so edited scripts are imported anew."""
+    start = time.monotonic()
+    process = subprocess.run([sys.executable, '-m', 'pytest'] + PYTEST_OPTIONS + [os.path.join(tests_dir, name + '.py')],
+                             cwd=PROJECT_ROOT, capture_output=True, text=True)
+    return process.returncode == 0, time.monotonic() - start, process.stdout + process.stderr
+
+
+def report(name, ok, seconds, output):
+    print(f"  {'ok' if ok else 'FAILED':<7} {name:<32} {seconds * 1000:6.0f} ms")
+    if not ok:
+        print('    ' + output.strip().replace('\n', '\n    '))
+
+
+def handle(state, changed, build=True, jobs=None):
+    """Re-runs what the changed paths affect. Returns False if a check or build failed."""
+    start = time.monotonic()
+    names = sorted(os.path.relpath(p, state.root) for p in changed)
+    print(f"[{time.strftime('%H:%M:%S')}] {len(names)} changed: {', '.join(names[:5])}"
+          + (', ...' if len(names) > 5 else ''))
+    state.update(changed)
+    plan = state.plan(changed)
+    ok = True
+
+    checks = run_checks(plan['checks']) if plan['checks'] else {}
+    for name, result in checks.items():
+        report(name, *result)
+        ok &= result[0]
+    for document in plan['documents']:
+        for key in state.missing_citations(document):
+            print(f"  warning {os.path.relpath(document, state.root)}: citation '{key}' not in the bibliography")
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as pool:
+        for name, result in zip(plan['tests'], pool.map(run_test, plan['tests'])):
+            report(name, *result)
+            ok &= result[0]
+    if plan['checks'] or plan['tests']:
+        print(f"  checks done in {(time.monotonic() - start) * 1000:.0f} ms")
+
+    if build and plan['documents']:
+        results = build_driver.run_builds(plan['documents'], jobs)
+        ok &= all(result.exit_code == 0 for result in results)
+    if not (plan['checks'] or plan['tests'] or plan['documents']):
+        print("  nothing affected")
+    return ok
+
+
+def collect(watcher, debounce):
+    """Waits for a change, then for `debounce` seconds without changes; returns the relevant paths."""
+    changed = set()
+    while not changed:
+        changed = {p for p in watcher.changes() if relevant(p)}
+    while True:
+        more = watcher.changes(debounce)
+        if not more:
+            return changed
+        changed.update(p for p in more if relevant(p))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-run the checks and builds affected by every saved file.")
+    parser.add_argument('--poll', action='store_true', help="poll for changes instead of using inotify")
+    parser.add_argument('--no-build', action='store_true', help="only run the checks, do not rebuild documents")
+    parser.add_argument('--debounce', type=float, default=DEBOUNCE,
+                        help=f"seconds without changes that end a burst of saves (default: {DEBOUNCE})")
+    parser.add_argument('-j', '--jobs', type=int, default=int(os.environ.get('BUILD_JOBS', 0)) or None)
+    # Paths changed before a restart, handled first
+    parser.add_argument('--changed', nargs='*', default=[], help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    build = not args.no_build
+    if build and shutil.which('pdflatex') is None:
+        print("pdflatex not found; documents are not rebuilt")
+        build = False
+    build_driver.set_search_paths()
+
+    start = time.monotonic()
+    state = ProjectState()
+    watcher = make_watcher([os.path.join(PROJECT_ROOT, d) for d in WATCHED_DIRS], args.poll)
+    print(f"Watching {', '.join(d + '/' for d in WATCHED_DIRS)} with {watcher.name} "
+          f"({len(state.index.files)} .tex files, {len(state.bib_keys)} references, "
+          f"{len(state.documents)} documents loaded in {(time.monotonic() - start) * 1000:.0f} ms). "
+          "Press Ctrl+C to stop.")
+
+    changed, restarted = set(args.changed), bool(args.changed)
+    try:
+        while True:
+            if changed:
+                if state.plan(changed)['restart'] and not restarted:
+                    watcher.close()
+                    restart(changed)
+                restarted = False
+                handle(state, changed, build, args.jobs)
+            changed = collect(watcher, args.debounce)
+    except KeyboardInterrupt:
+        watcher.close()
+        return 0
+
+
+def restart(changed):
+    """Replaces this process with a fresh watcher that handles `changed` first."""
+    print("Watcher code changed, restarting...")
+    argv = sys.argv[1:]
+    if '--changed' in argv:
+        argv = argv[:argv.index('--changed')]
+    os.execv(sys.executable, [sys.executable, os.path.abspath(__file__)] + argv + ['--changed'] + sorted(changed))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+Shared setup of the pytest session.
+
+Puts scripts/ on the import path, so every test module works from any
+working directory, and exposes the parsed project as session fixtures that
+are computed once per session (once per worker with pytest-xdist).
+"""
+import os
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS_DIR = os.path.join(PROJECT_ROOT, 'scripts')
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+import bib_reader  # noqa: E402
+import project_index  # noqa: E402
+
+PRESTUDY_DIR = os.path.join(PROJECT_ROOT, 'content', 'prestudy')
+BIB_FILE = os.path.join(PROJECT_ROOT, 'content', 'resources', 'bibliography.bib')
+
+
+@pytest.fixture(scope='session')
+def project():
+    """The project index of all documents (citations, labels, word counts)."""
+    return project_index.get_project_index()
+
+
+@pytest.fixture(scope='session')
+def bibliography_keys():
+    """Citation keys of content/resources/bibliography.bib."""
+    return bib_reader.get_bibliography_keys(BIB_FILE)
+
+
+@pytest.fixture(scope='session')
+def prestudy_main_tex():
+    """Source of content/prestudy/main.tex."""
+    with open(os.path.join(PRESTUDY_DIR, 'main.tex'), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+@pytest.fixture(autouse=True)
+def build_store_dir(tmp_path, monkeypatch):
+    """An empty build store per test, so tests neither share nor pollute the user's store."""
+    path = tmp_path / 'build-store'
+    monkeypatch.setenv('BUILD_STORE_DIR', str(path))
+    return path
+
+
+class Tree:
+    """A temporary directory that a test writes its input files to."""
+
+    def __init__(self, root):
+        self.root = str(root)
+
+    def path(self, *parts):
+        return os.path.join(self.root, *parts)
+
+    def write(self, name, content, newline=None):
+        """Writes `content` to `name` below the root, creating its directories; returns the path."""
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8', newline=newline) as f:
+            f.write(content)
+        return path
+
+
+@pytest.fixture
+def tree(request, tmp_path):
+    """
+    A Tree in the test's tmp_path. Test case classes marked with
+    @pytest.mark.usefixtures('tree') get it as `self.tree` before setUp runs.
+    """
+    path = tmp_path / 'tree'
+    path.mkdir()
+    tree = Tree(path)
+    if request.instance is not None:
+        request.instance.tree = tree
+    return tree
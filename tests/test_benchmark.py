@@ -0,0 +1,75 @@
+import io
+import json
+import sys
+import unittest
+from contextlib import redirect_stdout
+
+import pytest
+
+import benchmark
+import bib_reader
+import project_index
+
+
+@pytest.mark.usefixtures('tree')
+class TestBenchmark(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.corpus = benchmark.Corpus(sizes=(200,), sections=5, items=40)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.corpus.cleanup()
+
+    def test_corpus_is_parseable(self):
+        """The synthetic corpus is valid input for the real tooling."""
+        entries = list(bib_reader.iter_entries(self.corpus.bib_files[200]))
+        self.assertEqual(len(entries), 200)
+        self.assertTrue(any(entry.key.startswith('dup_') for entry in entries))
+
+        index = project_index.build_index(self.corpus.root, None, ('prestudy',))
+        paths = index.paths('content/prestudy/sections/')
+        self.assertEqual(len(paths), 5)
+        self.assertTrue(index.citations(paths) <= set(entry.key for entry in entries))
+
+    def test_run_benchmarks_times_every_case(self):
+        with redirect_stdout(io.StringIO()):
+            results = benchmark.run_benchmarks(self.corpus, repeat=2)
+        self.assertIn('citations/cold', results)
+        self.assertIn('bib_keys/200/warm', results)
+        self.assertIn('dedup/200', results)
+        self.assertIn('tables/unchanged', results)
+        self.assertIn('toc_check', results)
+        for result in results.values():
+            self.assertEqual(result['repeat'], 2)
+            self.assertLessEqual(result['min'], result['median'])
+
+    def test_compare_applies_margin(self):
+        baseline = {'results': {'a': {'min': 1.0}, 'b': {'min': 1.0}}}
+        results = {'a': {'min': 1.2}, 'b': {'min': 1.3}, 'new': {'min': 9.0}}
+        self.assertEqual(benchmark.compare(results, baseline, margin=0.25), [('b', 1.0, 1.3)])
+        self.assertEqual(benchmark.compare(results, baseline, margin=0.5), [])
+
+    def test_check_mode_fails_on_regression(self):
+        baseline_file = self.tree.path('baseline.json')
+        argv = ['--sizes', '100', '--sections', '2', '--items', '10', '--repeat', '1',
+                '--filter', 'toc_check', '--baseline', baseline_file]
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(benchmark.main(argv + ['--check']), 1)  # no baseline yet
+            self.assertEqual(benchmark.main(argv + ['--save']), 0)
+        with open(baseline_file, encoding='utf-8') as f:
+            baseline = json.load(f)
+        self.assertEqual(list(baseline['results']), ['toc_check'])
+
+        baseline['results']['toc_check']['min'] = 1e-9
+        with open(baseline_file, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f)
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertEqual(benchmark.main(argv + ['--check']), 1)
+        self.assertIn("Regression: toc_check", output.getvalue())
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
@@ -0,0 +1,141 @@
+import sys
+import unittest
+
+import pytest
+
+import bib_merge
+import bib_reader
+
+ZOTERO_BIB = """@article{davis_perceived_1989,
+\ttitle = {Perceived Usefulness, Perceived Ease of Use, and User Acceptance of Information Technology},
+\tauthor = {Davis, Fred D.},
+\tyear = {1989},
+\tdoi = {10.2307/249008},
+}
+
+@article{davis_perceived_1989-1,
+\ttitle = {Perceived usefulness, perceived ease of use, and user acceptance of information technology},
+\tauthor = {Davis, Fred D.},
+\tyear = {1989},
+\tdoi = {https://doi.org/10.2307/249008},
+\tpages = {319--340},
+}
+
+@book{baur_handbuch_2022,
+\ttitle = {Handbuch Methoden der empirischen Sozialforschung},
+\teditor = {Baur, Nina and Blasius, J{\\"o}rg},
+\tyear = {2022},
+\tisbn = {978-3-658-37985-8},
+}
+
+@incollection{kelle_mixed_2022,
+\ttitle = {Mixed Methods},
+\tauthor = {Kelle, Udo},
+\tyear = {2022},
+\tisbn = {978-3-658-37985-8},
+}
+"""
+
+LOCAL_BIB = """@incollection{kelle_mixed_2022,
+  title  = {Mixed-Methods},
+  author = {Kelle, Udo},
+  year   = {2022},
+  doi    = {10.1007/978-3-658-37985-8_12}
+}
+
+@misc{venkatesh_2000,
+  title  = {A Theoretical Extension of the Technology Acceptance Modell},
+  author = {Venkatesh, Viswanath},
+  year   = {2000}
+}
+
+@article{venkatesh_theoretical_2000,
+  title  = {A Theoretical Extension of the Technology Acceptance Model},
+  author = {Venkatesh, Viswanath and Davis, Fred D.},
+  year   = {2000}
+}
+
+@misc{alva_2025,
+  title  = {Alva},
+  author = {{Alva Team}},
+  year   = {2024}
+}
+
+@misc{alva_2025,
+  title  = {Something else entirely},
+  author = {{Alva Team}},
+  year   = {2025}
+}
+"""
+
+
+@pytest.mark.usefixtures('tree')
+class TestBibMerge(unittest.TestCase):
+
+    def merge(self):
+        remote = bib_reader.parse_string(ZOTERO_BIB)
+        local = bib_reader.parse_string(LOCAL_BIB)
+        return bib_merge.merge_sources(remote, local)
+
+    def test_duplicates_merged_across_keys(self):
+        """Same DOI / fingerprint under two keys collapses into one entry with an ids alias."""
+        entries, report, _local_keys = self.merge()
+        by_key = {e.key: e for e in entries}
+        self.assertNotIn('davis_perceived_1989-1', by_key)
+        davis = by_key['davis_perceived_1989']
+        self.assertEqual(davis.fields['ids'], 'davis_perceived_1989-1')
+        self.assertEqual(davis.fields['pages'], '319--340')
+        merged = {item['key']: item for item in report['merged']}
+        self.assertIn('doi', merged['davis_perceived_1989']['reasons'])
+
+    def test_near_duplicate_titles_within_block(self):
+        """A misspelt title with the same first author and year is detected as duplicate."""
+        entries, report, _local_keys = self.merge()
+        keys = [e.key for e in entries]
+        self.assertEqual(len([k for k in keys if k.startswith('venkatesh')]), 1)
+
+    def test_chapter_and_book_sharing_isbn_stay_separate(self):
+        """A chapter's ISBN belongs to its book and must not merge the two."""
+        entries, _report, _local_keys = self.merge()
+        keys = [e.key for e in entries]
+        self.assertIn('baur_handbuch_2022', keys)
+        self.assertIn('kelle_mixed_2022', keys)
+
+    def test_key_clash_is_reported(self):
+        """The same key used for different works keeps both: the later one under a suffixed key."""
+        entries, report, _local_keys = self.merge()
+        by_key = {e.key: e for e in entries}
+        self.assertEqual(by_key['alva_2025'].fields['title'], 'Alva')
+        self.assertEqual(by_key['alva_2025-1'].fields['title'], 'Something else entirely')
+        clashes = [c for c in report['conflicts'] if c['type'] == 'key']
+        self.assertEqual([(c['key'], c['renamed']) for c in clashes], [('alva_2025', 'alva_2025-1')])
+
+    def test_shared_key_does_not_chain_works(self):
+        """An entry sharing a key with one work and a DOI with another only merges with the latter."""
+        entries = bib_reader.parse_string("""@article{smith_2020, title = {Trust in Chatbots}, year = {2020}}
+@article{jones_2020, title = {Learning Analytics}, year = {2020}, doi = {10.1/la}}
+@article{smith_2020, title = {Learning Analytics Revisited}, year = {2020}, doi = {10.1/la}}
+""")
+        merged, report = bib_merge.merge_entries(entries)
+        by_key = {e.key: e for e in merged}
+        self.assertEqual(sorted(by_key), ['jones_2020', 'smith_2020'])
+        self.assertNotIn('ids', by_key['jones_2020'].fields)
+        self.assertEqual([(c['key'], c['renamed']) for c in report['conflicts'] if c['type'] == 'key'],
+                         [('smith_2020', 'jones_2020')])
+
+    def test_output_is_deterministic(self):
+        """Writing the same inputs twice yields byte-identical files that parse back."""
+        outputs = []
+        for run in range(2):
+            path = self.tree.path(f'out{run}.bib')
+            entries, _report, local_keys = self.merge()
+            bib_merge.write_bibliography(entries, path, local_keys)
+            with open(path, 'rb') as f:
+                outputs.append(f.read())
+        keys = bib_reader.get_bibliography_keys(path, cache_dir=None)
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertIn('davis_perceived_1989-1', keys)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
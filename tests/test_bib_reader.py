@@ -0,0 +1,75 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+import pytest
+
+import bib_reader
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BIB_FILE = os.path.join(PROJECT_ROOT, 'content', 'resources', 'bibliography.bib')
+
+try:
+    import bibtexparser
+    HAS_BIBTEXPARSER = True
+except ImportError:
+    HAS_BIBTEXPARSER = False
+
+SAMPLE_BIB = """% Zotero export
+@string{jcr = "Journal of Consumer Research"}
+
+@article{levin_gaeth_1988,
+  title     = {How consumers are affected by the {framing} of attribute information},
+  author    = "Levin, Irwin P. and Gaeth, Gary J.",
+  journal   = jcr,
+  year      = 1988,
+}
+
+@misc(alva_2025, title = {Alva} # ": AI Assistant", author = {{Alva Team}})
+"""
+
+
+@pytest.mark.usefixtures('tree')
+class TestBibReader(unittest.TestCase):
+
+    def setUp(self):
+        self.bib_file = self.tree.write('test.bib', SAMPLE_BIB)
+        self.cache_dir = self.tree.path('.cache')
+
+    def test_streaming_parse(self):
+        """Entries are parsed with braced, quoted, bare and concatenated values."""
+        entries = list(bib_reader.iter_entries(self.bib_file))
+        self.assertEqual([e.key for e in entries], ['levin_gaeth_1988', 'alva_2025'])
+        levin = entries[0]
+        self.assertEqual(levin.entry_type, 'article')
+        self.assertEqual(levin.fields['title'],
+                         'How consumers are affected by the {framing} of attribute information')
+        self.assertEqual(levin.fields['author'], 'Levin, Irwin P. and Gaeth, Gary J.')
+        self.assertEqual(levin.fields['year'], '1988')
+        self.assertEqual(entries[1].fields['title'], 'Alva: AI Assistant')
+        self.assertEqual(entries[1].fields['author'], '{Alva Team}')
+
+    def test_cache_is_reused_until_file_changes(self):
+        """An unchanged bib is served from the cache; an edited one is re-parsed."""
+        keys = bib_reader.get_bibliography_keys(self.bib_file, self.cache_dir)
+        self.assertEqual(keys, {'levin_gaeth_1988', 'alva_2025'})
+
+        with mock.patch.object(bib_reader, 'iter_entries', side_effect=AssertionError("re-parsed")):
+            self.assertEqual(bib_reader.get_bibliography_keys(self.bib_file, self.cache_dir), keys)
+
+        with open(self.bib_file, 'a', encoding='utf-8') as f:
+            f.write("\n@book{kelle_2022, title={Mixed Methods}}\n")
+        keys = bib_reader.get_bibliography_keys(self.bib_file, self.cache_dir)
+        self.assertIn('kelle_2022', keys)
+
+    @unittest.skipUnless(HAS_BIBTEXPARSER, "bibtexparser not installed")
+    def test_matches_bibtexparser_keys(self):
+        """The project bibliography yields the same keys as bibtexparser."""
+        with open(BIB_FILE, 'r', encoding='utf-8') as f:
+            expected = set(entry['ID'] for entry in bibtexparser.load(f).entries)
+        self.assertEqual(bib_reader.get_bibliography_keys(BIB_FILE, cache_dir=None), expected)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
@@ -0,0 +1,64 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+import pytest
+
+import build_deps
+import image_assets
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN_TEX = os.path.join(PROJECT_ROOT, 'content', 'prestudy', 'main.tex')
+
+
+@pytest.mark.usefixtures('tree')
+class TestBuildDeps(unittest.TestCase):
+
+    def test_prestudy_dependencies_resolve(self):
+        """Every subfile, table, image and bib resource of the prestudy is found."""
+        deps = build_deps.collect_dependencies(MAIN_TEX)
+        self.assertFalse(deps['missing'], f"Unresolved inputs: {deps['missing']}")
+        self.assertTrue(any(p.endswith('bibliography.bib') for p in deps['bib']))
+        self.assertTrue(any(p.endswith('ba_faryf_ai_tam.jpg') for p in deps['graphics']))
+        self.assertTrue(any(p.endswith('05_milestones.tex') for p in deps['tex']))
+
+    def test_plan_transitions(self):
+        """Unchanged inputs skip latexmk, text edits skip biber, new citations need biber."""
+        self.tree.write('refs.bib', '@book{a, title={A}}\n')
+        main_tex = self.tree.write(
+            'main.tex', '\\addbibresource{refs.bib}\n\\begin{document}\\subfile{section}\\end{document}\n')
+        section = self.tree.write('section.tex', 'Text \\cite{a}.\n')
+        for name in ('main.pdf', 'main.bbl'):
+            self.tree.write(name, '')
+
+        with mock.patch.object(build_deps, 'STATE_DIR', self.tree.path('state')):
+            self.assertEqual(build_deps.plan_build(main_tex), build_deps.FULL)
+            build_deps.record_build(main_tex)
+            self.assertEqual(build_deps.plan_build(main_tex), build_deps.UP_TO_DATE)
+
+            with open(section, 'a', encoding='utf-8') as f:
+                f.write('More text.\n')
+            self.assertEqual(build_deps.plan_build(main_tex), build_deps.LATEX_ONLY)
+
+            with open(section, 'a', encoding='utf-8') as f:
+                f.write('\\parencite{b}\n')
+            self.assertEqual(build_deps.plan_build(main_tex), build_deps.FULL)
+
+    def test_print_images_change_the_plan(self):
+        """Print variants in TEXINPUTS or other print settings make pdflatex run again."""
+        main_tex = self.tree.write('main.tex', '\\begin{document}\\includegraphics{figure.png}\\end{document}\n')
+        for name in ('figure.png', 'main.pdf', 'main.bbl'):
+            self.tree.write(name, '')
+
+        with mock.patch.object(build_deps, 'STATE_DIR', self.tree.path('state')), \
+                mock.patch.dict(os.environ, {'TEXINPUTS': ''}):
+            build_deps.record_build(main_tex)
+            self.assertEqual(build_deps.plan_build(main_tex), build_deps.UP_TO_DATE)
+            with mock.patch.object(image_assets, 'PRINT_MAX_WIDTH', 1200):
+                self.assertEqual(build_deps.plan_build(main_tex), build_deps.LATEX_ONLY)
+            with mock.patch.dict(os.environ, {'TEXINPUTS': image_assets.PRINT_DIR + '//:'}):
+                self.assertEqual(build_deps.plan_build(main_tex), build_deps.LATEX_ONLY)
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
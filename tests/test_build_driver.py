@@ -0,0 +1,145 @@
+import json
+import os
+import shutil
+import stat
+import sys
+import unittest
+from unittest import mock
+
+import pytest
+
+import build_deps
+import build_driver
+import image_assets
+
+# Stand-in for pdflatex: writes <jobname>.aux/.log/.pdf into -output-directory,
+# asks for biber like biblatex while there is no .bbl and fails for "broken.tex"
+FAKE_PDFLATEX = r"""#!/bin/sh
+for arg in "$@"; do
+    case $arg in -output-directory=*) outdir="${arg#-output-directory=}" ;; esac
+    file=$arg
+done
+job="${file%.tex}"
+echo "built $job"
+if [ "$file" = "broken.tex" ]; then
+    printf '(./broken.tex\n./broken.tex:1: Undefined control sequence.\nl.1 \\foo\n' > "$outdir/$job.log"
+    exit 1
+fi
+echo aux > "$outdir/$job.aux"
+echo pdf > "$outdir/$job.pdf"
+echo "(./$file" > "$outdir/$job.log"
+if [ ! -e "$outdir/$job.bbl" ]; then
+    echo "Package biblatex Warning: Please (re)run Biber on the file:" >> "$outdir/$job.log"
+    echo "(biblatex)                $job" >> "$outdir/$job.log"
+    echo "(biblatex)                and rerun LaTeX afterwards." >> "$outdir/$job.log"
+fi
+echo ")" >> "$outdir/$job.log"
+"""
+
+FAKE_BIBER = """#!/bin/sh
+for arg in "$@"; do
+    case $arg in --output-directory=*) outdir="${arg#--output-directory=}" ;; esac
+    job=$arg
+done
+echo bbl > "$outdir/$job.bbl"
+echo "cache: $PAR_GLOBAL_TEMP"
+echo "[0] Config.pm:307> INFO - This is Biber 2.19" > "$outdir/$job.blg"
+"""
+
+
+@unittest.skipIf(os.name == 'nt', "uses shell scripts as pdflatex/biber stand-ins")
+@pytest.mark.usefixtures('tree')
+class TestBuildDriver(unittest.TestCase):
+
+    def setUp(self):
+        bin_dir = self.tree.path('bin')
+        os.makedirs(bin_dir)
+        for name, script in (('pdflatex', FAKE_PDFLATEX), ('biber', FAKE_BIBER)):
+            path = os.path.join(bin_dir, name)
+            with open(path, 'w') as f:
+                f.write(script)
+            os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+        self.patches = [
+            mock.patch.dict(os.environ, {'PATH': bin_dir + os.pathsep + os.environ['PATH'], 'PREAMBLE_FORMAT': '0'}),
+            mock.patch.object(build_deps, 'STATE_DIR', self.tree.path('state')),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+
+    def make_document(self, target, name, text='Text'):
+        target_dir = self.tree.path(target)
+        os.makedirs(target_dir, exist_ok=True)
+        path = os.path.join(target_dir, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f'\\begin{{document}}{text}\\end{{document}}\n')
+        return path
+
+    def test_documents_build_in_isolated_output_dirs(self):
+        """Each document gets its own outdir, log and exit code; PDFs land next to the source."""
+        main = self.make_document('prestudy', 'main.tex')
+        required = self.make_document('prestudy', 'main_required.tex')
+        broken = self.make_document('thesis', 'broken.tex')
+
+        results = {r.document: r for r in build_driver.run_builds([main, required, broken], jobs=3)}
+
+        self.assertNotEqual(build_driver.output_dir_for(main), build_driver.output_dir_for(required))
+        self.assertEqual(results[main].exit_code, 0)
+        self.assertTrue(os.path.exists(self.tree.path('prestudy', 'main_required.pdf')))
+        with open(results[main].log_path, encoding='utf-8') as f:
+            self.assertIn('built main', f.read())
+        self.assertEqual(results[broken].exit_code, 1)
+        self.assertEqual(results[broken].status, 'failed')
+        error, = results[broken].diagnostics
+        self.assertEqual((error.file, error.line, error.message), ('broken.tex', 1, 'Undefined control sequence.'))
+
+        results = build_driver.run_builds([main], jobs=1)
+        self.assertEqual(results[0].status, build_deps.UP_TO_DATE)
+
+    def test_passes_follow_the_log(self):
+        """biber runs when biblatex asks for it; pdflatex reruns only while the log or aux files say so."""
+        main = self.make_document('prestudy', 'main.tex')
+        result = build_driver.build_document(main)
+        self.assertEqual((result.status, result.passes), (build_deps.FULL, 2))
+        with open(result.log_path, encoding='utf-8') as f:
+            log = f.read()
+        self.assertEqual(log.count('$ biber'), 1)
+        # biber does not share its unpack cache with the other documents
+        self.assertIn(f"cache: {os.path.join(build_driver.output_dir_for(main), 'biber-cache')}\n", log)
+        with open(os.path.join(build_driver.output_dir_for(main), 'main.diagnostics.json'), encoding='utf-8') as f:
+            self.assertEqual(json.load(f), {'diagnostics': []})
+
+        # A text edit leaves the .aux as it was, so one pass is enough
+        self.make_document('prestudy', 'main.tex', 'More text')
+        result = build_driver.build_document(main)
+        self.assertEqual((result.status, result.passes), (build_deps.LATEX_ONLY, 1))
+
+    def test_products_are_restored_from_the_build_store(self):
+        """A document whose inputs an earlier build saw is copied from the store instead of compiled."""
+        main = self.make_document('prestudy', 'main.tex')
+        self.assertEqual(build_driver.build_document(main).status, build_deps.FULL)
+        shutil.rmtree(build_driver.output_dir_for(main))
+        os.remove(self.tree.path('prestudy', 'main.pdf'))
+        build_deps.forget_build(main)
+
+        result = build_driver.build_document(main)
+        self.assertEqual((result.status, result.passes), (build_driver.STORED, 0))
+        self.assertTrue(os.path.exists(self.tree.path('prestudy', 'main.pdf')))
+        self.assertTrue(os.path.exists(os.path.join(build_driver.output_dir_for(main), 'main.bbl')))
+        self.assertEqual(build_driver.build_document(main).status, build_deps.UP_TO_DATE)
+
+        # Other print variants of the images make another document
+        key = build_driver.document_key(main)
+        with mock.patch.object(image_assets, 'PRINT_MAX_WIDTH', 1200):
+            self.assertNotEqual(build_driver.document_key(main), key)
+
+        build_deps.forget_build(main)
+        with mock.patch.dict(os.environ, {'BUILD_STORE': '0'}):
+            self.assertEqual(build_driver.build_document(main).status, build_deps.FULL)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
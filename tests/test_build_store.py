@@ -0,0 +1,92 @@
+import io
+import json
+import os
+import sys
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+import pytest
+
+import build_store
+
+
+@pytest.mark.usefixtures('tree')
+class TestBuildStore(unittest.TestCase):
+
+    def setUp(self):
+        self.root = self.tree.path('store')
+        self.patch = mock.patch.dict(os.environ, {'BUILD_STORE_DIR': self.root, 'BUILD_STORE': '1'})
+        self.patch.start()
+
+    def tearDown(self):
+        self.patch.stop()
+
+    def read(self, name):
+        with open(self.tree.path(name), 'rb') as f:
+            return f.read()
+
+    def test_save_and_fetch(self):
+        with open(self.tree.path('main.pdf'), 'wb') as f:
+            f.write(b'%PDF')
+        key = build_store.make_key('main.tex', b'content')
+        self.assertNotEqual(key, build_store.make_key('main.tex', b'other content'))
+        self.assertFalse(build_store.fetch('pdf', key, {'pdf': self.tree.path('out/main.pdf')}))
+
+        build_store.save('pdf', key, {'pdf': self.tree.path('main.pdf'), 'bbl': b'\\entry'})
+        targets = {'pdf': self.tree.path('out/main.pdf'), 'bbl': self.tree.path('out/main.bbl'),
+                   'toc': self.tree.path('out/main.toc')}
+        self.assertFalse(build_store.fetch('pdf', key, targets))
+        self.assertTrue(build_store.fetch('pdf', key, targets, required=['pdf']))
+        self.assertEqual((self.read('out/main.pdf'), self.read('out/main.bbl')), (b'%PDF', b'\\entry'))
+        self.assertFalse(os.path.exists(self.tree.path('out/main.toc')))
+
+        with mock.patch.dict(os.environ, {'BUILD_STORE': '0'}):
+            self.assertFalse(build_store.fetch('pdf', key, targets, required=['pdf']))
+
+    def test_least_recently_used_entries_are_evicted_first(self):
+        for index, key in enumerate(('a' * 64, 'b' * 64, 'c' * 64)):
+            build_store.save('images', key, {'variant': b'x' * 100})
+            meta = os.path.join(build_store.entry_dir('images', key), build_store.META_FILE)
+            os.utime(meta, (1000 + index, 1000 + index))
+        # A hit makes the oldest entry the most recently used one
+        self.assertIsNotNone(build_store.load('images', 'a' * 64))
+
+        removed = build_store.evict(200)
+        self.assertEqual([entry['key'] for entry in removed], ['b' * 64])
+        self.assertEqual(sorted(entry['key'] for entry in build_store.entries()), ['a' * 64, 'c' * 64])
+
+    def test_stats(self):
+        build_store.save('bbl', 'a' * 64, {'bbl': b'1234'})
+        build_store.load('bbl', 'a' * 64)
+        build_store.load('bbl', 'b' * 64)
+        build_store.load('bbl', 'a' * 64)
+        summary = build_store.stats()['bbl']
+        self.assertEqual((summary['hit'], summary['miss'], summary['save'], summary['restored']), (2, 1, 1, 8))
+        self.assertEqual((summary['entries'], summary['size']), (1, 4))
+        self.assertAlmostEqual(summary['hit_rate'], 2 / 3)
+
+        with redirect_stdout(io.StringIO()) as output:
+            self.assertEqual(build_store.main(['stats', '--json']), 0)
+        self.assertEqual(json.loads(output.getvalue())['bbl']['hit'], 2)
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(build_store.main(['clear']), 0)
+        self.assertEqual(build_store.stats(), {})
+
+    def test_stats_are_trimmed_on_eviction(self):
+        """Eviction drops the oldest events once the statistics outgrow their limit."""
+        for _ in range(40):
+            build_store.load('bbl', 'a' * 64)
+        build_store.load('pdf', 'b' * 64)
+        path = os.path.join(self.root, build_store.STATS_FILE)
+        with mock.patch.object(build_store, 'MAX_STATS_SIZE', 2000):
+            self.assertGreater(os.path.getsize(path), 2000)
+            build_store.evict(build_store.max_size())
+            self.assertLessEqual(os.path.getsize(path), 1000)
+        summary = build_store.stats()
+        self.assertLess(summary['bbl']['miss'], 40)
+        self.assertEqual(summary['pdf']['miss'], 1)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
@@ -0,0 +1,106 @@
+import io
+import json
+import os
+import sys
+import time
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+import pytest
+
+import build_trace
+
+FAKE_PASS = """
+echo "Output written on main.pdf"
+exit 3
+"""
+
+
+@unittest.skipIf(os.name == 'nt', "uses sh to stand in for pdflatex and biber")
+@pytest.mark.usefixtures('tree')
+class TestBuildTrace(unittest.TestCase):
+
+    def setUp(self):
+        self.trace_file = self.tree.path('trace.jsonl')
+        self.env = mock.patch.dict(os.environ, {build_trace.TRACE_ENV: self.trace_file})
+        self.env.start()
+
+    def tearDown(self):
+        self.env.stop()
+
+    def build_fake_document(self, document='/doc/main.tex'):
+        """Records a document build like build_driver.py: two pdflatex passes around one biber pass."""
+        parent = build_trace.event_id()
+        started = time.time()
+        for name in ('pdflatex', 'biber', 'pdflatex'):
+            build_trace.run_traced(['sh', '-c', FAKE_PASS], name, log=io.StringIO(), document=document,
+                                   category='pass', parent=parent)
+        build_trace.record({'id': parent, 'name': 'build', 'category': 'document', 'document': document,
+                            'start': started, 'wall': time.time() - started, 'passes': {'pdflatex': 2, 'biber': 1}})
+
+    def test_times_command_and_keeps_exit_code(self):
+        """The output is passed on, the exit code is returned and wall and CPU time are measured."""
+        log = io.StringIO()
+        exit_code, event = build_trace.run_traced(['sh', '-c', FAKE_PASS], 'pdflatex', log=log)
+        self.assertEqual(exit_code, 3)
+        self.assertIn("Output written", log.getvalue())
+        self.assertEqual(event['category'], 'stage')
+        self.assertGreaterEqual(event['wall'], 0.0)
+        if hasattr(os, 'wait4'):
+            self.assertIsNotNone(event['cpu_user'])
+
+    def test_events_are_appended_to_trace(self):
+        """Every pass is recorded as a child event of its document."""
+        self.build_fake_document()
+        events = build_trace.load_events([self.trace_file])
+        self.assertEqual([e['name'] for e in events if e['category'] == 'pass'], ['pdflatex', 'biber', 'pdflatex'])
+        parent = [e for e in events if e['category'] == 'document'][0]
+        self.assertTrue(all(e['parent'] == parent['id'] for e in events if e['category'] == 'pass'))
+
+    def test_record_without_trace_file_is_noop(self):
+        """Without BUILD_TRACE nothing is written."""
+        with mock.patch.dict(os.environ, {build_trace.TRACE_ENV: ''}):
+            build_trace.record({'name': 'x', 'category': 'stage', 'start': 0.0, 'wall': 1.0})
+        self.assertFalse(os.path.exists(self.trace_file))
+
+    def test_finish_writes_trace_and_chrome_format(self):
+        """finish() writes the trace and its Chrome trace-event version into every build directory."""
+        self.build_fake_document('/doc/a.tex')
+        self.build_fake_document('/doc/b.tex')
+        build_trace.record({'name': 'sanitize_sources', 'category': 'stage', 'document': None,
+                            'start': 0.0, 'wall': 0.5})
+        out_dirs = [self.tree.path('prestudy', 'build'), self.tree.path('thesis', 'build')]
+        with redirect_stdout(io.StringIO()):
+            build_trace.finish(self.trace_file, out_dirs, chrome=True)
+
+        with open(os.path.join(out_dirs[0], build_trace.TRACE_FILE_NAME), encoding='utf-8') as f:
+            trace = json.load(f)
+        self.assertEqual(trace['documents']['/doc/a.tex']['passes'], {'pdflatex': 2, 'biber': 1})
+        self.assertEqual(len(trace['events']), 9)
+
+        with open(os.path.join(out_dirs[1], build_trace.CHROME_TRACE_FILE_NAME), encoding='utf-8') as f:
+            chrome = json.load(f)
+        complete = [e for e in chrome['traceEvents'] if e['ph'] == 'X']
+        self.assertEqual(len(complete), 9)
+        self.assertEqual(min(e['ts'] for e in complete), 0)
+        # One lane per document plus one for the global stages
+        self.assertEqual(len({e['tid'] for e in complete}), 3)
+
+    def test_summary_deduplicates_traces_of_several_targets(self):
+        """The same events written to several targets are summarized once."""
+        self.build_fake_document()
+        out_dirs = [self.tree.path('a'), self.tree.path('b')]
+        with redirect_stdout(io.StringIO()):
+            build_trace.finish(self.trace_file, out_dirs)
+        traces = [os.path.join(d, build_trace.TRACE_FILE_NAME) for d in out_dirs]
+        self.assertEqual(len(build_trace.load_events(traces)), 4)
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertEqual(build_trace.main(['summary'] + traces), 0)
+        self.assertIn("biber x1, pdflatex x2", output.getvalue())
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
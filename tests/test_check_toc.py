@@ -0,0 +1,116 @@
+import io
+import os
+import sys
+import unittest
+from contextlib import redirect_stdout
+
+import pytest
+
+import check_toc
+
+MAIN = r"""\documentclass{apa7}
+\begin{document}
+\tableofcontents
+\subfile{sections/01_intro}
+\section*{Unnumbered}
+\listoffigures
+\listoftables
+\printbibliography[title={Quellenverzeichnis}, heading=bibintoc]
+\end{document}
+"""
+
+INTRO = r"""\documentclass[../main.tex]{subfiles}
+\begin{document}
+\section{Einleitung}\label{sec:intro}
+\subsection[Technology Acceptance Model]{Technology Acceptance Model \parencite{davis_1989}}
+Text \textcite{baroni_2022}. % \cite{commented_out}
+\begin{figure}
+\begin{subfigure}{0.5\textwidth}\caption{Links}\end{subfigure}
+\caption{Modell}\label{fig:model}
+\end{figure}
+\subsubsection{Hypothesenübersicht}
+\begin{table}\caption{Hypothesen}\end{table}
+\end{document}
+"""
+
+ARTIFACTS = {
+    'main.toc': "\\babel@toc {ngerman}{}\\relax \n"
+                "\\contentsline {section}{\\numberline {1}Einleitung}{2}{section.1}%\n"
+                "\\contentsline {subsection}{\\numberline {1.1}Technology Acceptance Model}{2}{subsection.1.1}%\n"
+                "\\contentsline {subsubsection}{\\numberline {1.1.1}Hypothesen\\IeC {\\\"u}bersicht}{3}{x}%\n"
+                "\\contentsline {section}{Quellenverzeichnis}{4}{section*.3}%\n",
+    'main.lof': "\\contentsline {figure}{\\numberline {1}{\\ignorespaces Modell}}{2}{figure.1}%\n"
+                "\\contentsline {subfigure}{\\numberline {(a)}{\\ignorespaces Links}}{2}{x}%\n",
+    'main.lot': "\\contentsline {table}{\\numberline {1}{\\ignorespaces Hypothesen}}{3}{table.1}%\n",
+    'main.aux': "\\newlabel{sec:intro}{{1}{2}{Einleitung}{section.1}{}}\n"
+                "\\newlabel{fig:model}{{1}{2}{Modell}{figure.1}{}}\n",
+    'main.bbl': "\\refsection{0}\n  \\entry{davis_1989}{article}{}\n  \\endentry\n"
+                "  \\entry{baroni_2022}{article}{}\n  \\endentry\n\\endrefsection\n",
+}
+
+
+@pytest.mark.usefixtures('tree')
+class TestCheckToc(unittest.TestCase):
+
+    def setUp(self):
+        self.main = self.tree.write('prestudy/main.tex', MAIN)
+        self.tree.write('prestudy/sections/01_intro.tex', INTRO)
+        self.outdir = os.path.join(self.tree.root, 'prestudy', 'build', 'main')
+        for name, content in ARTIFACTS.items():
+            self.tree.write(os.path.join('prestudy', 'build', 'main', name), content)
+
+    def messages(self):
+        return [(p.severity, p.artifact, p.message) for p in check_toc.check_document(self.main).problems]
+
+    def test_expected_contents(self):
+        expected = check_toc.expected_contents(check_toc.document_body(self.main, os.path.dirname(self.main)))
+        self.assertEqual(expected['toc'], [('section', 'einleitung'), ('subsection', 'technologyacceptancemodel'),
+                                           ('subsubsection', 'hypothesenübersicht'),
+                                           ('section', 'quellenverzeichnis')])
+        self.assertEqual((expected['lof'], expected['lot']), (1, 1))
+        self.assertEqual(expected['citations'], {'davis_1989', 'baroni_2022'})
+        self.assertEqual(expected['labels'], {'sec:intro', 'fig:model'})
+
+    def test_matching_artifacts(self):
+        report = check_toc.check_document(self.main)
+        self.assertEqual(report.problems, [])
+        self.assertEqual(report.outdir, self.outdir)
+        self.assertEqual(report.counts['toc'], 4)
+
+    def test_mismatches(self):
+        self.tree.write('prestudy/sections/01_intro.tex', INTRO.replace('Einleitung', 'Ausgangslage')
+                   .replace('\\caption{Hypothesen}', '\\caption{Hypothesen}\\caption{Noch eine}')
+                   .replace('baroni_2022', 'baroni_2022, hoffman_2019'))
+        self.assertEqual(self.messages(), [
+            ('error', 'toc', "no section entry for 'ausgangslage'"),
+            ('warning', 'toc', "section entry 'einleitung' has no heading in the sources"),
+            ('error', 'lot', "1 table entries, the sources caption 2"),
+            ('error', 'bbl', "no entry for cited key 'hoffman_2019'"),
+        ])
+        os.remove(os.path.join(self.outdir, 'main.lof'))
+        self.assertIn(('error', 'lof', "not found although the document typesets it"), self.messages())
+        os.remove(os.path.join(self.outdir, 'main.aux'))
+        self.assertEqual(self.messages(), [('error', 'aux', "not found, the document has not been built")])
+
+    def test_tocdepth(self):
+        """Headings deeper than the tocdepth of the main file have no .toc entry."""
+        self.tree.write('prestudy/sections/01_intro.tex',
+                        INTRO.replace('\\end{document}', '\\paragraph{Details}\n\\end{document}'))
+        self.assertEqual(self.messages(), [])
+        self.tree.write('prestudy/main.tex', MAIN.replace('\\begin{document}',
+                                                          '\\setcounter{tocdepth}{1}\n\\begin{document}'))
+        self.assertEqual(check_toc.toc_depth(self.main), 1)
+        self.assertEqual(self.messages(), [])
+        self.tree.write('prestudy/build/main/main.toc', "\\contentsline {section}{Quellenverzeichnis}{4}{x}%\n")
+        self.assertEqual(self.messages(), [('error', 'toc', "no section entry for 'einleitung'")])
+
+    def test_strict_exit_code(self):
+        self.tree.write('prestudy/build/main/main.bbl', '')
+        with redirect_stdout(io.StringIO()) as output:
+            self.assertEqual(check_toc.main([os.path.dirname(self.main), '--jobs', '2']), 0)
+            self.assertEqual(check_toc.main([self.main, '--strict']), 1)
+        self.assertIn("error: bbl: has no entries", output.getvalue())
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
@@ -0,0 +1,177 @@
+import json
+import os
+import sys
+import unittest
+
+import pytest
+
+import compile_content
+from compile_content import Citations, Converter, slugify, split_sections
+
+MAIN = r"""\documentclass{article}
+\begin{document}
+\tableofcontents
+\subfile{sections/01_einleitung}
+\subfile{sections/02_methode}
+\printbibliography[heading=bibnumbered, title={Literaturverzeichnis}]
+\end{document}
+"""
+
+INTRO = r"""\documentclass[../main.tex]{subfiles}
+\begin{document}
+\section{Einleitung}
+Vertrauen in KI ist zentral \parencite{davis_perceived_1989}. % Kommentar
+
+\subsection{Ausgangslage}
+\textcite{li_trust_2020} zeigen \textbf{erste} Befunde, siehe Tabelle~\ref{tab:plan}.
+
+\begin{table}[H]
+\caption{Plan}
+\label{tab:plan}
+\begin{tabular}{l r}
+\toprule
+Phase & Wochen \\
+\midrule
+Analyse & 4 \\
+\bottomrule
+\end{tabular}
+\end{table}
+\end{document}
+"""
+
+METHOD = r"""\documentclass[../main.tex]{subfiles}
+\begin{document}
+\section{Methode}
+\begin{itemize}
+    \item Online-Experiment
+    \item Umfrage \parencite{unknown_2024}
+\end{itemize}
+\end{document}
+"""
+
+REFERENCES = {
+    'davis_perceived_1989': {'id': 'davis_perceived_1989', 'authors': ['Davis, Fred D.'], 'year': 1989,
+                             'title': 'Perceived Usefulness', 'type': 'article', 'journal': 'MIS Quarterly'},
+    'li_trust_2020': {'id': 'li_trust_2020', 'authors': ['Li, Mengyao', 'Huang, Lin'], 'year': 2020,
+                      'title': 'Trust in AI', 'type': 'article'},
+}
+
+
+class TestConverter(unittest.TestCase):
+
+    def setUp(self):
+        self.converter = Converter(Citations(REFERENCES), {'fig:a': '2'})
+
+    def test_inline(self):
+        self.assertEqual(self.converter.inline(r"\textit{AI} \& Trust -- 50\% ``so''~\ref{fig:a}"),
+                         "<em>AI</em> &amp; Trust \u2013 50% \u201cso\u201d\u00a02")
+
+    def test_citations(self):
+        self.assertEqual(self.converter.inline(r"\parencite[S.~3]{li_trust_2020}"),
+                         '(<cite data-ref="li_trust_2020">Li &amp; Huang, 2020</cite>, S.\u00a03)')
+        self.assertEqual(self.converter.inline(r"\textcite{davis_perceived_1989}"),
+                         '<cite data-ref="davis_perceived_1989">Davis (1989)</cite>')
+        self.converter.inline(r"\cite{missing}")
+        self.assertEqual(self.converter.citations.unresolved, ['missing'])
+
+    def test_blocks(self):
+        html = self.converter.blocks("Erster Absatz.\n\n\\begin{enumerate}\\item A \\item B\\end{enumerate}")
+        self.assertEqual(html, "<p>Erster Absatz.</p>\n<ol><li>A</li><li>B</li></ol>")
+
+    def test_figures(self):
+        figure = "\\begin{figure}[H]\\includegraphics[width=\\textwidth]{tam.jpg}\\caption{TAM}\\label{fig:a}\\end{figure}"
+        self.assertEqual(self.converter.blocks(figure), '<figure><img src="/images/tam.jpg" alt="TAM" loading="lazy">'
+                                                        '<figcaption><strong>Abbildung 2</strong> TAM</figcaption></figure>')
+        # With variants from image_assets.py the figure gets a responsive <picture>
+        self.converter.images = {'tam.jpg': {
+            'src': '/assets/tam-1a2b-960.jpg', 'width': 1200, 'height': 800,
+            'srcset': {'image/webp': '/assets/tam-3c4d-960.webp 960w', 'image/jpeg': '/assets/tam-1a2b-960.jpg 960w'}}}
+        self.assertIn('<picture><source type="image/webp" srcset="/assets/tam-3c4d-960.webp 960w" sizes="',
+                      self.converter.blocks(figure))
+        self.assertIn('<img src="/assets/tam-1a2b-960.jpg" srcset="/assets/tam-1a2b-960.jpg 960w"',
+                      self.converter.blocks(figure))
+
+    def test_slugify_and_sections(self):
+        self.assertEqual(slugify("Theoretische Einbettung & Überblick"), "theoretische-einbettung-ueberblick")
+        sections = split_sections("\\section{A}\nx\n\\subsection*{B}\ny\n\\section[Kurz]{Lang}\nz")
+        self.assertEqual([(s['title'], len(s['subsections'])) for s in sections], [('A', 1), ('Kurz', 0)])
+        self.assertFalse(sections[0]['subsections'][0]['numbered'])
+
+
+@pytest.mark.usefixtures('tree')
+class TestCompileDocument(unittest.TestCase):
+
+    def setUp(self):
+        self.main = self.tree.write('main.tex', MAIN)
+        self.tree.write('sections/01_einleitung.tex', INTRO)
+        self.tree.write('sections/02_methode.tex', METHOD)
+        self.output = os.path.join(self.tree.root, 'out')
+        self.cache_file = os.path.join(self.tree.root, 'cache.json')
+
+    def compile(self):
+        return compile_content.compile_document(self.main, self.output, self.cache_file, REFERENCES, images={})
+
+    def load(self, name):
+        with open(os.path.join(self.output, name), encoding='utf-8') as f:
+            return json.load(f)
+
+    def test_glossary_terms_get_anchor_ids(self):
+        """Every glossary row becomes a term with a unique anchor id and its cells as HTML."""
+        glossary = self.tree.write('glossar.tex', "\\begin{tabularx}{\\textwidth}{l X}\n\\toprule\n"
+                                   "\\textbf{Abkürzung} & \\textbf{Begriff} \\\\\n\\midrule\n"
+                                   "AI-TAM & \\textit{AI} Technology Acceptance Model \\\\\n"
+                                   "AI TAM & Doppelt \\\\\n\\bottomrule\n\\end{tabularx}\n")
+        self.assertEqual(compile_content.compile_glossary(glossary), {
+            'columns': ['Abkürzung', 'Begriff'],
+            'terms': [{'id': 'ai-tam', 'term': 'AI-TAM', 'cells': ['<em>AI</em> Technology Acceptance Model']},
+                      {'id': 'ai-tam-2', 'term': 'AI TAM', 'cells': ['Doppelt']}],
+        })
+
+    def test_sections_are_written_as_chunks(self):
+        report = self.compile()
+        self.assertEqual(sorted(os.listdir(self.output)),
+                         ['einleitung.json', 'index.json', 'literaturverzeichnis.json', 'methode.json'])
+        self.assertEqual(report['unresolved'], ['unknown_2024'])
+
+        index = self.load('index.json')
+        self.assertEqual([(s['id'], s['number']) for s in index['sections']],
+                         [('einleitung', '1'), ('methode', '2'), ('literaturverzeichnis', '3')])
+        self.assertEqual(index['sections'][0]['subsections'],
+                         [{'id': 'ausgangslage', 'number': '1.1', 'title': 'Ausgangslage'}])
+
+        intro = self.load('einleitung.json')
+        self.assertEqual(intro['citations'], ['davis_perceived_1989', 'li_trust_2020'])
+        self.assertGreater(intro['wordCount'], 0)
+        self.assertNotIn('Kommentar', intro['content'])
+        table = intro['subsections'][0]['content']
+        self.assertIn('siehe Tabelle\u00a01', table)
+        self.assertIn('<figcaption><strong>Tabelle 1</strong> Plan</figcaption>', table)
+        self.assertIn('<thead><tr><th>Phase</th><th>Wochen</th></tr></thead>', table)
+        self.assertNotIn('[H]', table)
+
+        bibliography = self.load('literaturverzeichnis.json')['content']
+        self.assertEqual(bibliography.count('<li '), 2)
+
+    def test_only_edited_sections_are_recompiled(self):
+        self.compile()
+        report = self.compile()
+        self.assertEqual((report['compiled'], report['written']), ([], []))
+
+        self.tree.write('sections/02_methode.tex', METHOD.replace('Umfrage', 'Befragung'))
+        report = self.compile()
+        self.assertEqual(report['compiled'], ['methode'])
+        self.assertIn('Befragung', self.load('methode.json')['content'])
+        # Unresolved citations of cached sections are still reported
+        self.assertEqual(report['unresolved'], ['unknown_2024'])
+
+    def test_removed_sections_are_deleted(self):
+        self.compile()
+        self.tree.write('main.tex', MAIN.replace('\\subfile{sections/02_methode}\n', ''))
+        report = self.compile()
+        self.assertEqual(report['removed'], [os.path.join(self.output, 'methode.json')])
+        self.assertFalse(os.path.exists(os.path.join(self.output, 'methode.json')))
+        self.assertEqual(self.load('literaturverzeichnis.json')['number'], '2')
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
@@ -0,0 +1,112 @@
+import json
+import os
+import sys
+import unittest
+
+import pytest
+
+import export_references
+from export_references import convert_entry, latex_to_text, split_authors
+from bib_reader import BibEntry
+
+BIB = """@article{davis_perceived_1989,
+\ttitle = {Perceived {Usefulness}, {Perceived} {Ease} of {Use}},
+\tvolume = {13},
+\tjournal = {MIS Quarterly},
+\tauthor = {Davis, Fred D.},
+\tnumber = {3},
+\tpages = {319--340},
+\tyear = {1989},
+}
+
+@incollection{kelle_mixed_2022,
+\ttitle = {Mixed {Methods}},
+\tbooktitle = {Handbuch {Methoden} der empirischen {Sozialforschung}},
+\tpublisher = {Springer Fachmedien Wiesbaden},
+\tauthor = {Kelle, Udo},
+\tyear = {2022},
+}
+"""
+
+LOCAL_BIB = """@misc{liip_2025,
+  title  = {Liip AG},
+  author = {{Liip}},
+  year   = {2025},
+  url    = {https://www.liip.ch}
+}
+"""
+
+
+@pytest.mark.usefixtures('tree')
+class TestExportReferences(unittest.TestCase):
+
+    def setUp(self):
+        self.bib = self.tree.write('bibliography.bib', BIB)
+        self.local_bib = self.tree.write('local.bib', LOCAL_BIB)
+        self.output = os.path.join(self.tree.root, 'references.json')
+        self.cache_file = os.path.join(self.tree.root, 'cache.json')
+
+    def export(self, compact_dir=None):
+        return export_references.export_references(self.bib, self.local_bib, self.output, compact_dir,
+                                                   cache_file=self.cache_file)
+
+    def test_latex_is_converted_to_text(self):
+        self.assertEqual(latex_to_text("{AI} \\& {Society}"), "AI & Society")
+        self.assertEqual(latex_to_text("J{\\\"o}reskog and \\'{E}mile"), "Jöreskog and Émile")
+        self.assertEqual(latex_to_text("\\textit{Trust}  in {AI}"), "Trust in AI")
+        self.assertEqual(split_authors("{Kanton Basel-Stadt and Liip} and Kelle, Udo"),
+                         ["Kanton Basel-Stadt and Liip", "Kelle, Udo"])
+
+    def test_schema(self):
+        entry = BibEntry('incollection', 'k', {'title': '{A} {Title}', 'booktitle': 'Book', 'date': '2021-05-01'})
+        self.assertEqual(convert_entry(entry), {'id': 'k', 'authors': ['Unknown'], 'year': 2021, 'title': 'A Title',
+                                                'type': 'book', 'booktitle': 'Book'})
+        self.assertEqual(convert_entry(BibEntry('online', 'w', {}))['type'], 'web')
+
+    def test_exports_bibliography_and_local_entries(self):
+        report = self.export()
+        with open(self.output, encoding='utf-8') as f:
+            references = json.load(f)
+        self.assertEqual([r['id'] for r in references], ['davis_perceived_1989', 'kelle_mixed_2022', 'liip_2025'])
+        self.assertEqual(references[0], {
+            'id': 'davis_perceived_1989', 'authors': ['Davis, Fred D.'], 'year': 1989,
+            'title': 'Perceived Usefulness, Perceived Ease of Use', 'type': 'article', 'journal': 'MIS Quarterly',
+            'volume': '13', 'issue': '3', 'pages': '319--340'})
+        self.assertEqual(references[2]['authors'], ['Liip'])
+        self.assertEqual(report['converted'], 3)
+
+    def test_incremental_and_byte_stable(self):
+        self.export()
+        os.utime(self.output, ns=(0, 0))
+        report = self.export()
+        self.assertEqual((report['converted'], report['written']), (0, []))
+        self.assertEqual(os.stat(self.output).st_mtime_ns, 0)
+
+        self.tree.write('bibliography.bib', BIB.replace('{1989}', '{1990}'))
+        report = self.export()
+        self.assertEqual(report['converted'], 1)
+        self.assertEqual(report['written'], [self.output])
+        with open(self.output, encoding='utf-8') as f:
+            content = f.read()
+        # The assembled file is identical to a plain dump of all references
+        self.assertEqual(content, json.dumps(json.loads(content), ensure_ascii=False, indent=2) + "\n")
+
+    def test_compact_shards(self):
+        compact_dir = os.path.join(self.tree.root, 'compact')
+        self.export(compact_dir)
+        self.assertEqual(sorted(os.listdir(compact_dir)),
+                         ['index.json', 'references.min.json', 'shard-d.json', 'shard-k.json', 'shard-l.json'])
+        with open(os.path.join(compact_dir, 'index.json'), encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['shards'], {'d': 1, 'k': 1, 'l': 1})
+        with open(os.path.join(compact_dir, 'references.min.json'), encoding='utf-8') as f:
+            self.assertNotIn('\n', f.read().rstrip('\n'))
+
+        # Shards of removed entries are deleted
+        self.tree.write('local.bib', '')
+        report = self.export(compact_dir)
+        self.assertIn(os.path.join(compact_dir, 'shard-l.json'), report['written'])
+        self.assertFalse(os.path.exists(os.path.join(compact_dir, 'shard-l.json')))
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
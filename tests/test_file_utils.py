@@ -0,0 +1,62 @@
+import os
+import stat
+import sys
+import threading
+import unittest
+
+import pytest
+
+import file_utils
+
+
+@pytest.mark.usefixtures('tree')
+class TestAtomicWrite(unittest.TestCase):
+
+    def setUp(self):
+        self.path = self.tree.path('cache.json')
+
+    def test_concurrent_writers_do_not_share_a_temporary_file(self):
+        """Every writer installs a complete file of its own; no temporary files are left behind."""
+        errors = []
+
+        def writer(index):
+            try:
+                for _ in range(50):
+                    with file_utils.atomic_write(self.path) as f:
+                        f.write(str(index) * 1000)
+            except OSError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=writer, args=(index,)) for index in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        with open(self.path, encoding='utf-8') as f:
+            content = f.read()
+        self.assertIn(content, [str(index) * 1000 for index in range(4)])
+        self.assertEqual(os.listdir(self.tree.root), ['cache.json'])
+
+    def test_failed_write_keeps_the_old_file(self):
+        """An exception inside the block removes the temporary file and leaves `path` untouched."""
+        with file_utils.atomic_write(self.path) as f:
+            f.write('old')
+        with self.assertRaises(ValueError):
+            with file_utils.atomic_write(self.path) as f:
+                f.write('new')
+                raise ValueError
+        with open(self.path, encoding='utf-8') as f:
+            self.assertEqual(f.read(), 'old')
+        self.assertEqual(os.listdir(self.tree.root), ['cache.json'])
+
+    @unittest.skipIf(os.name == 'nt', "POSIX permissions")
+    def test_permissions_follow_the_umask(self):
+        """Written files are not restricted to the owner like mkstemp's files."""
+        with file_utils.atomic_write(self.path) as f:
+            f.write('x')
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o666 & ~file_utils._UMASK)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
@@ -0,0 +1,50 @@
+import os
+import sys
+import unittest
+
+import pytest
+
+from generate_item_tables import generate_latex_tables
+
+CSV_HEADER = "Construct,Item_Original,Item_Adapted,Scaling,Source\n"
+
+
+@pytest.mark.usefixtures('tree')
+class TestGenerateItemTables(unittest.TestCase):
+
+    def setUp(self):
+        self.csv_path = self.tree.path('items.csv')
+        self.output_dir = self.tree.path('tables')
+        self.write_csv("PUF,Original,Adapted,1-5 Likert-Skala,Davis (1989)\n"
+                       "EOU,Original,Adapted,1-5 Likert-Skala,Davis (1989)\n")
+
+    def write_csv(self, rows):
+        with open(self.csv_path, 'w', encoding='utf-8') as f:
+            f.write(CSV_HEADER + rows)
+
+    def table(self, name):
+        return os.path.join(self.output_dir, f"table_{name}.tex")
+
+    def test_unchanged_tables_are_not_rewritten(self):
+        """A second run with the same CSV writes nothing and keeps the mtimes."""
+        report = generate_latex_tables(self.csv_path, self.output_dir)
+        self.assertEqual(len(report['written']), 3)
+        os.utime(self.table('PUF'), ns=(0, 0))
+
+        report = generate_latex_tables(self.csv_path, self.output_dir)
+        self.assertEqual(report['written'], [])
+        self.assertEqual(os.stat(self.table('PUF')).st_mtime_ns, 0)
+
+    def test_changed_and_stale_tables(self):
+        """Only tables whose rows changed are written; removed constructs are deleted."""
+        generate_latex_tables(self.csv_path, self.output_dir)
+        self.write_csv("PUF,Original,Neu formuliert,1-5 Likert-Skala,Davis (1989)\n")
+
+        report = generate_latex_tables(self.csv_path, self.output_dir)
+        self.assertEqual(sorted(report['written']), sorted([self.table('PUF'), self.table('master')]))
+        self.assertEqual(report['removed'], [self.table('EOU')])
+        self.assertFalse(os.path.exists(self.table('EOU')))
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
@@ -0,0 +1,117 @@
+import json
+import os
+import sys
+import unittest
+
+import pytest
+
+import generate_results_tables
+from generate_results_tables import format_number, format_p, generate_results_tables as generate
+
+SURVEY = {
+    'respondents': 120,
+    'constructs': {
+        'PUF': {'items': ['PUF_1', 'PUF_2'], 'n_complete': 118, 'item_mean': [3.5, 3.25], 'item_sd': [1.0, 0.9],
+                'alpha': 0.84, 'alpha_if_deleted': [0.8, 0.79], 'item_total': [0.7, 0.72],
+                'score': {'n': 120, 'mean': 3.4, 'sd': 0.8, 'skewness': -0.3}},
+        'FAM-TEC': {'items': ['FAM-TEC_1'], 'n_complete': 120, 'item_mean': [2.0], 'item_sd': [1.1],
+                    'alpha': None, 'alpha_if_deleted': None, 'item_total': None,
+                    'score': {'n': 120, 'mean': 2.0, 'sd': 1.1, 'skewness': 0.2}},
+    },
+    'correlations': {'constructs': ['PUF', 'FAM-TEC'], 'n_complete': 118, 'matrix': [[1.0, -0.25], [-0.25, 1.0]]},
+}
+
+
+@pytest.mark.usefixtures('tree')
+class TestGenerateResultsTables(unittest.TestCase):
+
+    def setUp(self):
+        self.results_dir = self.tree.path('results')
+        self.output_dir = self.tree.path('tables')
+        self.cache_file = self.tree.path('cache.json')
+        os.makedirs(self.results_dir)
+        self.write_input('survey.json', SURVEY)
+
+    def write_input(self, name, data):
+        with open(os.path.join(self.results_dir, name), 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+
+    def run_generator(self, **kwargs):
+        return generate(self.results_dir, self.output_dir, cache_file=self.cache_file, **kwargs)
+
+    def read(self, table):
+        with open(os.path.join(self.output_dir, table), encoding='utf-8') as f:
+            return f.read()
+
+    def test_apa_number_format(self):
+        self.assertEqual(format_number(0.456, leading_zero=False), ".46")
+        self.assertEqual(format_number(-0.25, leading_zero=False), "$-$.25")
+        self.assertEqual(format_number(-0.001), "0.00")
+        self.assertEqual(format_number(3.0), "3.00")
+        self.assertEqual(format_number(None), "--")
+        self.assertEqual(format_p(0.0001), "< .001")
+        self.assertEqual(format_p(0.042), ".042")
+
+    def test_renders_survey_tables(self):
+        report = self.run_generator()
+        self.assertEqual(len(report['written']), 3)
+        self.assertEqual(len(report['missing']), 2)
+        correlations = self.read('results_correlations.tex')
+        self.assertIn("\\begin{threeparttable}", correlations)
+        self.assertIn("2. FAM-TEC & 2.00 & 1.10 & $-$.25 \\\\", correlations)
+        self.assertIn("PUF & 2 & 120 & 3.40 & 0.80 & $-$0.30 & .84 \\\\", self.read('results_descriptives.tex'))
+        self.assertIn(" & PUF\\_2 & 3.25 & 0.90 & .72 & .79 \\\\", self.read('results_reliability.tex'))
+
+    def test_only_changed_inputs_are_rendered(self):
+        self.run_generator()
+        self.write_input('fit.json', {'Structural model': {'chi2': 250.5, 'df': 180, 'p': 0.0004, 'cfi': 0.95,
+                                                           'tli': 0.94, 'rmsea': 0.05, 'srmr': 0.06}})
+        report = self.run_generator()
+        self.assertEqual([os.path.basename(f) for f in report['written']], ['results_fit.tex'])
+        self.assertEqual(len(report['cached']), 3)
+        self.assertIn("Structural model & 250.50 & 180 & < .001 & .950", self.read('results_fit.tex'))
+
+        # Different parameters invalidate every table, identical output is not rewritten
+        report = self.run_generator(decimals=2, force=True)
+        self.assertEqual(len(report['unchanged']), 4)
+        report = self.run_generator(decimals=3)
+        self.assertEqual(len(report['written']), 4)
+
+    def test_edited_table_is_rendered_again(self):
+        self.run_generator()
+        path = os.path.join(self.output_dir, 'results_descriptives.tex')
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write("% edited by hand\n")
+        report = self.run_generator()
+        self.assertEqual(report['written'], [path])
+        self.assertNotIn("edited by hand", self.read('results_descriptives.tex'))
+
+    def test_table_without_input_is_removed(self):
+        """A table whose analysis output was deleted is removed instead of going stale."""
+        self.run_generator()
+        path = os.path.join(self.output_dir, 'results_descriptives.tex')
+        self.assertIn("\\textit{Skew}", self.read('results_descriptives.tex'))
+        os.remove(os.path.join(self.results_dir, 'survey.json'))
+        report = self.run_generator()
+        self.assertIn(path, report['removed'])
+        self.assertEqual(len(report['removed']), 3)
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(self.run_generator()['removed'], [])
+
+    def test_power_table(self):
+        self.write_input('power.json', {'hypotheses': ['H1a', 'H9'], 'power': {'120': [0.9, 0.5], '60': [0.6, 0.2]},
+                                        'required': {'H1a': 120, 'H9': None}, 'target': 0.8, 'alpha': 0.05})
+        self.run_generator()
+        table = self.read('results_power.tex')
+        self.assertLess(table.index("60 & .60 & .20"), table.index("120 & .90 & .50"))
+        self.assertIn("80\\% power: H1a 120, H9 --.", table)
+
+    def test_cli_reports_invalid_input(self):
+        # The error is reported before anything is rendered or cached
+        self.write_input('survey.json', {'respondents': 3, 'constructs': {}})
+        self.assertEqual(generate_results_tables.main(['--results-dir', self.results_dir,
+                                                       '--output-dir', self.output_dir, '--force']), 1)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
@@ -0,0 +1,105 @@
+import json
+import os
+import shutil
+import sys
+import unittest
+from unittest import mock
+
+import pytest
+
+import image_assets
+
+try:
+    from PIL import Image
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+
+
+@pytest.mark.usefixtures('tree')
+@unittest.skipUnless(HAS_PIL, "Pillow not installed")
+class TestImageAssets(unittest.TestCase):
+
+    def setUp(self):
+        self.images = os.path.join(self.tree.root, 'images')
+        self.print_dir = os.path.join(self.tree.root, 'print')
+        self.web_dir = os.path.join(self.tree.root, 'web')
+        os.makedirs(os.path.join(self.images, 'design'))
+        self.make_image('ba_faryf_ai_tam.jpg', (3000, 2000), 'navy')
+        self.make_image('design/logo.png', (600, 300), 'red')
+
+    def make_image(self, name, size, color):
+        Image.new('RGB', size, color).save(os.path.join(self.images, name))
+
+    def build(self):
+        return image_assets.build_assets(self.images, os.path.join(self.tree.root, 'cache'), self.print_dir,
+                                         self.web_dir, jobs=2)
+
+    def manifest(self):
+        with open(os.path.join(self.web_dir, 'images.json'), encoding='utf-8') as f:
+            return json.load(f)
+
+    def test_transforms(self):
+        widths = [s['width'] for s in image_assets.transforms('jpeg', [3000, 2000]) if s['format'] == 'webp']
+        self.assertEqual(widths, [480, 960, 1600])
+        # Small images are not upscaled but still get their own width
+        widths = [s['width'] for s in image_assets.transforms('png', [600, 300]) if s['format'] == 'jpeg']
+        self.assertEqual(widths, [480, 600])
+        spec = {'target': 'web', 'format': 'webp', 'width': 480, 'quality': 78}
+        self.assertNotEqual(image_assets.variant_key('a', spec), image_assets.variant_key('a', dict(spec, quality=60)))
+
+    def test_variants(self):
+        report = self.build()
+        self.assertEqual(len(report['rendered']), 1 + 6 + 1 + 4)
+        with Image.open(os.path.join(self.print_dir, 'ba_faryf_ai_tam.jpg')) as image:
+            self.assertEqual(image.size, (image_assets.PRINT_MAX_WIDTH, 1260))
+        self.assertTrue(os.path.exists(os.path.join(self.print_dir, 'design', 'logo.png')))
+
+        entry = self.manifest()['ba_faryf_ai_tam.jpg']
+        self.assertEqual((entry['width'], entry['height']), (3000, 2000))
+        self.assertRegex(entry['srcset']['image/webp'], r'^/assets/ba_faryf_ai_tam-[0-9a-f]{8}-480\.webp 480w, ')
+        self.assertTrue(entry['src'].endswith('-1600.jpg'))
+        with Image.open(os.path.join(self.web_dir, os.path.basename(entry['src']))) as image:
+            self.assertEqual(image.size, (1600, 1067))
+
+    def test_unchanged_images_are_not_rendered_again(self):
+        self.build()
+        report = self.build()
+        self.assertEqual((report['rendered'], report['published'], report['removed']), ([], [], []))
+
+        self.make_image('design/logo.png', (600, 300), 'green')
+        old_src = self.manifest()['design/logo.png']['src']
+        report = self.build()
+        self.assertEqual(len(report['rendered']), 5)
+        self.assertNotEqual(self.manifest()['design/logo.png']['src'], old_src)
+        # The old web variants and store entries of the logo are removed
+        self.assertFalse(os.path.exists(os.path.join(self.web_dir, os.path.basename(old_src))))
+        self.assertEqual(len(report['removed']), 4 + 5)
+
+        os.remove(os.path.join(self.images, 'design', 'logo.png'))
+        self.build()
+        self.assertEqual(list(self.manifest()), ['ba_faryf_ai_tam.jpg'])
+        self.assertFalse(os.path.exists(os.path.join(self.print_dir, 'design', 'logo.png')))
+
+    def test_variants_are_restored_from_the_build_store(self):
+        self.build()
+        # Another checkout: an empty variant store, but the shared build store has every variant
+        shutil.rmtree(os.path.join(self.tree.root, 'cache'))
+        report = self.build()
+        self.assertEqual((report['rendered'], len(report['restored'])), ([], 1 + 6 + 1 + 4))
+        self.assertEqual(len(self.manifest()), 2)
+
+
+@pytest.mark.usefixtures('tree')
+class TestWithoutPillow(unittest.TestCase):
+
+    def test_main_warns_and_succeeds(self):
+        images = self.tree.write('images/photo.jpg', '')
+        with mock.patch.object(image_assets, 'Image', None), \
+                mock.patch.object(image_assets, 'build_assets') as build_assets:
+            self.assertEqual(image_assets.main(['--images-dir', os.path.dirname(images)]), 0)
+        build_assets.assert_not_called()
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
@@ -0,0 +1,116 @@
+import sys
+import unittest
+
+import pytest
+
+import latex_log
+
+BBX = '/usr/local/texlive/2023/texmf-dist/tex/latex/biblatex-apa/apa-extended-bibliography-style.bbx'
+
+LOG = f"""This is pdfTeX, Version 3.141592653-2.6-1.40.25 (TeX Live 2023)
+(./main.tex
+LaTeX2e <2023-11-01>
+({BBX}
+) (./sections/01_intro.tex
+LaTeX Warning: Citation `mueller2020' on page 3 undefined on input line 12.
+
+Overfull \\hbox (12.3pt too wide) in paragraph at lines 20--22
+[]\\T1/phv/m/n/10 Text (with parens
+ []
+
+LaTeX Warning: Reference `fig:ai' on page 4 undefined on input line 30.
+
+) (./sections/02_method.tex
+./sections/02_method.tex:7: Undefined control sequence.
+l.7 \\foo
+
+)
+Package rerunfilecheck Warning: File `main.out' has changed.
+(rerunfilecheck)                Rerun to get outlines right
+(rerunfilecheck)                or use package `bookmark'.
+
+Package biblatex Warning: Please (re)run Biber on the file:
+(biblatex)                main
+(biblatex)                and rerun LaTeX afterwards.
+"""
+
+BLG = """[0] Config.pm:307> INFO - This is Biber 2.19
+[212] Biber.pm:4016> WARN - I didn't find a database entry for 'mueller2020' (section 0)
+[230] Utils.pm:411> WARN - BibTeX subsystem: /tmp/biber_tmp/bibliography.bib_1234.utf8, line 41, syntax error
+"""
+
+
+def wrapped(text, width=latex_log.MAX_PRINT_LINE):
+    """Breaks lines like TeX does in its log."""
+    lines = []
+    for line in text.split('\n'):
+        while len(line) > width:
+            lines.append(line[:width] + '\n')
+            line = line[width:]
+        lines.append(line + '\n')
+    return lines
+
+
+def wrapped_bytes(text, width=latex_log.MAX_PRINT_LINE):
+    """Breaks lines at `width` bytes of UTF-8, as pdflatex writes them."""
+    lines = []
+    for line in text.encode('utf-8').split(b'\n'):
+        while len(line) > width:
+            lines.append(line[:width] + b'\n')
+            line = line[width:]
+        lines.append(line + b'\n')
+    return lines
+
+
+class TestLatexLog(unittest.TestCase):
+
+    def test_unwrap(self):
+        self.assertGreater(len(BBX) + 1, latex_log.MAX_PRINT_LINE)
+        self.assertIn(f'({BBX}', list(latex_log.unwrap(wrapped(LOG))))
+
+    def test_unwrap_counts_bytes(self):
+        """Lines are joined at 79 bytes, even where TeX splits an umlaut between them."""
+        for line in ('ä' * 60, 'Ü' + 'x' * 80):
+            lines = wrapped_bytes(line)
+            self.assertEqual(len(lines), 2)
+            self.assertEqual(list(latex_log.unwrap(lines)), [line])
+
+    def test_parse_log_with_umlauts(self):
+        """An undefined citation with umlauts in its key keeps its source line."""
+        log = ("(./main.tex\nLaTeX Warning: Citation `müller_künstliche_2021' on page 3 undefined "
+               "on input line 42.\n)\n")
+        diagnostics = list(latex_log.parse_log(wrapped_bytes(log)))
+        self.assertEqual([(d.kind, d.file, d.line) for d in diagnostics],
+                         [('undefined-citation', 'main.tex', 42)])
+
+    def test_parse_log(self):
+        diagnostics = list(latex_log.parse_log(wrapped(LOG)))
+        found = [(d.severity, d.kind, d.file, d.line) for d in diagnostics]
+        self.assertEqual(found, [
+            ('warning', 'undefined-citation', 'sections/01_intro.tex', 12),
+            ('badbox', 'overfull', 'sections/01_intro.tex', 20),
+            ('warning', 'undefined-reference', 'sections/01_intro.tex', 30),
+            ('error', 'error', 'sections/02_method.tex', 7),
+            ('warning', 'rerun-latex', 'main.tex', None),
+            ('warning', 'rerun-biber', 'main.tex', None),
+        ])
+        self.assertEqual(diagnostics[4].message,
+                         "File `main.out' has changed. Rerun to get outlines right or use package `bookmark'.")
+
+    def test_parse_blg(self):
+        diagnostics = list(latex_log.parse_blg(BLG.splitlines(keepends=True)))
+        self.assertEqual([(d.kind, d.file, d.line) for d in diagnostics],
+                         [('missing-entry', None, None), ('biber', 'bibliography.bib', 41)])
+
+    def test_decide(self):
+        diagnostics = list(latex_log.parse_log(wrapped(LOG)))
+        decision = latex_log.decide(diagnostics)
+        self.assertEqual((decision.latex, decision.biber, len(decision.reasons)), (True, True, 2))
+        # Undefined references alone are not fixed by another pass
+        undefined = [d for d in diagnostics if d.kind.startswith('undefined')]
+        self.assertEqual(latex_log.decide(undefined), (False, False, []))
+        self.assertEqual(latex_log.decide(undefined, aux_changed=True).latex, True)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
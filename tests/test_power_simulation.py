@@ -0,0 +1,120 @@
+import io
+import json
+import sys
+import unittest
+from contextlib import redirect_stdout
+
+import pytest
+
+try:
+    import numpy as np
+    import power_simulation
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+
+@unittest.skipUnless(HAS_NUMPY, "numpy not installed")
+@pytest.mark.usefixtures('tree')
+class TestPowerSimulation(unittest.TestCase):
+
+    def setUp(self):
+        self.model = power_simulation.load_model()
+        self.counts = power_simulation.item_counts()
+
+    def test_item_counts_come_from_catalogue(self):
+        self.assertNotIn('Treatment Check', self.counts)
+        for name in ('XAIT', 'PUF', 'EOU', 'BI', 'CI', 'FAM-TEC'):
+            self.assertGreater(self.counts[name], 1)
+
+    def test_latent_constructs_are_standardized(self):
+        # Item responses are Likert categories, so check the implied latent variances directly
+        variances = power_simulation.residual_variances(self.model['paths'])
+        self.assertAlmostEqual(variances['CI'], 1 - 0.5 ** 2)
+        self.assertAlmostEqual(variances['EOU'], 1 - 0.3 ** 2)
+        with self.assertRaises(ValueError):
+            power_simulation.residual_variances({'BI': {'PUF': 0.9, 'EOU': 0.9}})
+        with self.assertRaises(ValueError):
+            power_simulation.structural_order({'BI': {'PUF': 0.3}, 'PUF': {'BI': 0.3}})
+
+    def test_simulated_scores_are_likert_means(self):
+        rng = np.random.default_rng(0)
+        scores = power_simulation.simulate_scores(rng, 3, 90, self.model, self.counts)
+        self.assertEqual(scores['BI'].shape, (3, 90))
+        self.assertTrue(np.all((scores['PUF'] >= 1) & (scores['PUF'] <= 5)))
+        self.assertEqual(scores['Dummy_Pos'][0].sum(), 30)
+
+    def test_estimates_recover_paths(self):
+        scores = power_simulation.simulate_scores(np.random.default_rng(1), 20, 3000, self.model, self.counts)
+        estimates = power_simulation.fit_paths(scores, self.model['paths'])
+        coefficient, t_value, df = estimates[('Dummy_Neg', 'XAIT')]
+        self.assertEqual(coefficient.shape, (20,))
+        self.assertEqual(df, 3000 - 3)
+        self.assertTrue(np.all(coefficient < 0) and np.all(t_value < -2))
+
+    def test_power_grows_with_sample_size(self):
+        result = power_simulation.simulate_power([60, 300], 400, self.model, self.counts, seed=3, workers=1,
+                                                 cache_dir=None)
+        self.assertEqual(result['hypotheses'][-1], 'H9')
+        small, large = np.array(result['power'][60]), np.array(result['power'][300])
+        self.assertTrue(np.all(large >= small))
+        self.assertGreater(large[result['hypotheses'].index('H7')], 0.95)
+        required = power_simulation.required_sizes(result, 0.8)
+        self.assertEqual(required['H7'], 60)
+
+    def test_null_effect_keeps_alpha(self):
+        model = power_simulation.load_model()
+        model['paths']['PUF']['FAM-TEC'] = 0.0
+        result = power_simulation.simulate_power([150], 1000, model, self.counts, seed=4, workers=1,
+                                                 cache_dir=None)
+        # One-sided share of a two-sided test at alpha = .05
+        self.assertLess(result['power'][150][result['hypotheses'].index('H8')], 0.05)
+
+    def test_cache_reuses_replications(self):
+        first = power_simulation.simulate_power([60, 120], 250, self.model, self.counts, seed=2, workers=1,
+                                                cache_dir=self.tree.root)
+        extended = power_simulation.simulate_power([60, 120, 180], 450, self.model, self.counts, seed=2,
+                                                   workers=2, cache_dir=self.tree.root)
+        self.assertEqual(first['simulated'], 500)
+        # The first chunk (200 replications) of n = 60 and 120 is reused
+        self.assertEqual(extended['simulated'], 3 * 450 - 2 * 200)
+        fresh = power_simulation.simulate_power([60, 120, 180], 450, self.model, self.counts, seed=2,
+                                                workers=1, cache_dir=None)
+        self.assertEqual(extended['power'], fresh['power'])
+
+    def test_cli_writes_json(self):
+        path = self.tree.path('power.json')
+        output = io.StringIO()
+        with redirect_stdout(output):
+            code = power_simulation.main(['--sizes', '60:120:60', '-r', '100', '-j', '1', '--no-cache',
+                                          '--json', path])
+        self.assertEqual(code, 0)
+        self.assertIn("n for 80% power", output.getvalue())
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        self.assertEqual(sorted(data['power']), ['120', '60'])
+        self.assertIn('H9', data['required'])
+
+    def test_invalid_model_files_are_rejected(self):
+        """Misspelled keys, unknown constructs and hypotheses without a path are reported with exit code 1."""
+        invalid = [
+            ({'path': {}}, "Unknown model keys: path"),
+            ({'paths': {'BI': {'PUFF': 0.3}}}, "paths.BI: unknown construct 'PUFF'"),
+            ({'paths': {'BI': {'PUF': '0.3'}}}, "paths.BI.PUF must be a number"),
+            ({'paths': {'BI': {'PUF': 0.4}}}, "hypotheses.H1a: the model has no path Dummy_Pos -> XAIT"),
+            ({'alpha': 5}, "'alpha' must be a number between 0 and 1"),
+        ]
+        path = self.tree.path('model.json')
+        for overrides, message in invalid:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(overrides, f)
+            with self.assertRaisesRegex(ValueError, message):
+                power_simulation.load_model(path, self.counts)
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertEqual(power_simulation.main(['--model', path, '-r', '10', '--no-cache']), 1)
+        self.assertIn("Error: 'alpha' must be", output.getvalue())
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
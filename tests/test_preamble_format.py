@@ -0,0 +1,114 @@
+import os
+import stat
+import sys
+import unittest
+from unittest import mock
+
+import pytest
+
+import preamble_format
+
+# Stand-in for pdflatex: -ini writes <jobname>.fmt into -output-directory and
+# counts the dumps; a pass without -fmt is slower than one with a format
+FAKE_PDFLATEX = """#!/bin/sh
+fmt=""
+for arg in "$@"; do
+    case $arg in
+        -ini) ini=1 ;;
+        -jobname=*) job="${arg#-jobname=}" ;;
+        -output-directory=*) outdir="${arg#-output-directory=}" ;;
+        -fmt=*) fmt="${arg#-fmt=}" ;;
+    esac
+done
+if [ -n "$ini" ]; then
+    echo dump >> "$outdir/dumps"
+    echo fmt > "$outdir/$job.fmt"
+elif [ -z "$fmt" ]; then
+    sleep 0.2
+fi
+"""
+
+FAKE_KPSEWHICH = """#!/bin/sh
+echo "$(dirname "$0")/$1"
+"""
+
+MAIN = r"""\documentclass{apa7}
+\usepackage{booktabs} % tables
+\csname endofdump\endcsname
+\title{Vorstudie}
+\begin{document}
+Text
+\end{document}
+"""
+
+
+@pytest.mark.usefixtures('tree')
+@unittest.skipIf(os.name == 'nt', "uses shell scripts as pdflatex/kpsewhich stand-ins")
+class TestPreambleFormat(unittest.TestCase):
+
+    def setUp(self):
+        bin_dir = os.path.join(self.tree.root, 'bin')
+        os.makedirs(bin_dir)
+        for name, script in (('pdflatex', FAKE_PDFLATEX), ('kpsewhich', FAKE_KPSEWHICH)):
+            self.tree.write(os.path.join('bin', name), script)
+            path = os.path.join(bin_dir, name)
+            os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+        self.tree.write('bin/pdflatex.fmt', 'base')
+        self.tree.write('bin/mylatexformat.ltx', '')
+        self.tree.write('lib/apa7/apa7.cls', '% apa7')
+        self.main = self.tree.write('prestudy/main.tex', MAIN)
+        self.outdir = os.path.join(self.tree.root, 'prestudy', 'build', 'main')
+        self.patches = [
+            mock.patch.dict(os.environ, {'PATH': bin_dir + os.pathsep + os.environ['PATH'], 'PREAMBLE_FORMAT': '1'}),
+            mock.patch.object(preamble_format, 'LIB_DIR', os.path.join(self.tree.root, 'lib')),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+
+    def dumps(self):
+        with open(os.path.join(self.outdir, 'dumps'), encoding='utf-8') as f:
+            return len(f.readlines())
+
+    def test_static_preamble(self):
+        """The format covers the preamble up to \\endofdump, without comments."""
+        self.assertEqual(preamble_format.static_preamble(self.main), "\\documentclass{apa7}\n\\usepackage{booktabs} \n")
+        self.tree.write('prestudy/main.tex', MAIN.replace('\\csname endofdump\\endcsname\n', ''))
+        self.assertIn('\\title{Vorstudie}', preamble_format.static_preamble(self.main))
+
+    def test_format_is_dumped_once_and_reused(self):
+        fmt = preamble_format.ensure_format(self.main, self.outdir)
+        self.assertTrue(fmt['dumped'])
+        self.assertEqual(fmt['path'], os.path.join(self.outdir, 'main-preamble.fmt'))
+        self.assertGreater(fmt['saved'], 0.1)
+        self.assertEqual(preamble_format.pdflatex_options(fmt), [f"-fmt={fmt['path']}"])
+
+        fmt = preamble_format.ensure_format(self.main, self.outdir)
+        self.assertFalse(fmt['dumped'])
+        # Changes after \endofdump and to comments are read on every pass anyway
+        self.tree.write('prestudy/main.tex', MAIN.replace('Vorstudie', 'Bachelorarbeit').replace('tables', 'Tabellen'))
+        self.assertFalse(preamble_format.ensure_format(self.main, self.outdir)['dumped'])
+        self.assertEqual(self.dumps(), 1)
+
+    def test_format_is_invalidated(self):
+        preamble_format.ensure_format(self.main, self.outdir)
+        self.tree.write('prestudy/main.tex', MAIN.replace('booktabs', 'tabularx'))
+        self.assertTrue(preamble_format.ensure_format(self.main, self.outdir)['dumped'])
+        self.tree.write('lib/apa7/apa7.cls', '% apa7 v2')
+        self.assertTrue(preamble_format.ensure_format(self.main, self.outdir)['dumped'])
+        self.tree.write('bin/pdflatex.fmt', 'updated base')
+        self.assertTrue(preamble_format.ensure_format(self.main, self.outdir)['dumped'])
+        self.assertEqual(self.dumps(), 4)
+
+    def test_disabled_or_unavailable(self):
+        with mock.patch.dict(os.environ, {'PREAMBLE_FORMAT': '0'}):
+            self.assertIsNone(preamble_format.ensure_format(self.main, self.outdir))
+        with mock.patch.object(preamble_format, 'kpsewhich', lambda name: None if name.endswith('.ltx') else 'x'):
+            self.assertIsNone(preamble_format.ensure_format(self.main, self.outdir))
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
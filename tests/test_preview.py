@@ -0,0 +1,105 @@
+import io
+import os
+import stat
+import sys
+import unittest
+from unittest import mock
+
+import pytest
+
+import preview
+
+# Stand-in for pdflatex: records the .aux it starts from, asks for biber like
+# biblatex while there is no .bbl and writes an .aux with only its own labels
+FAKE_PDFLATEX = """#!/bin/sh
+for arg in "$@"; do
+    case $arg in -output-directory=*) outdir="${arg#-output-directory=}" ;; esac
+    file=$arg
+done
+job=$(basename "${file%.tex}")
+head -n 1 "$outdir/$job.aux" >> "$outdir/passes"
+echo "(./$file" > "$outdir/$job.log"
+if [ ! -e "$outdir/$job.bbl" ]; then
+    echo "Package biblatex Warning: Please (re)run Biber on the file:" >> "$outdir/$job.log"
+    echo "(biblatex)                $job" >> "$outdir/$job.log"
+fi
+echo "LaTeX Warning: Label(s) may have changed. Rerun to get cross-references right." >> "$outdir/$job.log"
+echo ")" >> "$outdir/$job.log"
+echo '\\\\newlabel{sec:method}{{3}{5}}' > "$outdir/$job.aux"
+echo pdf > "$outdir/$job.pdf"
+"""
+
+FAKE_BIBER = """#!/bin/sh
+for arg in "$@"; do
+    case $arg in --output-directory=*) outdir="${arg#--output-directory=}" ;; esac
+    job=$arg
+done
+echo '\\\\entry{hoffman_2019}{article}{}' > "$outdir/$job.bbl"
+"""
+
+MAIN = r"""\documentclass{apa7}
+\usepackage{subfiles}
+\csname endofdump\endcsname
+\addbibresource{../resources/bibliography.bib}
+\begin{document}
+\subfile{sections/03_methodology}
+\end{document}
+"""
+
+SECTION = r"""\documentclass[../main.tex]{subfiles}
+\begin{document}
+\section{Methodik}\label{sec:method}
+Wie in Abschnitt~\ref{sec:theory} \parencite{davis_1989}.
+\end{document}
+"""
+
+
+@pytest.mark.usefixtures('tree')
+@unittest.skipIf(os.name == 'nt', "uses shell scripts as pdflatex/biber stand-ins")
+class TestPreview(unittest.TestCase):
+
+    def setUp(self):
+        bin_dir = os.path.join(self.tree.root, 'bin')
+        for name, script in (('pdflatex', FAKE_PDFLATEX), ('biber', FAKE_BIBER)):
+            path = self.tree.write(os.path.join('bin', name), script)
+            os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+        self.main = self.tree.write('prestudy/main.tex', MAIN)
+        self.section = self.tree.write('prestudy/sections/03_methodology.tex', SECTION)
+        self.tree.write('prestudy/build/main/main.aux', '\\newlabel{sec:theory}{{2}{3}}\n')
+        self.tree.write('prestudy/build/main/main.bbl', '\\refsection{0}\n  \\entry{davis_1989}{article}{}\n')
+        self.outdir = os.path.join(self.tree.root, 'prestudy', 'build', 'preview', '03_methodology')
+        self.patch = mock.patch.dict(os.environ, {'PATH': bin_dir + os.pathsep + os.environ['PATH'],
+                                                  'PREAMBLE_FORMAT': '0'})
+        self.patch.start()
+
+    def tearDown(self):
+        self.patch.stop()
+
+    def passes(self):
+        with open(os.path.join(self.outdir, 'passes'), encoding='utf-8') as f:
+            return f.read().splitlines()
+
+    def test_wrapper(self):
+        self.assertEqual(preview.parent_document(self.section), self.main)
+        source = preview.wrapper_source(self.section, self.main)
+        self.assertTrue(source.startswith(MAIN.split('\\begin{document}')[0]))
+        self.assertIn('\\subfile{sections/03_methodology}', source)
+
+    def test_single_pass_with_the_parent_bibliography(self):
+        result = preview.build_preview(self.section, log=io.StringIO())
+        self.assertEqual((result['exit_code'], result['passes'], result['biber']), (0, 1, False))
+        self.assertEqual(result['pdf'], os.path.join(self.outdir, '03_methodology.pdf'))
+        self.assertTrue(os.path.exists(result['pdf']))
+        # The pass started from the parent's labels
+        self.assertEqual(self.passes(), ['\\newlabel{sec:theory}{{2}{3}}'])
+
+    def test_new_citation_runs_biber(self):
+        self.tree.write('prestudy/sections/03_methodology.tex', SECTION.replace('davis_1989', 'hoffman_2019'))
+        result = preview.build_preview(self.section, log=io.StringIO())
+        self.assertEqual((result['exit_code'], result['passes'], result['biber']), (0, 2, True))
+        # Every pass gets the parent's labels again
+        self.assertEqual(self.passes(), ['\\newlabel{sec:theory}{{2}{3}}'] * 2)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
@@ -0,0 +1,46 @@
+import os
+import sys
+import unittest
+
+import pytest
+
+from project_index import build_index, parse_tex
+
+
+@pytest.mark.usefixtures('tree')
+class TestProjectIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.root = self.tree.root
+        self.cache_file = os.path.join(self.root, '.cache', 'project_index.json')
+        self.tree.write('content/prestudy/main.tex', '\\subfile{sections/01_intro}\n\\nocite{*}\n')
+        self.tree.write('content/prestudy/sections/01_intro.tex',
+                        'Vertrauen \\parencite[S.~3]{davis_1989, venkatesh_2000}.\\label{sec:intro}\n')
+
+    def test_parse_tex(self):
+        """Citations, includes and labels are extracted; \\nocite{*} is a flag, not a key."""
+        entry = parse_tex('\\subfile{sections/a}\\textcite{x,y} \\nocite{*} \\label{l} \\ref{l} % \\cite{z}')
+        self.assertEqual(entry['subfiles'], ['sections/a'])
+        self.assertIn('x', entry['citations'])
+        self.assertNotIn('*', entry['citations'])
+        self.assertTrue(entry['nocite_all'])
+        self.assertEqual(entry['labels'], ['l'])
+        self.assertEqual(entry['refs'], ['l'])
+
+    def test_rerun_only_parses_changed_files(self):
+        """A second run reuses the cache and re-parses only the modified file."""
+        index = build_index(self.root, self.cache_file, documents=('prestudy',))
+        self.assertEqual(index.parsed, 2)
+        self.assertEqual(index.citations(index.paths()), {'davis_1989', 'venkatesh_2000'})
+
+        index = build_index(self.root, self.cache_file, documents=('prestudy',))
+        self.assertEqual(index.parsed, 0)
+
+        self.tree.write('content/prestudy/sections/01_intro.tex', 'Neu \\cite{ajzen_1991}.\n')
+        index = build_index(self.root, self.cache_file, documents=('prestudy',))
+        self.assertEqual(index.parsed, 1)
+        self.assertEqual(index.citations(index.paths()), {'ajzen_1991'})
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
@@ -0,0 +1,109 @@
+import io
+import sys
+import unittest
+from contextlib import redirect_stdout
+
+import pytest
+
+try:
+    import numpy as np
+    import resampling
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+COLUMNS = ['Dummy_Pos', 'Dummy_Neg', 'XAIT', 'PUF', 'BI', 'Group']
+
+
+def make_data(n=240, seed=0):
+    """3-group framing design with Dummy_Pos -> XAIT -> PUF -> BI mediation."""
+    rng = np.random.default_rng(seed)
+    group = np.repeat([0, 1, 2], n // 3)
+    pos, neg = (group == 1) * 1.0, (group == 2) * 1.0
+    xait = 0.8 * pos - 0.4 * neg + rng.normal(size=n)
+    puf = 0.6 * xait + rng.normal(size=n)
+    bi = 0.5 * puf + 0.1 * xait + rng.normal(size=n)
+    return np.column_stack([pos, neg, xait, puf, bi, group])
+
+
+@unittest.skipUnless(HAS_NUMPY, "numpy not installed")
+@pytest.mark.usefixtures('tree')
+class TestResampling(unittest.TestCase):
+
+    def setUp(self):
+        self.data = make_data()
+        self.statistics = [
+            resampling.IndirectEffect(COLUMNS, ['Dummy_Pos', 'XAIT', 'PUF', 'BI'], ['Dummy_Neg']),
+            resampling.MeanDifference(COLUMNS, 'XAIT', 'Group', 1, 0),
+        ]
+
+    def test_indirect_effect_matches_separate_regressions(self):
+        pos, neg, xait, puf, bi, _group = self.data.T
+        ones = np.ones_like(pos)
+
+        def coefficients(target, *predictors):
+            return np.linalg.lstsq(np.column_stack((ones,) + predictors), target, rcond=None)[0]
+
+        expected = (coefficients(xait, pos, neg)[1] * coefficients(puf, pos, xait, neg)[2]
+                    * coefficients(bi, pos, xait, puf, neg)[3])
+        identity = np.arange(len(pos))[None, :]
+        self.assertAlmostEqual(self.statistics[0](self.data, identity)[0], expected, places=10)
+
+    def test_results_do_not_depend_on_worker_count(self):
+        single = resampling.resample(self.data, self.statistics, 700, batch_size=200, workers=1, seed=5)
+        pooled = resampling.resample(self.data, self.statistics, 700, batch_size=200, workers=2, seed=5)
+        self.assertEqual(single.values.shape, (700, 2))
+        np.testing.assert_array_equal(single.values, pooled.values)
+        other_seed = resampling.resample(self.data, self.statistics, 700, batch_size=200, workers=1, seed=6)
+        self.assertFalse(np.array_equal(single.values, other_seed.values))
+
+    def test_checkpoint_resumes_and_extends(self):
+        first = resampling.resample(self.data, self.statistics, 400, batch_size=100, workers=1, seed=2,
+                                    checkpoint_dir=self.tree.root)
+        extended = resampling.resample(self.data, self.statistics, 1000, batch_size=100, workers=1, seed=2,
+                                       checkpoint_dir=self.tree.root)
+        self.assertEqual((first.computed, extended.computed), (400, 600))
+        fresh = resampling.resample(self.data, self.statistics, 1000, batch_size=100, workers=1, seed=2)
+        np.testing.assert_array_equal(extended.values, fresh.values)
+
+        with self.assertRaises(ValueError):
+            resampling.resample(self.data, self.statistics, 1000, batch_size=100, workers=1, seed=3,
+                                checkpoint_dir=self.tree.root)
+
+    def test_stratified_bootstrap_keeps_cell_sizes(self):
+        strata = self.data[:, COLUMNS.index('Group')]
+        indices = resampling.index_matrix(np.random.default_rng(0), len(strata), 50, resampling.BOOTSTRAP, strata)
+        np.testing.assert_array_equal(strata[indices], np.broadcast_to(strata, indices.shape))
+
+    def test_bootstrap_interval_covers_effect(self):
+        result = resampling.resample(self.data, self.statistics, 2000, workers=1, seed=1)
+        lower, upper = resampling.bias_corrected_interval(result.values, result.estimate)
+        self.assertTrue(np.all(lower < result.estimate) and np.all(result.estimate < upper))
+        self.assertGreater(lower[0], 0)
+        self.assertGreater(result.throughput, 0)
+
+    def test_permutation_test(self):
+        permuted = [resampling.Permuted(statistic, ['Dummy_Pos', 'Dummy_Neg', 'Group'])
+                    for statistic in self.statistics]
+        result = resampling.resample(self.data, permuted, 500, method=resampling.PERMUTATION, workers=1, seed=1)
+        np.testing.assert_allclose(result.estimate, [s(self.data, np.arange(240)[None, :])[0]
+                                                     for s in self.statistics])
+        p_values = resampling.permutation_p_value(result.values, result.estimate)
+        self.assertTrue(np.all(p_values < 0.01))
+        # Under the null the permutation distribution centers on zero
+        self.assertLess(abs(result.values[:, 1].mean()), 0.1)
+
+    def test_cli_reads_scores_csv(self):
+        path = self.tree.path('scores.csv')
+        np.savetxt(path, self.data, delimiter=',', header=','.join(COLUMNS), comments='')
+        output = io.StringIO()
+        with redirect_stdout(output):
+            code = resampling.main(['bootstrap', path, '--indirect', 'Dummy_Pos>XAIT>BI', '-n', '300',
+                                    '-j', '1', '--strata', 'Group'])
+        self.assertEqual(code, 0)
+        self.assertIn("Dummy_Pos > XAIT > BI", output.getvalue())
+        self.assertIn("resamples/s", output.getvalue())
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
@@ -0,0 +1,112 @@
+import io
+import os
+import sys
+import unittest
+from contextlib import redirect_stdout
+
+import pytest
+
+import file_utils
+import sanitize_sources
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DIRTY_BIB = ('\ufeff@article{key,\n'
+             '\ttitle = {Vertrauen\u200b in KI\u200e},\n'
+             '\tnote = {S.\u00a012},\n'
+             '\tauthor = {Mu\u0308ller, A.},\n'
+             '}\n')
+CLEAN_BIB = ('@article{key,\n'
+             '\ttitle = {Vertrauen in KI},\n'
+             '\tnote = {S. 12},\n'
+             '\tauthor = {Müller, A.},\n'
+             '}\n')
+
+
+@pytest.mark.usefixtures('tree')
+class TestSanitizeSources(unittest.TestCase):
+
+    def setUp(self):
+        self.content = os.path.join(self.tree.root, 'content')
+        os.makedirs(os.path.join(self.content, 'prestudy', 'build'))
+        self.cache_file = os.path.join(self.tree.root, 'cache.json')
+
+    def read(self, path):
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            return f.read()
+
+    def sanitize(self, check=False):
+        with redirect_stdout(io.StringIO()):
+            return sanitize_sources.sanitize([self.content], check=check, cache_file=self.cache_file)
+
+    def test_sanitizes_bib_and_tex(self):
+        bib = self.tree.write('content/refs.bib', DIRTY_BIB, newline='')
+        tex = self.tree.write('content/prestudy/main.tex', 'Siehe S.\u00a012\u2060 und\u202fso.\n', newline='')
+        dirty, errors = self.sanitize()
+        self.assertEqual(errors, [])
+        self.assertEqual(self.read(bib), CLEAN_BIB)
+        self.assertEqual(self.read(tex), 'Siehe S.~12 und\\,so.\n')
+        counts = dirty[os.path.relpath(bib, PROJECT_ROOT).replace(os.sep, '/')]
+        self.assertEqual(counts, {'bom': 1, 'zero-width': 1, 'bidi': 1, 'nbsp': 1, 'nfc': 1})
+
+    def test_nbsp_in_verbatim_and_urls_becomes_a_space(self):
+        """Where `~` and `\\,` are printed literally, NBSPs become plain spaces, also across chunks."""
+        lines = ['Siehe\u00a0\\url{https://example.org/a\u00a0b} und \\verb|x\u00a0y| z.\u202fB.\n',
+                 '\\begin{lstlisting}\n', 'a\u00a0b\n', '\\end{lstlisting}\n', '1\u2007000\n']
+        state = {}
+        sanitized = [sanitize_sources.sanitize_text(line, '.tex', state)[0] for line in lines]
+        self.assertEqual(sanitized, ['Siehe~\\url{https://example.org/a b} und \\verb|x y| z.\\,B.\n',
+                                     '\\begin{lstlisting}\n', 'a b\n', '\\end{lstlisting}\n', '1\\,000\n'])
+
+    def test_check_mode_reports_without_writing(self):
+        bib = self.tree.write('content/refs.bib', DIRTY_BIB, newline='')
+        dirty, _errors = self.sanitize(check=True)
+        self.assertEqual(len(dirty), 1)
+        self.assertEqual(self.read(bib), DIRTY_BIB)
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(sanitize_sources.main([bib, '--check']), 1)
+
+    def test_clean_files_are_skipped_on_later_runs(self):
+        bib = self.tree.write('content/refs.bib', CLEAN_BIB, newline='')
+        self.assertEqual(self.sanitize(), ({}, []))
+        cached = file_utils.load_cache(self.cache_file, sanitize_sources.CACHE_VERSION)
+        self.assertEqual(len(cached), 1)
+
+        mtime = os.stat(bib).st_mtime_ns
+        self.sanitize()
+        self.assertEqual(os.stat(bib).st_mtime_ns, mtime)
+
+        # Touched but unchanged: skipped by hash, cache follows the new mtime
+        os.utime(bib, ns=(mtime + 10**9, mtime + 10**9))
+        self.assertEqual(self.sanitize(), ({}, []))
+        cached = file_utils.load_cache(self.cache_file, sanitize_sources.CACHE_VERSION)
+        self.assertEqual(list(cached.values())[0]['mtime'], mtime + 10**9)
+
+        self.tree.write('content/refs.bib', DIRTY_BIB, newline='')
+        dirty, _errors = self.sanitize()
+        self.assertEqual(len(dirty), 1)
+        self.assertEqual(self.read(bib), CLEAN_BIB)
+
+    def test_build_output_and_other_files_are_ignored(self):
+        self.tree.write('content/prestudy/build/main.tex', DIRTY_BIB, newline='')
+        self.tree.write('content/notes.md', DIRTY_BIB, newline='')
+        self.assertEqual(self.sanitize(), ({}, []))
+
+    def test_chunks_split_at_line_ends(self):
+        """Combining marks at a chunk boundary are normalized like in one piece."""
+        text = ('a' * 9 + 'u\u0308\n') * 50 + 'ende'
+        chunks = list(sanitize_sources.iter_chunks(io.BytesIO(text.encode('utf-8')), size=7))
+        self.assertEqual(''.join(t for _raw, t in chunks), text)
+        self.assertTrue(all(t.endswith('\n') for _raw, t in chunks[:-1]))
+        self.assertEqual(b''.join(raw for raw, _t in chunks), text.encode('utf-8'))
+
+    def test_invalid_utf8_is_reported(self):
+        with open(os.path.join(self.content, 'latin1.bib'), 'wb') as f:
+            f.write('@misc{k, title={Müller}}\n'.encode('latin-1'))
+        dirty, errors = self.sanitize()
+        self.assertEqual(dirty, {})
+        self.assertEqual(len(errors), 1)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
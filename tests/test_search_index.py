@@ -0,0 +1,125 @@
+import json
+import os
+import sys
+import unittest
+
+import pytest
+
+import search_index
+from search_index import decode_postings, encode_postings, normalize, stem, tokenize
+from bib_reader import BibEntry
+
+MAIN = r"""\documentclass{article}
+\begin{document}
+\subfile{sections/01_einleitung}
+\subfile{sections/02_methode}
+\end{document}
+"""
+
+INTRO = r"""\section{Einleitung}
+Das Vertrauen in künstliche Intelligenz \parencite{davis_perceived_1989}.
+
+\subsection{Ausgangslage}
+Die wahrgenommene Nützlichkeit von Chatbots.
+"""
+
+METHOD = r"""\section{Methode}
+Ein Online-Experiment misst die Nutzung.
+"""
+
+GLOSSARY = r"""\begin{tabularx}{\textwidth}{l X X}
+\toprule
+\textbf{Abkürzung} & \textbf{Englisch} & \textbf{Deutsch} \\
+\midrule
+PUF & Perceived Usefulness & Wahrgenommene Nützlichkeit \\
+SEM & Structural Equation Model & Strukturgleichungsmodell \\
+\bottomrule
+\end{tabularx}
+"""
+
+ENTRIES = [BibEntry('article', 'davis_perceived_1989', {
+    'title': 'Perceived Usefulness', 'author': 'Davis, Fred D.', 'year': '1989', 'journal': 'MIS Quarterly'})]
+
+
+class TestTokenizer(unittest.TestCase):
+    # Same cases as webapp/src/lib/search.test.ts, so both tokenizers stay in sync
+
+    def test_normalize(self):
+        self.assertEqual(normalize('Größe Nützlichkeit Émile'), 'grosse nutzlichkeit emile')
+
+    def test_stem(self):
+        self.assertEqual([stem(normalize(t)) for t in ('Nutzungen', 'Nutzung', 'nutzen')], ['nutz'] * 3)
+        self.assertEqual(stem('vertrauens'), 'vertrau')
+        self.assertEqual(stem('ki'), 'ki')
+        self.assertEqual(stem('2025'), '2025')
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize('KI-Vertrauen (2025)'), ['ki', 'vertrau', '2025'])
+
+    def test_postings_round_trip(self):
+        docs = {1: [3, 7], 3: [0]}
+        self.assertEqual(encode_postings(docs), [1, 2, 3, 4, 2, 1, 0])
+        self.assertEqual(decode_postings(encode_postings(docs)), docs)
+
+
+@pytest.mark.usefixtures('tree')
+class TestSearchIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.content = os.path.join(self.tree.root, 'content')
+        self.tree.write('content/prestudy/main.tex', MAIN)
+        self.tree.write('content/prestudy/sections/01_einleitung.tex', INTRO)
+        self.tree.write('content/prestudy/sections/02_methode.tex', METHOD)
+        self.glossary = self.tree.write('glossar.tex', GLOSSARY)
+        self.output = os.path.join(self.tree.root, 'search')
+        self.cache_file = os.path.join(self.tree.root, 'cache.json')
+
+    def build(self):
+        return search_index.build_search_index(('prestudy',), self.output, self.cache_file, self.glossary,
+                                               ENTRIES, content_dir=self.content)
+
+    def titles(self, query):
+        return [doc['title'] for _score, doc in search_index.search(query, self.output)]
+
+    def test_index_files(self):
+        report = self.build()
+        self.assertEqual(report['units'], 6)
+        with open(os.path.join(self.output, 'docs.json'), encoding='utf-8') as f:
+            docs = json.load(f)
+        self.assertEqual([(d['id'], d['url']) for d in docs], [
+            ('prestudy/einleitung', '/vorstudie#einleitung'),
+            ('prestudy/einleitung/ausgangslage', '/vorstudie#ausgangslage'),
+            ('prestudy/methode', '/vorstudie#methode'),
+            ('glossar/puf', '/glossar#puf'),
+            ('glossar/sem', '/glossar#sem'),
+            ('references/davis_perceived_1989', None),
+        ])
+        with open(os.path.join(self.output, 'index.json'), encoding='utf-8') as f:
+            manifest = json.load(f)
+        for name in manifest['shards']:
+            with open(os.path.join(self.output, f"terms-{name}.json"), encoding='utf-8') as f:
+                self.assertTrue(all(search_index.shard_name(term) == name for term in json.load(f)))
+
+    def test_search(self):
+        self.build()
+        # Citations are indexed with the text they are rendered as
+        self.assertCountEqual(self.titles('Davis'), ['Perceived Usefulness', '1 Einleitung'])
+        self.assertEqual(self.titles('nutzlichkeit'), ['PUF', '1.1 Ausgangslage'])
+        self.assertEqual(self.titles('"Nützlichkeit wahrgenommene"'), [])
+        self.assertEqual(self.titles('Nutzungen'), ['2 Methode'])
+        self.assertEqual(self.titles('Vertrauen Methode'), [])
+
+    def test_rebuilds_only_changed_sections(self):
+        self.build()
+        report = self.build()
+        self.assertEqual((report['tokenized'], report['written']), ([], []))
+
+        self.tree.write('content/prestudy/sections/02_methode.tex', METHOD.replace('Nutzung', 'Befragung'))
+        report = self.build()
+        self.assertEqual(report['tokenized'], ['prestudy/methode'])
+        self.assertEqual(self.titles('Befragung'), ['2 Methode'])
+        self.assertEqual(self.titles('Nutzung'), [])
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
@@ -0,0 +1,123 @@
+import csv
+import io
+import sys
+import unittest
+from contextlib import redirect_stdout
+
+import pytest
+
+try:
+    import numpy as np
+    import survey_scoring
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+
+@unittest.skipUnless(HAS_NUMPY, "numpy not installed")
+@pytest.mark.usefixtures('tree')
+class TestSurveyScoring(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.items = survey_scoring.load_catalogue()
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        latent = rng.normal(size=(400, 1))
+        likert = np.clip(np.round(3 + latent + rng.normal(size=(400, len(self.items)))), 1, 5)
+        self.responses = self.tree.path('responses.csv')
+        self.values = np.empty(likert.shape)
+        with open(self.responses, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['respondent'] + [item.id for item in self.items])
+            for r in range(likert.shape[0]):
+                row = []
+                for i, item in enumerate(self.items):
+                    if item.boolean:
+                        answer = 'ja' if likert[r, i] > 3 else 'nein'
+                        self.values[r, i] = 1.0 if answer == 'ja' else 0.0
+                    elif rng.random() < 0.03:
+                        answer = ''
+                        self.values[r, i] = np.nan
+                    else:
+                        answer = str(int(likert[r, i]))
+                        self.values[r, i] = likert[r, i]
+                    row.append(answer)
+                writer.writerow([f"r{r}"] + row)
+
+    def score(self, **kwargs):
+        return survey_scoring.score_responses(self.responses, self.items, **kwargs)
+
+    def test_catalogue_matches_items_csv(self):
+        """Rows with unquoted commas in the item text still get their scaling."""
+        constructs = survey_scoring.constructs_of(self.items)
+        self.assertEqual(list(constructs), ['Treatment Check', 'PUF', 'EOU', 'BI', 'XAIT', 'FAM-TEC', 'CI'])
+        self.assertEqual(len(constructs['XAIT']), 5)
+        self.assertTrue(self.items[0].boolean)
+        self.assertTrue(all((item.scale_min, item.scale_max) == (1, 5) for item in self.items[1:]))
+        self.assertEqual(self.items[1].id, 'PUF_1')
+
+    def test_reliability_matches_direct_computation(self):
+        result = self.score(chunk_size=37)
+        positions = survey_scoring.constructs_of(self.items)['XAIT']
+        block = self.values[:, positions]
+        block = block[~np.isnan(block).any(axis=1)]
+        k = block.shape[1]
+        cov = np.cov(block, rowvar=False)
+        alpha = k / (k - 1) * (1 - np.trace(cov) / cov.sum())
+        rest = block.sum(axis=1) - block[:, 2]
+        item_total = np.corrcoef(block[:, 2], rest)[0, 1]
+        reduced = np.cov(np.delete(block, 2, axis=1), rowvar=False)
+        alpha_deleted = (k - 1) / (k - 2) * (1 - np.trace(reduced) / reduced.sum())
+
+        stats = result['constructs']['XAIT']
+        self.assertEqual(stats['n_complete'], block.shape[0])
+        self.assertAlmostEqual(stats['alpha'], alpha, places=10)
+        self.assertAlmostEqual(stats['item_total'][2], item_total, places=10)
+        self.assertAlmostEqual(stats['alpha_if_deleted'][2], alpha_deleted, places=10)
+        self.assertIsNone(result['constructs']['Treatment Check']['alpha'])
+
+    def test_chunk_size_does_not_change_results(self):
+        small = self.score(chunk_size=11)
+        large = self.score(chunk_size=100000)
+        for name, stats in small['constructs'].items():
+            other = large['constructs'][name]
+            self.assertEqual(stats['score']['n'], other['score']['n'])
+            for key in ('mean', 'sd', 'skewness'):
+                self.assertAlmostEqual(stats['score'][key], other['score'][key], places=10)
+        np.testing.assert_allclose(np.array(small['correlations']['matrix'], dtype=float),
+                                   np.array(large['correlations']['matrix'], dtype=float))
+
+    def test_scores_are_streamed_to_csv(self):
+        scores_csv = self.tree.path('scores.csv')
+        result = self.score(chunk_size=50, scores_csv=scores_csv, id_column='respondent', min_answered=0.5)
+        with open(scores_csv, encoding='utf-8') as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0], ['respondent', 'Treatment_Check', 'PUF', 'EOU', 'BI', 'XAIT', 'FAM-TEC', 'CI'])
+        self.assertEqual(len(rows) - 1, result['respondents'])
+        positions = survey_scoring.constructs_of(self.items)['PUF']
+        self.assertAlmostEqual(float(rows[1][2]), np.nanmean(self.values[0, positions]), places=4)
+
+        scores = np.array([[float(v) if v else np.nan for v in row[1:]] for row in rows[1:]])
+        self.assertAlmostEqual(result['constructs']['PUF']['score']['mean'], np.nanmean(scores[:, 1]), places=4)
+
+    def test_invalid_answers_are_missing(self):
+        raw = np.array([['5', '6', 'x', '2,5', ' ja ']])
+        boolean = np.array([False, False, False, False, True])
+        values = survey_scoring._to_values(raw, boolean, np.ones(5), np.full(5, 5.0))
+        np.testing.assert_array_equal(np.isnan(values[0]), [False, True, True, False, False])
+        self.assertEqual(values[0, 3], 2.5)
+        self.assertEqual(values[0, 4], 1.0)
+
+    def test_missing_columns_are_reported(self):
+        path = self.tree.path('partial.csv')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("PUF_1,PUF_2\n1,2\n")
+        with redirect_stdout(io.StringIO()) as output:
+            self.assertEqual(survey_scoring.main([path]), 1)
+        self.assertIn("no column for", output.getvalue())
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
@@ -0,0 +1,167 @@
+import io
+import json
+import os
+import shutil
+import sys
+import threading
+import unittest
+from contextlib import redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+import sync_zotero
+
+
+class FakeZotero:
+    """In-memory library served by a local stand-in for the Zotero web API."""
+
+    def __init__(self):
+        self.library_version = 10
+        self.items = {}
+        self.collections = {'AAAA': [], 'BBBB': []}
+        self.requests = []
+        for i in range(120):
+            self.add_item(f'ITEM{i:04d}', 'AAAA')
+        self.add_item('SHARED01', 'AAAA')
+        self.collections['BBBB'].append('SHARED01')
+
+    def add_item(self, key, col_id, version=5):
+        self.items[key] = {'version': version, 'title': key}
+        self.collections[col_id].append(key)
+
+    def bibtex(self, key):
+        return f"@article{{{key.lower()},\n\ttitle = {{{self.items[key]['title']}}},\n}}"
+
+
+def make_handler(library):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def respond(self, status, body='', headers=None):
+            self.send_response(status)
+            self.send_header('Last-Modified-Version', str(library.library_version))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body.encode('utf-8'))
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            parts = url.path.strip('/').split('/')
+            library.requests.append(self.path)
+            since = self.headers.get('If-Modified-Since-Version')
+            if since is not None and int(since) >= library.library_version:
+                return self.respond(304)
+
+            if parts[2] == 'collections':
+                if parts[3] not in library.collections:
+                    return self.respond(404, 'Collection not found')
+                keys = library.collections[parts[3]]
+                start = int(query.get('start', ['0'])[0])
+                limit = int(query['limit'][0])
+                page = {key: library.items[key]['version'] for key in keys[start:start + limit]}
+                headers = {'Total-Results': str(len(keys))}
+                if start + limit < len(keys):
+                    port = self.server.server_address[1]
+                    next_url = f"http://127.0.0.1:{port}{url.path}?format=versions&limit={limit}&start={start + limit}"
+                    headers['Link'] = f'<{next_url}>; rel="next"'
+                return self.respond(200, json.dumps(page), headers)
+
+            keys = query['itemKey'][0].split(',')
+            body = [{'key': key, 'version': library.items[key]['version'], 'bibtex': library.bibtex(key)}
+                    for key in keys]
+            return self.respond(200, json.dumps(body))
+
+    return Handler
+
+
+@unittest.skipUnless(shutil.which('curl'), "curl not installed")
+@pytest.mark.usefixtures('tree')
+class TestSyncZotero(unittest.TestCase):
+
+    def setUp(self):
+        self.library = FakeZotero()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(self.library))
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.cache_dir = self.tree.path('cache')
+        self.collections = ['AAAA', 'BBBB']
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def sync(self):
+        self.library.requests.clear()
+        cache = sync_zotero.load_cache(self.cache_dir)
+        cache, complete = sync_zotero.sync_cache(cache, 'key', '123', self.collections, self.base_url, workers=4)
+        self.assertTrue(complete)
+        sync_zotero.save_cache(self.cache_dir, cache)
+        return cache
+
+    def collection_requests(self, col_id):
+        return [r for r in self.library.requests if f'/collections/{col_id}/' in r]
+
+    def item_requests(self):
+        return [r for r in self.library.requests if 'itemKey=' in r]
+
+    def test_pagination_and_incremental_sync(self):
+        """Collections beyond one page are complete; re-runs only fetch changed items."""
+        cache = self.sync()
+        self.assertEqual(len(cache['collections']['AAAA']), 121)
+        self.assertEqual(len(cache['items']), 121)
+        self.assertEqual(len(self.item_requests()), 3)
+        self.assertEqual(cache['library_version'], 10)
+        # The offsets of the second page follow from Total-Results of the first, not from its Link header
+        self.assertEqual(len(self.collection_requests('AAAA')), 2)
+        self.assertIn('start=100', self.collection_requests('AAAA')[1])
+
+        self.sync()
+        self.assertEqual(self.item_requests(), [])
+        self.assertTrue(all('items?format=versions' in r for r in self.library.requests))
+
+        self.library.library_version = 11
+        self.library.items['ITEM0007'] = {'version': 11, 'title': 'Updated title'}
+        cache = self.sync()
+        self.assertEqual(len(self.item_requests()), 1)
+        self.assertIn('Updated title', cache['items']['ITEM0007']['bibtex'])
+
+    def test_incomplete_sync_keeps_the_bibliography(self):
+        """A failed request leaves bibliography.bib as it was and fails the run."""
+        bib_path = self.tree.path('bibliography.bib')
+        with open(bib_path, 'w', encoding='utf-8') as f:
+            f.write('@article{old,\n\ttitle = {Old},\n}\n')
+        self.collections.append('MISSING')
+        with mock.patch.dict(os.environ, {'ZOTERO_API_KEY': 'key', 'ZOTERO_USER_ID': '123'}), \
+                redirect_stdout(io.StringIO()) as output:
+            exit_code = sync_zotero.sync_zotero(cache_dir=self.cache_dir, base_url=self.base_url,
+                                                collection_ids=self.collections, bib_path=bib_path,
+                                                local_bib_path=self.tree.path('missing.bib'))
+        self.assertEqual(exit_code, 1)
+        self.assertIn("sync is incomplete", output.getvalue())
+        with open(bib_path, encoding='utf-8') as f:
+            self.assertEqual(f.read().count('@article{'), 1)
+        self.assertIsNone(sync_zotero.load_cache(self.cache_dir)['library_version'])
+
+    def test_offline_assembly_uses_cache_only(self):
+        """bibliography.bib is rebuilt from the item cache without any request."""
+        self.sync()
+        self.library.requests.clear()
+        bib_path = self.tree.path('bibliography.bib')
+        cache = sync_zotero.load_cache(self.cache_dir)
+        bibtex = sync_zotero.assemble_bibtex(cache, self.collections)
+        sync_zotero.write_bibliography(bibtex, bib_path, self.tree.path('missing.bib'))
+
+        self.assertEqual(self.library.requests, [])
+        with open(bib_path, encoding='utf-8') as f:
+            content = f.read()
+        self.assertEqual(content.count('@article{'), 121)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
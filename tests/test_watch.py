@@ -0,0 +1,96 @@
+import os
+import sys
+import unittest
+
+import pytest
+
+import watch
+from watch import InotifyWatcher, PollingWatcher, ProjectState, collect_test_imports, relevant
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def path(rel_path):
+    return os.path.join(PROJECT_ROOT, rel_path)
+
+
+class TestPlan(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.state = ProjectState(cache=False)
+
+    def test_relevant(self):
+        self.assertTrue(relevant(path('content/prestudy/sections/02_theory.tex')))
+        self.assertFalse(relevant(path('content/prestudy/build/main/main.aux')))
+        self.assertFalse(relevant(path('content/prestudy/.02_theory.tex.swp')))
+        self.assertFalse(relevant(path('scripts/__pycache__/watch.cpython-311.pyc')))
+        # The PDF copied next to main.tex is build output
+        self.assertFalse(relevant(path('content/prestudy/main.pdf')))
+
+    def test_test_imports(self):
+        imports = collect_test_imports(path('tests'), path('scripts'))
+        self.assertEqual(imports['test_structure'], set())
+        # export_references imports bib_merge and bib_reader
+        self.assertTrue({'export_references', 'bib_merge', 'bib_reader'} <= imports['test_export_references'])
+
+    def test_content_change(self):
+        main_tex = path('content/prestudy/main.tex')
+        included = self.state.deps[main_tex]['tex'][1]
+        plan = self.state.plan({included})
+        self.assertEqual(plan['documents'], [main_tex])
+        self.assertIn('test_citations', plan['checks'])
+        self.assertNotIn('test_structure', plan['checks'])
+        self.assertEqual((plan['tests'], plan['restart']), ([], False))
+
+    def test_script_and_test_changes(self):
+        plan = self.state.plan({path('scripts/generate_results_tables.py')})
+        self.assertEqual(plan['tests'], ['test_generate_results_tables'])
+        self.assertFalse(plan['restart'])
+
+        plan = self.state.plan({path('scripts/project_index.py'), path('tests/test_citations.py')})
+        self.assertTrue(plan['restart'])
+        self.assertIn('test_citations', plan['tests'])
+        self.assertIn('test_project_index', plan['tests'])
+        self.assertEqual((plan['checks'], plan['documents']), ([], []))
+
+    def test_run_checks(self):
+        results = watch.run_checks(['test_structure', 'test_formatting_rules'])
+        self.assertEqual(sorted(results), ['test_formatting_rules', 'test_structure'])
+        self.assertTrue(all(ok for ok, _seconds, _output in results.values()))
+
+
+@pytest.mark.usefixtures('tree')
+class TestWatchers(unittest.TestCase):
+
+    def setUp(self):
+        self.file = self.tree.write('a.tex', 'a')
+
+    def check(self, watcher):
+        try:
+            self.assertEqual(watcher.changes(0.05), set())
+            with open(self.file, 'w') as f:
+                f.write('changed')
+            os.makedirs(os.path.join(self.tree.root, 'sub'))
+            with open(os.path.join(self.tree.root, 'sub', 'b.tex'), 'w') as f:
+                f.write('b')
+            expected = {self.file, os.path.join(self.tree.root, 'sub', 'b.tex')}
+            changed = set()
+            for _ in range(10):
+                changed |= watcher.changes(0.1)
+                if expected <= changed:
+                    break
+            self.assertTrue(expected <= changed, changed)
+        finally:
+            watcher.close()
+
+    def test_polling(self):
+        self.check(PollingWatcher([self.tree.root], interval=0.01))
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), "inotify is Linux only")
+    def test_inotify(self):
+        self.check(InotifyWatcher([self.tree.root]))
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))
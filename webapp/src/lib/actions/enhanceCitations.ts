@@ -18,6 +18,9 @@ const CITATION_PATTERNS = [
 // Minimum citation length: "(A,2000)" = 8 chars
 const MIN_CITATION_LENGTH = 8;
 
+const CITATION_CLASS =
+	'citation-ref text-primary font-medium underline decoration-dotted underline-offset-2 hover:decoration-solid hover:text-primary/80 transition-all cursor-pointer';
+
 // OPTIMIZATION: Process nodes in chunks during idle time
 const CHUNK_SIZE = 10; // Process 10 nodes per idle callback
 
@@ -196,8 +199,7 @@ function processTextNode(textNode: Text, citationMap: Map<string, string>): void
 					const cite = document.createElement('a');
 					cite.textContent = part.trim();
 					cite.href = `/downloads#ref-${refId[idx]}`;
-					cite.className =
-						'citation-ref text-primary font-medium underline decoration-dotted underline-offset-2 hover:decoration-solid hover:text-primary/80 transition-all cursor-pointer';
+					cite.className = CITATION_CLASS;
 					cite.setAttribute('data-citation-id', refId[idx]);
 					cite.setAttribute('onclick', 'event.preventDefault()');
 					fragment.appendChild(cite);
@@ -213,8 +215,7 @@ function processTextNode(textNode: Text, citationMap: Map<string, string>): void
 				const cite = document.createElement('a');
 				cite.textContent = matchText;
 				cite.href = `/downloads#ref-${refId}`;
-				cite.className =
-					'citation-ref text-primary font-medium underline decoration-dotted underline-offset-2 hover:decoration-solid hover:text-primary/80 transition-all cursor-pointer';
+				cite.className = CITATION_CLASS;
 				cite.setAttribute('data-citation-id', refId as string);
 				cite.setAttribute('onclick', 'event.preventDefault()');
 				fragment.appendChild(cite);
@@ -243,6 +244,12 @@ export const enhanceCitations: Action = (node: HTMLElement) => {
 	// Skip if already processed
 	if (node.querySelector('.citation-ref')) return;
 
+	// Compiled sections already name the reference of every citation
+	node.querySelectorAll<HTMLElement>('cite[data-ref]').forEach((cite) => {
+		cite.className = CITATION_CLASS;
+		cite.setAttribute('data-citation-id', cite.dataset.ref as string);
+	});
+
 	// Build citation map (format -> ref ID)
 	const citationMap = buildCitationMap();
 
@@ -1,13 +1,13 @@
-import { describe, it, expect } from 'vitest';
+import { describe, it, expect, vi } from 'vitest';
 import {
     calculateReadingTime,
-    sections,
+    loadSection,
+    loadSectionIndex,
     navItems,
     glossaryTerms,
     figures,
-    totalWordCount,
-    type Section,
-    type NavItem
+    type NavItem,
+    type SectionIndex
 } from './content';
 
 describe('calculateReadingTime', () => {
@@ -37,46 +37,34 @@ describe('calculateReadingTime', () => {
     });
 });
 
-describe('sections data integrity', () => {
-    it('should have all required fields for each section', () => {
-        sections.forEach((section: Section) => {
-            expect(section).toHaveProperty('id');
-            expect(section).toHaveProperty('number');
-            expect(section).toHaveProperty('title');
-            expect(section).toHaveProperty('content');
-            expect(section).toHaveProperty('wordCount');
-
-            expect(typeof section.id).toBe('string');
-            expect(typeof section.number).toBe('string');
-            expect(typeof section.title).toBe('string');
-            expect(typeof section.content).toBe('string');
-            expect(typeof section.wordCount).toBe('number');
-        });
-    });
+describe('section loading', () => {
+    const index: SectionIndex = {
+        document: 'prestudy',
+        sections: [
+            { id: 'einleitung', number: '1', title: 'Einleitung', wordCount: 834, subsections: [],
+              file: 'einleitung.json', hash: 'abc123' }
+        ]
+    };
 
-    it('should have unique section IDs', () => {
-        const ids = sections.map(s => s.id);
-        const uniqueIds = new Set(ids);
-        expect(uniqueIds.size).toBe(ids.length);
+    function fetcher(body: unknown, ok = true) {
+        return vi.fn(async () => ({ ok, json: async () => body }) as Response);
+    }
+
+    it('should load the section index of a document', async () => {
+        const fetch = fetcher(index);
+        expect(await loadSectionIndex('prestudy', fetch)).toEqual(index);
+        expect(fetch).toHaveBeenCalledWith('/content/prestudy/index.json');
     });
 
-    it('should have positive word counts', () => {
-        sections.forEach((section: Section) => {
-            expect(section.wordCount).toBeGreaterThan(0);
-        });
+    it('should load a section by its content hash', async () => {
+        const fetch = fetcher({ id: 'einleitung', content: '<p>Text</p>' });
+        const section = await loadSection('prestudy', index.sections[0], fetch);
+        expect(section.id).toBe('einleitung');
+        expect(fetch).toHaveBeenCalledWith('/content/prestudy/einleitung.json?v=abc123');
     });
 
-    it('should have valid subsection structure', () => {
-        sections.forEach((section: Section) => {
-            if (section.subsections) {
-                expect(Array.isArray(section.subsections)).toBe(true);
-                section.subsections.forEach(sub => {
-                    expect(sub).toHaveProperty('id');
-                    expect(sub).toHaveProperty('title');
-                    expect(sub).toHaveProperty('content');
-                });
-            }
-        });
+    it('should fail when the compiled content is missing', async () => {
+        await expect(loadSectionIndex('prestudy', fetcher(null, false))).rejects.toThrow('not found');
     });
 });
 
@@ -165,20 +153,3 @@ describe('figures data integrity', () => {
         });
     });
 });
-
-describe('totalWordCount calculation', () => {
-    it('should correctly sum all section word counts', () => {
-        const expectedTotal = sections.reduce((sum, s) => sum + s.wordCount, 0);
-        expect(totalWordCount).toBe(expectedTotal);
-    });
-
-    it('should be a positive number', () => {
-        expect(totalWordCount).toBeGreaterThan(0);
-    });
-
-    it('should calculate reading time for total', () => {
-        const totalReadingTime = calculateReadingTime(totalWordCount);
-        expect(totalReadingTime).toBeGreaterThan(0);
-        expect(Number.isInteger(totalReadingTime)).toBe(true);
-    });
-});
@@ -0,0 +1,38 @@
+import { describe, it, expect } from 'vitest';
+import { decodePostings, normalize, parseQuery, shardName, stem, tokenize } from './search';
+
+// Same cases as tests/test_search_index.py, so both tokenizers stay in sync
+describe('tokenize', () => {
+    it('should normalize German text', () => {
+        expect(normalize('Größe Nützlichkeit Émile')).toBe('grosse nutzlichkeit emile');
+    });
+
+    it('should stem German word forms to the same term', () => {
+        expect(['Nutzungen', 'Nutzung', 'nutzen'].map((t) => stem(normalize(t)))).toEqual(['nutz', 'nutz', 'nutz']);
+        expect(stem('vertrauens')).toBe('vertrau');
+        expect(stem('ki')).toBe('ki');
+        expect(stem('2025')).toBe('2025');
+    });
+
+    it('should split text into terms', () => {
+        expect(tokenize('KI-Vertrauen (2025)')).toEqual(['ki', 'vertrau', '2025']);
+    });
+});
+
+describe('parseQuery', () => {
+    it('should keep quoted phrases together', () => {
+        expect(parseQuery('"wahrgenommene Nützlichkeit" KI')).toEqual([['wahrgenomm', 'nutzlichkeit'], ['ki']]);
+    });
+});
+
+describe('decodePostings', () => {
+    it('should decode delta-encoded postings', () => {
+        expect(decodePostings([1, 2, 3, 4, 2, 1, 0])).toEqual(
+            new Map([
+                [1, [3, 7]],
+                [3, [0]]
+            ])
+        );
+        expect(shardName('2025')).toBe('0');
+    });
+});
@@ -0,0 +1,151 @@
+/**
+ * Client for the static search index written by scripts/search_index.py.
+ *
+ * Queries are tokenized with the same rules as the index (see normalize and
+ * stem there), and only the shards of the query terms are fetched.
+ */
+
+export const INDEX_VERSION = 1;
+
+const SUFFIXES = ['ungen', 'ung', 'ern', 'em', 'en', 'er', 'es', 'e', 's', 'n'];
+const MIN_STEM = 3;
+
+export interface SearchDoc {
+    id: string;
+    kind: 'section' | 'glossary' | 'reference';
+    title: string;
+    url: string | null;
+    length: number;
+}
+
+export interface SearchResult {
+    doc: SearchDoc;
+    score: number;
+}
+
+interface Manifest {
+    version: number;
+    documents: number;
+    docs: string;
+    shards: Record<string, { terms: number; hash: string }>;
+}
+
+type Postings = Map<number, number[]>;
+
+// Lowercase, 'ß' as 'ss' and diacritics removed (ä -> a, é -> e)
+export function normalize(text: string): string {
+    return text.toLowerCase().replace(/ß/g, 'ss').normalize('NFKD').replace(/\p{M}/gu, '');
+}
+
+export function stem(term: string): string {
+    if (!/^[a-z]+$/.test(term)) return term;
+    for (let pass = 0; pass < 2; pass++) {
+        const suffix = SUFFIXES.find((s) => term.endsWith(s) && term.length - s.length >= MIN_STEM);
+        if (!suffix) break;
+        term = term.slice(0, -suffix.length);
+    }
+    return term;
+}
+
+export function tokenize(text: string): string[] {
+    return (normalize(text).match(/[a-z0-9]+/g) ?? []).map(stem);
+}
+
+export function shardName(term: string): string {
+    return /^[0-9]/.test(term) ? '0' : term.charAt(0);
+}
+
+// Inverse of encode_postings in scripts/search_index.py
+export function decodePostings(encoded: number[]): Postings {
+    const docs: Postings = new Map();
+    let doc = 0;
+    for (let i = 0; i < encoded.length; ) {
+        doc += encoded[i];
+        const count = encoded[i + 1];
+        const positions: number[] = [];
+        let position = 0;
+        for (const delta of encoded.slice(i + 2, i + 2 + count)) {
+            position += delta;
+            positions.push(position);
+        }
+        docs.set(doc, positions);
+        i += 2 + count;
+    }
+    return docs;
+}
+
+// Quoted phrases stay together, every other term is a phrase of its own
+export function parseQuery(query: string): string[][] {
+    const phrases = [...query.matchAll(/"([^"]+)"/g)].map((m) => tokenize(m[1]));
+    phrases.push(...tokenize(query.replace(/"[^"]*"/g, ' ')).map((term) => [term]));
+    return phrases.filter((phrase) => phrase.length > 0);
+}
+
+let manifest: Promise<Manifest> | null = null;
+let docs: Promise<SearchDoc[]> | null = null;
+const shards = new Map<string, Promise<Record<string, number[]>>>();
+
+async function fetchJson<T>(url: string, fetcher: typeof fetch): Promise<T> {
+    const response = await fetcher(url);
+    if (!response.ok) throw new Error(`Search index file ${url} not found`);
+    return response.json();
+}
+
+async function loadShard(name: string, fetcher: typeof fetch): Promise<Record<string, number[]>> {
+    const index = await (manifest ??= fetchJson<Manifest>('/search/index.json', fetcher));
+    if (index.version !== INDEX_VERSION) throw new Error('Search index version mismatch');
+    const shard = index.shards[name];
+    if (!shard) return {};
+    if (!shards.has(name)) {
+        shards.set(name, fetchJson(`/search/terms-${name}.json?v=${shard.hash}`, fetcher));
+    }
+    return shards.get(name)!;
+}
+
+/**
+ * Searches the index: all terms must occur, a "quoted phrase" only with
+ * consecutive positions. Results are ranked by tf-idf, best first.
+ */
+export async function search(query: string, limit = 10, fetcher: typeof fetch = fetch): Promise<SearchResult[]> {
+    const phrases = parseQuery(query);
+    if (phrases.length === 0) return [];
+
+    const terms = [...new Set(phrases.flat())];
+    const postings = new Map<string, Postings>();
+    await Promise.all(
+        terms.map(async (term) => {
+            const shard = await loadShard(shardName(term), fetcher);
+            postings.set(term, decodePostings(shard[term] ?? []));
+        })
+    );
+    const index = await manifest!;
+    const allDocs = await (docs ??= fetchJson<SearchDoc[]>(`/search/docs.json?v=${index.docs}`, fetcher));
+
+    let scores: Map<number, number> | null = null;
+    for (const phrase of phrases) {
+        const matches = new Map<number, number>();
+        for (const [doc, positions] of postings.get(phrase[0])!) {
+            const count = positions.filter((p) =>
+                phrase.slice(1).every((term, i) => postings.get(term)!.get(doc)?.includes(p + i + 1))
+            ).length;
+            if (count) matches.set(doc, count);
+        }
+        const idf = matches.size ? Math.log(1 + allDocs.length / matches.size) : 0;
+        const phraseScores = new Map<number, number>();
+        for (const [doc, count] of matches) {
+            phraseScores.set(doc, (count * idf) / Math.sqrt(allDocs[doc].length));
+        }
+        const previous: Map<number, number> | null = scores;
+        scores = previous
+            ? new Map(
+                  [...previous]
+                      .filter(([doc]) => phraseScores.has(doc))
+                      .map(([doc, score]) => [doc, score + phraseScores.get(doc)!])
+              )
+            : phraseScores;
+    }
+    return [...scores!]
+        .map(([doc, score]) => ({ doc: allDocs[doc], score }))
+        .sort((a, b) => b.score - a.score)
+        .slice(0, limit);
+}
@@ -111,6 +111,16 @@ describe("sanitizeHtml utility", () => {
         });
     });
 
+    describe("Compiled Sections", () => {
+        it("should keep citations, figures and tables", () => {
+            const input =
+                '<p>Text (<cite data-ref="davis_perceived_1989">Davis, 1989</cite>)</p>' +
+                '<figure id="fig-1"><img src="/images/a.jpg" alt="A"><figcaption>Abbildung 1</figcaption></figure>' +
+                '<table><tbody><tr><td colspan="2">Zelle</td></tr></tbody></table>';
+            expect(sanitizeHtml(input)).toBe(input);
+        });
+    });
+
     describe("Academic Content", () => {
         it("should handle typical thesis content", () => {
             const input = `
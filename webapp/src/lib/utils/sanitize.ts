@@ -35,8 +35,37 @@ export function sanitizeHtml(html: string): string {
             "code",
             "pre",
             "span",
+            // Sections compiled by scripts/compile_content.py
+            "cite",
+            "figure",
+            "figcaption",
+            "picture",
+            "source",
+            "img",
+            "table",
+            "thead",
+            "tbody",
+            "tr",
+            "th",
+            "td",
+        ],
+        ALLOWED_ATTR: [
+            "href",
+            "target",
+            "rel",
+            "class",
+            "id",
+            "src",
+            "srcset",
+            "sizes",
+            "type",
+            "alt",
+            "width",
+            "height",
+            "loading",
+            "colspan",
+            "data-ref",
         ],
-        ALLOWED_ATTR: ["href", "target", "rel", "class"],
         ALLOW_DATA_ATTR: false,
     });
 }
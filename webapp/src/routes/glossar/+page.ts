@@ -0,0 +1,5 @@
+import { loadGlossary } from '$lib/data/content';
+import type { PageLoad } from './$types';
+
+// Rows of 07_glossar.tex; the search index links to their ids
+export const load: PageLoad = async ({ fetch }) => ({ glossary: await loadGlossary(fetch) });
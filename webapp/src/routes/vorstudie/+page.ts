@@ -0,0 +1,12 @@
+import { loadSection, loadSectionIndex } from '$lib/data/content';
+import type { PageLoad } from './$types';
+
+// Sections compiled from content/prestudy by scripts/compile_content.py (npm run prebuild)
+export const load: PageLoad = async ({ fetch }) => {
+    const index = await loadSectionIndex('prestudy', fetch);
+    const sections = await Promise.all(index.sections.map((section) => loadSection('prestudy', section, fetch)));
+    return {
+        sections,
+        totalWordCount: sections.reduce((sum, s) => sum + s.wordCount, 0)
+    };
+};